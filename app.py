@@ -19,8 +19,13 @@ import json
 from pathlib import Path
 from flask import Flask, request, render_template, jsonify, url_for, Response, stream_with_context
 from dotenv import load_dotenv
+from services.config_service import CONFIG_CHATBOT, get_config_service
+from services.asset_manifest import get_asset_manifest
+from services.image_pipeline import OUTPUT_URL_PREFIX as OPTIMIZED_IMAGE_URL_PREFIX
 from services.storybook_manager import get_storybook_manager
 from services.game_event_manager import get_game_event_manager
+from services.game_rules import monthly_stamina_recovery
+from services.game_state_storage import is_safe_file_name
 
 # 환경변수 로드
 load_dotenv()
@@ -35,15 +40,72 @@ app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 # 프로젝트 루트 경로
 BASE_DIR = Path(__file__).resolve().parent
 
+
+@app.before_request
+def reject_unsafe_username():
+    """
+    API 요청의 username 검사
+
+    사용자 이름은 세션 ID로 저장소 파일 이름(flat 레이아웃, 저널)이 되므로
+    경로 문자(/, \\)가 있거나 .으로 시작하는 이름은 저장소까지 가기 전에 400으로 거절합니다.
+    """
+    if not request.path.startswith('/api/'):
+        return None
+    username = request.args.get('username')
+    if username is None and request.is_json:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            username = data.get('username')
+    if username is not None and not is_safe_file_name(str(username)):
+        return jsonify({
+            'success': False,
+            'error': '사용할 수 없는 사용자 이름입니다.'
+        }), 400
+    return None
+
+
+@app.after_request
+def cache_fingerprinted_assets(response):
+    """
+    내용 해시가 URL에 들어간 정적 파일은 내용이 바뀌면 URL도 바뀌므로
+    SEND_FILE_MAX_AGE_DEFAULT = 0과 달리 1년 immutable로 캐시
+    - 빌드된 이미지 변환본 (파일 이름에 해시)
+    - asset_url()로 만든 JS/CSS 주소 (?v=<해시>가 현재 내용과 같을 때만)
+    """
+    if response.status_code not in (200, 304) or not request.path.startswith('/static/'):
+        return response
+
+    fingerprinted = request.path.startswith(OPTIMIZED_IMAGE_URL_PREFIX)
+    if not fingerprinted and 'v' in request.args:
+        filename = request.path[len('/static/'):]
+        fingerprinted = request.args['v'] == get_asset_manifest().version(filename)
+    if fingerprinted:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+@app.context_processor
+def inject_asset_url():
+    """템플릿에서 asset_url('js/chatbot.js') → 내용 해시가 붙은 static 주소"""
+    def asset_url(filename: str) -> str:
+        version = get_asset_manifest().version(filename)
+        if version is None:
+            return url_for('static', filename=filename)
+        return url_for('static', filename=filename, v=version)
+    return {'asset_url': asset_url}
+
 # 설정 파일 로드
 CONFIG_PATH = BASE_DIR / 'config' / 'chatbot_config.json'
 
 def load_config():
-    """챗봇 설정 파일 로드"""
+    """
+    챗봇 설정 반환
+
+    파일이 바뀌면 ConfigService가 다시 읽어 교체하므로 요청마다 호출해 최신 값을 사용합니다.
+    """
     try:
-        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
+        return get_config_service().get(CONFIG_CHATBOT)
+    except (FileNotFoundError, ValueError):
         # 기본 설정 반환
         return {
             'name': '챗봇',
@@ -52,26 +114,20 @@ def load_config():
             'thumbnail': 'images/hateslop/club_logo.png'
         }
 
-config = load_config()
-
-# 이미지 파일 스캔 함수
+# 이미지 파일 목록
 def get_image_files():
-    """챗봇 이미지 디렉토리에서 이미지 파일 목록 반환"""
-    folder_path = BASE_DIR / "static" / "images" / "chatbot"
-    image_files = []
-    
-    if folder_path.exists():
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                if file.lower().endswith((".png", ".jpg", ".jpeg", ".gif")):
-                    rel_path = os.path.relpath(os.path.join(root, file), folder_path)
-                    image_files.append(rel_path.replace("\\", "/"))
-    
-    return image_files
+    """
+    챗봇 이미지 디렉토리의 이미지 파일 목록 반환
+
+    목록은 AssetManifest가 시작 시(와 파일이 바뀔 때 감시 스레드에서) 만들어 두므로
+    요청마다 디렉토리를 훑지 않습니다.
+    """
+    return list(get_asset_manifest().chatbot_images)
 
 # 메인 페이지
 @app.route('/')
 def index():
+    config = load_config()
     bot_info = {
         'name': config.get('name', '챗봇'),
         'image': url_for('static', filename=config.get('thumbnail', 'images/hateslop/club_logo.png')),
@@ -83,6 +139,7 @@ def index():
 # 챗봇 상세정보 페이지
 @app.route('/detail')
 def detail():
+    config = load_config()
     bot_info = {
         'name': config.get('name', '챗봇'),
         'image': url_for('static', filename=config.get('thumbnail', 'images/hateslop/club_logo.png')),
@@ -95,7 +152,7 @@ def detail():
 @app.route('/chat')
 def chat():
     username = request.args.get('username', '사용자')
-    bot_name = config.get('name', '챗봇')
+    bot_name = load_config().get('name', '챗봇')
     image_files = get_image_files()
     
     return render_template('chat.html', 
@@ -142,25 +199,36 @@ def api_chat_stream():
         data = request.get_json()
         user_message = data.get('message', '')
         username = data.get('username', '사용자')
+        # 클라이언트 요청 ID (재시도 시 동일한 값 사용)
+        request_id = data.get('request_id')
 
         if not user_message:
             return jsonify({'error': 'Message is required'}), 400
 
         from services import get_chatbot_service
-        import json
+        from services.request_coalescer import get_request_coalescer
+        from services.sse_framing import SSEFramer
+
+        # 토큰 묶음 전송 설정 (chatbot_config.json의 "streaming")
+        framer = SSEFramer.from_config(load_config().get('streaming'))
 
         @stream_with_context
         def generate():
             """SSE 스트리밍 제너레이터"""
             try:
                 chatbot = get_chatbot_service()
-
-                # 스트리밍 응답 생성
-                for event in chatbot.generate_response_stream(user_message, username):
-                    # SSE 형식으로 전송
-                    # data: {"type": "token", "content": "안녕"}
-                    event_json = json.dumps(event, ensure_ascii=False)
-                    yield f"data: {event_json}\n\n"
+                coalescer = get_request_coalescer()
+
+                # 스트리밍 응답 생성 (같은 세션/메시지/요청 ID의 중복 요청은 진행 중인 스트림에 합류)
+                events = coalescer.stream(
+                    username,
+                    user_message,
+                    request_id,
+                    lambda: chatbot.generate_response_stream(user_message, username)
+                )
+                # SSE 형식으로 전송 (연속 토큰은 한 프레임으로 묶음)
+                # data: {"type": "token", "content": "안녕하세요"}
+                yield from framer.frames(events)
 
             except Exception as e:
                 print(f"[ERROR] 스트리밍 중 오류: {e}")
@@ -172,8 +240,7 @@ def api_chat_stream():
                     'type': 'error',
                     'content': "죄송해요, 일시적인 오류가 발생했어요. 다시 시도해주세요."
                 }
-                error_json = json.dumps(error_event, ensure_ascii=False)
-                yield f"data: {error_json}\n\n"
+                yield SSEFramer.encode_event(error_event)
 
         # SSE 응답 반환
         return Response(
@@ -243,7 +310,7 @@ def api_get_stats():
 
         from services import get_chatbot_service
         chatbot = get_chatbot_service()
-        game_state = chatbot.game_manager.get_or_create(username)
+        game_state = chatbot.game_manager.get_snapshot(username)
 
         return jsonify({
             'success': True,
@@ -283,36 +350,19 @@ def api_advance_month():
 
         from services import get_chatbot_service
         chatbot = get_chatbot_service()
-        game_state = chatbot.game_manager.get_or_create(username)
-
         storybook_manager = get_storybook_manager()
+        event_manager = get_game_event_manager()
 
-        # 목표 달성 확인 (디버깅 모드: 임시로 비활성화)
-        # all_achieved, goals_info = storybook_manager.check_goals_achieved(game_state)
-        # if not all_achieved and game_state.current_month < 9:
-        #     return jsonify({
-        #         'success': False,
-        #         'error': '목표를 달성하지 못했습니다',
-        #         'goals_info': goals_info
-        #     }), 400
-
-        old_month = game_state.current_month
-
-        # ========== 8월 경기 계산 로직 ==========
-        # 8월에서 9월로 넘어갈 때 경기 결과가 아직 계산되지 않았으면 자동 계산
-        if old_month == 8 and game_state.flags.get('tournament_result') == 'strikeout':
+        # 8월 대회 조언 채점(LLM)은 세션 락 밖에서 스냅샷 기준으로 먼저 수행
+        # (느린 판정 호출이 같은 사용자의 다른 요청을 막지 않도록, 락 안에서는 결과 추첨과 적용만)
+        advice_scores = None
+        snapshot = chatbot.game_manager.get_snapshot(username)
+        if storybook_manager.is_tournament_pending(snapshot):
             print("[8월 이벤트] 경기 결과 계산 시작")
 
-            # 1. 채팅 히스토리에서 최근 10개 메시지 추출
-            conversation_history = chatbot.get_session_history(username).messages
-            recent_messages = conversation_history[-10:] if len(conversation_history) >= 10 else conversation_history
-
-            # 2. 사용자 메시지만 필터링
-            user_messages = [
-                msg.content
-                for msg in recent_messages
-                if hasattr(msg, 'type') and msg.type == 'human'
-            ]
+            # 1~2. 채팅 히스토리의 최근 10개 메시지 중 사용자 메시지만 추출
+            from services.chat_history import recent_contents
+            user_messages = recent_contents(chatbot.get_session_history(username), limit=10, message_type='human')
 
             # 3. 조언 문자열 생성 (없으면 기본값)
             if user_messages:
@@ -322,80 +372,100 @@ def api_advance_month():
                 advice = "..."
                 print("[8월 이벤트] 채팅 없음, 기본 조언 사용")
 
-            # 4. 경기 결과 계산
-            from services.game_event_manager import get_game_event_manager
-            event_manager = get_game_event_manager()
-            result, details = event_manager.calculate_at_bat_result(advice, game_state.stats.stamina)
+            # 4. 조언 채점
+            advice_scores = event_manager.score_advice(advice, snapshot.stats.stamina)
+
+        with chatbot.game_manager.session_lock(username) as game_state:
+            # 목표 달성 확인 (디버깅 모드: 임시로 비활성화)
+            # all_achieved, goals_info = storybook_manager.check_goals_achieved(game_state)
+            # if not all_achieved and game_state.current_month < 9:
+            #     return jsonify({
+            #         'success': False,
+            #         'error': '목표를 달성하지 못했습니다',
+            #         'goals_info': goals_info
+            #     }), 400
+
+            old_month = game_state.current_month
+
+            # ========== 8월 경기 계산 로직 ==========
+            # 8월에서 9월로 넘어갈 때 경기 결과가 아직 계산되지 않았으면 자동 계산
+            if storybook_manager.is_tournament_pending(game_state):
+                if advice_scores is None:
+                    # 스냅샷을 읽은 뒤 다른 요청이 상태를 바꿈 (채점 없이 결과를 정하지 않음)
+                    return jsonify({
+                        'success': False,
+                        'error': '게임 상태가 바뀌었습니다. 다시 시도해주세요.'
+                    }), 409
+
+                # 4. 경기 결과 계산 (현재 체력 기준)
+                result, details = event_manager.resolve_at_bat(advice_scores, game_state.stats.stamina)
+
+                # 5. 결과에 따라 스토리북 ID 설정
+                if result == "homerun":
+                    game_state.flags['tournament_result'] = 'homerun'
+                    next_storybook_id = "8_result_homerun"
+                    print(f"[8월 이벤트] 결과: 홈런 → {next_storybook_id}")
+                elif result == "hit":
+                    game_state.flags['tournament_result'] = 'hit'  # 도루는 나중에 결정
+                    game_state.next_action = "decide_steal"
+                    next_storybook_id = "8_result_hit"
+                    print(f"[8월 이벤트] 결과: 안타 → {next_storybook_id} (도루 분기 대기)")
+                else:  # strikeout
+                    game_state.flags['tournament_result'] = 'strikeout'
+                    next_storybook_id = "8_result_strikeout"
+                    print(f"[8월 이벤트] 결과: 삼진 → {next_storybook_id}")
+
+                print(f"[8월 이벤트] 계산 상세: {details}")
+
+                # 월은 증가시키지 않음 (결과 스토리북 → 도루 분기 → 8_to_9_transition → 9월)
+            else:
+                # 일반 월 진행 (기존 로직)
+                next_storybook_id = storybook_manager.get_next_storybook_id(game_state)
+            # ========== 8월 경기 계산 로직 끝 ==========
 
-            # 5. 결과에 따라 스토리북 ID 설정
-            if result == "homerun":
-                game_state.flags['tournament_result'] = 'homerun'
-                next_storybook_id = "8_result_homerun"
-                print(f"[8월 이벤트] 결과: 홈런 → {next_storybook_id}")
-            elif result == "hit":
-                game_state.flags['tournament_result'] = 'hit'  # 도루는 나중에 결정
-                game_state.next_action = "decide_steal"
-                next_storybook_id = "8_result_hit"
-                print(f"[8월 이벤트] 결과: 안타 → {next_storybook_id} (도루 분기 대기)")
-            else:  # strikeout
-                game_state.flags['tournament_result'] = 'strikeout'
-                next_storybook_id = "8_result_strikeout"
-                print(f"[8월 이벤트] 결과: 삼진 → {next_storybook_id}")
+            if not next_storybook_id:
+                return jsonify({
+                    'success': False,
+                    'error': '다음 단계를 결정할 수 없습니다'
+                }), 400
 
-            print(f"[8월 이벤트] 계산 상세: {details}")
+            # 월 증가 (9월 이하일 때만, 단 8월 경기 계산인 경우는 제외)
+            august_tournament_calculated = old_month == 8 and game_state.flags.get('tournament_result') != 'strikeout'
+            if game_state.current_month < 9 and not august_tournament_calculated:
+                game_state.current_month += 1
 
-            # 월은 증가시키지 않음 (결과 스토리북 → 도루 분기 → 8_to_9_transition → 9월)
-        else:
-            # 일반 월 진행 (기존 로직)
-            next_storybook_id = storybook_manager.get_next_storybook_id(game_state)
-        # ========== 8월 경기 계산 로직 끝 ==========
+                # 월별 체력 회복
+                stamina_recovery = monthly_stamina_recovery(game_state.current_month)
 
-        if not next_storybook_id:
-            return jsonify({
-                'success': False,
-                'error': '다음 단계를 결정할 수 없습니다'
-            }), 400
+                if stamina_recovery > 0:
+                    game_state.stats.apply_changes({'stamina': stamina_recovery})
+                    print(f"[월 진행] {game_state.current_month}월 시작: 체력 +{stamina_recovery}")
 
-        # 월 증가 (9월 이하일 때만, 단 8월 경기 계산인 경우는 제외)
-        august_tournament_calculated = old_month == 8 and game_state.flags.get('tournament_result') != 'strikeout'
-        if game_state.current_month < 9 and not august_tournament_calculated:
-            game_state.current_month += 1
+                # 훈련 횟수 리셋
+                game_state.training_count_this_month = 0
+                print(f"[월 진행] 훈련 횟수 리셋")
 
-            # 월별 체력 회복
-            stamina_recovery = 0
-            if game_state.current_month in [3, 4, 5]:
-                stamina_recovery = 25
-            elif game_state.current_month in [6, 7]:
-                stamina_recovery = 15
-            elif game_state.current_month in [8, 9]:
-                stamina_recovery = 10
+                # 이전 월 스탯 저장 (전환 스토리북에서 변화량 표시용)
+                game_state.save_previous_month_stats()
 
-            if stamina_recovery > 0:
-                game_state.stats.apply_changes({'stamina': stamina_recovery})
-                print(f"[월 진행] {game_state.current_month}월 시작: 체력 +{stamina_recovery}")
+            new_month = game_state.current_month
 
-            # 훈련 횟수 리셋
-            game_state.training_count_this_month = 0
-            print(f"[월 진행] 훈련 횟수 리셋")
-
-            # 이전 월 스탯 저장 (전환 스토리북에서 변화량 표시용)
-            game_state.save_previous_month_stats()
-
-        new_month = game_state.current_month
-
-        # 스토리북 모드로 전환
-        game_state.set_storybook_mode(next_storybook_id)
+            # 스토리북 모드로 전환
+            game_state.set_storybook_mode(next_storybook_id)
 
-        # 게임 상태 저장
-        chatbot.game_manager.save(username)
+            # 게임 상태 저장
+            chatbot.game_manager.save(username)
 
-        return jsonify({
-            'success': True,
-            'transition_storybook_id': next_storybook_id,
-            'old_month': old_month,
-            'new_month': new_month,
-            'message': f'{old_month}월을 마무리하고 {new_month}월로 넘어갑니다'
-        })
+            return jsonify({
+                'success': True,
+                'transition_storybook_id': next_storybook_id,
+                'old_month': old_month,
+                'new_month': new_month,
+                'message': f'{old_month}월을 마무리하고 {new_month}월로 넘어갑니다',
+                'prefetch': storybook_manager.prefetch_manifest(
+                    storybook_manager.predict_next_storybooks(game_state)
+                )
+            })
 
     except Exception as e:
         print(f"[ERROR] 월 진행 실패: {e}")
@@ -415,7 +485,7 @@ def api_get_hints():
 
         from services import get_chatbot_service
         chatbot = get_chatbot_service()
-        game_state = chatbot.game_manager.get_or_create(username)
+        game_state = chatbot.game_manager.get_snapshot(username)
 
         # 친밀도와 월에 따른 추천 응답
         intimacy = game_state.stats.intimacy
@@ -507,7 +577,7 @@ def api_get_moments():
 
         from services import get_chatbot_service
         chatbot = get_chatbot_service()
-        game_state = chatbot.game_manager.get_or_create(username)
+        game_state = chatbot.game_manager.get_snapshot(username)
 
         return jsonify({
             'success': True,
@@ -527,45 +597,101 @@ def api_get_moments():
 @app.route('/api/storybook/<storybook_id>', methods=['GET'])
 def api_get_storybook(storybook_id: str):
     """
-    특정 스토리북 데이터 반환
+    특정 스토리북 데이터 반환 (사용자와 무관한 정적 내용만, 브라우저/CDN 캐시 가능)
+
+    사용자별 스탯은 /api/storybook/<id>/overlay에서 따로 조회합니다.
+    본문은 설정을 로드할 때 미리 직렬화/압축해 두므로 여기서는 고르기만 합니다.
+
+    Query Params:
+        - v: 스토리북 버전 (현재 버전과 같으면 immutable로 장기 캐시)
+
+    Headers:
+        - If-None-Match: 이전 응답의 ETag (같으면 304, 게임 상태는 조회하지 않음)
+
+    Returns:
+        {
+            "success": True,
+            "version": "...",
+            "storybook": {...}
+        }
+    """
+    storybook_manager = get_storybook_manager()
+    try:
+        payload, prefetch_links = storybook_manager.get_response_cache(storybook_id)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
+
+    # 버전이 박힌 URL은 내용이 절대 바뀌지 않으므로 장기 캐시, 그 외에는 매번 ETag로 재검증
+    if request.args.get('v') == payload.version:
+        cache_control = 'public, max-age=31536000, immutable'
+    else:
+        cache_control = 'public, no-cache'
+    # 압축 방식마다 본문 bytes가 다르므로 ETag도 인코딩별로 다름 (304 응답에도 같은 값)
+    body, encoding = payload.encoded(request.headers.get('Accept-Encoding', ''))
+    headers = {
+        'ETag': payload.etag_for(encoding),
+        'Cache-Control': cache_control,
+        'Vary': 'Accept-Encoding'
+    }
+    # 다음에 올 수 있는 스토리북과 이미지를 브라우저가 한가할 때 미리 받도록 힌트
+    if prefetch_links:
+        headers['Link'] = prefetch_links
+
+    if payload.matches(request.headers.get('If-None-Match')):
+        return Response(status=304, headers=headers)
+
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(body, mimetype='application/json', headers=headers)
+
+
+@app.route('/api/storybook/<storybook_id>/overlay', methods=['GET'])
+def api_get_storybook_overlay(storybook_id: str):
+    """
+    스토리북 화면에 겹쳐 표시할 사용자별 값 (캐시하지 않음)
 
     Query Params:
-        - username: 사용자 이름 (게임 상태 확인용)
+        - username: 사용자 이름
 
     Returns:
         {
             "success": True,
-            "storybook": {...},
-            "current_stats": {...}
+            "version": "...",   # 현재 스토리북 버전 (캐시된 내용이 최신인지 확인용)
+            "current_stats": {...},
+            "current_month": 3,
+            "prefetch": [{"id": ..., "url": ..., "images": [...]}]   # 다음에 볼 스토리북 후보
         }
     """
     try:
         username = request.args.get('username', '사용자')
-
-        # 스토리북 관리자 가져오기
         storybook_manager = get_storybook_manager()
+        payload = storybook_manager.get_payload(storybook_id)
 
-        # 스토리북 가져오기
-        storybook = storybook_manager.get_storybook(storybook_id)
-
-        # 현재 게임 상태 가져오기 (스탯 표시용)
         from services import get_chatbot_service
         chatbot = get_chatbot_service()
-        game_state = chatbot.game_manager.get_or_create(username)
+        game_state = chatbot.game_manager.get_snapshot(username)
 
-        return jsonify({
+        response = jsonify({
             'success': True,
-            'storybook': storybook,
+            'version': payload.version,
             'current_stats': game_state.stats.to_dict(),
-            'current_month': game_state.current_month
+            'current_month': game_state.current_month,
+            'prefetch': storybook_manager.prefetch_manifest(
+                storybook_manager.predict_next_storybooks(game_state)
+            )
         })
+        response.headers['Cache-Control'] = 'private, no-store'
+        return response
     except ValueError as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 404
     except Exception as e:
-        print(f"[ERROR] 스토리북 조회 실패: {e}")
+        print(f"[ERROR] 스토리북 오버레이 조회 실패: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({
@@ -594,7 +720,7 @@ def api_get_current_storybook():
 
         from services import get_chatbot_service
         chatbot = get_chatbot_service()
-        game_state = chatbot.game_manager.get_or_create(username)
+        game_state = chatbot.game_manager.get_snapshot(username)
 
         storybook_manager = get_storybook_manager()
         current_storybook = storybook_manager.get_current_storybook(game_state)
@@ -634,29 +760,28 @@ def api_training():
         from services.training_manager import get_training_manager
 
         chatbot = get_chatbot_service()
-        game_state = chatbot.game_manager.get_or_create(username)
-
-        training_manager = get_training_manager()
-
-        # 훈련 실행
-        outcome = training_manager.execute(
-            game_state=game_state,
-            intensity=intensity,
-            focuses=focuses
-        )
+        with chatbot.game_manager.session_lock(username) as game_state:
+            training_manager = get_training_manager()
+
+            # 훈련 실행
+            outcome = training_manager.execute(
+                game_state=game_state,
+                intensity=intensity,
+                focuses=focuses
+            )
 
-        # 게임 상태 저장
-        chatbot.game_manager.save(username)
+            # 게임 상태 저장
+            chatbot.game_manager.save(username)
 
-        return jsonify({
-            'success': True,
-            'intensity_label': outcome.intensity_label,
-            'summary': outcome.summary,
-            'stat_changes': outcome.stat_changes,
-            'stamina_change': outcome.stamina_change,
-            'total_changes': outcome.total_changes,
-            'conversation_note': outcome.conversation_note
-        })
+            return jsonify({
+                'success': True,
+                'intensity_label': outcome.intensity_label,
+                'summary': outcome.summary,
+                'stat_changes': outcome.stat_changes,
+                'stamina_change': outcome.stamina_change,
+                'total_changes': outcome.total_changes,
+                'conversation_note': outcome.conversation_note
+            })
 
     except ValueError as e:
         error_msg = str(e)
@@ -678,6 +803,148 @@ def api_training():
         }), 500
 
 
+def is_valid_intensity(value) -> bool:
+    """훈련 강도가 정수로 변환 가능한 값인지 확인 (None, 숫자가 아닌 문자열, bool은 거절)"""
+    if isinstance(value, bool):
+        return False
+    try:
+        int(value)
+    except (TypeError, ValueError, OverflowError):
+        return False
+    return True
+
+
+@app.route('/api/training/plan', methods=['POST'])
+def api_training_plan_apply():
+    """
+    한 달 훈련 계획 일괄 처리
+
+    sessions([{intensity, focuses}, ...])를 순서대로 모두 검증한 뒤
+    한 번의 세션 락 안에서 적용하고 한 번만 저장합니다.
+    하나라도 조건(횟수/체력)에 걸리면 아무것도 적용하지 않습니다.
+    """
+    try:
+        data = request.get_json()
+        username = data.get('username', '사용자')
+        sessions = data.get('sessions', [])
+
+        if not isinstance(sessions, list) or not sessions:
+            return jsonify({
+                'success': False,
+                'error': '훈련 계획이 비어 있습니다.'
+            }), 400
+        if any(not isinstance(session, dict) or not session.get('focuses') for session in sessions):
+            return jsonify({
+                'success': False,
+                'error': '훈련할 항목을 선택해주세요.'
+            }), 400
+        if any(not is_valid_intensity(session.get('intensity', 50)) for session in sessions):
+            return jsonify({
+                'success': False,
+                'error': '훈련 강도가 올바르지 않습니다.'
+            }), 400
+
+        from services import get_chatbot_service
+        from services.training_manager import get_training_manager, max_trainings
+
+        chatbot = get_chatbot_service()
+        with chatbot.game_manager.session_lock(username) as game_state:
+            outcomes = get_training_manager().execute_plan(
+                game_state=game_state,
+                sessions=sessions
+            )
+
+            # 게임 상태 저장 (계획 전체에 한 번)
+            chatbot.game_manager.save(username)
+
+            return jsonify({
+                'success': True,
+                'steps': [
+                    {
+                        'intensity_label': outcome.intensity_label,
+                        'summary': outcome.summary,
+                        'stat_changes': outcome.stat_changes,
+                        'stamina_change': outcome.stamina_change,
+                        'total_changes': outcome.total_changes,
+                        'conversation_note': outcome.conversation_note
+                    }
+                    for outcome in outcomes
+                ],
+                'stats': game_state.stats.to_dict(),
+                'training_count_this_month': game_state.training_count_this_month,
+                'remaining_trainings': max_trainings(game_state.current_month) - game_state.training_count_this_month
+            })
+
+    except ValueError as e:
+        error_msg = str(e)
+        print(f"[WARNING] 훈련 계획 제한 조건: {error_msg}")
+        return jsonify({
+            'success': False,
+            'warning': True,
+            'message': error_msg
+        }), 200
+    except Exception as e:
+        print(f"[ERROR] 훈련 계획 처리 실패: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': '서버 오류가 발생했습니다.'
+        }), 500
+
+
+@app.route('/api/training/plan', methods=['GET'])
+def api_training_plan():
+    """
+    목표 엔딩까지의 훈련 계획 추천 (사전 계산 표 조회)
+
+    Query Params:
+        - username: 사용자 이름
+        - target: 목표 엔딩 ID (예: "B1")
+
+    Returns:
+        {
+            "success": True,
+            "target": "B1",
+            "probability": 0.13,
+            "sessions": 3,
+            "plan": [{"month": 4, "intensity": 100, "intensity_label": "...", "focuses": [...]}, ...],
+            "expected": {"ending_score": 241, "stamina_at_tournament": 85},
+            "precomputed": True,
+            "assumptions": {...}
+        }
+    """
+    try:
+        if not load_config().get('training_plan', {}).get('enabled', True):
+            return jsonify({'success': False, 'error': '훈련 계획 추천이 꺼져 있습니다.'}), 404
+
+        username = request.args.get('username', '사용자')
+        target = request.args.get('target', '')
+
+        # numpy가 필요한 모듈이므로 이 엔드포인트에서만 로드
+        from services.training_planner import get_training_planner
+        planner = get_training_planner()
+        if planner is None:
+            return jsonify({
+                'success': False,
+                'error': '훈련 계획 표가 없습니다. (python -m services.training_planner build)'
+            }), 503
+
+        from services import get_chatbot_service
+        chatbot = get_chatbot_service()
+        game_state = chatbot.game_manager.get_snapshot(username)
+
+        try:
+            advice = planner.advise(game_state, target)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        return jsonify({'success': True, **advice})
+    except Exception as e:
+        print(f"[ERROR] 훈련 계획 조회 실패: {e}")
+        return jsonify({'success': False, 'error': '서버 오류가 발생했습니다.'}), 500
+
+
 @app.route('/api/game/check-goals', methods=['GET'])
 def api_check_goals():
     """
@@ -699,7 +966,7 @@ def api_check_goals():
 
         from services import get_chatbot_service
         chatbot = get_chatbot_service()
-        game_state = chatbot.game_manager.get_or_create(username)
+        game_state = chatbot.game_manager.get_snapshot(username)
 
         storybook_manager = get_storybook_manager()
 
@@ -758,127 +1025,122 @@ def api_complete_storybook():
 
         from services import get_chatbot_service
         chatbot = get_chatbot_service()
-        game_state = chatbot.game_manager.get_or_create(username)
-
-        if game_state.next_action == "decide_steal" and storybook_id == "8_result_hit":
-            print("[Game Event] '안타' 스토리북 완료. '도루' 결과를 계산합니다.")
-            event_manager = get_game_event_manager()
-            steal_result, _ = event_manager.calculate_steal_result(game_state)
-
-            if steal_result == "steal_success":
-                game_state.flags['tournament_result'] = 'hit_steal'
-                next_storybook_id = "8_steal_success"
-            else: # steal_fail
-                game_state.flags['tournament_result'] = 'hit'
-                next_storybook_id = "8_steal_fail"
+        with chatbot.game_manager.session_lock(username) as game_state:
+            if game_state.next_action == "decide_steal" and storybook_id == "8_result_hit":
+                print("[Game Event] '안타' 스토리북 완료. '도루' 결과를 계산합니다.")
+                event_manager = get_game_event_manager()
+                steal_result, _ = event_manager.calculate_steal_result(game_state)
+
+                if steal_result == "steal_success":
+                    game_state.flags['tournament_result'] = 'hit_steal'
+                    next_storybook_id = "8_steal_success"
+                else: # steal_fail
+                    game_state.flags['tournament_result'] = 'hit'
+                    next_storybook_id = "8_steal_fail"
             
-            game_state.next_action = None # 모든 이벤트 종료
-            game_state.set_storybook_mode(next_storybook_id)
-            chatbot.game_manager.save(username)
+                game_state.next_action = None # 모든 이벤트 종료
+                game_state.set_storybook_mode(next_storybook_id)
+                chatbot.game_manager.save(username)
             
-            return jsonify({
+                return jsonify({
+                    'success': True,
+                    'next_action': 'show_next_storybook',
+                    'next_storybook_id': next_storybook_id
+                })
+
+            # 스토리북 완료 표시
+            game_state.mark_storybook_completed(storybook_id)
+
+            # 특별한 순간 카드 생성 (5월 집 방문, 8월 대회)
+            from services.moment_manager import get_moment_manager
+            moment_mgr = get_moment_manager()
+
+            if storybook_id == "5_main_event":
+                # 5월 집 방문 이벤트 카드 생성
+                card = moment_mgr.create_event_card(
+                    category='home_visit',
+                    title='보이지 않는 상처',
+                    description='강태의 집을 방문해 그의 과거와 깊은 상처를 알게 되었습니다.',
+                    month=5,
+                    image_url='./static/images/chatbot/5_month_house.png',
+                    stats_snapshot=game_state.stats.to_dict()
+                )
+                moment_mgr.add_cards_to_game_state(game_state, [card])
+
+            elif storybook_id in ["8_result_homerun", "8_result_hit", "8_steal_success", "8_steal_fail"]:
+                # 8월 대회 결과 카드 생성 (결과별 다른 제목/설명)
+                tournament_result = game_state.flags.get('tournament_result', 'strikeout')
+
+                if tournament_result == 'homerun':
+                    title = '기적의 역전 만루 홈런'
+                    description = '9회 말 2사 만루, 강태가 끝내기 만루 홈런을 터뜨렸습니다!'
+                    image_url = './static/images/chatbot/cheers1.png'
+                elif tournament_result == 'hit_steal':
+                    title = '극적인 도루 성공'
+                    description = '동점 적시타 후 도루에 성공하며 트라우마를 극복했습니다!'
+                    image_url = './static/images/chatbot/cheers2.png'
+                elif tournament_result == 'hit':
+                    title = '동점 적시타'
+                    description = '9회 말 2사 만루, 강태가 동점 적시타를 쳐냈습니다!'
+                    image_url = './static/images/chatbot/cheers2.png'
+                else:  # strikeout
+                    title = '아쉬운 삼진'
+                    description = '9회 말 마지막 타석, 아쉽게 삼진을 당했지만 강태는 성장했습니다.'
+                    image_url = './static/images/chatbot/ballpark.png'
+
+                card = moment_mgr.create_event_card(
+                    category='tournament',
+                    title=title,
+                    description=description,
+                    month=8,
+                    image_url=image_url,
+                    stats_snapshot=game_state.stats.to_dict()
+                )
+                moment_mgr.add_cards_to_game_state(game_state, [card])
+
+            # 스토리북 정보 가져오기
+            storybook_manager = get_storybook_manager()
+            # 완료 동작은 로드 시점에 문자열/딕셔너리 형식을 하나로 정규화해 둠
+            completion_action = storybook_manager.get_completion_action(storybook_id)
+            action_type = completion_action.type
+            action_message = completion_action.message
+            next_storybook_id = completion_action.next_storybook_id
+
+            response_data = {
                 'success': True,
-                'next_action': 'show_next_storybook',
-                'next_storybook_id': next_storybook_id
-            })
+                'next_action': action_type,
+                'message': action_message
+            }
 
-        # 스토리북 완료 표시
-        game_state.mark_storybook_completed(storybook_id)
-
-        # 특별한 순간 카드 생성 (5월 집 방문, 8월 대회)
-        from services.moment_manager import get_moment_manager
-        moment_mgr = get_moment_manager()
-
-        if storybook_id == "5_main_event":
-            # 5월 집 방문 이벤트 카드 생성
-            card = moment_mgr.create_event_card(
-                category='home_visit',
-                title='보이지 않는 상처',
-                description='강태의 집을 방문해 그의 과거와 깊은 상처를 알게 되었습니다.',
-                month=5,
-                image_url='./static/images/chatbot/5_month_house.png',
-                stats_snapshot=game_state.stats.to_dict()
+            if action_type == 'start_chat_mode':
+                game_state.set_chat_mode()
+                response_data['message'] = '대화를 시작하세요'
+
+            elif action_type == 'show_next_storybook':
+                # 다음 스토리북 표시
+                if next_storybook_id:
+                    game_state.set_storybook_mode(next_storybook_id)
+                    response_data['next_storybook_id'] = next_storybook_id
+
+            elif action_type == 'determine_ending':
+                # 엔딩 결정
+                ending = storybook_manager.determine_ending(game_state)
+                response_data['ending'] = ending
+                response_data['next_action'] = 'game_end'
+
+            elif action_type == 'game_end':
+                # 게임 종료
+                response_data['message'] = '게임이 종료되었습니다'
+
+            # 다음에 볼 스토리북을 사용자가 읽거나 대화하는 동안 미리 받도록 안내
+            response_data['prefetch'] = storybook_manager.prefetch_manifest(
+                storybook_manager.predict_next_storybooks(game_state)
             )
-            moment_mgr.add_cards_to_game_state(game_state, [card])
-
-        elif storybook_id in ["8_result_homerun", "8_result_hit", "8_steal_success", "8_steal_fail"]:
-            # 8월 대회 결과 카드 생성 (결과별 다른 제목/설명)
-            tournament_result = game_state.flags.get('tournament_result', 'strikeout')
-
-            if tournament_result == 'homerun':
-                title = '기적의 역전 만루 홈런'
-                description = '9회 말 2사 만루, 강태가 끝내기 만루 홈런을 터뜨렸습니다!'
-                image_url = './static/images/chatbot/cheers1.png'
-            elif tournament_result == 'hit_steal':
-                title = '극적인 도루 성공'
-                description = '동점 적시타 후 도루에 성공하며 트라우마를 극복했습니다!'
-                image_url = './static/images/chatbot/cheers2.png'
-            elif tournament_result == 'hit':
-                title = '동점 적시타'
-                description = '9회 말 2사 만루, 강태가 동점 적시타를 쳐냈습니다!'
-                image_url = './static/images/chatbot/cheers2.png'
-            else:  # strikeout
-                title = '아쉬운 삼진'
-                description = '9회 말 마지막 타석, 아쉽게 삼진을 당했지만 강태는 성장했습니다.'
-                image_url = './static/images/chatbot/ballpark.png'
-
-            card = moment_mgr.create_event_card(
-                category='tournament',
-                title=title,
-                description=description,
-                month=8,
-                image_url=image_url,
-                stats_snapshot=game_state.stats.to_dict()
-            )
-            moment_mgr.add_cards_to_game_state(game_state, [card])
-
-        # 스토리북 정보 가져오기
-        storybook_manager = get_storybook_manager()
-        storybook = storybook_manager.get_storybook(storybook_id)
-        completion_action = storybook.get('completion_action', {})
-
-        # completion_action이 문자열인지 딕셔너리인지 확인 (하위 호환성)
-        if isinstance(completion_action, str):
-            # 문자열인 경우: storybook_config.json의 간단한 형식
-            action_type = completion_action
-            action_message = ''
-            next_storybook_id = storybook.get('next_storybook_id')
-        else:
-            # 딕셔너리인 경우: 확장된 형식
-            action_type = completion_action.get('type', 'start_chat_mode')
-            action_message = completion_action.get('message', '')
-            next_storybook_id = completion_action.get('next_storybook_id')
-
-        response_data = {
-            'success': True,
-            'next_action': action_type,
-            'message': action_message
-        }
-
-        if action_type == 'start_chat_mode':
-            game_state.set_chat_mode()
-            response_data['message'] = '대화를 시작하세요'
-
-        elif action_type == 'show_next_storybook':
-            # 다음 스토리북 표시
-            if next_storybook_id:
-                game_state.set_storybook_mode(next_storybook_id)
-                response_data['next_storybook_id'] = next_storybook_id
-
-        elif action_type == 'determine_ending':
-            # 엔딩 결정
-            ending = storybook_manager.determine_ending(game_state)
-            response_data['ending'] = ending
-            response_data['next_action'] = 'game_end'
 
-        elif action_type == 'game_end':
-            # 게임 종료
-            response_data['message'] = '게임이 종료되었습니다'
-
-        # 게임 상태 저장
-        chatbot.game_manager.save(username)
+            # 게임 상태 저장
+            chatbot.game_manager.save(username)
 
-        return jsonify(response_data)
+            return jsonify(response_data)
 
     except Exception as e:
         print(f"[ERROR] 스토리북 완료 처리 실패: {e}")
@@ -999,11 +1261,60 @@ def api_month_start():
 # 헬스체크 엔드포인트 (Vercel용)
 @app.route('/health')
 def health():
-    return jsonify({'status': 'ok', 'chatbot': config.get('name', 'unknown')})
+    return jsonify({'status': 'ok', 'chatbot': load_config().get('name', 'unknown')})
+
+
+# 파이프라인 단계별 서킷 브레이커 상태 (closed / open / half_open)
+@app.route('/health/pipeline')
+def health_pipeline():
+    from services.circuit_breaker import get_breaker_registry
+    breakers = get_breaker_registry().snapshot()
+    degraded = [stage for stage, info in breakers.items() if info['state'] != 'closed']
+    return jsonify({
+        'status': 'degraded' if degraded else 'ok',
+        'degraded_stages': degraded,
+        'breakers': breakers
+    })
+
+
+# LLM 호출 제한기 메트릭 (대기열 길이, 대기 시간, 재시도/429 횟수)
+@app.route('/api/metrics/llm')
+def llm_metrics():
+    from services.llm_limiter import get_llm_limiter
+    return jsonify({'success': True, 'profiles': get_llm_limiter().metrics()})
+
+
+# 세션 캐시 메모리 메트릭 (세션 수, 추정 크기, 제거 횟수, 프로세스 RSS)
+@app.route('/api/metrics/memory')
+def memory_metrics():
+    from services import get_chatbot_service
+    from services.session_cache import process_rss_bytes
+    chatbot = get_chatbot_service()
+    return jsonify({
+        'success': True,
+        'rss_bytes': process_rss_bytes(),
+        'caches': {
+            'game_states': chatbot.game_manager.cache_stats(),
+            'chat_histories': chatbot.store.stats()
+        }
+    })
+
+
+# 작업별 모델 라우팅 메트릭 (모델, p50/p95 지연 시간, SLO 위반, 토큰 사용량)
+@app.route('/api/metrics/models')
+def model_metrics():
+    from services.model_router import get_model_router
+    return jsonify({'success': True, 'tasks': get_model_router().metrics()})
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_ENV') == 'development'
+
+    # docker stop 등 SIGTERM 종료 시에도 atexit 핸들러(게임 상태 flush)가 실행되도록 정상 종료로 전환
+    import signal
+    import sys
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
     # threaded=True는 SSE 스트리밍에 필수
     app.run(host='0.0.0.0', port=port, debug=debug, threaded=True)
 
@@ -1025,36 +1336,40 @@ def play_at_bat():
         from services.game_event_manager import get_game_event_manager
 
         chatbot = get_chatbot_service()
-        game_state = chatbot.game_manager.get_or_create(username)
-        
-        # 이벤트 계산기 실행
         event_manager = get_game_event_manager()
-        result, details = event_manager.calculate_at_bat_result(advice, game_state.stats.stamina)
-
-        # <<< 수정 시작: 결과에 따라 '다음 행동' 플래그를 설정하거나 초기화 >>>
-        # 이유: '안타'가 나왔을 경우, 다음 단계가 '도루 결정'임을 시스템에 알려줘야 합니다.
-        if result == "hit":
-            game_state.next_action = "decide_steal"
-            next_storybook_id = "8_result_hit"
-        elif result == "homerun":
-            game_state.flags['tournament_result'] = 'homerun'
-            game_state.next_action = None # 이벤트 종료
-            next_storybook_id = "8_result_homerun"
-        else: # strikeout
-            game_state.flags['tournament_result'] = 'strikeout'
-            game_state.next_action = None # 이벤트 종료
-            next_storybook_id = "8_result_strikeout"
-        # <<< 수정 끝 >>>
-
-        game_state.set_storybook_mode(next_storybook_id)
-        chatbot.game_manager.save(username)
 
-        return jsonify({
-            'success': True,
-            'result': result,
-            'next_storybook_id': next_storybook_id,
-            'details': details
-        })
+        # 조언 채점(LLM)은 세션 락 밖에서 스냅샷 체력 기준으로 수행
+        snapshot = chatbot.game_manager.get_snapshot(username)
+        scores = event_manager.score_advice(advice, snapshot.stats.stamina)
+
+        with chatbot.game_manager.session_lock(username) as game_state:
+            # 결과 추첨과 적용만 락 안에서 (현재 체력 기준)
+            result, details = event_manager.resolve_at_bat(scores, game_state.stats.stamina)
+
+            # <<< 수정 시작: 결과에 따라 '다음 행동' 플래그를 설정하거나 초기화 >>>
+            # 이유: '안타'가 나왔을 경우, 다음 단계가 '도루 결정'임을 시스템에 알려줘야 합니다.
+            if result == "hit":
+                game_state.next_action = "decide_steal"
+                next_storybook_id = "8_result_hit"
+            elif result == "homerun":
+                game_state.flags['tournament_result'] = 'homerun'
+                game_state.next_action = None # 이벤트 종료
+                next_storybook_id = "8_result_homerun"
+            else: # strikeout
+                game_state.flags['tournament_result'] = 'strikeout'
+                game_state.next_action = None # 이벤트 종료
+                next_storybook_id = "8_result_strikeout"
+            # <<< 수정 끝 >>>
+
+            game_state.set_storybook_mode(next_storybook_id)
+            chatbot.game_manager.save(username)
+
+            return jsonify({
+                'success': True,
+                'result': result,
+                'next_storybook_id': next_storybook_id,
+                'details': details
+            })
 
     except Exception as e:
         print(f"[ERROR] 8월 이벤트 API 실패: {e}")
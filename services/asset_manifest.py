@@ -0,0 +1,103 @@
+"""
+정적 파일 목록 / 지문(fingerprint)
+
+예전에는 /chat 페이지를 열 때마다 get_image_files()가 static/images/chatbot을 os.walk로 훑었고,
+chatbot.js와 style.css는 캐시가 꺼진 채(SEND_FILE_MAX_AGE_DEFAULT = 0) 매번 다시 받았습니다.
+
+AssetManifest는 시작할 때(와 파일이 바뀔 때 ConfigService 감시 스레드에서) 한 번
+- 챗봇 이미지 목록을 만들고
+- static/js, static/css 파일의 내용 해시를 계산합니다.
+템플릿은 asset_url()로 "?v=<해시>"가 붙은 주소를 쓰고, app.py는 해시가 현재 값과 같은
+요청을 immutable로 장기 캐시합니다. 페이지 요청 중에는 파일 시스템을 보지 않습니다.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .config_service import CONFIG_ASSETS, get_config_service
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+STATIC_DIR = BASE_DIR / "static"
+
+# 지문을 붙일 디렉토리 (static 기준)
+FINGERPRINT_DIRS = ("js", "css")
+# 갤러리에 보여줄 챗봇 이미지 디렉토리
+CHATBOT_IMAGE_DIR = "images/chatbot"
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif")
+
+
+class AssetManifest:
+    """정적 파일 목록과 지문 (읽기 전용)"""
+
+    def __init__(self, versions: Dict[str, str], chatbot_images: Tuple[str, ...]):
+        """
+        Args:
+            versions: static 기준 파일 이름 → 내용 해시 (예: "js/chatbot.js" → "3f2a9c01d4")
+            chatbot_images: static/images/chatbot 기준 이미지 경로 (정렬됨)
+        """
+        self.versions = versions
+        self.chatbot_images = chatbot_images
+
+    @classmethod
+    def build(cls, static_dir: Path = STATIC_DIR) -> 'AssetManifest':
+        """디렉토리를 훑어 새 manifest 생성"""
+        versions = {}
+        for dirname in FINGERPRINT_DIRS:
+            for path in _walk_files(static_dir / dirname):
+                filename = path.relative_to(static_dir).as_posix()
+                versions[filename] = hashlib.sha256(path.read_bytes()).hexdigest()[:10]
+
+        image_dir = static_dir / CHATBOT_IMAGE_DIR
+        chatbot_images = tuple(sorted(
+            path.relative_to(image_dir).as_posix()
+            for path in _walk_files(image_dir) if path.suffix.lower() in IMAGE_SUFFIXES
+        ))
+        return cls(versions, chatbot_images)
+
+    def version(self, filename: str) -> Optional[str]:
+        """static 기준 파일 이름의 내용 해시 (지문 대상이 아니면 None)"""
+        return self.versions.get(filename)
+
+
+def tracked_dirs(static_dir: Path = STATIC_DIR) -> list:
+    """변경을 감시할 디렉토리"""
+    return [static_dir / dirname for dirname in FINGERPRINT_DIRS + (CHATBOT_IMAGE_DIR,)]
+
+
+def _walk_files(root: Path):
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            yield Path(dirpath) / filename
+
+
+# ============================================================================
+# 싱글톤 패턴
+# ============================================================================
+
+_asset_manifest: AssetManifest | None = None
+
+
+def get_asset_manifest() -> AssetManifest:
+    """
+    현재 AssetManifest 반환
+
+    ConfigService를 쓸 수 있으면 파일이 바뀔 때마다 감시 스레드에서 다시 만든 값을,
+    아니면 처음 한 번 만든 값을 반환합니다.
+    """
+    global _asset_manifest
+    try:
+        service = get_config_service()
+    except (FileNotFoundError, ValueError):
+        if _asset_manifest is None:
+            _asset_manifest = AssetManifest.build()
+        return _asset_manifest
+
+    try:
+        return service.get(CONFIG_ASSETS)
+    except KeyError:
+        manifest = service.watch_tree(CONFIG_ASSETS, tracked_dirs(), AssetManifest.build)
+        print(f"[AssetManifest] 지문 {len(manifest.versions)}개, 챗봇 이미지 {len(manifest.chatbot_images)}개")
+        return manifest
@@ -0,0 +1,379 @@
+"""
+대화 히스토리 저장소
+
+RunnableWithMessageHistory가 사용하는 BaseChatMessageHistory 구현체들입니다.
+기본(InMemoryChatMessageHistory)은 프로세스 메모리에만 있으므로 재시작/배포 때마다 사라집니다.
+
+- SQLiteChatMessageHistory: SQLite에 영구 저장, 프롬프트에 필요한 마지막 N개만 메모리에 둠
+- SharedChatMessageHistory: 여러 워커가 같은 대화를 이어가야 할 때 공유 저장소 사용
+
+SQLite 구성 (ChatHistoryStore):
+- chat_messages: 최근 메시지 (메시지 하나 = 행 하나, 종류별 인덱스)
+- chat_archive: 오래된 메시지를 archive_block개씩 묶어 zlib으로 압축한 행
+- chat_sessions: 세션별 마지막 순번 / 보관 처리된 순번
+
+설정은 config/chatbot_config.json의 "chat_history"에서 읽습니다.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+from .shared_store import SharedBackend
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_CHAT_DB_PATH = BASE_DIR / "static" / "data" / "chat_history.sqlite3"
+
+
+class ChatHistoryStore:
+    """
+    SQLite(WAL) 대화 기록 저장소
+
+    메시지는 세션마다 1부터 증가하는 순번(seq)을 가지며, 순번이 페이지 커서 역할을 합니다.
+    최근 hot_messages개를 넘는 오래된 메시지는 archive_block개씩 압축 보관됩니다.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS chat_sessions (
+            session_id TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL,
+            archived_seq INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            session_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (session_id, seq)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_chat_messages_type ON chat_messages (session_id, type, seq);
+        CREATE TABLE IF NOT EXISTS chat_archive (
+            session_id TEXT NOT NULL,
+            first_seq INTEGER NOT NULL,
+            last_seq INTEGER NOT NULL,
+            payload BLOB NOT NULL,
+            PRIMARY KEY (session_id, first_seq)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(
+        self,
+        db_path: Path = DEFAULT_CHAT_DB_PATH,
+        hot_messages: int = 200,
+        archive_block: int = 100,
+        busy_timeout_ms: int = 5000
+    ):
+        """
+        Args:
+            db_path: SQLite 파일 경로
+            hot_messages: 압축하지 않고 두는 최근 메시지 수
+            archive_block: 압축 보관 단위 (메시지 수)
+            busy_timeout_ms: 다른 프로세스가 쓰는 중일 때 대기 시간
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.hot_messages = max(1, int(hot_messages))
+        self.archive_block = max(1, int(archive_block))
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            self._conn.executescript(self.SCHEMA)
+
+    # ------------------------------------------------------------------
+    # 쓰기
+    # ------------------------------------------------------------------
+
+    def append(self, session_id: str, messages: List[dict]) -> int:
+        """message_to_dict() 형식 메시지 추가 후 마지막 순번 반환"""
+        if not messages:
+            return self.last_seq(session_id)
+        with self._lock:
+            # 다른 워커와 순번이 겹치지 않도록 쓰기 락부터 잡음
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                last_seq, archived_seq = self._session_row(session_id)
+                rows = [
+                    (session_id, last_seq + offset, message.get('type', ''),
+                     json.dumps(message, ensure_ascii=False, separators=(',', ':')))
+                    for offset, message in enumerate(messages, start=1)
+                ]
+                self._conn.executemany(
+                    "INSERT INTO chat_messages (session_id, seq, type, data) VALUES (?, ?, ?, ?)", rows
+                )
+                last_seq += len(rows)
+                while last_seq - archived_seq >= self.hot_messages + self.archive_block:
+                    archived_seq = self._archive_block(session_id, archived_seq)
+                self._conn.execute(
+                    "INSERT INTO chat_sessions (session_id, last_seq, archived_seq, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET last_seq = excluded.last_seq, "
+                    "archived_seq = excluded.archived_seq, updated_at = excluded.updated_at",
+                    (session_id, last_seq, archived_seq, time.time())
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return last_seq
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ("chat_messages", "chat_archive", "chat_sessions"):
+                    self._conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    # ------------------------------------------------------------------
+    # 읽기
+    # ------------------------------------------------------------------
+
+    def last_seq(self, session_id: str) -> int:
+        """마지막 순번 (= 전체 메시지 수, 없으면 0)"""
+        with self._lock:
+            return self._session_row(session_id)[0]
+
+    def read_range(self, session_id: str, first_seq: int, last_seq: int) -> List[dict]:
+        """first_seq~last_seq(포함) 메시지 (오래된 순)"""
+        if last_seq < first_seq:
+            return []
+        with self._lock:
+            return [message for _, message in self._read_range(session_id, first_seq, last_seq)]
+
+    def tail(self, session_id: str, limit: int) -> Tuple[int, List[dict]]:
+        """(마지막 순번, 마지막 limit개 메시지)"""
+        with self._lock:
+            last_seq = self._session_row(session_id)[0]
+            first_seq = max(1, last_seq - limit + 1)
+            return last_seq, [message for _, message in self._read_range(session_id, first_seq, last_seq)]
+
+    def page(self, session_id: str, before: Optional[int] = None, limit: int = 20) -> Tuple[List[dict], Optional[int]]:
+        """
+        커서 페이지네이션 (최신 페이지부터 과거로)
+
+        Args:
+            before: 이 순번보다 앞의 메시지 (None이면 가장 최근부터)
+            limit: 페이지 크기
+
+        Returns:
+            (메시지 목록(오래된 순), 다음 페이지 커서 - 더 없으면 None)
+        """
+        with self._lock:
+            last_seq = self._session_row(session_id)[0]
+            if before is not None:
+                last_seq = min(last_seq, before - 1)
+            first_seq = max(1, last_seq - limit + 1)
+            messages = [message for _, message in self._read_range(session_id, first_seq, last_seq)]
+        return messages, (first_seq if first_seq > 1 else None)
+
+    def recent_of_type(self, session_id: str, within: int, message_type: str) -> List[dict]:
+        """마지막 within개 메시지 중 message_type 메시지만 (오래된 순, 종류 인덱스 사용)"""
+        with self._lock:
+            last_seq, archived_seq = self._session_row(session_id)
+            first_seq = max(1, last_seq - within + 1)
+            if first_seq <= archived_seq:
+                return [
+                    message for _, message in self._read_range(session_id, first_seq, last_seq)
+                    if message.get('type') == message_type
+                ]
+            rows = self._conn.execute(
+                "SELECT data FROM chat_messages WHERE session_id = ? AND type = ? AND seq >= ? ORDER BY seq",
+                (session_id, message_type, first_seq)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # 내부 구현 (self._lock 보유 상태에서 호출)
+    # ------------------------------------------------------------------
+
+    def _session_row(self, session_id: str) -> Tuple[int, int]:
+        row = self._conn.execute(
+            "SELECT last_seq, archived_seq FROM chat_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row is not None else (0, 0)
+
+    def _archive_block(self, session_id: str, archived_seq: int) -> int:
+        """archived_seq 다음 archive_block개를 압축 행 하나로 옮기고 새 archived_seq 반환"""
+        first_seq = archived_seq + 1
+        last_seq = archived_seq + self.archive_block
+        rows = self._conn.execute(
+            "SELECT seq, data FROM chat_messages WHERE session_id = ? AND seq BETWEEN ? AND ? ORDER BY seq",
+            (session_id, first_seq, last_seq)
+        ).fetchall()
+        payload = zlib.compress(
+            json.dumps([[seq, json.loads(data)] for seq, data in rows], ensure_ascii=False).encode('utf-8')
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO chat_archive (session_id, first_seq, last_seq, payload) VALUES (?, ?, ?, ?)",
+            (session_id, first_seq, last_seq, payload)
+        )
+        self._conn.execute(
+            "DELETE FROM chat_messages WHERE session_id = ? AND seq BETWEEN ? AND ?",
+            (session_id, first_seq, last_seq)
+        )
+        return last_seq
+
+    def _read_range(self, session_id: str, first_seq: int, last_seq: int) -> List[Tuple[int, dict]]:
+        result = []
+        archived = self._conn.execute(
+            "SELECT payload FROM chat_archive WHERE session_id = ? AND last_seq >= ? AND first_seq <= ? "
+            "ORDER BY first_seq",
+            (session_id, first_seq, last_seq)
+        ).fetchall()
+        for (payload,) in archived:
+            result.extend(
+                (seq, message) for seq, message in json.loads(zlib.decompress(payload))
+                if first_seq <= seq <= last_seq
+            )
+        rows = self._conn.execute(
+            "SELECT seq, data FROM chat_messages WHERE session_id = ? AND seq BETWEEN ? AND ? ORDER BY seq",
+            (session_id, first_seq, last_seq)
+        ).fetchall()
+        result.extend((seq, json.loads(data)) for seq, data in rows)
+        return result
+
+
+class SQLiteChatMessageHistory(BaseChatMessageHistory):
+    """
+    ChatHistoryStore 기반 대화 히스토리
+
+    messages는 프롬프트에 넣을 마지막 window개만 반환하며, 처음 접근할 때 읽어 메모리에 둡니다.
+    더 오래된 메시지는 page()로 순번 커서를 따라 읽습니다.
+    """
+
+    def __init__(self, session_id: str, store: ChatHistoryStore, window: int = 40):
+        self.session_id = session_id
+        self.store = store
+        self.window = max(1, int(window))
+        self._tail: Optional[List[BaseMessage]] = None
+        self._last_seq = 0
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        # 다른 워커가 같은 대화에 추가했으면 다시 읽음 (순번 조회 한 번)
+        if self._tail is None or self.store.last_seq(self.session_id) != self._last_seq:
+            self._last_seq, tail = self.store.tail(self.session_id, self.window)
+            self._tail = messages_from_dict(tail)
+        return list(self._tail)
+
+    def add_messages(self, messages: List[BaseMessage]) -> None:
+        if not messages:
+            return
+        last_seq = self.store.append(self.session_id, [message_to_dict(message) for message in messages])
+        if self._tail is not None and last_seq == self._last_seq + len(messages):
+            self._tail = (self._tail + list(messages))[-self.window:]
+            self._last_seq = last_seq
+        else:
+            self._tail = None
+
+    def clear(self) -> None:
+        self.store.clear(self.session_id)
+        self._tail = None
+        self._last_seq = 0
+
+    def message_count(self) -> int:
+        """전체 메시지 수 (window와 무관)"""
+        return self.store.last_seq(self.session_id)
+
+    def page(self, before: Optional[int] = None, limit: int = 20) -> Tuple[List[BaseMessage], Optional[int]]:
+        """과거 메시지 페이지 (ChatHistoryStore.page 참고)"""
+        messages, cursor = self.store.page(self.session_id, before=before, limit=limit)
+        return messages_from_dict(messages), cursor
+
+    def recent_contents(self, limit: int = 10, message_type: str = "human") -> List[str]:
+        """마지막 limit개 메시지 중 message_type 메시지 본문"""
+        return [
+            message['data']['content']
+            for message in self.store.recent_of_type(self.session_id, limit, message_type)
+        ]
+
+
+class SharedChatMessageHistory(BaseChatMessageHistory):
+    """공유 백엔드 리스트에 저장하는 대화 히스토리 (메시지 하나 = 리스트 항목 하나)"""
+
+    def __init__(self, session_id: str, backend: SharedBackend, key_prefix: str = "bbgame:"):
+        self.session_id = session_id
+        self.backend = backend
+        self.key = f"{key_prefix}chat:{session_id}"
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return messages_from_dict([json.loads(raw) for raw in self.backend.list_range(self.key, 0, -1)])
+
+    def add_messages(self, messages: List[BaseMessage]) -> None:
+        self.backend.list_append(self.key, [
+            json.dumps(message_to_dict(message), ensure_ascii=False).encode('utf-8')
+            for message in messages
+        ])
+
+    def clear(self) -> None:
+        self.backend.delete(self.key)
+
+
+def recent_contents(history: BaseChatMessageHistory, limit: int = 10, message_type: str = "human") -> List[str]:
+    """
+    마지막 limit개 메시지 중 message_type 메시지 본문
+
+    저장소가 종류별 조회를 지원하면(SQLiteChatMessageHistory) 전체 히스토리를 읽지 않습니다.
+    """
+    fast_path = getattr(history, 'recent_contents', None)
+    if fast_path is not None:
+        return fast_path(limit, message_type)
+    return [
+        message.content
+        for message in history.messages[-limit:]
+        if getattr(message, 'type', None) == message_type
+    ]
+
+
+# ============================================================================
+# 싱글톤 패턴
+# ============================================================================
+
+_chat_history_store: ChatHistoryStore | None = None
+_chat_history_store_lock = threading.Lock()
+
+
+def get_chat_history_store(chat_config: Optional[dict] = None) -> ChatHistoryStore:
+    """
+    싱글톤 대화 기록 저장소 반환
+
+    Args:
+        chat_config: chatbot_config.json의 "chat_history" 섹션
+    """
+    global _chat_history_store
+    if _chat_history_store is None:
+        with _chat_history_store_lock:
+            if _chat_history_store is None:
+                chat_config = chat_config or {}
+                db_path = Path(chat_config.get('sqlite_path') or DEFAULT_CHAT_DB_PATH)
+                if not db_path.is_absolute():
+                    db_path = BASE_DIR / db_path
+                _chat_history_store = ChatHistoryStore(
+                    db_path,
+                    hot_messages=chat_config.get('hot_messages', 200),
+                    archive_block=chat_config.get('archive_block', 100)
+                )
+                print(f"[ChatHistory] SQLite 대화 기록 사용: {db_path}")
+    return _chat_history_store
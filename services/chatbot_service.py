@@ -89,9 +89,9 @@
 """
 
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
-import json
 
 # 환경변수 로드
 load_dotenv()
@@ -99,6 +99,9 @@ load_dotenv()
 # 프로젝트 루트 경로
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# reply 단계가 차단(circuit open)되었을 때 즉시 돌려줄 안내 메시지
+DEGRADED_REPLY_MESSAGE = "지금은 강태가 잠깐 자리를 비웠어요. 잠시 후 다시 말을 걸어주세요."
+
 
 class ChatbotService:
     """
@@ -163,18 +166,16 @@ class ChatbotService:
             raise ValueError("OPENAI_API_KEY 환경변수가 설정되지 않았습니다.")
 
         # 3. ChatOpenAI (LangChain) 초기화
-        from langchain_openai import ChatOpenAI
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.7,
-            max_tokens=500,
-            api_key=api_key
-        )
+        # 작업별 모델/토큰/온도/타임아웃은 chatbot_config.json의 model_routing에서 결정
+        from .model_router import get_model_router, TASK_REPLY
+        self.router = get_model_router()
+        self.llm = self.router.llm_for(TASK_REPLY)
         print("[ChatbotService] ChatOpenAI (LangChain) 초기화 완료")
 
         # 4. OpenAI Client 초기화 (임베딩용)
+        # 재시도는 llm_limiter가 속도 제한/우선순위에 맞춰 수행하므로 SDK 자체 재시도는 끔
         from openai import OpenAI
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, max_retries=0)
         print("[ChatbotService] OpenAI Client 초기화 완료")
 
         # 5. ChromaDB 초기화
@@ -185,35 +186,104 @@ class ChatbotService:
             print(f"[ChatbotService] ChromaDB 초기화 실패 (컬렉션이 없을 수 있음): {e}")
             self.collection = None
 
-        # 6. 세션 히스토리 저장소 초기화 (InMemoryChatMessageHistory)
-        from langchain_core.chat_history import InMemoryChatMessageHistory
-
-        # 각 사용자(session_id)별로 대화 내역을 저장하는 딕셔너리
-        self.store = {}
+        # 6. 세션 히스토리 저장소 초기화 (SQLite 영구 저장, "memory"면 InMemoryChatMessageHistory)
+        from langchain_core.chat_history import BaseChatMessageHistory, InMemoryChatMessageHistory
+
+        # 각 사용자(session_id)별 대화 내역 (LRU/유휴 TTL로 오래된 세션 정리)
+        from .session_cache import SessionCache
+        cache_config = self.config.get('session_cache', {})
+        storage_config = self.config.get('storage', {})
+        shared_config = self.config.get('shared_store', {})
+        chat_config = self.config.get('chat_history', {})
+        # memory 백엔드는 제거한 대화를 다시 읽어 올 곳이 없으므로(8월 조언 맥락 포함) 한도/만료 없이 보관
+        history_cache_config = cache_config.get('chat_histories')
+        if chat_config.get('backend', 'memory') != 'sqlite' and history_cache_config:
+            print("[ChatbotService] chat_history.backend가 memory라 대화 기록 캐시 한도를 적용하지 않습니다")
+            history_cache_config = None
+        self.store = SessionCache.from_config(
+            "chat_histories",
+            history_cache_config,
+            sizeof=_estimate_history_size
+        )
 
         # 세션 히스토리 가져오기 함수
-        def get_session_history(session_id: str) -> InMemoryChatMessageHistory:
-            if session_id not in self.store:
-                self.store[session_id] = InMemoryChatMessageHistory()
-            return self.store[session_id]
+        def get_session_history(session_id: str) -> BaseChatMessageHistory:
+            if storage_config.get('backend') == 'shared':
+                # 여러 워커가 같은 대화를 이어가도록 공유 저장소에서 직접 읽고 씀
+                from .chat_history import SharedChatMessageHistory
+                from .shared_store import get_shared_backend
+                return SharedChatMessageHistory(
+                    session_id,
+                    get_shared_backend(shared_config),
+                    key_prefix=shared_config.get('key_prefix', 'bbgame:')
+                )
+
+            history = self.store.get(session_id)
+            if history is None:
+                if chat_config.get('backend', 'memory') == 'sqlite':
+                    # 재시작 후에도 대화가 남도록 SQLite에 저장 (메모리에는 마지막 window개만)
+                    from .chat_history import SQLiteChatMessageHistory, get_chat_history_store
+                    history = SQLiteChatMessageHistory(
+                        session_id,
+                        get_chat_history_store(chat_config),
+                        window=chat_config.get('window', 40)
+                    )
+                else:
+                    history = InMemoryChatMessageHistory()
+                self.store.put(session_id, history)
+            else:
+                # 지난 턴에 추가된 메시지만큼 크기 갱신
+                self.store.refresh_size(session_id)
+            return history
 
         self.get_session_history = get_session_history
         print("[ChatbotService] 세션 히스토리 저장소 초기화 완료")
 
         # 7. 게임 상태 관리자 초기화
         from .game_state_manager import GameStateManager
+        from .game_state_storage import create_storage
         save_dir = BASE_DIR / "static" / "data" / "game_states"
-        self.game_manager = GameStateManager(save_dir)
+        storage = create_storage(storage_config, save_dir, shared_config=shared_config)
+
+        # 오래 접속하지 않은 세션은 압축 보관소로 옮김 (접속하면 자동 복원)
+        cold_config = self.config.get('cold_storage', {})
+        cold_storage = None
+        if cold_config.get('enabled', False):
+            from .cold_storage import DEFAULT_COLD_DIR, ColdStorage
+            cold_dir = Path(cold_config.get('dir') or DEFAULT_COLD_DIR)
+            if not cold_dir.is_absolute():
+                cold_dir = BASE_DIR / cold_dir
+            cold_storage = ColdStorage(
+                cold_dir,
+                segment_max_bytes=cold_config.get('segment_max_bytes', 64 * 1024 * 1024)
+            )
+
+        self.game_manager = GameStateManager(
+            save_dir,
+            storage=storage,
+            durability=storage_config.get('durability', GameStateManager.DURABILITY_SYNC),
+            flush_interval_s=storage_config.get('flush_interval_s', 1.0),
+            cache_config=cache_config.get('game_states'),
+            cold_storage=cold_storage,
+            archive_idle_s=cold_config.get('idle_days', 30) * 86400,
+            archive_interval_s=cold_config.get('interval_s', 3600),
+            archive_max_per_run=cold_config.get('max_per_run', 500)
+        )
         print("[ChatbotService] 게임 상태 관리자 초기화 완료")
 
-        # 8. 이벤트 감지기 초기화
+        # 8. 이벤트 감지기 초기화 (이벤트/힌트 판정 전용 모델)
+        from .model_router import TASK_EVENT_JUDGE, TASK_HINT_JUDGE, TASK_STAT_JUDGE
         from .event_detector import EventDetector
-        self.event_detector = EventDetector(self.llm)
+        self.event_detector = EventDetector(
+            self.router.llm_for(TASK_EVENT_JUDGE),
+            hint_llm=self.router.llm_for(TASK_HINT_JUDGE),
+            router=self.router
+        )
         print("[ChatbotService] 이벤트 감지기 초기화 완료")
 
-        # 9. 스탯 계산기 초기화
+        # 9. 스탯 계산기 초기화 (스탯 판정 전용 모델)
         from .stat_calculator import StatCalculator
-        self.stat_calculator = StatCalculator(self.llm)
+        self.stat_calculator = StatCalculator(self.router.llm_for(TASK_STAT_JUDGE), router=self.router)
         print("[ChatbotService] 스탯 계산기 초기화 완료")
 
         print("[ChatbotService] 초기화 완료")
@@ -232,12 +302,14 @@ class ChatbotService:
             "system_prompt": {...}
         }
         """
-        config_path = BASE_DIR / "config" / "chatbot_config.json"
+        # 파일이 바뀌면 ConfigService가 다시 읽어 _on_config_changed로 교체
+        from .config_service import CONFIG_CHATBOT, get_config_service
 
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+            service = get_config_service()
+            service.subscribe(CONFIG_CHATBOT, self._on_config_changed)
+            return service.get(CONFIG_CHATBOT)
+        except (FileNotFoundError, ValueError) as e:
             print(f"[WARNING] Config 로드 실패 ({type(e).__name__}): {e}")
             print(f"[WARNING] 기본 설정을 사용합니다")
             return {
@@ -250,6 +322,17 @@ class ChatbotService:
             }
     
     
+    def _on_config_changed(self, config: dict):
+        """
+        chatbot_config.json 변경 반영
+
+        시스템 프롬프트/이름처럼 요청마다 self.config에서 읽는 값은 다음 요청부터 적용됩니다.
+        storage, model_routing 등 초기화 때 객체를 만든 섹션은 재시작해야 반영됩니다.
+        """
+        self.config = config
+        print(f"[ChatbotService] Config 다시 로드: {config.get('name', 'Unknown')}")
+
+
     def _init_chromadb(self):
         """
         ChromaDB 초기화 및 컬렉션 반환
@@ -313,9 +396,18 @@ class ChatbotService:
         - )
         - return response.data[0].embedding
         """
-        response = self.client.embeddings.create(
-            input=[text],
-            model="text-embedding-3-large"
+        from .llm_limiter import PRIORITY_INTERACTIVE
+        from .model_router import TASK_EMBEDDING
+
+        route = self.router.route(TASK_EMBEDDING)
+        response = self.router.invoke(
+            TASK_EMBEDDING,
+            lambda: self.client.embeddings.create(
+                input=[text],
+                model=route['model'],
+                timeout=route.get('timeout_s')
+            ),
+            priority=PRIORITY_INTERACTIVE
         )
         return response.data[0].embedding
     
@@ -381,8 +473,15 @@ class ChatbotService:
             print("[RAG] ChromaDB 컬렉션이 비어있거나 없습니다.")
             return (None, None, None)
 
-        # 1. 쿼리 임베딩 생성
-        query_embedding = self._create_embedding(query)
+        # 1. 쿼리 임베딩 생성 (embedding 브레이커가 차단 중이거나 실패하면 RAG 생략)
+        from .circuit_breaker import get_breaker, STAGE_EMBEDDING
+        query_embedding = get_breaker(STAGE_EMBEDDING).call(
+            lambda: self._create_embedding(query),
+            fallback=lambda: None
+        )
+        if query_embedding is None:
+            print("[RAG] ✗ 임베딩 단계 차단/실패 - RAG 생략")
+            return (None, None, None)
 
         # 2. ChromaDB 검색 (where 필터 적용)
         results = self.collection.query(
@@ -646,11 +745,34 @@ class ChatbotService:
             )
 
             # 체인 실행 (session_id로 username 사용)
+            # reply 브레이커가 차단 중이면 업스트림을 기다리지 않고 바로 안내
+            from .circuit_breaker import get_breaker, STAGE_REPLY
+            reply_breaker = get_breaker(STAGE_REPLY)
+            if not reply_breaker.allow():
+                print(f"[LLM] ✗ reply 단계 차단 중 - 안내 메시지 반환")
+                print(f"{'='*50}\n")
+                return {
+                    'reply': DEGRADED_REPLY_MESSAGE,
+                    'image': None
+                }
+
             print(f"[LLM] Invoking chain with session_id='{username}'...")
-            response = chain_with_history.invoke(
-                {"input": user_message},
-                config={"configurable": {"session_id": username}}
-            )
+            from .llm_limiter import PRIORITY_INTERACTIVE
+            from .model_router import TASK_REPLY
+            reply_started = time.monotonic()
+            try:
+                response = self.router.invoke(
+                    TASK_REPLY,
+                    lambda: chain_with_history.invoke(
+                        {"input": user_message},
+                        config={"configurable": {"session_id": username}}
+                    ),
+                    priority=PRIORITY_INTERACTIVE
+                )
+            except Exception:
+                reply_breaker.record(False, time.monotonic() - reply_started)
+                raise
+            reply_breaker.record(True, time.monotonic() - reply_started)
 
             # AIMessage에서 텍스트 추출
             reply = response.content
@@ -662,9 +784,6 @@ class ChatbotService:
             # [5단계] 스탯 변화 계산 및 적용
             game_state = self.game_manager.get_or_create(username)
 
-            # 이전 스탯 저장 (변화량 계산용)
-            old_stats = game_state.stats.to_dict()
-
             # LLM으로 스탯 변화 분석
             stat_changes, stat_reason = self.stat_calculator.analyze_conversation(
                 user_message=user_message,
@@ -672,17 +791,21 @@ class ChatbotService:
                 game_state=game_state
             )
 
-            # 스탯 변화 적용
-            if stat_changes:
-                game_state.stats.apply_changes(stat_changes)
-                print(f"[STAT] ✓ Stat changes applied: {stat_changes}")
-                print(f"[STAT] Reason: {stat_reason}")
-            else:
-                print(f"[STAT] No stat changes")
+            with self.game_manager.session_lock(username) as game_state:
+                # 이전 스탯 저장 (변화량 계산용)
+                old_stats = game_state.stats.to_dict()
+
+                # 스탯 변화 적용
+                if stat_changes:
+                    game_state.stats.apply_changes(stat_changes)
+                    print(f"[STAT] ✓ Stat changes applied: {stat_changes}")
+                    print(f"[STAT] Reason: {stat_reason}")
+                else:
+                    print(f"[STAT] No stat changes")
 
-            # [6단계] 게임 상태 저장
-            self.game_manager.save(username)
-            print(f"[GAME] ✓ Game state saved for '{username}'")
+                # [6단계] 게임 상태 저장
+                self.game_manager.save(username)
+                print(f"[GAME] ✓ Game state saved for '{username}'")
 
             # [7단계] 이벤트 감지 및 힌트 제공
             conversation_history = self.get_session_history(username).messages
@@ -706,19 +829,20 @@ class ChatbotService:
             if event_info:
                 print(f"[EVENT] ✓ Event triggered: {event_info['event_name']}")
 
-                # 이벤트의 flags 적용
-                if 'flags' in event_info:
-                    for flag_key, flag_value in event_info['flags'].items():
-                        game_state.flags[flag_key] = flag_value
-                    print(f"[EVENT] ✓ Flags applied: {event_info['flags']}")
+                with self.game_manager.session_lock(username) as game_state:
+                    # 이벤트의 flags 적용
+                    if 'flags' in event_info:
+                        for flag_key, flag_value in event_info['flags'].items():
+                            game_state.flags[flag_key] = flag_value
+                        print(f"[EVENT] ✓ Flags applied: {event_info['flags']}")
 
-                # 이벤트의 stat_changes 적용
-                if 'stat_changes' in event_info:
-                    game_state.stats.apply_changes(event_info['stat_changes'])
-                    print(f"[EVENT] ✓ Stat changes applied: {event_info['stat_changes']}")
+                    # 이벤트의 stat_changes 적용
+                    if 'stat_changes' in event_info:
+                        game_state.stats.apply_changes(event_info['stat_changes'])
+                        print(f"[EVENT] ✓ Stat changes applied: {event_info['stat_changes']}")
 
-                # 게임 상태 저장
-                self.game_manager.save(username)
+                    # 게임 상태 저장
+                    self.game_manager.save(username)
 
             if hint:
                 print(f"[HINT] ✓ Hint provided: {hint}")
@@ -856,25 +980,53 @@ class ChatbotService:
                 history_messages_key="history"
             )
 
+            # reply 브레이커가 차단 중이면 업스트림을 기다리지 않고 바로 안내
+            from .circuit_breaker import get_breaker, STAGE_REPLY
+            reply_breaker = get_breaker(STAGE_REPLY)
+            if not reply_breaker.allow():
+                print(f"[LLM] ✗ reply 단계 차단 중 - 안내 메시지 반환")
+                print(f"{'='*50}\n")
+                yield {
+                    'type': 'error',
+                    'content': DEGRADED_REPLY_MESSAGE
+                }
+                return
+
             # [5단계] 스트리밍 실행
             print(f"[LLM] Starting stream with session_id='{username}'...")
 
             full_response = ""  # 전체 응답 수집 (스탯 계산용)
 
-            # 스트리밍으로 토큰 생성
-            for chunk in chain_with_history.stream(
-                {"input": user_message},
-                config={"configurable": {"session_id": username}}
-            ):
-                # AIMessage 또는 AIMessageChunk에서 content 추출
-                if hasattr(chunk, 'content'):
-                    token = chunk.content
-                    if token:  # 빈 토큰 필터링
-                        full_response += token
-                        yield {
-                            'type': 'token',
-                            'content': token
-                        }
+            # 스트리밍으로 토큰 생성 (제한기 슬롯을 스트림 종료까지 유지)
+            # reply 브레이커에는 첫 토큰까지 걸린 시간을 기록
+            from .llm_limiter import PRIORITY_INTERACTIVE
+            from .model_router import TASK_REPLY
+            reply_started = time.monotonic()
+            first_token_latency = None
+            try:
+                for chunk in self.router.stream(
+                    TASK_REPLY,
+                    lambda: chain_with_history.stream(
+                        {"input": user_message},
+                        config={"configurable": {"session_id": username}}
+                    ),
+                    priority=PRIORITY_INTERACTIVE
+                ):
+                    # AIMessage 또는 AIMessageChunk에서 content 추출
+                    if hasattr(chunk, 'content'):
+                        token = chunk.content
+                        if token:  # 빈 토큰 필터링
+                            if first_token_latency is None:
+                                first_token_latency = time.monotonic() - reply_started
+                            full_response += token
+                            yield {
+                                'type': 'token',
+                                'content': token
+                            }
+            except Exception:
+                reply_breaker.record(False, time.monotonic() - reply_started)
+                raise
+            reply_breaker.record(True, first_token_latency if first_token_latency is not None else time.monotonic() - reply_started)
 
             print(f"[LLM] ✓ Stream completed")
             print(f"[BOT] {full_response[:100]}...")
@@ -882,7 +1034,6 @@ class ChatbotService:
 
             # [6단계] 스탯 변화 계산 및 적용 (빠름)
             game_state = self.game_manager.get_or_create(username)
-            old_stats = game_state.stats.to_dict()
 
             stat_changes, stat_reason = self.stat_calculator.analyze_conversation(
                 user_message=user_message,
@@ -890,38 +1041,42 @@ class ChatbotService:
                 game_state=game_state
             )
 
-            if stat_changes:
-                game_state.stats.apply_changes(stat_changes)
-                print(f"[STAT] ✓ Stat changes applied: {stat_changes}")
+            # 스탯 적용과 저장은 세션 락 안에서 (훈련/월 진행 요청과의 경합 방지)
+            with self.game_manager.session_lock(username) as game_state:
+                old_stats = game_state.stats.to_dict()
 
-                # 마일스톤 체크 (친밀도, 스탯 조합)
-                from services.moment_manager import get_moment_manager
-                moment_mgr = get_moment_manager()
+                if stat_changes:
+                    game_state.stats.apply_changes(stat_changes)
+                    print(f"[STAT] ✓ Stat changes applied: {stat_changes}")
 
-                new_stats = game_state.stats.to_dict()
+                    # 마일스톤 체크 (친밀도, 스탯 조합)
+                    from services.moment_manager import get_moment_manager
+                    moment_mgr = get_moment_manager()
 
-                # 친밀도 마일스톤 체크
-                intimacy_cards = moment_mgr.check_and_create_intimacy_milestones(
-                    game_state=game_state,
-                    old_intimacy=old_stats.get('intimacy', 0),
-                    new_intimacy=new_stats.get('intimacy', 0)
-                )
-                moment_mgr.add_cards_to_game_state(game_state, intimacy_cards)
+                    new_stats = game_state.stats.to_dict()
 
-                # 스탯 조합 마일스톤 체크
-                stat_combo_cards = moment_mgr.check_and_create_stat_combo_milestones(
-                    game_state=game_state,
-                    old_stats=old_stats,
-                    new_stats=new_stats
-                )
-                moment_mgr.add_cards_to_game_state(game_state, stat_combo_cards)
+                    # 친밀도 마일스톤 체크
+                    intimacy_cards = moment_mgr.check_and_create_intimacy_milestones(
+                        game_state=game_state,
+                        old_intimacy=old_stats.get('intimacy', 0),
+                        new_intimacy=new_stats.get('intimacy', 0)
+                    )
+                    moment_mgr.add_cards_to_game_state(game_state, intimacy_cards)
 
-            else:
-                print(f"[STAT] No stat changes")
+                    # 스탯 조합 마일스톤 체크
+                    stat_combo_cards = moment_mgr.check_and_create_stat_combo_milestones(
+                        game_state=game_state,
+                        old_stats=old_stats,
+                        new_stats=new_stats
+                    )
+                    moment_mgr.add_cards_to_game_state(game_state, stat_combo_cards)
 
-            # [7단계] 게임 상태 저장
-            self.game_manager.save(username)
-            print(f"[GAME] ✓ Game state saved for '{username}'")
+                else:
+                    print(f"[STAT] No stat changes")
+
+                # [7단계] 게임 상태 저장
+                self.game_manager.save(username)
+                print(f"[GAME] ✓ Game state saved for '{username}'")
 
             # [8단계] done 신호 즉시 전송 ⭐
             yield {
@@ -965,19 +1120,20 @@ class ChatbotService:
             if event_info:
                 print(f"[EVENT] ✓ Event triggered: {event_info['event_name']}")
 
-                # 이벤트의 flags 적용
-                if 'flags' in event_info:
-                    for flag_key, flag_value in event_info['flags'].items():
-                        game_state.flags[flag_key] = flag_value
-                    print(f"[EVENT] ✓ Flags applied: {event_info['flags']}")
+                with self.game_manager.session_lock(username) as game_state:
+                    # 이벤트의 flags 적용
+                    if 'flags' in event_info:
+                        for flag_key, flag_value in event_info['flags'].items():
+                            game_state.flags[flag_key] = flag_value
+                        print(f"[EVENT] ✓ Flags applied: {event_info['flags']}")
 
-                # 이벤트의 stat_changes 적용
-                if 'stat_changes' in event_info:
-                    game_state.stats.apply_changes(event_info['stat_changes'])
-                    print(f"[EVENT] ✓ Stat changes applied: {event_info['stat_changes']}")
+                    # 이벤트의 stat_changes 적용
+                    if 'stat_changes' in event_info:
+                        game_state.stats.apply_changes(event_info['stat_changes'])
+                        print(f"[EVENT] ✓ Stat changes applied: {event_info['stat_changes']}")
 
-                # 게임 상태 저장
-                self.game_manager.save(username)
+                    # 게임 상태 저장
+                    self.game_manager.save(username)
 
                 # 이벤트 업데이트 전송 ⭐
                 yield {
@@ -1019,6 +1175,11 @@ class ChatbotService:
             }
 
 
+def _estimate_history_size(history) -> int:
+    """대화 히스토리의 추정 메모리 크기 (메시지 본문 + 메시지당 고정 오버헤드)"""
+    return sum(len(str(message.content).encode('utf-8')) + 64 for message in history.messages)
+
+
 # ============================================================================
 # 싱글톤 패턴
 # ============================================================================
@@ -0,0 +1,249 @@
+"""
+파이프라인 단계별 서킷 브레이커
+
+OpenAI가 느려지면 한 턴이 RAG 검색 → 응답 → 스탯 분석 → 이벤트 체크 → 힌트를
+순서대로 모두 기다리게 됩니다. 각 단계에 서킷 브레이커를 두어,
+최근 구간(rolling window)의 오류율이나 느린 호출 비율이 임계값을 넘으면
+해당 단계를 잠시 차단(open)하고 즉시 대체 동작(fallback)으로 처리합니다.
+
+단계와 대체 동작:
+- embedding: RAG 생략 (일반 대화 모드)
+- reply: 즉시 안내 메시지 반환
+- stat_judge: 스탯 변화 없음
+- event_judge: 이벤트 체크 생략
+- hint_judge: 힌트 생략
+- at_bat_scorer: 로컬 규칙 기반 조언 채점
+
+설정은 config/chatbot_config.json의 "circuit_breakers"에서 읽습니다.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Optional, TypeVar
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# 파이프라인 단계 이름
+STAGE_EMBEDDING = "embedding"
+STAGE_REPLY = "reply"
+STAGE_STAT_JUDGE = "stat_judge"
+STAGE_EVENT_JUDGE = "event_judge"
+STAGE_HINT_JUDGE = "hint_judge"
+STAGE_AT_BAT_SCORER = "at_bat_scorer"
+
+STAGES = [
+    STAGE_EMBEDDING,
+    STAGE_REPLY,
+    STAGE_STAT_JUDGE,
+    STAGE_EVENT_JUDGE,
+    STAGE_HINT_JUDGE,
+    STAGE_AT_BAT_SCORER,
+]
+
+DEFAULT_SETTINGS = {
+    "window_s": 60,          # 통계를 유지할 최근 구간(초)
+    "min_calls": 5,          # 판단에 필요한 최소 호출 수
+    "failure_rate": 0.5,     # 이 비율 이상 실패하면 차단
+    "slow_call_s": 5.0,      # 이 시간 이상 걸리면 느린 호출
+    "slow_call_rate": 0.5,   # 이 비율 이상 느리면 차단
+    "open_s": 30             # 차단 유지 시간 (이후 시험 호출 1회 허용)
+}
+
+T = TypeVar('T')
+
+
+class CircuitBreaker:
+    """
+    단계 하나의 서킷 브레이커
+
+    상태:
+    - closed: 정상 호출
+    - open: 호출하지 않고 바로 fallback
+    - half_open: open_s가 지난 뒤 시험 호출 1회만 허용 (성공하면 closed, 실패하면 다시 open)
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window_s: float = 60,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call_s: float = 5.0,
+        slow_call_rate: float = 0.5,
+        open_s: float = 30
+    ):
+        self.name = name
+        self.window_s = window_s
+        self.min_calls = max(1, int(min_calls))
+        self.failure_rate = failure_rate
+        self.slow_call_s = slow_call_s
+        self.slow_call_rate = slow_call_rate
+        self.open_s = open_s
+
+        self.state = self.CLOSED
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._calls: deque = deque()  # (timestamp, ok, latency)
+        self._lock = threading.Lock()
+
+        # 누적 카운터
+        self.rejected = 0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """지금 실제 호출을 해도 되는지 여부"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.open_s:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    return False
+                self._probe_in_flight = True
+
+            return True
+
+    def record(self, ok: bool, latency: float):
+        """호출 결과 기록"""
+        now = time.monotonic()
+        slow = latency >= self.slow_call_s
+
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if ok and not slow:
+                    self.state = self.CLOSED
+                    self._calls.clear()
+                    print(f"[CircuitBreaker] {self.name}: 복구됨 (closed)")
+                else:
+                    self._trip(now)
+                return
+
+            self._calls.append((now, ok, latency))
+            self._trim(now)
+
+            total = len(self._calls)
+            if self.state == self.CLOSED and total >= self.min_calls:
+                failures = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+                slow_calls = sum(1 for _, _, call_latency in self._calls if call_latency >= self.slow_call_s)
+                if failures / total >= self.failure_rate or slow_calls / total >= self.slow_call_rate:
+                    self._trip(now)
+
+    def call(self, fn: Callable[[], T], fallback: Callable[[], T]) -> T:
+        """
+        브레이커를 통해 fn 실행
+
+        차단 중이거나 fn이 예외를 던지면 fallback() 결과를 반환합니다.
+        """
+        if not self.allow():
+            return fallback()
+
+        started = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            self.record(False, time.monotonic() - started)
+            print(f"[CircuitBreaker] {self.name}: 호출 실패, 대체 동작 사용 ({type(e).__name__}: {e})")
+            return fallback()
+
+        self.record(True, time.monotonic() - started)
+        return result
+
+    def snapshot(self) -> dict:
+        """상태 정보 (헬스 체크용)"""
+        with self._lock:
+            self._trim(time.monotonic())
+            total = len(self._calls)
+            failures = sum(1 for _, ok, _ in self._calls if not ok)
+            slow_calls = sum(1 for _, _, latency in self._calls if latency >= self.slow_call_s)
+            avg_latency = sum(latency for _, _, latency in self._calls) / total if total else 0.0
+            return {
+                'state': self.state,
+                'window_calls': total,
+                'window_failures': failures,
+                'window_slow_calls': slow_calls,
+                'avg_latency_ms': round(avg_latency * 1000, 1),
+                'rejected': self.rejected,
+                'trips': self.trips
+            }
+
+    def _trip(self, now: float):
+        """차단 상태로 전환 (self._lock 보유 상태에서 호출)"""
+        self.state = self.OPEN
+        self.opened_at = now
+        self.trips += 1
+        self._calls.clear()
+        print(f"[CircuitBreaker] {self.name}: 차단됨 (open, {self.open_s}초)")
+
+    def _trim(self, now: float):
+        """window_s보다 오래된 기록 제거 (self._lock 보유 상태에서 호출)"""
+        while self._calls and now - self._calls[0][0] > self.window_s:
+            self._calls.popleft()
+
+
+class BreakerRegistry:
+    """파이프라인 단계별 브레이커 모음"""
+
+    def __init__(self, breaker_config: Optional[dict] = None):
+        """
+        Args:
+            breaker_config: {"default": {...}, "stat_judge": {...}, ...}
+        """
+        breaker_config = breaker_config or {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        for stage in STAGES:
+            settings = dict(DEFAULT_SETTINGS)
+            settings.update(breaker_config.get('default', {}))
+            settings.update(breaker_config.get(stage, {}))
+            self._breakers[stage] = CircuitBreaker(name=stage, **settings)
+
+    def get(self, stage: str) -> CircuitBreaker:
+        """단계 브레이커 반환"""
+        return self._breakers[stage]
+
+    def snapshot(self) -> dict:
+        """모든 단계의 상태"""
+        return {stage: breaker.snapshot() for stage, breaker in self._breakers.items()}
+
+
+# ============================================================================
+# 싱글톤 패턴
+# ============================================================================
+
+_breaker_registry: BreakerRegistry | None = None
+_breaker_registry_lock = threading.Lock()
+
+
+def get_breaker_registry() -> BreakerRegistry:
+    """싱글톤 BreakerRegistry 인스턴스 반환 (chatbot_config.json의 circuit_breakers 사용)"""
+    global _breaker_registry
+    if _breaker_registry is None:
+        with _breaker_registry_lock:
+            if _breaker_registry is None:
+                config_path = BASE_DIR / "config" / "chatbot_config.json"
+                try:
+                    with open(config_path, 'r', encoding='utf-8') as f:
+                        breaker_config = json.load(f).get('circuit_breakers', {})
+                except (FileNotFoundError, json.JSONDecodeError) as e:
+                    print(f"[WARNING] circuit_breakers 설정 로드 실패 ({type(e).__name__}): {e}")
+                    breaker_config = {}
+                _breaker_registry = BreakerRegistry(breaker_config)
+    return _breaker_registry
+
+
+def get_breaker(stage: str) -> CircuitBreaker:
+    """단계 브레이커 반환 (편의 함수)"""
+    return get_breaker_registry().get(stage)
@@ -0,0 +1,353 @@
+"""
+비활성 세션 보관소 (Cold Storage)
+
+게임을 끝냈거나 오래 접속하지 않은 세션의 상태를 압축해 세그먼트 파일에 모아 둡니다.
+활성 저장소(game_states 디렉토리, SQLite 등)에는 최근 세션만 남으므로
+디렉토리가 작게 유지되고 백업 대상 파일 수와 용량이 줄어듭니다.
+
+파일 구성 (cold_dir):
+- segment-000001.seg ...: zlib으로 압축한 상태를 이어 붙인 파일 (세션 여러 개)
+- cold_index.jsonl: 세션 ID → (세그먼트, 위치, 길이) 색인 (append-only, 복원되면 삭제 기록)
+    * 첫 줄은 {"generation": N} (compact()로 색인을 다시 쓸 때마다 증가, 없으면 0)
+- cold.lock: 프로세스 간 락 (기록은 배타, 읽기는 공유)
+- archiver.lock: 보관/정리 담당 프로세스 표시
+
+GameStateManager가 주기적으로 유휴 세션을 옮기고(archive_idle),
+저장소에 없는 세션을 로드할 때 여기서 찾아 활성 저장소로 되돌립니다.
+
+여러 워커(gunicorn -w N)가 같은 디렉토리를 쓸 수 있습니다.
+- 보관/정리는 archiver.lock을 먼저 잡은 프로세스 하나만 수행합니다. (claim_archiver)
+- 복원(discard)은 어느 워커에서나 일어나므로 모든 기록은 cold.lock을 배타로 잡고,
+  색인 파일의 새 기록을 먼저 읽은 뒤 추가합니다.
+- 읽을 때마다 색인 세대를 확인해, 다른 프로세스가 정리했으면 색인을 처음부터 다시 읽습니다.
+fcntl이 없는 환경(Windows)에서는 프로세스 간 락 없이 한 프로세스만 쓴다고 가정합니다.
+
+보관 현황:
+    python -m services.cold_storage stats
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .state_codec import BASE_DIR, CorruptStateError, atomic_write, decode, encode
+
+try:
+    import fcntl  # POSIX 전용: 프로세스 간 파일 락
+except ImportError:
+    fcntl = None
+
+
+DEFAULT_COLD_DIR = BASE_DIR / "static" / "data" / "game_cold"
+
+
+class ColdStorage:
+    """세그먼트 파일 기반 압축 보관소"""
+
+    INDEX_NAME = "cold_index.jsonl"
+    LOCK_NAME = "cold.lock"
+    ARCHIVER_LOCK_NAME = "archiver.lock"
+    SEGMENT_PATTERN = "segment-*.seg"
+
+    def __init__(
+        self,
+        cold_dir: Path = DEFAULT_COLD_DIR,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        compress_level: int = 6
+    ):
+        """
+        Args:
+            cold_dir: 보관 디렉토리
+            segment_max_bytes: 세그먼트 파일 최대 크기 (넘으면 새 세그먼트)
+            compress_level: zlib 압축 수준 (1~9)
+        """
+        self.cold_dir = Path(cold_dir)
+        self.cold_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = int(segment_max_bytes)
+        self.compress_level = int(compress_level)
+
+        # 세션 ID → (세그먼트 이름, 위치, 길이)
+        self._index: Dict[str, Tuple[str, int, int]] = {}
+        self._index_offset = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._archiver_file = None
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh_index()
+
+    @property
+    def index_path(self) -> Path:
+        return self.cold_dir / self.INDEX_NAME
+
+    # ------------------------------------------------------------------
+    # 보관 / 복원
+    # ------------------------------------------------------------------
+
+    def claim_archiver(self) -> bool:
+        """
+        이 프로세스가 보관/정리 담당인지 여부
+
+        처음 archiver.lock을 잡은 프로세스가 종료될 때까지 담당하고,
+        종료되면 다음에 호출한 프로세스가 이어받습니다.
+        """
+        if fcntl is None:
+            return True
+        with self._lock:
+            if self._archiver_file is not None:
+                return True
+            f = open(self.cold_dir / self.ARCHIVER_LOCK_NAME, 'a+b')
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+            self._archiver_file = f
+            print(f"[ColdStorage] 이 프로세스(pid {os.getpid()})가 보관/정리를 담당합니다")
+            return True
+
+    def put(self, session_id: str, data: dict):
+        """상태 보관 (세그먼트와 색인을 fsync한 뒤 반환)"""
+        payload = zlib.compress(encode(data), self.compress_level)
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh_index()
+            segment = self._writable_segment(len(payload))
+            with open(self.cold_dir / segment, 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            self._append_index({
+                'session_id': session_id, 'segment': segment,
+                'offset': offset, 'length': len(payload), 'ts': round(time.time(), 3)
+            })
+            self._index[session_id] = (segment, offset, len(payload))
+
+    def load(self, session_id: str) -> Optional[dict]:
+        """
+        보관된 상태 반환 (없으면 None)
+
+        Raises:
+            CorruptStateError: 세그먼트가 없거나 잘렸거나 압축을 풀 수 없는 경우
+        """
+        # 읽는 동안 다른 프로세스가 정리(세그먼트 삭제)하지 못하도록 공유 락 유지
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh_index()
+            entry = self._index.get(session_id)
+            if entry is None:
+                return None
+
+            segment, offset, length = entry
+            try:
+                with open(self.cold_dir / segment, 'rb') as f:
+                    f.seek(offset)
+                    payload = f.read(length)
+            except FileNotFoundError as e:
+                raise CorruptStateError(f"보관 세그먼트가 없습니다 ({session_id}, {segment})") from e
+        if len(payload) != length:
+            raise CorruptStateError(f"보관된 상태가 잘렸습니다 ({session_id}, {segment}@{offset})")
+        try:
+            return decode(zlib.decompress(payload))
+        except zlib.error as e:
+            raise CorruptStateError(f"보관된 상태 압축 해제 실패 ({session_id}, {segment}@{offset}): {e}") from e
+
+    def discard(self, session_id: str):
+        """보관 항목 삭제 표시 (세그먼트 공간은 compact()에서 회수)"""
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh_index()
+            if self._index.pop(session_id, None) is not None:
+                self._append_index({'session_id': session_id, 'deleted': True})
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh_index()
+            return session_id in self._index
+
+    def session_ids(self) -> List[str]:
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh_index()
+            return sorted(self._index)
+
+    # ------------------------------------------------------------------
+    # 정리 / 통계
+    # ------------------------------------------------------------------
+
+    def compact(self, min_live_ratio: float = 0.5) -> int:
+        """
+        복원되어 빈 공간이 많은 세그먼트를 다시 쓰고 색인을 새로 작성
+
+        Args:
+            min_live_ratio: 살아 있는 데이터 비율이 이보다 낮은 세그먼트를 다시 씀
+
+        Returns:
+            다시 쓴 세그먼트 수
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh_index()
+            live = self._live_bytes_by_segment()
+            targets = [
+                path.name for path in sorted(self.cold_dir.glob(self.SEGMENT_PATTERN))
+                if path.stat().st_size and live.get(path.name, 0) / path.stat().st_size < min_live_ratio
+            ]
+            if not targets:
+                return 0
+
+            # 옮길 항목을 먼저 읽어 둔 뒤 새 세그먼트에 다시 씀
+            moving = []
+            for session_id, (segment, offset, length) in self._index.items():
+                if segment in targets:
+                    with open(self.cold_dir / segment, 'rb') as f:
+                        f.seek(offset)
+                        moving.append((session_id, f.read(length)))
+
+            target_set = frozenset(targets)
+            for session_id, payload in moving:
+                segment = self._writable_segment(len(payload), exclude=target_set)
+                with open(self.cold_dir / segment, 'ab') as f:
+                    offset = f.seek(0, os.SEEK_END)
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._index[session_id] = (segment, offset, len(payload))
+
+            self._rewrite_index()
+            for segment in targets:
+                (self.cold_dir / segment).unlink(missing_ok=True)
+        print(f"[ColdStorage] 세그먼트 {len(targets)}개 정리 (세션 {len(moving)}개 이동)")
+        return len(targets)
+
+    def stats(self) -> dict:
+        """보관 현황"""
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh_index()
+            segments = sorted(self.cold_dir.glob(self.SEGMENT_PATTERN))
+            return {
+                'sessions': len(self._index),
+                'segments': len(segments),
+                'bytes': sum(path.stat().st_size for path in segments),
+                'live_bytes': sum(self._live_bytes_by_segment().values())
+            }
+
+    # ------------------------------------------------------------------
+    # 내부 구현 (self._lock 보유 상태에서 호출)
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        """프로세스 간 락 (fcntl이 없으면 아무것도 하지 않음)"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.cold_dir / self.LOCK_NAME, 'a+b') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _refresh_index(self):
+        """
+        색인 파일에서 아직 읽지 않은 부분 적용 (cold.lock 보유 상태에서 호출)
+
+        다른 프로세스가 compact()로 색인을 다시 썼으면(세대가 바뀜) 처음부터 다시 읽습니다.
+        """
+        try:
+            f = open(self.index_path, 'rb')
+        except FileNotFoundError:
+            self._index.clear()
+            self._index_offset = 0
+            self._generation = 0
+            return
+
+        with f:
+            generation = _index_generation(f.readline())
+            if generation != self._generation:
+                self._index.clear()
+                self._index_offset = 0
+                self._generation = generation
+            f.seek(self._index_offset)
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    break  # 기록 도중 잘린 마지막 줄
+                entry = json.loads(raw_line)
+                if 'generation' in entry:
+                    pass
+                elif entry.get('deleted'):
+                    self._index.pop(entry['session_id'], None)
+                else:
+                    self._index[entry['session_id']] = (entry['segment'], entry['offset'], entry['length'])
+                self._index_offset += len(raw_line)
+
+    def _append_index(self, entry: dict):
+        line = (json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+        with open(self.index_path, 'ab') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._index_offset += len(line)
+
+    def _rewrite_index(self):
+        """살아 있는 항목만으로 색인을 다시 씀 (세대 증가, 다른 프로세스는 다음 읽기에서 다시 로드)"""
+        generation = self._generation + 1
+        lines = [json.dumps({'generation': generation}) + "\n"] + [
+            json.dumps({'session_id': session_id, 'segment': segment, 'offset': offset, 'length': length},
+                       ensure_ascii=False, separators=(',', ':')) + "\n"
+            for session_id, (segment, offset, length) in self._index.items()
+        ]
+        payload = "".join(lines).encode('utf-8')
+        atomic_write(self.index_path, payload)
+        self._index_offset = len(payload)
+        self._generation = generation
+
+    def _writable_segment(self, length: int, exclude: frozenset = frozenset()) -> str:
+        """length 바이트를 추가할 세그먼트 이름 (마지막 세그먼트가 차면 새로 만듦)"""
+        segments = [path for path in sorted(self.cold_dir.glob(self.SEGMENT_PATTERN)) if path.name not in exclude]
+        if segments and segments[-1].stat().st_size + length <= self.segment_max_bytes:
+            return segments[-1].name
+        numbers = [int(path.stem.split('-')[1]) for path in self.cold_dir.glob(self.SEGMENT_PATTERN)]
+        return f"segment-{max(numbers, default=0) + 1:06d}.seg"
+
+    def _live_bytes_by_segment(self) -> Dict[str, int]:
+        live: Dict[str, int] = {}
+        for segment, _, length in self._index.values():
+            live[segment] = live.get(segment, 0) + length
+        return live
+
+
+def _index_generation(first_line: bytes) -> int:
+    """색인 첫 줄의 세대 번호 (세대 줄이 없는 이전 형식이면 0)"""
+    if not first_line.endswith(b"\n"):
+        return 0
+    try:
+        return int(json.loads(first_line).get('generation', 0))
+    except (ValueError, AttributeError):
+        return 0
+
+
+if __name__ == "__main__":
+    """
+    보관 현황 출력
+
+    실행 방법:
+    python -m services.cold_storage stats
+    """
+    if len(sys.argv) < 2 or sys.argv[1] != "stats":
+        print("사용법: python -m services.cold_storage stats")
+        sys.exit(1)
+
+    config_path = BASE_DIR / "config" / "chatbot_config.json"
+    with open(config_path, 'r', encoding='utf-8') as f:
+        cold_config = json.load(f).get('cold_storage', {})
+    cold_dir = Path(cold_config.get('dir') or DEFAULT_COLD_DIR)
+    if not cold_dir.is_absolute():
+        cold_dir = BASE_DIR / cold_dir
+
+    info = ColdStorage(cold_dir).stats()
+    print(f"보관 디렉토리: {cold_dir}")
+    print(f"세션 {info['sessions']}개 / 세그먼트 {info['segments']}개")
+    print(f"크기 {info['bytes'] / 1024:.1f}KB (사용 중 {info['live_bytes'] / 1024:.1f}KB)")
@@ -0,0 +1,257 @@
+"""
+설정 파일 핫 리로드
+
+chatbot_config.json과 storybook_config.json은 예전에는 시작할 때 한 번만 읽었기 때문에
+문구 하나를 고쳐도 서버를 재시작해야 했고, 그 과정에서 메모리의 대화 기록과 캐시가 사라졌습니다.
+
+ConfigService는 등록된 파일(또는 디렉토리 안 파일들)의 mtime/크기를
+주기적으로 확인(폴링, 외부 패키지 없음)하고,
+바뀐 파일을 요청 처리와 별개인 스레드에서 파싱/검증(compile)한 뒤
+성공한 경우에만 값을 통째로 교체합니다. 요청은 항상 완성된 값 하나를 보게 됩니다.
+- 파싱/검증에 실패하면 경고만 남기고 이전 값을 유지
+- 교체 후 구독자(subscribe)에게 새 값을 알림 (프롬프트 설정, 스토리북 그래프 등)
+
+설정은 chatbot_config.json의 "config_reload"에서 읽습니다.
+    {"enabled": true, "interval_s": 2.0}
+
+storage / shared_store / model_routing 등 시작 시 객체를 만드는 섹션은
+값은 바뀌지만 이미 만든 객체에는 반영되지 않으므로 재시작이 필요합니다.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+CHATBOT_CONFIG_PATH = BASE_DIR / "config" / "chatbot_config.json"
+
+# 등록 이름
+CONFIG_CHATBOT = "chatbot"
+CONFIG_STORYBOOK = "storybook"
+CONFIG_IMAGE_MANIFEST = "image_manifest"
+CONFIG_ASSETS = "assets"
+
+
+def _validate_chatbot_config(config: dict) -> dict:
+    """chatbot_config.json 최소 검증 (잘못된 파일로 교체되는 것을 막음)"""
+    if not isinstance(config, dict):
+        raise ValueError("최상위 값이 객체가 아닙니다")
+    if not isinstance(config.get('system_prompt', {}), dict):
+        raise ValueError("system_prompt가 객체가 아닙니다")
+    return config
+
+
+class _WatchedFile:
+    """감시 중인 JSON 파일 하나"""
+
+    def __init__(self, name: str, path: Path, compile: Callable[[dict], Any]):
+        self.name = name
+        self.label = path.name
+        self.path = path
+        self.compile = compile
+        self.signature = None
+        self.value = None
+        self.subscribers: List[Callable[[Any], None]] = []
+
+    def current_signature(self):
+        """파일 변경 여부 판단용 (mtime_ns, 크기), 파일이 없으면 None"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def load(self):
+        """파일을 읽어 compile한 값 반환 (실패 시 예외)"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return self.compile(json.load(f))
+
+
+class _WatchedTree(_WatchedFile):
+    """감시 중인 디렉토리들 (안의 파일이 추가/삭제/수정되면 build를 다시 실행)"""
+
+    def __init__(self, name: str, roots: List[Path], build: Callable[[], Any]):
+        super().__init__(name, roots[0], lambda config: config)
+        self.label = ", ".join(root.name for root in roots)
+        self.roots = roots
+        self.build = build
+
+    def current_signature(self):
+        entries = []
+        for root in self.roots:
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(entries))
+
+    def load(self):
+        return self.build()
+
+
+class ConfigService:
+    """
+    설정 파일 감시 및 원자적 교체
+
+    get()은 락 없이 현재 값을 반환합니다. (교체는 참조 하나를 바꾸는 것뿐이므로
+    읽는 쪽은 이전 값 또는 새 값 중 하나를 온전히 보게 됨)
+    반환된 값은 다른 요청과 공유되므로 수정하면 안 됩니다.
+    """
+
+    def __init__(self, interval_s: float = 2.0):
+        """
+        Args:
+            interval_s: 파일 확인 주기 (초)
+        """
+        self.interval_s = interval_s
+        self._files: Dict[str, _WatchedFile] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, name: str, path: Path, compile: Optional[Callable[[dict], Any]] = None) -> Any:
+        """
+        파일 등록 후 현재 값 반환 (이미 등록된 이름이면 기존 값 반환)
+
+        Args:
+            name: 등록 이름
+            path: JSON 파일 경로
+            compile: 파싱한 dict를 검증/변환하는 함수 (예외를 던지면 교체하지 않음)
+
+        Raises:
+            처음 로드에 실패하면 compile이나 json.load의 예외를 그대로 전달
+        """
+        with self._lock:
+            watched = self._files.get(name)
+            if watched is not None:
+                return watched.value
+
+            watched = _WatchedFile(name, Path(path), compile or (lambda config: config))
+            return self._register(watched)
+
+    def watch_tree(self, name: str, roots: List[Path], build: Callable[[], Any]) -> Any:
+        """
+        디렉토리 등록 후 build() 결과 반환 (이미 등록된 이름이면 기존 값 반환)
+
+        디렉토리 탐색은 감시 스레드에서만 하므로, 요청 처리에서는 get()으로 결과만 조회합니다.
+
+        Args:
+            name: 등록 이름
+            roots: 감시할 디렉토리 목록 (하위 디렉토리 포함)
+            build: 디렉토리 내용으로 값을 만드는 함수
+        """
+        with self._lock:
+            watched = self._files.get(name)
+            if watched is not None:
+                return watched.value
+            return self._register(_WatchedTree(name, [Path(root) for root in roots], build))
+
+    def _register(self, watched: _WatchedFile) -> Any:
+        """(self._lock 보유 상태에서 호출)"""
+        # 읽기 전에 시그니처를 잡아야 읽는 도중 바뀐 내용도 다음 확인에서 감지됨
+        watched.signature = watched.current_signature()
+        watched.value = watched.load()
+        self._files[watched.name] = watched
+        return watched.value
+
+    def get(self, name: str) -> Any:
+        """현재 값 (등록되지 않은 이름이면 KeyError)"""
+        return self._files[name].value
+
+    def subscribe(self, name: str, callback: Callable[[Any], None]):
+        """값이 교체될 때마다 callback(새 값) 호출 (감시 스레드에서 실행됨)"""
+        with self._lock:
+            self._files[name].subscribers.append(callback)
+
+    def check(self) -> List[str]:
+        """
+        바뀐 파일을 다시 로드
+
+        Returns:
+            새 값으로 교체된 등록 이름 목록
+        """
+        with self._lock:
+            files = list(self._files.values())
+
+        changed = []
+        for watched in files:
+            signature = watched.current_signature()
+            if signature is None or signature == watched.signature:
+                continue
+            # 실패해도 같은 내용으로 계속 재시도하지 않도록 시그니처는 먼저 갱신
+            watched.signature = signature
+            try:
+                value = watched.load()
+            except Exception as e:
+                print(f"[ConfigService] {watched.label} 다시 읽기 실패, 이전 설정 유지 ({type(e).__name__}): {e}")
+                continue
+
+            watched.value = value
+            changed.append(watched.name)
+            print(f"[ConfigService] {watched.label} 변경 적용")
+            for callback in list(watched.subscribers):
+                try:
+                    callback(value)
+                except Exception as e:
+                    print(f"[ConfigService] {watched.name} 구독자 처리 실패 ({type(e).__name__}): {e}")
+        return changed
+
+    def start(self):
+        """감시 스레드 시작 (이미 실행 중이면 무시)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="config-reload", daemon=True)
+            self._thread.start()
+        print(f"[ConfigService] 설정 파일 감시 시작 ({self.interval_s}초 간격)")
+
+    def close(self):
+        """감시 스레드 종료"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self.interval_s + 1)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"[ConfigService] 설정 확인 중 오류 ({type(e).__name__}): {e}")
+
+
+# ============================================================================
+# 싱글톤 패턴
+# ============================================================================
+
+_config_service: ConfigService | None = None
+_config_service_lock = threading.Lock()
+
+
+def get_config_service() -> ConfigService:
+    """
+    싱글톤 ConfigService 반환
+
+    첫 호출 시 chatbot_config.json을 "chatbot"으로 등록하고,
+    "config_reload" 설정이 켜져 있으면 감시 스레드를 시작합니다.
+    """
+    global _config_service
+    if _config_service is None:
+        with _config_service_lock:
+            if _config_service is None:
+                service = ConfigService()
+                config = service.watch(CONFIG_CHATBOT, CHATBOT_CONFIG_PATH, _validate_chatbot_config)
+                reload_config = config.get('config_reload', {})
+                service.interval_s = float(reload_config.get('interval_s', service.interval_s))
+                if reload_config.get('enabled', True):
+                    service.start()
+                _config_service = service
+    return _config_service
@@ -0,0 +1,344 @@
+"""
+엔딩 분포 시뮬레이터 (몬테카를로, NumPy 벡터화)
+
+determine_ending / 8월 타석·도루 / 월별 체력 회복 / 훈련 규칙을 바꿨을 때
+엔딩이 어떻게 분포하는지 손으로 계산하는 대신, 플레이어 행동 분포(프로필)를 정해
+수백만 번의 플레이를 한 번에 굴려 엔딩 히스토그램을 봅니다.
+
+규칙 값은 복사하지 않고 game_rules / training_manager의 정의를 그대로 씁니다.
+- 판정 함수(타석 확률, 도루 확률, 스탯 범위, 엔딩 ID)는 시뮬레이션 중 실제로 나온
+  입력 조합마다 한 번씩만 호출하고(apply_rule), 결과를 배열 인덱싱으로 펼칩니다.
+- 훈련은 강도/집중 항목 선택지마다 intensity_tier()와 stat_gain()으로 표를 만듭니다.
+
+모델링하는 한 판 (3월 → 9월):
+- 매달: 새 달 체력 회복(4월부터) → 채팅으로 인한 스탯 변화(프로필 chat_gain)
+- 4/6/7월: 훈련 (세션 수/강도/집중 항목을 프로필 분포에서 추첨, 월별 횟수 제한 적용,
+  체력이 부족하면 게임과 마찬가지로 일반 훈련이 거절되므로 회복 세션으로 대체)
+- 8월: 조언 점수(항목별 분포)와 체력으로 타석, 안타면 도루 (공포증 극복 비율)
+- 9월: 엔딩 결정 (A1이면 스페셜 엔딩 추첨)
+스토리북 stat_changes는 화면 표시용이라(스탯에 적용되지 않음) 포함하지 않습니다.
+
+프로필 형식 (BEHAVIOR_PROFILES 참고, JSON 파일로도 지정 가능):
+    {
+        "chat_gain": {"intimacy": [평균, 표준편차], ...},   # 한 달 채팅의 스탯 변화 (정규분포)
+        "training_sessions": {"3": 0.5, "4": 0.5},         # 훈련 달의 세션 수 분포
+        "training_intensity": {"60": 0.7, "95": 0.3},      # 세션 강도 분포
+        "training_focus": {"batting": 0.5, "all": 0.5},    # 집중 항목 분포 ("speed+defense"처럼 조합 가능)
+        "advice_score": {"1": 0.2, "2": 0.5, "3": 0.3},    # 조언 채점 항목별 점수 분포
+        "steal_phobia_overcome": 0.3                       # 도루 공포증을 극복한 비율
+    }
+
+실행 방법:
+    python -m services.ending_simulator [프로필 이름 또는 JSON 경로 ...] [--n 1000000] [--seed 42] [--json]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from . import game_rules
+from .game_state_manager import STAT_DEFAULTS, STAT_NAMES
+from .storybook_graph import FIRST_MONTH, FINAL_MONTH, TOURNAMENT_MONTH
+from .training_manager import (
+    MIN_TRAINING_STAMINA, TRAINABLE_MONTHS, VALID_FOCUSES, intensity_tier, max_trainings, stat_gain
+)
+
+
+DEFAULT_PLAYTHROUGHS = 1_000_000
+
+# 기본 플레이어 행동 분포
+BEHAVIOR_PROFILES: Dict[str, dict] = {
+    "casual": {
+        "description": "가끔 들러 가볍게 대화하고 훈련은 거의 하지 않는 플레이어",
+        "chat_gain": {"intimacy": [3, 3], "mental": [2, 3]},
+        "training_sessions": {"0": 0.3, "1": 0.3, "2": 0.3, "3": 0.1},
+        "training_intensity": {"30": 0.4, "60": 0.5, "80": 0.1},
+        "training_focus": {"all": 0.6, "batting": 0.4},
+        "advice_score": {"1": 0.4, "2": 0.4, "3": 0.2},
+        "steal_phobia_overcome": 0.1,
+    },
+    "average": {
+        "description": "매달 대화하고 훈련 달에 절반 이상 훈련하는 플레이어",
+        "chat_gain": {"intimacy": [6, 4], "mental": [4, 4]},
+        "training_sessions": {"2": 0.3, "3": 0.4, "4": 0.3},
+        "training_intensity": {"15": 0.1, "60": 0.5, "80": 0.3, "95": 0.1},
+        "training_focus": {"all": 0.3, "batting": 0.3, "speed": 0.2, "defense": 0.2},
+        "advice_score": {"1": 0.2, "2": 0.5, "3": 0.3},
+        "steal_phobia_overcome": 0.3,
+    },
+    "dedicated": {
+        "description": "훈련 횟수를 모두 쓰고 고강도 훈련과 회복을 섞는 플레이어",
+        "chat_gain": {"intimacy": [10, 4], "mental": [8, 4]},
+        "training_sessions": {"4": 0.3, "5": 0.7},
+        "training_intensity": {"15": 0.15, "80": 0.45, "95": 0.4},
+        "training_focus": {"batting": 0.4, "speed": 0.3, "defense": 0.3},
+        "advice_score": {"1": 0.05, "2": 0.35, "3": 0.6},
+        "steal_phobia_overcome": 0.6,
+    },
+}
+
+_COLUMN = {name: index for index, name in enumerate(STAT_NAMES)}
+_AT_BAT_RESULTS = ("homerun", "hit", "strikeout")
+
+
+def load_profile(name_or_path: str) -> Tuple[str, dict]:
+    """
+    프로필 이름(BEHAVIOR_PROFILES) 또는 JSON 파일 경로 → (이름, 프로필)
+
+    Raises:
+        ValueError: 알 수 없는 프로필 이름
+    """
+    if name_or_path in BEHAVIOR_PROFILES:
+        return name_or_path, BEHAVIOR_PROFILES[name_or_path]
+    path = Path(name_or_path)
+    if path.suffix == ".json":
+        with open(path, 'r', encoding='utf-8') as f:
+            return path.stem, json.load(f)
+    raise ValueError(f"알 수 없는 프로필 '{name_or_path}' (가능: {', '.join(BEHAVIOR_PROFILES)} 또는 .json 경로)")
+
+
+def _distribution(raw: Dict[str, float], label: str) -> Tuple[list, np.ndarray]:
+    """{값: 확률} → (값 목록, 합이 1인 확률 배열)"""
+    if not raw:
+        raise ValueError(f"{label}: 분포가 비어 있습니다")
+    weights = np.array([float(weight) for weight in raw.values()])
+    if (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError(f"{label}: 확률은 0 이상이고 합이 0보다 커야 합니다")
+    return list(raw), weights / weights.sum()
+
+
+def _parse_focus(key: str) -> Tuple[str, ...]:
+    if key == "all":
+        return tuple(sorted(VALID_FOCUSES))
+    focuses = tuple(dict.fromkeys(part.strip() for part in key.split('+')))
+    for focus in focuses:
+        if focus not in VALID_FOCUSES:
+            raise ValueError(f"training_focus: 알 수 없는 항목 '{focus}'")
+    return focuses
+
+
+def apply_rule(func: Callable, *columns: np.ndarray) -> np.ndarray:
+    """
+    규칙 함수를 배열에 적용
+
+    정수 열들의 값 조합마다 func를 한 번씩만 호출하고 결과를 원래 위치로 펼칩니다.
+    (조합 수는 많아야 수만 개라 수백만 행에도 Python 호출 비용이 작음)
+    """
+    dims = tuple(int(column.max()) + 1 for column in columns)
+    keys = np.ravel_multi_index(tuple(column.astype(np.int64) for column in columns), dims)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    values = np.array([func(*(int(v) for v in combo)) for combo in zip(*np.unravel_index(unique, dims))])
+    return values[inverse]
+
+
+def _apply(stats: np.ndarray, column: int, delta: np.ndarray):
+    """PlayerStats.apply_changes와 같은 0~100 클램프"""
+    stats[:, column] = np.clip(stats[:, column] + delta, 0, 100)
+
+
+def simulate(profile: dict, n: int = DEFAULT_PLAYTHROUGHS, seed=None) -> dict:
+    """
+    프로필로 n번 플레이한 엔딩 분포
+
+    Returns:
+        {
+            "n": 플레이 수,
+            "endings": {엔딩 ID: 횟수} (ENDING_IDS 순서),
+            "tournament": {대회 결과: 횟수},
+            "stat_ranges": {스탯 범위: 횟수},
+            "score": {"mean", "p10", "p50", "p90"} (엔딩 점수),
+            "elapsed_s": 소요 시간
+        }
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+
+    # 프로필 → 선택지 표 (규칙 함수는 선택지마다 한 번씩 호출)
+    chat_gain = profile.get("chat_gain", {})
+    for stat in chat_gain:
+        if stat not in _COLUMN:
+            raise ValueError(f"chat_gain: 알 수 없는 스탯 '{stat}'")
+
+    session_values, session_probs = _distribution(profile.get("training_sessions", {"0": 1}), "training_sessions")
+    sessions_options = np.array([int(value) for value in session_values])
+
+    intensity_values, intensity_probs = _distribution(profile.get("training_intensity", {"60": 1}), "training_intensity")
+    tiers = [intensity_tier(max(0, min(100, int(value)))) for value in intensity_values]
+    tier_stamina = np.array([tier.stamina_change for tier in tiers])
+    tier_recovery = np.array([tier.is_recovery for tier in tiers])
+
+    focus_values, focus_probs = _distribution(profile.get("training_focus", {"all": 1}), "training_focus")
+    focus_sets = [_parse_focus(key) for key in focus_values]
+    # gain_table[강도 선택지, 집중 선택지] = 집중 항목 하나당 상승량
+    gain_table = np.array([
+        [stat_gain(tier.base_gain, len(focuses), max(0, min(100, int(intensity)))) for focuses in focus_sets]
+        for tier, intensity in zip(tiers, intensity_values)
+    ])
+    # focus_mask[집중 선택지, 스탯 열] = 해당 스탯에 상승량 적용 여부
+    focus_mask = np.zeros((len(focus_sets), len(STAT_NAMES)), dtype=bool)
+    for index, focuses in enumerate(focus_sets):
+        for focus in focuses:
+            focus_mask[index, _COLUMN[focus]] = True
+
+    recovery_tier = intensity_tier(0)
+
+    advice_values, advice_probs = _distribution(profile.get("advice_score", {"2": 1}), "advice_score")
+    low, high = game_rules.ADVICE_SCORE_RANGE
+    advice_options = np.clip(np.array([int(value) for value in advice_values]), low, high)
+
+    overcome_rate = float(profile.get("steal_phobia_overcome", 0.0))
+
+    # 한 판씩이 아니라 n판을 한 번에: stats[판, 스탯 열]
+    stats = np.tile(np.array(STAT_DEFAULTS, dtype=np.int16), (n, 1))
+    result = np.full(n, game_rules.TOURNAMENT_RESULTS.index(game_rules.DEFAULT_TOURNAMENT_RESULT), dtype=np.int64)
+
+    for month in range(FIRST_MONTH, FINAL_MONTH + 1):
+        if month > FIRST_MONTH:
+            recovery = game_rules.monthly_stamina_recovery(month)
+            if recovery:
+                _apply(stats, _COLUMN['stamina'], recovery)
+
+        for stat, (mean, std) in chat_gain.items():
+            _apply(stats, _COLUMN[stat], np.rint(rng.normal(mean, std, n)).astype(np.int16))
+
+        if month in TRAINABLE_MONTHS:
+            cap = max_trainings(month)
+            sessions = np.minimum(rng.choice(sessions_options, size=n, p=session_probs), cap)
+            for session in range(int(sessions.max(initial=0))):
+                active = sessions > session
+                intensity = rng.choice(len(tiers), size=n, p=intensity_probs)
+                focus = rng.choice(len(focus_sets), size=n, p=focus_probs)
+
+                # 체력이 부족하면 일반 훈련이 거절되므로 회복 세션으로 대체
+                refused = ~tier_recovery[intensity] & (stats[:, _COLUMN['stamina']] < MIN_TRAINING_STAMINA)
+                training = active & ~refused
+                recovering = active & refused
+
+                gains = np.where(focus_mask[focus], gain_table[intensity, focus][:, None], 0) * training[:, None]
+                stats[:] = np.clip(stats + gains, 0, 100)
+                stamina_change = np.where(training, tier_stamina[intensity], 0)
+                stamina_change = np.where(recovering, recovery_tier.stamina_change, stamina_change)
+                _apply(stats, _COLUMN['stamina'], stamina_change)
+
+        if month == TOURNAMENT_MONTH:
+            result = _tournament(stats, rng, advice_options, advice_probs, overcome_rate)
+
+    # 엔딩 결정
+    score = stats[:, [_COLUMN[name] for name in game_rules.ENDING_SCORE_STATS]].sum(axis=1, dtype=np.int32)
+    ranges = apply_rule(game_rules.stat_range, score)
+    result_ids = np.array(game_rules.ENDING_IDS)
+    ending_index = apply_rule(
+        lambda range_, result_index: game_rules.ENDING_IDS.index(
+            game_rules.ending_id(range_, game_rules.TOURNAMENT_RESULTS[result_index])
+        ),
+        ranges, result
+    )
+    special = (ending_index == game_rules.ENDING_IDS.index(game_rules.SPECIAL_ENDING_BASE_ID)) & (
+        rng.random(n) < game_rules.SPECIAL_ENDING_PROB
+    )
+    ending_index[special] = game_rules.ENDING_IDS.index(game_rules.SPECIAL_ENDING_ID)
+
+    ending_counts = np.bincount(ending_index, minlength=len(result_ids))
+    result_counts = np.bincount(result, minlength=len(game_rules.TOURNAMENT_RESULTS))
+    range_counts = np.bincount(ranges, minlength=game_rules.LOWEST_STAT_RANGE + 1)
+    p10, p50, p90 = np.percentile(score, [10, 50, 90])
+
+    return {
+        'n': n,
+        'endings': {ending: int(count) for ending, count in zip(result_ids, ending_counts)},
+        'tournament': {name: int(count) for name, count in zip(game_rules.TOURNAMENT_RESULTS, result_counts)},
+        'stat_ranges': {range_: int(range_counts[range_]) for range_ in range(1, game_rules.LOWEST_STAT_RANGE + 1)},
+        'score': {'mean': float(score.mean()), 'p10': float(p10), 'p50': float(p50), 'p90': float(p90)},
+        'elapsed_s': time.perf_counter() - started,
+    }
+
+
+def _tournament(stats, rng, advice_options, advice_probs, overcome_rate) -> np.ndarray:
+    """8월 타석 (+ 안타면 도루) → TOURNAMENT_RESULTS 인덱스 배열"""
+    n = len(stats)
+    advice_total = sum(
+        rng.choice(advice_options, size=n, p=advice_probs) for _ in game_rules.ADVICE_SCORE_ITEMS
+    )
+    # probabilities[판] = (홈런 %, 안타 %)
+    probabilities = apply_rule(
+        lambda total, stamina: tuple(
+            game_rules.at_bat_probabilities(total, stamina)[2][name] for name in _AT_BAT_RESULTS[:2]
+        ),
+        advice_total, stats[:, _COLUMN['stamina']]
+    )
+    roll = rng.random(n) * 100
+    homerun = roll < probabilities[:, 0]
+    hit = ~homerun & (roll < probabilities[:, 0] + probabilities[:, 1])
+
+    overcome = rng.random(n) < overcome_rate
+    steal_prob = apply_rule(
+        lambda speed, mental, intimacy, phobia_overcome: game_rules.steal_success_probability(
+            speed, mental, intimacy, bool(phobia_overcome)
+        ),
+        stats[:, _COLUMN['speed']], stats[:, _COLUMN['mental']], stats[:, _COLUMN['intimacy']], overcome
+    )
+    steal = hit & (rng.random(n) * 100 < steal_prob)
+
+    index = game_rules.TOURNAMENT_RESULTS.index
+    result = np.full(n, index('strikeout'), dtype=np.int64)
+    result[homerun] = index('homerun')
+    result[hit] = index('hit')
+    result[steal] = index('hit_steal')
+    return result
+
+
+def format_report(name: str, report: dict) -> List[str]:
+    """엔딩 히스토그램 텍스트"""
+    n = report['n']
+    lines = [f"[{name}] {n:,}판, {report['elapsed_s']:.2f}초 "
+             f"(엔딩 점수 평균 {report['score']['mean']:.0f}, "
+             f"p10/p50/p90 {report['score']['p10']:.0f}/{report['score']['p50']:.0f}/{report['score']['p90']:.0f})"]
+    for ending, count in report['endings'].items():
+        share = count / n
+        lines.append(f"  {ending:<3}{share * 100:6.2f}%  {'#' * round(share * 50)}")
+    lines.append("  대회: " + ", ".join(f"{key} {count / n * 100:.1f}%" for key, count in report['tournament'].items()))
+    lines.append("  스탯 범위: " + ", ".join(f"{key} {count / n * 100:.1f}%" for key, count in report['stat_ranges'].items()))
+    return lines
+
+
+def _option(args: List[str], name: str, default):
+    if name not in args:
+        return default
+    index = args.index(name)
+    value = args[index + 1]
+    del args[index:index + 2]
+    return type(default)(value) if default is not None else int(value)
+
+
+if __name__ == "__main__":
+    """
+    엔딩 분포 출력
+
+    실행 방법:
+    python -m services.ending_simulator                        # 기본 프로필 전부
+    python -m services.ending_simulator average --n 5000000
+    python -m services.ending_simulator my_profile.json --seed 42 --json
+    """
+    args = sys.argv[1:]
+    n = _option(args, "--n", DEFAULT_PLAYTHROUGHS)
+    seed = _option(args, "--seed", None)
+    as_json = "--json" in args
+    names = [arg for arg in args if arg != "--json"] or list(BEHAVIOR_PROFILES)
+
+    reports = {}
+    for name_or_path in names:
+        try:
+            name, profile = load_profile(name_or_path)
+        except (ValueError, FileNotFoundError) as e:
+            print(f"[EndingSimulator] {e}")
+            sys.exit(1)
+        reports[name] = simulate(profile, n=n, seed=seed)
+        if not as_json:
+            print("\n".join(format_report(name, reports[name])))
+
+    if as_json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
@@ -10,6 +10,10 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 import json
 
+from .llm_limiter import PRIORITY_JUDGE, PRIORITY_BACKGROUND
+from .model_router import get_model_router, TASK_EVENT_JUDGE, TASK_HINT_JUDGE
+from .circuit_breaker import get_breaker, STAGE_EVENT_JUDGE, STAGE_HINT_JUDGE
+
 
 class EventDetector:
     """
@@ -21,12 +25,16 @@ class EventDetector:
     3. 필요시 힌트 제공
     """
 
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(self, llm: ChatOpenAI, hint_llm: Optional[ChatOpenAI] = None, router=None):
         """
         Args:
-            llm: ChatOpenAI 인스턴스
+            llm: ChatOpenAI 인스턴스 (event_judge 라우팅)
+            hint_llm: 힌트 판정용 ChatOpenAI (None이면 llm 사용)
+            router: 호출 기록용 ModelRouter (None이면 싱글톤)
         """
         self.llm = llm
+        self.hint_llm = hint_llm or llm
+        self.router = router or get_model_router()
         self.event_definitions = self._load_event_definitions()
 
     def _load_event_definitions(self) -> Dict:
@@ -191,14 +199,25 @@ class EventDetector:
         chain = prompt | self.llm
 
         try:
-            response = chain.with_config({"timeout": 3.0}).invoke({
+            inputs = {
                 "event_name": event_def['name'],
                 "conditions": "\n".join([f"- {cond}" for cond in event_def['conditions']]),
                 "current_month": game_state.current_month,
                 "intimacy": game_state.stats.intimacy,
                 "conversation_count": len(recent_messages),
                 "conversation_summary": conversation_summary if conversation_summary else "대화 없음"
-            })
+            }
+            # event_judge 브레이커가 차단 중이거나 호출이 실패하면 이벤트 체크 생략
+            response = get_breaker(STAGE_EVENT_JUDGE).call(
+                lambda: self.router.invoke(
+                    TASK_EVENT_JUDGE,
+                    lambda: chain.invoke(inputs),
+                    priority=PRIORITY_JUDGE
+                ),
+                fallback=lambda: None
+            )
+            if response is None:
+                return (False, "이벤트 판정 생략")
 
             # JSON 파싱
             result = json.loads(response.content)
@@ -285,14 +304,25 @@ class EventDetector:
 사용자가 막혀있나요?""")
         ])
 
-        chain = prompt | self.llm
+        chain = prompt | self.hint_llm
 
         try:
-            response = chain.with_config({"timeout": 3.0}).invoke({
+            inputs = {
                 "event_name": event_def['name'],
                 "conditions": "\n".join([f"- {cond}" for cond in event_def['conditions']]),
                 "conversation_summary": conversation_summary
-            })
+            }
+            # hint_judge 브레이커가 차단 중이거나 호출이 실패하면 힌트 생략
+            response = get_breaker(STAGE_HINT_JUDGE).call(
+                lambda: self.router.invoke(
+                    TASK_HINT_JUDGE,
+                    lambda: chain.invoke(inputs),
+                    priority=PRIORITY_BACKGROUND
+                ),
+                fallback=lambda: None
+            )
+            if response is None:
+                return None
 
             result = json.loads(response.content)
             is_stuck = result.get('is_stuck', False)
@@ -6,6 +6,19 @@ from langchain_core.prompts import ChatPromptTemplate
 import json
 import random
 
+from .llm_limiter import PRIORITY_JUDGE
+from .model_router import get_model_router, TASK_AT_BAT_SCORER
+from .circuit_breaker import get_breaker, STAGE_AT_BAT_SCORER
+from .game_rules import (
+    ADVICE_SCORE_ITEMS, at_bat_probabilities, steal_base_probability, steal_success_probability
+)
+
+# 로컬 조언 채점용 키워드 (at_bat_scorer 대체 동작)
+LOCAL_TONE_WORDS = ["할 수 있", "괜찮", "자신", "힘내", "잘하", "최고", "응원", "즐겨"]
+LOCAL_PRACTICAL_WORDS = ["스윙", "타이밍", "호흡", "직구", "변화구", "노려", "배트", "짧게", "침착", "카운트", "공 끝", "하체"]
+LOCAL_TRUST_WORDS = ["믿", "함께", "네 편", "걱정 마", "책임", "곁에", "뒤에"]
+LOCAL_NEGATIVE_WORDS = ["실망", "제대로", "왜 못", "실수하지", "망치", "한심"]
+
 class GameEventManager:
     def __init__(self, llm: ChatOpenAI):
         self.llm = llm
@@ -13,56 +26,36 @@ class GameEventManager:
     def calculate_at_bat_result(self, advice: str, stamina: int) -> Tuple[str, Dict]:
         """
         사용자의 조언과 선수의 체력을 바탕으로 타석 결과를 확률적으로 계산합니다.
+
+        score_advice + resolve_at_bat. 게임 상태를 바꾸는 요청에서는 두 단계를 나눠
+        채점(LLM)은 세션 락 밖에서, 결과 결정과 적용만 락 안에서 수행합니다.
         """
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """당신은 프로야구 코칭 전문가입니다. 선수의 현재 상태와 코치의 조언을 분석하여, 조언의 질을 세 가지 항목으로 평가하고 JSON 형식으로만 응답해야 합니다.
+        return self.resolve_at_bat(self.score_advice(advice, stamina), stamina)
 
-1.  **정서적 톤 (1-3점):** 조언이 얼마나 따뜻하고 선수에게 자신감을 주는가? (격려, 믿음 표현 시 고득점)
-2.  **실질적 조언 (1-3점):** 조언이 얼마나 구체적이고 실질적인 도움이 되는가? (뜬구름 잡는 소리는 저득점)
-3.  **관계적 신뢰 (1-3점):** 조언이 선수를 지지하고 신뢰하는 마음을 보여주는가? (비난, 압박 시 저득점)
+    def score_advice(self, advice: str, stamina: int) -> Dict:
+        """
+        조언을 세 항목으로 채점 (게임 상태를 읽거나 바꾸지 않음)
 
-**응답 형식 (JSON ONLY):**
-{{
-  "tone_score": 점수,
-  "advice_score": 점수,
-  "trust_score": 점수
-}}"""),
-            ("human", "선수의 현재 체력은 {stamina}/100 입니다. 코치가 다음과 같이 조언했습니다:\n\n\"{advice}\"\n\n위 조언을 세 가지 항목으로 평가하여 점수를 매겨주세요.")
-        ])
-        
-        chain = prompt | self.llm
-        
+        조언 채점은 LLM으로 하되, at_bat_scorer 브레이커가 차단 중이거나
+        LLM 호출/파싱이 실패하면 로컬 규칙 기반 채점으로 대체합니다.
+        """
+        return get_breaker(STAGE_AT_BAT_SCORER).call(
+            lambda: self._score_advice_with_llm(advice, stamina),
+            fallback=lambda: self._score_advice_locally(advice)
+        )
+
+    def resolve_at_bat(self, scores: Dict, stamina: int) -> Tuple[str, Dict]:
+        """채점 결과와 현재 체력으로 타석 결과 추첨 (LLM 호출 없음)"""
         try:
-            response = chain.invoke({"advice": advice, "stamina": stamina})
-            scores = json.loads(response.content)
-            
             # 1. 조언 점수 계산
-            total_score = scores.get('tone_score', 1) + scores.get('advice_score', 1) + scores.get('trust_score', 1)
-            
-            # 2. 멘탈 계수 (M) 계산
-            if total_score <= 3: m_coeff = 0.6
-            elif total_score <= 6: m_coeff = 1.0
-            else: m_coeff = 1.4
-            
-            # 3. 피지컬 계수 (P) 계산
-            if stamina <= 40: p_coeff = 0.7
-            elif stamina <= 70: p_coeff = 1.0
-            else: p_coeff = 1.3
-            
-            # 4. 최종 확률 계산
-            homerun_prob = round(10 * m_coeff * p_coeff)
-            hit_prob = round(30 * m_coeff * p_coeff)
-            
-            # 확률 정규화 (합이 100을 넘지 않도록)
-            if homerun_prob + hit_prob >= 99:
-                homerun_prob = min(homerun_prob, 40) # 홈런 최대 확률 40%로 제한
-                hit_prob = 99 - homerun_prob
-            
-            strikeout_prob = 100 - (homerun_prob + hit_prob)
-            
+            total_score = sum(scores.get(item, 1) for item in ADVICE_SCORE_ITEMS)
+
+            # 2~4. 멘탈 계수 (M, 조언 점수) × 피지컬 계수 (P, 체력)로 최종 확률 계산 (기준은 game_rules)
+            m_coeff, p_coeff, probabilities = at_bat_probabilities(total_score, stamina)
+
             # 5. 확률에 따라 최종 결과 결정
             outcomes = ["homerun", "hit", "strikeout"]
-            weights = [homerun_prob, hit_prob, strikeout_prob]
+            weights = [probabilities[outcome] for outcome in outcomes]
             final_result = random.choices(outcomes, weights=weights, k=1)[0]
             
             # 디버깅 및 결과 확인을 위한 상세 정보
@@ -71,7 +64,7 @@ class GameEventManager:
                 "total_score": total_score,
                 "m_coeff": m_coeff,
                 "p_coeff": p_coeff,
-                "probabilities": {"homerun": homerun_prob, "hit": hit_prob, "strikeout": strikeout_prob}
+                "probabilities": probabilities
             }
             
             print(f"[8월 이벤트] 조언 분석 결과: {details}")
@@ -83,6 +76,58 @@ class GameEventManager:
             print(f"[ERROR] 8월 이벤트 결과 계산 실패: {e}")
             return "strikeout", {} # 오류 발생 시 최악의 결과 반환
 
+    def _score_advice_with_llm(self, advice: str, stamina: int) -> Dict:
+        """LLM으로 조언을 세 항목(정서적 톤, 실질적 조언, 관계적 신뢰)으로 채점"""
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", """당신은 프로야구 코칭 전문가입니다. 선수의 현재 상태와 코치의 조언을 분석하여, 조언의 질을 세 가지 항목으로 평가하고 JSON 형식으로만 응답해야 합니다.
+
+1.  **정서적 톤 (1-3점):** 조언이 얼마나 따뜻하고 선수에게 자신감을 주는가? (격려, 믿음 표현 시 고득점)
+2.  **실질적 조언 (1-3점):** 조언이 얼마나 구체적이고 실질적인 도움이 되는가? (뜬구름 잡는 소리는 저득점)
+3.  **관계적 신뢰 (1-3점):** 조언이 선수를 지지하고 신뢰하는 마음을 보여주는가? (비난, 압박 시 저득점)
+
+**응답 형식 (JSON ONLY):**
+{{
+  "tone_score": 점수,
+  "advice_score": 점수,
+  "trust_score": 점수
+}}"""),
+            ("human", "선수의 현재 체력은 {stamina}/100 입니다. 코치가 다음과 같이 조언했습니다:\n\n\"{advice}\"\n\n위 조언을 세 가지 항목으로 평가하여 점수를 매겨주세요.")
+        ])
+
+        chain = prompt | self.llm
+        response = get_model_router().invoke(
+            TASK_AT_BAT_SCORER,
+            lambda: chain.invoke({"advice": advice, "stamina": stamina}),
+            priority=PRIORITY_JUDGE
+        )
+        return json.loads(response.content)
+
+    @staticmethod
+    def _score_advice_locally(advice: str) -> Dict:
+        """
+        LLM 없이 키워드로 조언 채점 (판정기 장애 시 대체용)
+
+        각 항목 기본 1점, 관련 표현이 나올 때마다 가산(최대 3점),
+        비난/압박 표현은 신뢰·톤 점수에서 차감합니다.
+        """
+        text = advice or ""
+        count = lambda words: sum(1 for word in words if word in text)
+
+        negative = count(LOCAL_NEGATIVE_WORDS)
+        tone = 1 + count(LOCAL_TONE_WORDS) - negative
+        practical = 1 + count(LOCAL_PRACTICAL_WORDS)
+        trust = 1 + count(LOCAL_TRUST_WORDS) - negative
+
+        clamp = lambda value: max(1, min(3, value))
+        scores = {
+            "tone_score": clamp(tone),
+            "advice_score": clamp(practical),
+            "trust_score": clamp(trust),
+            "scorer": "local"
+        }
+        print(f"[8월 이벤트] 로컬 채점 사용: {scores}")
+        return scores
+
     # <<< 수정 시작: '안타' 이후 '도루' 결과를 계산하는 새로운 함수 추가 >>>
     # 이유: 8월 이벤트의 2단계 분기("안타 -> 도루 시도")를 처리하기 위한 핵심 로직입니다.
     def calculate_steal_result(self, game_state) -> Tuple[str, Dict]:
@@ -91,18 +136,12 @@ class GameEventManager:
         (기획: "겁에 질려 도루 시도 안 함" vs "도루 성공")
         """
         stats = game_state.stats
-        
-        # 도루 성공률 계산: (주루 능력 + 멘탈 + 친밀도/5) / 3 이 베이스 확률
-        # 주루 능력이 가장 중요 (가중치 1.5), 멘탈은 극복 의지, 친밀도는 코치에 대한 믿음
-        base_prob = (stats.speed * 1.5 + stats.mental + (stats.intimacy / 5)) / 3
-        
-        # 도루 공포증 극복 여부에 따라 큰 보너스/페널티 적용
-        if game_state.flags.get('steal_phobia_overcome', False):
-            success_prob = min(base_prob + 20, 95) # 극복 시 확률 대폭 상승 (최대 95%)
-        else:
-            success_prob = max(base_prob - 15, 5)  # 미극복 시 확률 대폭 하락 (최소 5%)
+        overcome = game_state.flags.get('steal_phobia_overcome', False)
 
-        success_prob = round(success_prob)
+        # 도루 성공률 계산: (주루 능력 + 멘탈 + 친밀도/5) / 3 이 베이스 확률
+        # 도루 공포증 극복 여부에 따라 큰 보너스/페널티 적용 (기준은 game_rules)
+        base_prob = steal_base_probability(stats.speed, stats.mental, stats.intimacy)
+        success_prob = steal_success_probability(stats.speed, stats.mental, stats.intimacy, overcome)
         fail_prob = 100 - success_prob
         
         # 확률에 따라 최종 결과 결정
@@ -113,7 +152,7 @@ class GameEventManager:
         details = {
             "base_prob": base_prob,
             "final_prob": success_prob,
-            "overcome_phobia": game_state.flags.get('steal_phobia_overcome', False)
+            "overcome_phobia": overcome
         }
         
         print(f"[도루 이벤트] 계산 결과: {details}")
@@ -128,11 +167,7 @@ _game_event_manager = None
 def get_game_event_manager() -> GameEventManager:
     global _game_event_manager
     if _game_event_manager is None:
-        from langchain_openai import ChatOpenAI
-        import os
-        # <<< 수정 시작: 싱글톤 생성 시에도 GameEventManager를 올바르게 호출하도록 수정 >>>
-        # 이유: 이전에 llm 인스턴스를 직접 넘겨주지 않아 발생할 수 있는 오류를 방지합니다.
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.2, api_key=os.getenv("OPENAI_API_KEY"))
+        # 타석 채점 모델/온도/토큰 한도는 model_routing의 at_bat_scorer 설정 사용
+        llm = get_model_router().llm_for(TASK_AT_BAT_SCORER)
         _game_event_manager = GameEventManager(llm=llm)
-        # <<< 수정 끝 >>>
     return _game_event_manager
\ No newline at end of file
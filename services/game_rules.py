@@ -0,0 +1,170 @@
+"""
+게임 규칙 정의 (엔딩 / 8월 대회 / 월별 체력 회복)
+
+StorybookManager.determine_ending, GameEventManager(타석/도루), app.py의 월 진행과
+엔딩 분포 시뮬레이터(services.ending_simulator)가 같은 값을 쓰도록 한곳에 모아 둡니다.
+밸런스를 바꿀 때는 이 파일만 고치면 실제 게임과 시뮬레이션에 함께 반영됩니다.
+
+여기 있는 함수는 게임 상태나 난수에 의존하지 않는 순수 함수입니다.
+(무작위 추첨은 호출하는 쪽에서 반환된 확률로 수행)
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+
+# ============================================================================
+# 엔딩
+# ============================================================================
+
+# 엔딩 점수에 들어가는 스탯 (친밀도, 멘탈 제외 4개 기술/신체 스탯, 최대 400점)
+ENDING_SCORE_STATS = ('batting', 'speed', 'defense', 'stamina')
+
+# 스탯 범위 기준 (점수 이상이면 해당 범위, 모두 미달이면 최하위 범위)
+STAT_RANGE_THRESHOLDS = (
+    (320, 1),  # 400점 만점에 320 이상 (S급 선수)
+    (240, 2),  # 240 이상 (A급 선수)
+    (150, 3),  # 150 이상 (B급 선수)
+)
+LOWEST_STAT_RANGE = 4
+
+# 8월 대회 결과 (엔딩 매트릭스의 열 순서: 홈런 → 1, 안타+도루 → 2, 안타 → 3, 삼진 → 4)
+TOURNAMENT_RESULTS = ('homerun', 'hit_steal', 'hit', 'strikeout')
+DEFAULT_TOURNAMENT_RESULT = 'strikeout'
+
+# 엔딩 매트릭스의 행 (스탯 범위 1~4 → A~D)
+ENDING_GRADES = "ABCD"
+
+# 스페셜 엔딩 (메이저리그): 범위 1 + 홈런(A1)일 때 5% 확률
+SPECIAL_ENDING_ID = "S"
+SPECIAL_ENDING_BASE_ID = "A1"
+SPECIAL_ENDING_PROB = 0.05
+
+ENDING_IDS = (SPECIAL_ENDING_ID,) + tuple(
+    f"{grade}{rank}" for grade in ENDING_GRADES for rank in range(1, len(TOURNAMENT_RESULTS) + 1)
+)
+# 알 수 없는 범위/결과일 때의 엔딩 (최하위)
+FALLBACK_ENDING_ID = "D4"
+
+
+def ending_score(stats) -> int:
+    """엔딩 점수 (ENDING_SCORE_STATS 합계, stats는 PlayerStats)"""
+    return sum(getattr(stats, name) for name in ENDING_SCORE_STATS)
+
+
+def stat_range(total_score: int) -> int:
+    """엔딩 점수 → 스탯 범위 (1~4)"""
+    for threshold, range_ in STAT_RANGE_THRESHOLDS:
+        if total_score >= threshold:
+            return range_
+    return LOWEST_STAT_RANGE
+
+
+def ending_id(range_: int, tournament_result: str) -> str:
+    """
+    스탯 범위 + 8월 대회 결과 → 엔딩 ID (예: 범위 1 선수가 홈런을 치면 'A1')
+
+    스페셜 엔딩 추첨은 포함하지 않습니다. (SPECIAL_ENDING_BASE_ID일 때 호출하는 쪽에서 추첨)
+    """
+    if not 1 <= range_ <= len(ENDING_GRADES) or tournament_result not in TOURNAMENT_RESULTS:
+        return FALLBACK_ENDING_ID
+    return f"{ENDING_GRADES[range_ - 1]}{TOURNAMENT_RESULTS.index(tournament_result) + 1}"
+
+
+# ============================================================================
+# 8월 대회 타석
+# ============================================================================
+
+# 조언 채점 항목 (각 1~3점, 합계 3~9점)
+ADVICE_SCORE_ITEMS = ('tone_score', 'advice_score', 'trust_score')
+ADVICE_SCORE_RANGE = (1, 3)
+
+# 구간 표: ((이하 값, 계수), ...) 순서대로 확인하고, 모두 넘으면 마지막 계수
+# 멘탈 계수 (M): 조언 점수 합계 기준
+MENTAL_COEFF_BANDS = ((3, 0.6), (6, 1.0), (None, 1.4))
+# 피지컬 계수 (P): 체력 기준
+PHYSICAL_COEFF_BANDS = ((40, 0.7), (70, 1.0), (None, 1.3))
+
+# 기본 확률 (%) × M × P
+HOMERUN_BASE_PROB = 10
+HIT_BASE_PROB = 30
+# 홈런 + 안타가 이 값 이상이면 홈런을 HOMERUN_MAX_PROB로 제한하고 안타를 나머지로 채움
+# (삼진 확률이 최소 1%는 남도록)
+AT_BAT_PROB_CAP = 99
+HOMERUN_MAX_PROB = 40
+
+
+def banded(value: float, bands: Sequence[Tuple[Optional[float], float]]) -> float:
+    """구간 표에서 value가 속하는 계수"""
+    for upper, coeff in bands:
+        if upper is None or value <= upper:
+            return coeff
+    return bands[-1][1]
+
+
+def at_bat_probabilities(advice_total: int, stamina: int) -> Tuple[float, float, Dict[str, int]]:
+    """
+    타석 결과 확률
+
+    Args:
+        advice_total: 조언 점수 합계 (3~9)
+        stamina: 선수 체력
+
+    Returns:
+        (M 계수, P 계수, {"homerun": %, "hit": %, "strikeout": %}) - 확률은 합이 100인 정수
+    """
+    m_coeff = banded(advice_total, MENTAL_COEFF_BANDS)
+    p_coeff = banded(stamina, PHYSICAL_COEFF_BANDS)
+
+    homerun_prob = round(HOMERUN_BASE_PROB * m_coeff * p_coeff)
+    hit_prob = round(HIT_BASE_PROB * m_coeff * p_coeff)
+
+    # 확률 정규화 (합이 100을 넘지 않도록)
+    if homerun_prob + hit_prob >= AT_BAT_PROB_CAP:
+        homerun_prob = min(homerun_prob, HOMERUN_MAX_PROB)
+        hit_prob = AT_BAT_PROB_CAP - homerun_prob
+
+    strikeout_prob = 100 - (homerun_prob + hit_prob)
+    return m_coeff, p_coeff, {"homerun": homerun_prob, "hit": hit_prob, "strikeout": strikeout_prob}
+
+
+# ============================================================================
+# 8월 대회 도루
+# ============================================================================
+
+# 베이스 확률 = (주루 × 1.5 + 멘탈 + 친밀도 / 5) / 3
+# 주루 능력이 가장 중요, 멘탈은 극복 의지, 친밀도는 코치에 대한 믿음
+STEAL_SPEED_WEIGHT = 1.5
+STEAL_INTIMACY_DIVISOR = 5
+# 도루 공포증 극복 시 보너스 (최대 95%), 미극복 시 페널티 (최소 5%)
+STEAL_OVERCOME_BONUS = 20
+STEAL_MAX_PROB = 95
+STEAL_PHOBIA_PENALTY = 15
+STEAL_MIN_PROB = 5
+
+
+def steal_base_probability(speed: int, mental: int, intimacy: int) -> float:
+    """도루 베이스 확률 (%, 보정 전)"""
+    return (speed * STEAL_SPEED_WEIGHT + mental + (intimacy / STEAL_INTIMACY_DIVISOR)) / 3
+
+
+def steal_success_probability(speed: int, mental: int, intimacy: int, phobia_overcome: bool) -> int:
+    """도루 성공 확률 (%, 정수)"""
+    base_prob = steal_base_probability(speed, mental, intimacy)
+    if phobia_overcome:
+        success_prob = min(base_prob + STEAL_OVERCOME_BONUS, STEAL_MAX_PROB)
+    else:
+        success_prob = max(base_prob - STEAL_PHOBIA_PENALTY, STEAL_MIN_PROB)
+    return round(success_prob)
+
+
+# ============================================================================
+# 월별 체력 회복
+# ============================================================================
+
+# 새 달이 시작될 때 회복하는 체력 (초반 25, 중반 15, 대회 준비 10)
+STAMINA_RECOVERY_BY_MONTH = {3: 25, 4: 25, 5: 25, 6: 15, 7: 15, 8: 10, 9: 10}
+
+
+def monthly_stamina_recovery(month: int) -> int:
+    """month월이 시작될 때 회복하는 체력"""
+    return STAMINA_RECOVERY_BY_MONTH.get(month, 0)
@@ -0,0 +1,335 @@
+"""
+게임 상태 저널 (Append-only Journal + 주기적 스냅샷)
+
+스탯 변화, 이벤트, 월 진행이 있을 때마다 전체 상태를 다시 쓰는 대신,
+이전 저장과의 차이(delta)만 세션별 저널 파일에 한 줄씩 추가합니다.
+
+파일 구성 (세션마다):
+- {session_id}.journal: JSON Lines, 한 줄이 저장 한 번
+- {session_id}.snapshot: N개 기록마다 갱신되는 전체 상태 + 저널 위치(seq, offset)
+- archived/{session_id}.journal: 보관소로 옮긴 세션의 이전 저널 (보관할 때마다 이어 붙임)
+
+저널은 스냅샷 이후에도, 세션을 보관소로 옮긴 뒤에도 지우지 않으므로 스탯 변화의 전체 이력이 남습니다.
+복원은 스냅샷을 읽고, 저널의 offset 이후 기록만 다시 적용합니다.
+
+기록 형식:
+    {"seq": 12, "ts": 1760000000.0,
+     "stats": {"mental": 3},                  # 스탯 증감
+     "flags": {"backstory_revealed": true},   # 바뀐 플래그
+     "append": {"event_history": ["5월 시작"]}, # 리스트 끝에 추가된 항목
+     "set": {"current_month": 5},             # 그 외 바뀐 필드 (전체 값)
+     "unset": ["..."]}                        # 사라진 필드
+    첫 기록은 {"seq": 1, "ts": ..., "full": {...}} (전체 상태)
+
+세션 이력 확인:
+    python -m services.game_state_journal <session_id>
+"""
+
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from .game_state_storage import BASE_DIR, GameStateStorage, is_safe_file_name
+from .session_cache import SessionCache
+from .state_codec import CorruptStateError, atomic_write, encode, read_file
+
+
+DEFAULT_JOURNAL_DIR = BASE_DIR / "static" / "data" / "game_journal"
+
+
+class _JournalHead:
+    """세션 저널의 마지막 상태 (다음 delta 계산용)"""
+
+    __slots__ = ('state', 'seq', 'offset', 'snapshot_seq')
+
+    def __init__(self, state: dict, seq: int, offset: int, snapshot_seq: int):
+        self.state = state
+        self.seq = seq
+        self.offset = offset
+        self.snapshot_seq = snapshot_seq
+
+
+def diff_states(previous: dict, current: dict) -> dict:
+    """두 상태 dict의 차이를 저널 기록으로 변환 (변화가 없으면 빈 dict)"""
+    record = {}
+    for key, value in current.items():
+        if key in previous and previous[key] == value:
+            continue
+        old = previous.get(key)
+
+        if key == 'stats' and isinstance(old, dict) and isinstance(value, dict) and old.keys() == value.keys() \
+                and all(isinstance(v, int) for v in value.values()):
+            record.setdefault('stats', {}).update(
+                {stat: value[stat] - old[stat] for stat in value if value[stat] != old[stat]}
+            )
+        elif key == 'flags' and isinstance(old, dict) and isinstance(value, dict) and old.keys() <= value.keys():
+            record.setdefault('flags', {}).update(
+                {flag: flag_value for flag, flag_value in value.items() if old.get(flag, object()) != flag_value}
+            )
+        elif isinstance(old, list) and isinstance(value, list) and len(value) > len(old) \
+                and value[:len(old)] == old:
+            record.setdefault('append', {})[key] = value[len(old):]
+        else:
+            record.setdefault('set', {})[key] = value
+
+    removed = [key for key in previous if key not in current]
+    if removed:
+        record['unset'] = removed
+    return record
+
+
+def apply_record(state: dict, record: dict) -> dict:
+    """
+    저널 기록 하나를 상태 dict에 적용 (제자리 수정 후 반환)
+
+    기록의 값 객체를 그대로 참조하므로, 파일에서 막 읽은 기록에만 사용합니다.
+    """
+    if 'full' in record:
+        return record['full']
+
+    for key, value in record.get('set', {}).items():
+        state[key] = value
+    for stat, delta in record.get('stats', {}).items():
+        stats = state.setdefault('stats', {})
+        stats[stat] = stats.get(stat, 0) + delta
+    if 'flags' in record:
+        state.setdefault('flags', {}).update(record['flags'])
+    for key, items in record.get('append', {}).items():
+        state.setdefault(key, []).extend(items)
+    for key in record.get('unset', []):
+        state.pop(key, None)
+    return state
+
+
+class JournalStorage(GameStateStorage):
+    """
+    저널 기반 저장소
+
+    - save(): 이전 저장과의 delta 한 줄 append (+ fsync)
+    - snapshot_every개 기록마다 스냅샷을 원자적으로 교체
+    - load(): 스냅샷 + 이후 저널 재생
+    - 프로세스가 기록 도중 죽어 마지막 줄이 잘린 경우, 로드할 때 잘린 부분을 잘라냅니다.
+    """
+
+    name = "journal"
+
+    ARCHIVE_DIR_NAME = "archived"
+
+    def __init__(
+        self,
+        journal_dir: Path = DEFAULT_JOURNAL_DIR,
+        snapshot_every: int = 50,
+        fsync: bool = True,
+        head_cache_entries: int = 2000
+    ):
+        """
+        Args:
+            journal_dir: 저널/스냅샷 디렉토리
+            snapshot_every: 스냅샷 간격 (기록 수)
+            fsync: 기록마다 fsync 여부
+            head_cache_entries: delta 계산용으로 메모리에 두는 세션 수
+        """
+        self.journal_dir = Path(journal_dir)
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshot_every = max(1, int(snapshot_every))
+        self.fsync = fsync
+        self._heads = SessionCache("journal_heads", max_entries=head_cache_entries)
+        self._lock = threading.Lock()
+
+    def _journal_path(self, session_id: str) -> Path:
+        return self.journal_dir / f"{self._file_stem(session_id)}.journal"
+
+    def _snapshot_path(self, session_id: str) -> Path:
+        return self.journal_dir / f"{self._file_stem(session_id)}.snapshot"
+
+    def _archived_path(self, session_id: str) -> Path:
+        return self.journal_dir / self.ARCHIVE_DIR_NAME / f"{self._file_stem(session_id)}.journal"
+
+    @staticmethod
+    def _file_stem(session_id: str) -> str:
+        # 세션 ID가 그대로 파일 이름이 되므로 journal_dir 밖을 가리키는 ID는 거절 (FileStorage flat과 같은 기준)
+        if not is_safe_file_name(session_id):
+            raise ValueError(f"파일 이름으로 쓸 수 없는 세션 ID입니다: {session_id!r}")
+        return session_id
+
+    # ------------------------------------------------------------------
+    # 저장소 인터페이스
+    # ------------------------------------------------------------------
+
+    def load(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            head = self._restore(session_id)
+        return copy.deepcopy(head.state) if head is not None else None
+
+    def save(self, session_id: str, data: dict):
+        with self._lock:
+            head = self._heads.get(session_id) or self._restore(session_id)
+
+            if head is None:
+                record = {'full': data}
+                seq = 1
+            else:
+                record = diff_states(head.state, data)
+                if not record:
+                    return
+                seq = head.seq + 1
+
+            line = json.dumps({'seq': seq, 'ts': round(time.time(), 3), **record},
+                              ensure_ascii=False, separators=(',', ':'))
+            offset = self._append(session_id, line.encode('utf-8') + b"\n")
+
+            snapshot_seq = head.snapshot_seq if head is not None else 0
+            state = copy.deepcopy(data)
+            if seq - snapshot_seq >= self.snapshot_every:
+                self._write_snapshot(session_id, state, seq, offset)
+                snapshot_seq = seq
+            self._heads.put(session_id, _JournalHead(state, seq, offset, snapshot_seq))
+
+    def delete(self, session_id: str):
+        paths = (self._journal_path(session_id), self._snapshot_path(session_id))
+        with self._lock:
+            self._heads.pop(session_id)
+            for path in paths:
+                path.unlink(missing_ok=True)
+
+    def archive(self, session_id: str):
+        """
+        보관소로 옮긴 세션 정리
+
+        저널은 archived/로 옮겨 이력으로 남기고 스냅샷만 삭제합니다.
+        (복원되면 새 저널이 전체 상태 기록부터 다시 시작)
+        """
+        journal_path = self._journal_path(session_id)
+        snapshot_path = self._snapshot_path(session_id)
+        archived_path = self._archived_path(session_id)
+        with self._lock:
+            self._heads.pop(session_id)
+            if journal_path.exists():
+                content = journal_path.read_bytes()
+                # 기록 도중 잘린 마지막 줄은 다음에 이어 붙일 기록과 섞이지 않도록 제외
+                content = content[:content.rfind(b"\n") + 1]
+                archived_path.parent.mkdir(exist_ok=True)
+                with open(archived_path, 'ab') as f:
+                    f.write(content)
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+                journal_path.unlink()
+            snapshot_path.unlink(missing_ok=True)
+
+    def session_ids(self) -> List[str]:
+        return sorted(path.stem for path in self.journal_dir.glob("*.journal"))
+
+    def idle_sessions(self, before: float, limit: int = 0) -> List[str]:
+        result = []
+        for path in sorted(self.journal_dir.glob("*.journal")):
+            if path.stat().st_mtime < before:
+                result.append(path.stem)
+                if limit and len(result) >= limit:
+                    break
+        return result
+
+    # ------------------------------------------------------------------
+    # 분석용
+    # ------------------------------------------------------------------
+
+    def iter_records(self, session_id: str) -> Iterator[dict]:
+        """세션의 저널 기록 전체 (보관 전 기록 포함, 오래된 순, 라이브 상태와 무관하게 파일에서 읽음)"""
+        for path in (self._archived_path(session_id), self._journal_path(session_id)):
+            if not path.exists():
+                continue
+            with open(path, 'rb') as f:
+                for raw_line in f:
+                    if not raw_line.endswith(b"\n"):
+                        break  # 기록 도중 잘린 마지막 줄
+                    yield json.loads(raw_line)
+
+    # ------------------------------------------------------------------
+    # 내부 구현 (self._lock 보유 상태에서 호출)
+    # ------------------------------------------------------------------
+
+    def _append(self, session_id: str, payload: bytes) -> int:
+        """저널에 한 줄 추가 후 파일 끝 위치 반환"""
+        with open(self._journal_path(session_id), 'ab') as f:
+            f.write(payload)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            return f.tell()
+
+    def _write_snapshot(self, session_id: str, state: dict, seq: int, offset: int):
+        atomic_write(
+            self._snapshot_path(session_id),
+            encode({'seq': seq, 'offset': offset, 'state': state})
+        )
+
+    def _restore(self, session_id: str) -> Optional[_JournalHead]:
+        """스냅샷 + 저널 재생으로 마지막 상태 복원"""
+        snapshot = read_file(self._snapshot_path(session_id))
+        if snapshot is not None:
+            state, seq, offset = snapshot['state'], snapshot['seq'], snapshot['offset']
+        else:
+            state, seq, offset = None, 0, 0
+        snapshot_seq = seq
+
+        path = self._journal_path(session_id)
+        if not path.exists():
+            if state is None:
+                return None
+            head = _JournalHead(state, seq, offset, snapshot_seq)
+            self._heads.put(session_id, head)
+            return head
+
+        with open(path, 'rb+') as f:
+            f.seek(offset)
+            good_offset = offset
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    # 기록 도중 중단된 줄: 다음 append가 이어 붙지 않도록 잘라냄
+                    print(f"[GameStateJournal] {session_id}: 잘린 마지막 기록 제거 ({len(raw_line)}바이트)")
+                    f.truncate(good_offset)
+                    break
+                try:
+                    record = json.loads(raw_line)
+                except json.JSONDecodeError as e:
+                    raise CorruptStateError(f"저널 기록 해석 실패 ({session_id}, offset {good_offset}): {e}") from e
+                if record['seq'] > seq:
+                    state = apply_record(state or {}, record)
+                    seq = record['seq']
+                good_offset += len(raw_line)
+
+        if state is None:
+            return None
+        head = _JournalHead(state, seq, good_offset, snapshot_seq)
+        self._heads.put(session_id, head)
+        return head
+
+
+if __name__ == "__main__":
+    """
+    세션의 스탯 변화 이력 출력
+
+    실행 방법:
+    python -m services.game_state_journal <session_id>
+    """
+    if len(sys.argv) < 2:
+        print("사용법: python -m services.game_state_journal <session_id>")
+        sys.exit(1)
+
+    journal = JournalStorage()
+    target = sys.argv[1]
+    for entry in journal.iter_records(target):
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['ts']))
+        if 'full' in entry:
+            print(f"#{entry['seq']:<4} {stamp}  새 게임 ({entry['full'].get('current_month')}월)")
+            continue
+        parts = [f"{stat} {delta:+d}" for stat, delta in entry.get('stats', {}).items()]
+        parts += [f"{key}={value}" for key, value in entry.get('set', {}).items() if key != 'previous_month_stats']
+        parts += [f"flag {flag}={value}" for flag, value in entry.get('flags', {}).items()]
+        parts += [f"{key} +{len(items)}" for key, items in entry.get('append', {}).items()]
+        print(f"#{entry['seq']:<4} {stamp}  {', '.join(parts)}")
@@ -5,154 +5,362 @@
 - 선수 스탯 (친밀도, 멘탈, 체력, 힘, 주루능력)
 - 게임 진행 상황 (현재 월, 이벤트 히스토리)
 - 게임 플래그 (백스토리 공개 여부, 특별 엔딩 플래그 등)
+
+벤치마크:
+    python -m services.game_state_manager bench
 """
 
-from dataclasses import dataclass, field, asdict
-from typing import Dict, List, Optional
-import json
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, Optional, Set
+from contextlib import contextmanager, nullcontext
+import atexit
+import copy
+import threading
+import time
+import weakref
 from pathlib import Path
 
+from .cold_storage import ColdStorage
+from .game_state_storage import GameStateStorage, FileStorage
+from .session_cache import SessionCache
+from .state_codec import CorruptStateError, encode
+
+
+STAT_NAMES = ('intimacy', 'mental', 'stamina', 'batting', 'speed', 'defense')
+STAT_DEFAULTS = (0, 35, 100, 40, 25, 35)
+_STAT_INDEX = {name: index for index, name in enumerate(STAT_NAMES)}
+
 
-@dataclass
 class PlayerStats:
     """
     선수 스탯 (모든 스탯 0~100 범위)
 
-    관계: 친밀도
-    정신: 멘탈
-    신체: 체력
-    기술: 타격, 주루, 수비
+    관계: 친밀도 (intimacy, 기본 0)
+    정신: 멘탈 (mental, 기본 35 - 기본적인 멘탈은 있으나 약점이 명확함)
+    신체: 체력 (stamina, 기본 100 - 게임 밸런스를 위해 100으로 상향)
+    기술: 타격 (batting, 40), 주루 (speed, 25 - 도루 공포증으로 낮음), 수비 (defense, 35)
+
+    값은 STAT_NAMES 순서의 고정 길이 리스트 하나에 두고, 이름별 속성으로 읽고 씁니다.
+    to_dict()는 한 턴에 여러 번 호출되므로 dict를 캐시해 두고 값이 바뀔 때만 다시 만듭니다.
     """
-    # 관계
-    intimacy: int = 0      # 친밀도 (0-100)
 
-    # 정신 (기본적인 멘탈은 있으나 약점이 명확함)
-    mental: int = 35       # 멘탈
+    __slots__ = ('_values', '_view', '_extra')
+
+    def __init__(
+        self,
+        intimacy: int = 0,
+        mental: int = 35,
+        stamina: int = 100,
+        batting: int = 40,
+        speed: int = 25,
+        defense: int = 35
+    ):
+        object.__setattr__(self, '_values', [intimacy, mental, stamina, batting, speed, defense])
+        object.__setattr__(self, '_view', None)
+        object.__setattr__(self, '_extra', None)
 
-    # 신체 (고교 선수로서의 기본 피지컬)
-    stamina: int = 100     # 체력 (게임 밸런스를 위해 100으로 상향)
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> 'PlayerStats':
+        """딕셔너리에서 복원 (알 수 없는 키는 무시, 빠진 스탯은 기본값)"""
+        instance = cls.__new__(cls)
+        data = data or {}
+        object.__setattr__(instance, '_values', [
+            data.get(name, default) for name, default in zip(STAT_NAMES, STAT_DEFAULTS)
+        ])
+        object.__setattr__(instance, '_view', None)
+        object.__setattr__(instance, '_extra', None)
+        return instance
 
-    # 기술 (재능은 있으나 아직 미숙한 상태)
-    batting: int = 40      # 타격 능력
-    speed: int = 25        # 주루 능력 (도루 공포증으로 낮음)
-    defense: int = 35      # 수비 능력
+    def __setattr__(self, name, value):
+        """스탯이 아닌 속성도 대입할 수 있게 유지 (이전 dataclass와 호환, 저장 대상 아님)"""
+        try:
+            object.__setattr__(self, name, value)
+        except AttributeError:
+            if self._extra is None:
+                object.__setattr__(self, '_extra', {})
+            self._extra[name] = value
+
+    def __getattr__(self, name):
+        if name != '_extra':
+            extra = self._extra
+            if extra and name in extra:
+                return extra[name]
+        raise AttributeError(f"'PlayerStats' object has no attribute '{name}'")
+
+    def __eq__(self, other):
+        if not isinstance(other, PlayerStats):
+            return NotImplemented
+        return self._values == other._values
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={value}" for name, value in zip(STAT_NAMES, self._values))
+        return f"PlayerStats({fields})"
+
+    def __copy__(self) -> 'PlayerStats':
+        clone = PlayerStats.__new__(PlayerStats)
+        object.__setattr__(clone, '_values', list(self._values))
+        object.__setattr__(clone, '_view', self._view)  # 캐시 dict는 읽기 전용으로만 공유
+        object.__setattr__(clone, '_extra', dict(self._extra) if self._extra else None)
+        return clone
+
+    def __deepcopy__(self, memo) -> 'PlayerStats':
+        return self.__copy__()
+
+    def as_mapping(self) -> Mapping[str, int]:
+        """읽기 전용 스탯 dict (복사 없음, 값을 바꾸면 다음 호출에서 새로 만듦)"""
+        view = self._view
+        if view is None:
+            view = dict(zip(STAT_NAMES, self._values))
+            object.__setattr__(self, '_view', view)
+        return MappingProxyType(view)
 
     def to_dict(self) -> dict:
-        """딕셔너리로 변환"""
-        return asdict(self)
+        """딕셔너리로 변환 (호출자가 수정해도 되는 새 dict)"""
+        view = self._view
+        if view is None:
+            view = dict(zip(STAT_NAMES, self._values))
+            object.__setattr__(self, '_view', view)
+        return view.copy()
 
     def apply_changes(self, changes: Dict[str, int]):
         """
         스탯 변화 적용 (모든 스탯 0-100 범위로 클램핑)
         """
+        values = self._values
         for key, value in changes.items():
-            if hasattr(self, key):
-                current = getattr(self, key)
+            index = _STAT_INDEX.get(key)
+            if index is not None:
                 # 0-100 범위로 클램핑
-                new_value = max(0, min(100, current + value))
-                setattr(self, key, new_value)
+                values[index] = max(0, min(100, values[index] + value))
+        object.__setattr__(self, '_view', None)
 
     def get_stat(self, stat_name: str) -> int:
         """특정 스탯 값 가져오기"""
-        return getattr(self, stat_name, 0)
+        index = _STAT_INDEX.get(stat_name)
+        if index is None:
+            return getattr(self, stat_name, 0)
+        return self._values[index]
+
+
+def _stat_property(index: int, name: str) -> property:
+    def getter(self):
+        return self._values[index]
+
+    def setter(self, value):
+        self._values[index] = value
+        object.__setattr__(self, '_view', None)
+
+    return property(getter, setter, doc=f"{name} 스탯")
+
+
+for _index, _name in enumerate(STAT_NAMES):
+    setattr(PlayerStats, _name, _stat_property(_index, _name))
+
+
+# GameState 필드 (저장 형식의 키 순서)
+GAME_STATE_FIELDS = (
+    'session_id',
+    'current_month',
+    'current_day',
+    'stats',
+    'flags',
+    'event_history',
+    'special_moments',
+    'training_schedule',
+    'training_history',
+    'current_phase',
+    'current_storybook_id',
+    'storybook_completed',
+    'previous_month_stats',
+    'next_action',
+    'training_count_this_month',
+)
+
+# 스냅샷 복사 시 그대로 공유해도 되는 불변 값 필드
+_SCALAR_FIELDS = (
+    'session_id', 'current_month', 'current_day', 'current_phase',
+    'current_storybook_id', 'next_action', 'training_count_this_month'
+)
+_CONTAINER_FIELDS = tuple(name for name in GAME_STATE_FIELDS if name not in _SCALAR_FIELDS and name != 'stats')
 
 
-@dataclass
 class GameState:
     """
     전체 게임 상태
 
     게임의 모든 상태를 저장하고 관리합니다.
-    """
-
-    session_id: str  # username (세션 식별자)
-
-    # 시간 정보
-    current_month: int = 3  # 3월부터 시작
-    current_day: int = 1
-
-    # 선수 스탯
-    stats: PlayerStats = field(default_factory=PlayerStats)
 
-    # 게임 플래그
-    flags: Dict[str, bool] = field(default_factory=dict)
-
-    # 이벤트 히스토리
-    event_history: List[str] = field(default_factory=list)
-
-    # 특별한 순간 (추후 구현)
-    special_moments: List[dict] = field(default_factory=list)
-
-    # 훈련 스케줄 (추후 구현)
-    training_schedule: Dict[str, str] = field(default_factory=dict)
-    # Training history for prompt context
-    training_history: List[dict] = field(default_factory=list)
-
-    # 스토리북 관련
-    current_phase: str = "storybook"  # "storybook" | "chat"
-    current_storybook_id: str = "3_opening"  # 현재 보고 있는 스토리북
-    storybook_completed: Dict[str, bool] = field(default_factory=dict)  # 완료한 스토리북 목록
-
-    # 이전 월 스탯 (전환 스토리북에서 변화량 표시용)
-    previous_month_stats: Dict[str, int] = field(default_factory=dict)
-    
-    # <<< 수정 시작: '다음 행동'을 지정하는 플래그 추가 >>>
-    # 이유: 8월 이벤트처럼 여러 단계로 진행되는 이벤트를 처리하기 위해, 현재 어떤 단계를 수행해야 하는지 저장해야 합니다.
-    next_action: Optional[str] = None  # 예: "submit_advice", "decide_steal"
-    # <<< 수정 끝 >>>
+    필드:
+        session_id: username (세션 식별자)
+        current_month / current_day: 시간 정보 (3월 1일부터 시작)
+        stats: 선수 스탯
+        flags: 게임 플래그
+        event_history: 이벤트 히스토리
+        special_moments: 특별한 순간
+        training_schedule / training_history: 훈련 스케줄, 프롬프트용 훈련 기록
+        current_phase: "storybook" | "chat"
+        current_storybook_id: 현재 보고 있는 스토리북
+        storybook_completed: 완료한 스토리북 목록
+        previous_month_stats: 이전 월 스탯 (전환 스토리북에서 변화량 표시용)
+        next_action: 8월 이벤트처럼 여러 단계로 진행되는 이벤트의 다음 단계
+                     (예: "submit_advice", "decide_steal")
+        training_count_this_month: 월별 훈련 횟수
+    """
 
-    # 월별 훈련 횟수 추적
-    training_count_this_month: int = 0
+    __slots__ = GAME_STATE_FIELDS + ('_dirty',)
 
-    def __post_init__(self):
-        """초기화 후 기본값 설정"""
+    def __init__(
+        self,
+        session_id: str,
+        current_month: int = 3,
+        current_day: int = 1,
+        stats: Optional[PlayerStats] = None,
+        flags: Optional[Dict[str, bool]] = None,
+        event_history: Optional[List[str]] = None,
+        special_moments: Optional[List[dict]] = None,
+        training_schedule: Optional[Dict[str, str]] = None,
+        training_history: Optional[List[dict]] = None,
+        current_phase: str = "storybook",
+        current_storybook_id: Optional[str] = "3_opening",
+        storybook_completed: Optional[Dict[str, bool]] = None,
+        previous_month_stats: Optional[Dict[str, int]] = None,
+        next_action: Optional[str] = None,
+        training_count_this_month: int = 0
+    ):
+        setter = object.__setattr__
+        setter(self, '_dirty', None)
+        setter(self, 'session_id', session_id)
+        setter(self, 'current_month', current_month)
+        setter(self, 'current_day', current_day)
         # stats가 None이거나 PlayerStats 타입이 아니면 새로 생성
-        if self.stats is None or not isinstance(self.stats, PlayerStats):
-            self.stats = PlayerStats()
-
-        # flags 기본값 설정 (None이거나 비어있을 때만)
-        if self.flags is None:
-            self.flags = {}
+        setter(self, 'stats', stats if isinstance(stats, PlayerStats) else PlayerStats())
+        setter(self, 'flags', flags if flags is not None else {})
+        setter(self, 'event_history', event_history if event_history is not None else [])
+        setter(self, 'special_moments', special_moments if special_moments is not None else [])
+        setter(self, 'training_schedule', training_schedule if training_schedule is not None else {})
+        setter(self, 'training_history', training_history if training_history is not None else [])
+        setter(self, 'current_phase', current_phase)
+        setter(self, 'current_storybook_id', current_storybook_id)
+        setter(self, 'storybook_completed', storybook_completed if storybook_completed is not None else {})
+        setter(self, 'previous_month_stats', previous_month_stats if previous_month_stats is not None else {})
+        setter(self, 'next_action', next_action)
+        setter(self, 'training_count_this_month', training_count_this_month)
 
         # 필수 플래그 키 초기화 (없으면 추가)
         default_flags = {
             'backstory_revealed': False,  # 5월 집 방문 여부
-            'tournament_result': 'strikeout', # <<< 수정: 8월 대회 결과를 저장할 플래그 (homerun, hit_steal, hit, strikeout)
+            'tournament_result': 'strikeout',  # 8월 대회 결과 (homerun, hit_steal, hit, strikeout)
             'steal_phobia_overcome': False,  # 도루 공포증 극복
         }
         for key, value in default_flags.items():
             if key not in self.flags:
                 self.flags[key] = value
 
-        if self.training_history is None:
-            self.training_history = []
+        # 변경 추적 시작 (저장 대상 판단용)
+        setter(self, '_dirty', False)
+
+    def __setattr__(self, name, value):
+        """필드 대입 시 변경된 상태로 기록 (초기화 이후부터)"""
+        object.__setattr__(self, name, value)
+        try:
+            dirty = self._dirty
+        except AttributeError:  # 복원 중 (슬롯이 아직 비어 있음)
+            return
+        if dirty is not None:
+            object.__setattr__(self, '_dirty', True)
+
+    def __eq__(self, other):
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in GAME_STATE_FIELDS)
+
+    def __repr__(self) -> str:
+        return (
+            f"GameState(session_id={self.session_id!r}, current_month={self.current_month}, "
+            f"current_phase={self.current_phase!r}, stats={self.stats!r})"
+        )
+
+    def __deepcopy__(self, memo) -> 'GameState':
+        """스냅샷용 깊은 복사 (불변 필드는 공유, 스탯은 리스트만 복사)"""
+        clone = GameState.__new__(GameState)
+        setter = object.__setattr__
+        for name in _SCALAR_FIELDS:
+            setter(clone, name, getattr(self, name))
+        setter(clone, 'stats', self.stats.__copy__())
+        for name in _CONTAINER_FIELDS:
+            setter(clone, name, copy.deepcopy(getattr(self, name), memo))
+        setter(clone, '_dirty', self._dirty)
+        return clone
+
+    def mark_dirty(self):
+        """
+        변경 표시
+
+        리스트/딕셔너리/스탯을 제자리에서 수정한 경우처럼 대입이 없는 변경에 사용합니다.
+        (저장소는 항상 상태 전체를 기록하므로 필드 단위로 구분하지 않음)
+        """
+        object.__setattr__(self, '_dirty', True)
+
+    def is_dirty(self) -> bool:
+        """저장되지 않은 변경이 있는지 여부"""
+        return bool(self._dirty)
+
+    def clear_dirty(self):
+        """변경 표시 초기화 (저장 후 호출)"""
+        object.__setattr__(self, '_dirty', False)
 
     def to_dict(self) -> dict:
-        """딕셔너리로 변환 (저장용)"""
+        """
+        딕셔너리로 변환 (저장용)
+
+        컨테이너 필드는 얕은 복사본입니다. flush는 세션 락 안에서 변환한 결과를 락 밖에서
+        기록하므로, 그 사이 다른 요청이 리스트/딕셔너리를 수정해도 변환 결과는 바뀌지 않습니다.
+        (원소 dict는 추가만 되고 제자리에서 수정되지 않으므로 얕은 복사로 충분)
+        """
         return {
             'session_id': self.session_id,
             'current_month': self.current_month,
             'current_day': self.current_day,
             'stats': self.stats.to_dict(),
-            'flags': self.flags,
-            'event_history': self.event_history,
-            'special_moments': self.special_moments,
-            'training_schedule': self.training_schedule,
-            'training_history': self.training_history,
+            'flags': dict(self.flags),
+            'event_history': list(self.event_history),
+            'special_moments': list(self.special_moments),
+            'training_schedule': dict(self.training_schedule),
+            'training_history': list(self.training_history),
             'current_phase': self.current_phase,
             'current_storybook_id': self.current_storybook_id,
-            'storybook_completed': self.storybook_completed,
-            'previous_month_stats': self.previous_month_stats,
+            'storybook_completed': dict(self.storybook_completed),
+            'previous_month_stats': dict(self.previous_month_stats),
             'next_action': self.next_action,
             'training_count_this_month': self.training_count_this_month
         }
 
     @classmethod
     def from_dict(cls, data: dict) -> 'GameState':
-        """딕셔너리에서 게임 상태 복원"""
-        stats_data = data.pop('stats', {})
-        instance = cls(**data)
-        instance.stats = PlayerStats(**stats_data)
+        """
+        딕셔너리에서 게임 상태 복원
+
+        data는 수정하지 않으며, 컨테이너 필드는 얕은 복사본을 사용합니다.
+        알 수 없는 키는 무시합니다. (session_id가 없으면 KeyError)
+        """
+        instance = cls(
+            session_id=data['session_id'],
+            current_month=data.get('current_month', 3),
+            current_day=data.get('current_day', 1),
+            stats=PlayerStats.from_dict(data.get('stats')),
+            flags=dict(data.get('flags') or {}),
+            event_history=list(data.get('event_history') or ()),
+            special_moments=list(data.get('special_moments') or ()),
+            training_schedule=dict(data.get('training_schedule') or {}),
+            training_history=list(data.get('training_history') or ()),
+            current_phase=data.get('current_phase', "storybook"),
+            current_storybook_id=data.get('current_storybook_id', "3_opening"),
+            storybook_completed=dict(data.get('storybook_completed') or {}),
+            previous_month_stats=dict(data.get('previous_month_stats') or {}),
+            next_action=data.get('next_action'),
+            training_count_this_month=data.get('training_count_this_month', 0)
+        )
+        instance.clear_dirty()
         return instance
 
     def get_months_until_draft(self) -> int:
@@ -162,6 +370,7 @@ class GameState:
     def mark_storybook_completed(self, storybook_id: str):
         """스토리북 완료 표시"""
         self.storybook_completed[storybook_id] = True
+        self.mark_dirty()
 
     def set_chat_mode(self):
         """채팅 모드로 전환"""
@@ -186,7 +395,7 @@ class GameState:
         if not self.previous_month_stats:
             return {}
 
-        current_stats = self.stats.to_dict()
+        current_stats = self.stats.as_mapping()
         changes = {}
 
         for key, current_value in current_stats.items():
@@ -221,6 +430,7 @@ class GameState:
         }
 
         self.training_history.append(entry)
+        self.mark_dirty()
 
         # Keep the history small (latest 10 entries are enough for prompts)
         if len(self.training_history) > 10:
@@ -266,20 +476,192 @@ class GameStateManager:
     게임 상태 저장/로드 관리
 
     각 사용자(세션)별로 게임 상태를 관리합니다.
+
+    동시성:
+    - 세션마다 별도의 RLock을 두어 같은 세션의 변경은 직렬화하고,
+      서로 다른 세션은 완전히 병렬로 처리합니다.
+    - 변경은 session_lock() 안에서 수행하고, 락이 풀릴 때 읽기 전용 스냅샷을 갱신합니다.
+    - GET 엔드포인트는 get_snapshot()으로 마지막 스냅샷을 읽으므로 쓰기 작업을 기다리지 않습니다.
+
+    영구 저장은 GameStateStorage 구현체(JSON 파일 / SQLite)가 담당합니다.
+
+    저장 방식 (durability):
+    - "sync": save() 호출 시 바로 저장소에 기록
+    - "write_behind": save()는 변경 표시만 하고, 백그라운드 스레드가 flush_interval_s마다
+      변경된 세션들을 한 번의 저장소 호출(save_many)로 기록합니다.
+      한 턴에 save()가 여러 번 호출되어도 실제 기록은 한 번이며,
+      정상 종료 시(atexit) 남은 변경을 모두 기록합니다.
+      단, 프로세스가 비정상 종료(kill -9, OOM, 정전)되면 마지막 flush 이후 save()가
+      성공으로 응답한 변경(최대 flush_interval_s 분량)이 사라지므로 기본값은 sync입니다.
+
+    메모리 캐시(_states)는 SessionCache로 크기/유휴 시간을 제한합니다.
+    제거 대상 세션은 저장되지 않은 변경을 먼저 기록하고, 사용 중(세션 락 보유)이면 제거를 미룹니다.
+    제거된 세션은 다음 접근 때 저장소에서 다시 로드됩니다.
+
+    보관소(cold_storage)가 있으면 archive_idle_s 동안 저장되지 않은 세션을
+    archive_interval_s마다 압축 보관소로 옮기고, 저장소에 없는 세션을 로드할 때
+    보관소에서 찾아 저장소로 되돌립니다. 보관은 보관소 담당 워커 하나만 수행합니다.
     """
 
-    def __init__(self, save_dir: Path):
+    DURABILITY_SYNC = "sync"
+    DURABILITY_WRITE_BEHIND = "write_behind"
+
+    def __init__(
+        self,
+        save_dir: Path,
+        storage: Optional[GameStateStorage] = None,
+        durability: str = DURABILITY_SYNC,
+        flush_interval_s: float = 1.0,
+        cache_config: Optional[dict] = None,
+        cold_storage: Optional[ColdStorage] = None,
+        archive_idle_s: float = 30 * 86400,
+        archive_interval_s: float = 3600,
+        archive_max_per_run: int = 500
+    ):
         """
         Args:
             save_dir: 게임 상태 저장 디렉토리
+            storage: 저장소 (None이면 save_dir의 파일 저장소)
+            durability: "sync" | "write_behind"
+            flush_interval_s: write_behind 모드의 기록 주기(초)
+            cache_config: 메모리 캐시 한도 {"max_entries", "max_bytes", "idle_ttl_s"} (None이면 제한 없음)
+            cold_storage: 비활성 세션 보관소 (None이면 보관하지 않음)
+            archive_idle_s: 마지막 저장 후 이 시간이 지난 세션을 보관
+            archive_interval_s: 보관 작업 주기(초) (0이면 archive_idle()을 직접 호출할 때만)
+            archive_max_per_run: 한 번에 보관할 최대 세션 수
         """
+        if durability not in (self.DURABILITY_SYNC, self.DURABILITY_WRITE_BEHIND):
+            raise ValueError(f"지원하지 않는 durability 설정입니다: {durability}")
+
         self.save_dir = save_dir
         self.save_dir.mkdir(parents=True, exist_ok=True)
+        self.storage = storage or FileStorage(save_dir)
+
+        # 공유 저장소는 분산 락을 놓기 전에 기록이 끝나야 하므로 즉시 기록만 허용
+        if self.storage.shared and durability != self.DURABILITY_SYNC:
+            print(f"[GameStateManager] 공유 저장소에서는 write_behind 대신 sync로 저장합니다")
+            durability = self.DURABILITY_SYNC
+        self.durability = durability
+        self.flush_interval_s = flush_interval_s
+
+        # 기록 대기 중인 세션 / 기록 순서 보장용 락
+        self._dirty_sessions: Set[str] = set()
+        self._dirty_guard = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_flusher = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        # 메모리 캐시 (빠른 접근용, LRU/TTL 제한)
+        self._states = SessionCache.from_config(
+            "game_states",
+            cache_config,
+            sizeof=_estimate_state_size,
+            on_evict=self._on_evict
+        )
 
-        # 메모리 캐시 (빠른 접근용)
-        self._states: Dict[str, GameState] = {}
+        # 세션별 락 / 읽기 전용 스냅샷
+        # (락은 약한 참조로만 보관: 잡고 있거나 기다리는 스레드가 없으면 사라지므로
+        #  지금까지 본 세션 수만큼 쌓이지 않음)
+        self._locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self._locks_guard = threading.Lock()
+        self._snapshots: Dict[str, GameState] = {}
+        self._lock_depth = threading.local()
+
+        # 비활성 세션 보관 (공유 저장소는 워커마다 보관하면 충돌하므로 사용하지 않음)
+        if cold_storage is not None and self.storage.shared:
+            print(f"[GameStateManager] 공유 저장소에서는 비활성 세션 보관을 사용하지 않습니다")
+            cold_storage = None
+        self.cold_storage = cold_storage
+        self.archive_idle_s = archive_idle_s
+        self.archive_interval_s = archive_interval_s
+        self.archive_max_per_run = archive_max_per_run
+        self._archiver: Optional[threading.Thread] = None
+
+        if durability == self.DURABILITY_WRITE_BEHIND:
+            self._flusher = threading.Thread(target=self._flush_loop, name="game-state-flusher", daemon=True)
+            self._flusher.start()
+            atexit.register(self.close)
+
+        if cold_storage is not None and archive_interval_s > 0:
+            self._archiver = threading.Thread(target=self._archive_loop, name="game-state-archiver", daemon=True)
+            self._archiver.start()
+
+        print(f"[GameStateManager] 초기화 완료: {save_dir} "
+              f"(저장소: {self.storage.name}, 저장 방식: {durability})")
+
+    def _get_lock(self, session_id: str) -> threading.RLock:
+        """
+        세션 전용 락 반환 (없으면 생성)
+
+        호출자가 반환값을 들고 있는 동안에는 같은 세션에 같은 락이 반환됩니다.
+        """
+        lock = self._locks.get(session_id)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._locks.get(session_id)
+                if lock is None:
+                    lock = threading.RLock()
+                    self._locks[session_id] = lock
+        return lock
+
+    @contextmanager
+    def session_lock(self, session_id: str) -> Iterator[GameState]:
+        """
+        세션 단위 직렬 실행 구간
 
-        print(f"[GameStateManager] 초기화 완료: {save_dir}")
+        같은 세션의 다른 변경 요청은 이 구간이 끝날 때까지 대기합니다.
+        중첩 호출이 가능하며, 가장 바깥 구간이 끝날 때 스냅샷을 갱신합니다.
+        공유 저장소에서는 가장 바깥 구간에서 분산 락을 잡고, 다른 워커가 저장한
+        상태라면 로컬 캐시를 버리고 다시 로드합니다.
+
+        사용 예:
+            with manager.session_lock(username) as game_state:
+                game_state.stats.apply_changes(...)
+                manager.save(username)
+        """
+        lock = self._get_lock(session_id)
+        depths = self._lock_depth.__dict__.setdefault('depths', {})
+        with lock:
+            outermost = session_id not in depths
+            with self.storage.session_guard(session_id) if outermost else nullcontext():
+                if outermost and self.storage.is_stale(session_id):
+                    self._drop_cached(session_id)
+                depths[session_id] = depths.get(session_id, 0) + 1
+                try:
+                    yield self.get_or_create(session_id)
+                finally:
+                    depths[session_id] -= 1
+                    if depths[session_id] == 0:
+                        del depths[session_id]
+                        self._publish_snapshot(session_id)
+
+    def get_snapshot(self, session_id: str) -> GameState:
+        """
+        읽기 전용 게임 상태 스냅샷 반환 (GET 엔드포인트용)
+
+        마지막으로 커밋된 상태의 복사본이므로 진행 중인 변경과 경합하지 않습니다.
+        반환된 객체를 수정해도 실제 상태에는 반영되지 않습니다.
+        """
+        snapshot = self._snapshots.get(session_id)
+        if snapshot is None or self.storage.is_stale(session_id):
+            # 처음 로드되었거나 캐시에서 제거된 세션: 락 안에서 바로 스냅샷 생성
+            with self.session_lock(session_id):
+                self._publish_snapshot(session_id)
+                snapshot = self._snapshots[session_id]
+        return snapshot
+
+    def _drop_cached(self, session_id: str):
+        """로컬 캐시/스냅샷 폐기 (세션 락 보유 상태에서 호출, 다음 접근 때 저장소에서 다시 로드)"""
+        self._states.pop(session_id)
+        self._snapshots.pop(session_id, None)
+        with self._dirty_guard:
+            self._dirty_sessions.discard(session_id)
+
+    def _publish_snapshot(self, session_id: str):
+        """현재 상태를 복사해 스냅샷으로 교체 (세션 락 보유 상태에서 호출)"""
+        state = self._states.peek(session_id)
+        if state is not None:
+            self._snapshots[session_id] = copy.deepcopy(state)
 
     def get_or_create(self, session_id: str) -> GameState:
         """
@@ -292,22 +674,32 @@ class GameStateManager:
             GameState 객체
         """
         # 메모리 캐시에 있으면 반환
-        if session_id in self._states:
-            return self._states[session_id]
-
-        # 저장된 상태 로드 시도
-        save_file = self.save_dir / f"{session_id}.json"
-        if save_file.exists():
-            try:
-                with open(save_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+        state = self._states.get(session_id)
+        if state is not None:
+            return state
+
+        # 같은 세션을 두 스레드가 동시에 로드하지 않도록 세션 락 안에서 처리
+        with self._get_lock(session_id):
+            if session_id in self._states:
+                return self._states[session_id]
+            return self._load_or_create(session_id)
+
+    def _load_or_create(self, session_id: str) -> GameState:
+        """저장소에서 로드하거나 새 상태 생성 (세션 락 보유 상태에서 호출)"""
+
+        # 저장된 상태 로드 시도 (저장소에 없으면 보관소에서 복원)
+        try:
+            data = self.storage.load(session_id)
+            if data is None and self.cold_storage is not None:
+                data = self._rehydrate(session_id)
+            if data is not None:
                 state = GameState.from_dict(data)
                 self._states[session_id] = state
                 print(f"[GameStateManager] 게임 상태 로드: {session_id} ({state.current_month}월)")
                 return state
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"[WARNING] 게임 상태 로드 실패 ({type(e).__name__}): {e}")
-                print(f"[WARNING] 새 게임으로 시작합니다")
+        except (CorruptStateError, KeyError, TypeError) as e:
+            print(f"[WARNING] 게임 상태 로드 실패 ({type(e).__name__}): {e}")
+            print(f"[WARNING] 새 게임으로 시작합니다")
 
         # 새 게임 상태 생성
         state = GameState(session_id=session_id)
@@ -315,10 +707,85 @@ class GameStateManager:
         print(f"[GameStateManager] 새 게임 시작: {session_id}")
         return state
 
+    def _rehydrate(self, session_id: str) -> Optional[dict]:
+        """보관소의 상태를 저장소로 되돌림 (세션 락 보유 상태에서 호출)"""
+        data = self.cold_storage.load(session_id)
+        if data is None:
+            return None
+        # 저장소에 먼저 기록한 뒤 보관 항목 삭제 (중간에 죽어도 저장소 쪽이 우선)
+        self.storage.save(session_id, data)
+        self.cold_storage.discard(session_id)
+        print(f"[GameStateManager] 보관된 게임 상태 복원: {session_id}")
+        return data
+
+    def archive_idle(self, idle_s: Optional[float] = None) -> int:
+        """
+        오래 저장되지 않은 세션을 보관소로 이동
+
+        메모리에 있거나 사용 중(세션 락 보유)이거나 기록 대기 중인 세션은 건너뜁니다.
+        보관소 담당(claim_archiver)이 아닌 워커에서는 아무것도 하지 않습니다.
+
+        Args:
+            idle_s: 유휴 기준(초) (None이면 archive_idle_s)
+
+        Returns:
+            보관한 세션 수
+        """
+        # 보관은 워커 하나만 (여러 워커가 같은 세그먼트에 기록하지 않도록)
+        if self.cold_storage is None or not self.cold_storage.claim_archiver():
+            return 0
+
+        before = time.time() - (self.archive_idle_s if idle_s is None else idle_s)
+        archived = 0
+        for session_id in self.storage.idle_sessions(before, limit=self.archive_max_per_run):
+            if session_id in self._states:
+                continue
+            lock = self._get_lock(session_id)
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                with self._dirty_guard:
+                    if session_id in self._dirty_sessions:
+                        continue
+                if session_id in self._states:
+                    continue
+                try:
+                    data = self.storage.load(session_id)
+                except CorruptStateError as e:
+                    print(f"[WARNING] 보관 건너뜀: {session_id} ({e})")
+                    continue
+                if data is None:
+                    continue
+                # 보관소에 기록(fsync)한 뒤 저장소에서 제거 (저널은 이력으로 남김)
+                self.cold_storage.put(session_id, data)
+                self.storage.archive(session_id)
+                self._snapshots.pop(session_id, None)
+                archived += 1
+            finally:
+                lock.release()
+
+        if archived:
+            print(f"[GameStateManager] 비활성 세션 {archived}개 보관")
+        return archived
+
+    def _archive_loop(self):
+        """주기적 비활성 세션 보관 + 보관소 정리"""
+        while not self._stop_flusher.wait(self.archive_interval_s):
+            try:
+                if not self.cold_storage.claim_archiver():
+                    continue
+                self.archive_idle()
+                self.cold_storage.compact()
+            except Exception as e:
+                print(f"[ERROR] 비활성 세션 보관 실패 ({type(e).__name__}): {e}")
+
     def save(self, session_id: str):
         """
         게임 상태 저장
 
+        sync 모드에서는 바로 기록하고, write_behind 모드에서는 변경 표시 후
+        백그라운드 flush에 맡깁니다.
+
         Args:
             session_id: 사용자 식별자
         """
@@ -326,12 +793,140 @@ class GameStateManager:
             print(f"[GameStateManager] 저장할 상태가 없음: {session_id}")
             return
 
-        state = self._states[session_id]
-        save_file = self.save_dir / f"{session_id}.json"
+        with self._get_lock(session_id):
+            # 호출자가 제자리 수정(스탯, 리스트 append 등)을 했을 수 있으므로 변경으로 표시
+            self._states[session_id].mark_dirty()
+            self._states.refresh_size(session_id)
+            self._publish_snapshot(session_id)
+            with self._dirty_guard:
+                self._dirty_sessions.add(session_id)
 
-        with open(save_file, 'w', encoding='utf-8') as f:
-            json.dump(state.to_dict(), f, ensure_ascii=False, indent=2)
-        print(f"[GameStateManager] 게임 상태 저장 완료: {session_id}")
+        if self.durability == self.DURABILITY_SYNC:
+            self.flush([session_id])
+            print(f"[GameStateManager] 게임 상태 저장 완료: {session_id}")
+
+    def flush(self, session_ids: Optional[List[str]] = None) -> int:
+        """
+        변경된 세션을 저장소에 기록
+
+        Args:
+            session_ids: 기록할 세션 (None이면 변경된 세션 전체)
+
+        Returns:
+            기록한 세션 수
+        """
+        # 동시에 두 flush가 돌면 오래된 상태가 나중에 기록될 수 있으므로 직렬화
+        with self._flush_lock:
+            with self._dirty_guard:
+                if session_ids is None:
+                    targets = list(self._dirty_sessions)
+                else:
+                    targets = [sid for sid in session_ids if sid in self._dirty_sessions]
+                self._dirty_sessions.difference_update(targets)
+
+            items = []
+            for session_id in targets:
+                with self._get_lock(session_id):
+                    state = self._states.peek(session_id)
+                    if state is None or not state.is_dirty():
+                        continue
+                    items.append((session_id, state.to_dict()))
+                    state.clear_dirty()
+
+            if not items:
+                return 0
+
+            try:
+                self.storage.save_many(items)
+            except Exception:
+                # 다음 flush에서 다시 시도
+                with self._dirty_guard:
+                    self._dirty_sessions.update(session_id for session_id, _ in items)
+                for session_id, data in items:
+                    state = self._states.peek(session_id)
+                    if state is not None:
+                        state.mark_dirty()
+                    else:
+                        # 그 사이 캐시에서 제거된 세션은 기록할 내용을 직접 보관
+                        self._states.put(session_id, GameState.from_dict(data))
+                        self._states.peek(session_id).mark_dirty()
+                raise
+
+        return len(items)
+
+    def _on_evict(self, session_id: str, state: GameState) -> bool:
+        """
+        캐시 제거 전 콜백 (SessionCache 락 밖에서 호출, 세션 락/flush 락은 기다리지 않고 보류)
+
+        - 다른 스레드가 세션 락을 잡고 있거나 현재 스레드가 사용 중이면 제거 보류
+        - 저장되지 않은 변경이 있으면 먼저 기록 (flush 진행 중이면 보류)
+        """
+        if session_id in self._lock_depth.__dict__.get('depths', {}):
+            return False
+
+        lock = self._get_lock(session_id)
+        if not lock.acquire(blocking=False):
+            return False
+        try:
+            if state.is_dirty():
+                if not self._flush_lock.acquire(blocking=False):
+                    return False
+                try:
+                    self.storage.save(session_id, state.to_dict())
+                    state.clear_dirty()
+                    with self._dirty_guard:
+                        self._dirty_sessions.discard(session_id)
+                except Exception as e:
+                    print(f"[ERROR] 제거 전 게임 상태 저장 실패 ({type(e).__name__}): {e}")
+                    return False
+                finally:
+                    self._flush_lock.release()
+            self._snapshots.pop(session_id, None)
+            return True
+        finally:
+            lock.release()
+
+    def cache_stats(self) -> dict:
+        """메모리 캐시 메트릭"""
+        return self._states.stats()
+
+    def pending_count(self) -> int:
+        """기록 대기 중인 세션 수"""
+        with self._dirty_guard:
+            return len(self._dirty_sessions)
+
+    def close(self):
+        """백그라운드 flush 중지 후 남은 변경 기록 (종료 시 호출)"""
+        self._stop_flusher.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=self.flush_interval_s + 5)
+        if self._archiver is not None and self._archiver is not threading.current_thread():
+            self._archiver.join(timeout=5)
+        written = self.flush()
+        if written:
+            print(f"[GameStateManager] 종료 전 게임 상태 {written}개 저장")
+
+    def _flush_loop(self):
+        """write_behind 모드의 주기적 flush"""
+        while not self._stop_flusher.wait(self.flush_interval_s):
+            self._states.sweep()
+            try:
+                started = time.perf_counter()
+                written = self.flush()
+                if written:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    print(f"[GameStateManager] 게임 상태 {written}개 저장 ({elapsed_ms:.1f}ms)")
+            except Exception as e:
+                print(f"[ERROR] 게임 상태 저장 실패 ({type(e).__name__}): {e}")
+
+    def sessions_in_month(self, month: int) -> List[str]:
+        """
+        저장소 기준 해당 월에 있는 세션 ID 목록
+
+        Args:
+            month: 조회할 월 (3~9)
+        """
+        return self.storage.sessions_in_month(month)
 
     def get_stat_summary(self, session_id: str) -> str:
         """
@@ -383,16 +978,101 @@ class GameStateManager:
         Returns:
             성공 여부 (9월 이후면 False)
         """
-        state = self.get_or_create(session_id)
+        with self.session_lock(session_id) as state:
+            if state.current_month >= 9:
+                print(f"[GameStateManager] 이미 마지막 달(9월)입니다")
+                return False
 
-        if state.current_month >= 9:
-            print(f"[GameStateManager] 이미 마지막 달(9월)입니다")
-            return False
-
-        state.current_month += 1
-        state.current_day = 1
-        state.event_history.append(f"{state.current_month}월 시작")
+            state.current_month += 1
+            state.current_day = 1
+            state.event_history.append(f"{state.current_month}월 시작")
 
-        self.save(session_id)
+            self.save(session_id)
         print(f"[GameStateManager] {session_id}: {state.current_month}월로 진행")
         return True
+
+
+def _estimate_state_size(state: GameState) -> int:
+    """게임 상태의 추정 메모리 크기 (직렬화 크기 기준)"""
+    return len(encode(state.to_dict()))
+
+
+def _benchmark(turns: int = 20000, sessions: int = 1000):
+    """
+    한 턴 동안의 상태 접근 패턴을 흉내 내 시간 / 임시 할당량 / 세션당 메모리 측정
+
+    한 턴: 이전 스탯 → 스탯 변화 적용 → 새 스탯(응답 + 디버그) → 목표 확인
+           → 순간 카드 스냅샷 → 저장용 직렬화 → 스냅샷 복사
+    """
+    import sys
+    import tracemalloc
+
+    from .state_codec import decode
+
+    state = GameState(session_id="bench_user")
+    for month in range(3, 9):
+        state.event_history.append(f"{month}월 시작")
+        state.record_training_session(
+            month=month, intensity=2, intensity_label="보통", focuses=['batting'],
+            stat_changes={'batting': 2}, stamina_change=-10, summary="타격 훈련"
+        )
+    changes = {'mental': 1, 'batting': 2, 'stamina': -3}
+
+    def one_turn():
+        old_stats = state.stats.to_dict()
+        state.stats.apply_changes(changes)
+        new_stats = state.stats.to_dict()
+        debug_stats = state.stats.to_dict()
+        goals = state.stats.as_mapping()
+        achieved = all(goals.get(name, 0) >= 0 for name in ('batting', 'mental'))
+        moment_snapshot = state.stats.to_dict()
+        payload = encode(state.to_dict())
+        snapshot = copy.deepcopy(state)
+        return old_stats, new_stats, debug_stats, achieved, moment_snapshot, payload, snapshot
+
+    one_turn()
+    started = time.perf_counter()
+    for _ in range(turns):
+        one_turn()
+    turn_us = (time.perf_counter() - started) / turns * 1e6
+
+    # 저장소에서 막 읽은 것처럼 세션마다 새 dict 사용
+    payload = encode(state.to_dict())
+    fresh = [decode(payload) for _ in range(sessions)]
+    started = time.perf_counter()
+    for data in fresh:
+        GameState.from_dict(data)
+    load_us = (time.perf_counter() - started) / sessions * 1e6
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    one_turn()
+    _, peak = tracemalloc.get_traced_memory()
+    turn_bytes = peak - baseline
+
+    before, _ = tracemalloc.get_traced_memory()
+    loaded = [GameState.from_dict(decode(payload)) for _ in range(sessions)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"Python {sys.version.split()[0]}, {turns}턴")
+    print(f"턴당 시간:        {turn_us:8.1f} us")
+    print(f"턴당 임시 할당:   {turn_bytes:8d} bytes (peak)")
+    print(f"from_dict:        {load_us:8.1f} us")
+    print(f"세션당 메모리:    {(after - before) / len(loaded):8.0f} bytes ({sessions}개 평균)")
+
+
+if __name__ == "__main__":
+    """
+    GameState 접근/직렬화 마이크로벤치마크
+
+    실행 방법:
+    python -m services.game_state_manager bench [턴 수]
+    """
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != "bench":
+        print("사용법: python -m services.game_state_manager bench [턴 수]")
+        sys.exit(1)
+    _benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 20000)
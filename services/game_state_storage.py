@@ -0,0 +1,652 @@
+"""
+게임 상태 저장소 (Storage Backend)
+
+GameStateManager는 상태를 메모리(_states)에 두고, 영구 저장은 이 모듈의 저장소에 맡깁니다.
+저장소는 GameState.to_dict() 결과(dict)를 세션 ID 단위로 읽고 씁니다.
+
+- FileStorage: 세션마다 파일 하나 (json_pretty / json / msgpack, state_codec 참고)
+    * "sharded" 레이아웃은 세션 ID 해시로 2단계 디렉토리에 나눠 저장
+- JournalStorage: 세션별 append-only delta 저널 + 주기적 스냅샷 (game_state_journal 참고)
+- SQLiteStorage: WAL 모드 SQLite 한 파일
+    * 자주 조회하는 필드(월, 페이즈, 스탯)는 타입이 있는 컬럼
+    * 나머지 필드는 JSON 문자열 컬럼(data)
+    * current_month 인덱스로 "8월인 세션 전체" 같은 조회를 파일 스캔 없이 처리
+
+설정은 config/chatbot_config.json의 "storage"에서 읽습니다.
+
+기존 JSON 파일 가져오기:
+    python -m services.game_state_storage migrate [--overwrite]
+
+flat JSON 파일을 sharded 레이아웃으로 옮기기:
+    python -m services.game_state_storage reshard
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import ContextManager, Dict, Iterable, List, Optional, Tuple
+
+from .state_codec import (
+    CorruptStateError, FORMAT_JSON, FORMAT_MSGPACK, atomic_write, encode, read_file, resolve_format
+)
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_JSON_DIR = BASE_DIR / "static" / "data" / "game_states"
+DEFAULT_SQLITE_PATH = BASE_DIR / "static" / "data" / "game_states.sqlite3"
+
+# SQLite 타입 컬럼으로 분리하는 스탯 (PlayerStats 필드)
+STAT_COLUMNS = ("intimacy", "mental", "stamina", "batting", "speed", "defense")
+
+
+class GameStateStorage:
+    """
+    게임 상태 저장소 인터페이스
+
+    모든 메서드는 GameState.to_dict() 형식의 dict를 주고받습니다.
+    세션 단위 직렬화는 GameStateManager의 세션 락이 담당하므로,
+    구현체는 서로 다른 세션의 동시 호출만 안전하게 처리하면 됩니다.
+    """
+
+    name = "base"
+
+    # 여러 프로세스가 같은 저장소를 공유하는지 여부 (SharedStorage만 True)
+    shared = False
+
+    def load(self, session_id: str) -> Optional[dict]:
+        """저장된 상태 반환 (없으면 None)"""
+        raise NotImplementedError
+
+    def save(self, session_id: str, data: dict):
+        """상태 저장 (있으면 덮어쓰기)"""
+        raise NotImplementedError
+
+    def save_many(self, items: Iterable[Tuple[str, dict]]):
+        """여러 세션 저장 (구현체가 한 번의 I/O로 묶을 수 있음)"""
+        for session_id, data in items:
+            self.save(session_id, data)
+
+    def delete(self, session_id: str):
+        """상태 삭제 (없으면 무시)"""
+        raise NotImplementedError
+
+    def archive(self, session_id: str):
+        """보관소로 옮긴 세션을 활성 저장소에서 제거 (기본은 delete, 이력을 남기는 저장소는 재정의)"""
+        self.delete(session_id)
+
+    def session_ids(self) -> List[str]:
+        """저장된 세션 ID 목록"""
+        raise NotImplementedError
+
+    def sessions_in_month(self, month: int) -> List[str]:
+        """current_month가 month인 세션 ID 목록"""
+        result = []
+        for session_id in self.session_ids():
+            data = self.load(session_id)
+            if data and data.get('current_month') == month:
+                result.append(session_id)
+        return result
+
+    def idle_sessions(self, before: float, limit: int = 0) -> List[str]:
+        """
+        마지막 저장 시각이 before(epoch 초)보다 이전인 세션 ID 목록 (보관 대상 찾기용)
+
+        저장 시각을 알 수 없는 저장소는 빈 목록을 반환합니다.
+        limit이 0보다 크면 최대 limit개까지만 반환합니다.
+        """
+        return []
+
+    def is_stale(self, session_id: str) -> bool:
+        """다른 프로세스가 저장해 로컬 사본이 오래되었는지 여부 (공유 저장소만 해당)"""
+        return False
+
+    def session_guard(self, session_id: str) -> ContextManager:
+        """프로세스 간 세션 락 (공유 저장소만 해당, 기본은 아무것도 하지 않음)"""
+        return nullcontext()
+
+    def close(self):
+        """리소스 정리"""
+
+
+def shard_key(session_id: str) -> str:
+    """세션 ID의 고정 해시 (sharded 레이아웃의 파일 이름, 보안 용도 아님)"""
+    return hashlib.sha1(session_id.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+def is_safe_file_name(session_id: str) -> bool:
+    """세션 ID를 그대로 파일 이름으로 써도 되는지 여부 (flat 레이아웃)"""
+    return bool(session_id) and not (
+        session_id.startswith('.')
+        or any(char in session_id for char in ('/', '\\', '\0'))
+    )
+
+
+class FileStorage(GameStateStorage):
+    """
+    세션마다 파일 하나
+
+    - json_pretty / json 형식은 .json, msgpack 형식은 .msgpack
+    - 쓰기는 임시 파일 + fsync + rename (원자적 교체)
+    - 읽기는 내용으로 형식을 판별하므로 형식을 바꿔도 기존 파일을 그대로 읽고,
+      다음 저장 때 새 형식으로 바뀝니다.
+    - 해석할 수 없는 파일은 {파일명}.corrupt-{시각}으로 옮겨 두고 CorruptStateError를 발생시켜,
+      새 게임 저장이 손상된 원본을 덮어쓰지 않도록 합니다.
+
+    레이아웃:
+    - "flat": {session_id}.json (기존 방식, 경로로 쓸 수 없는 세션 ID는 ValueError)
+    - "sharded": {해시[:2]}/{해시[2:4]}/{해시}.json
+        * 디렉토리 하나의 파일 수가 세션 수/65536 수준으로 유지되고, 어떤 세션 ID든 안전한 경로가 됨
+        * 해시 → 세션 ID 역색인(session_index.jsonl, append-only)으로 목록 조회
+        * 기존 flat 파일도 읽으며, 다음 저장 때 sharded 위치로 옮겨짐
+          (한 번에 옮기려면 python -m services.game_state_storage reshard)
+    """
+
+    name = "file"
+
+    EXTENSIONS = {FORMAT_MSGPACK: ".msgpack"}
+    DEFAULT_EXTENSION = ".json"
+
+    LAYOUTS = ("flat", "sharded")
+    INDEX_NAME = "session_index.jsonl"
+
+    def __init__(self, save_dir: Path, fmt: str = FORMAT_JSON, layout: str = "flat"):
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"지원하지 않는 파일 레이아웃입니다: {layout}")
+        self.save_dir = Path(save_dir)
+        self.save_dir.mkdir(parents=True, exist_ok=True)
+        self.fmt = resolve_format(fmt)
+        self.layout = layout
+        self.extension = self.EXTENSIONS.get(self.fmt, self.DEFAULT_EXTENSION)
+        self._other_extensions = [
+            ext for ext in {self.DEFAULT_EXTENSION, *self.EXTENSIONS.values()} if ext != self.extension
+        ]
+
+        # sharded 역색인 (해시 → 세션 ID, 처음 필요할 때 읽음)
+        self._index: Optional[Dict[str, str]] = None
+        self._index_lock = threading.Lock()
+
+    @property
+    def index_path(self) -> Path:
+        return self.save_dir / self.INDEX_NAME
+
+    def _all_extensions(self) -> List[str]:
+        return [self.extension, *self._other_extensions]
+
+    def _flat_path(self, session_id: str, extension: Optional[str] = None) -> Path:
+        if not is_safe_file_name(session_id):
+            raise ValueError(f"파일 이름으로 쓸 수 없는 세션 ID입니다: {session_id!r}")
+        return self.save_dir / f"{session_id}{extension or self.extension}"
+
+    def _path(self, session_id: str, extension: Optional[str] = None) -> Path:
+        if self.layout == "flat":
+            return self._flat_path(session_id, extension)
+        key = shard_key(session_id)
+        return self.save_dir / key[:2] / key[2:4] / f"{key}{extension or self.extension}"
+
+    def _candidate_paths(self, session_id: str) -> List[Path]:
+        """읽기 순서대로 후보 경로 (sharded는 이전 flat 파일도 포함)"""
+        paths = [self._path(session_id, extension) for extension in self._all_extensions()]
+        if self.layout == "sharded" and is_safe_file_name(session_id):
+            paths += [self._flat_path(session_id, extension) for extension in self._all_extensions()]
+        return paths
+
+    def load(self, session_id: str) -> Optional[dict]:
+        for path in self._candidate_paths(session_id):
+            try:
+                data = read_file(path)
+            except CorruptStateError:
+                quarantine = path.with_name(f"{path.name}.corrupt-{int(time.time())}")
+                path.replace(quarantine)
+                print(f"[WARNING] 손상된 게임 상태 파일을 {quarantine.name}(으)로 옮겼습니다")
+                raise
+            if data is not None:
+                return data
+        return None
+
+    def save(self, session_id: str, data: dict):
+        path = self._path(session_id)
+        if self.layout == "sharded":
+            path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, encode(data, self.fmt))
+        if self.layout == "sharded":
+            self._index_add(path.stem, session_id)
+        # 다른 형식/레이아웃으로 저장된 예전 파일 정리 (다음 로드 때 오래된 파일을 읽지 않도록)
+        for old_path in self._candidate_paths(session_id):
+            if old_path != path:
+                old_path.unlink(missing_ok=True)
+
+    def delete(self, session_id: str):
+        for path in self._candidate_paths(session_id):
+            path.unlink(missing_ok=True)
+        if self.layout == "sharded":
+            self._index_remove(shard_key(session_id))
+
+    def session_ids(self) -> List[str]:
+        session_ids = set(self._flat_session_ids())
+        if self.layout == "sharded":
+            with self._index_lock:
+                session_ids.update(self._load_index().values())
+        return sorted(session_ids)
+
+    def idle_sessions(self, before: float, limit: int = 0) -> List[str]:
+        result = []
+        for session_id in self.session_ids():
+            for path in self._candidate_paths(session_id):
+                try:
+                    modified = path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if modified < before:
+                    result.append(session_id)
+                break
+            if limit and len(result) >= limit:
+                break
+        return result
+
+    def _flat_session_ids(self) -> List[str]:
+        extensions = set(self._all_extensions())
+        return [
+            path.stem for path in self.save_dir.iterdir()
+            if path.suffix in extensions and not path.name.startswith('.')
+        ]
+
+    # ------------------------------------------------------------------
+    # sharded 역색인
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> Dict[str, str]:
+        """역색인 읽기 (self._index_lock 보유 상태에서 호출)"""
+        if self._index is None:
+            index = {}
+            try:
+                with open(self.index_path, 'rb') as f:
+                    for raw_line in f:
+                        if not raw_line.endswith(b"\n"):
+                            break  # 기록 도중 잘린 마지막 줄
+                        entry = json.loads(raw_line)
+                        if entry.get('deleted'):
+                            index.pop(entry['key'], None)
+                        else:
+                            index[entry['key']] = entry['session_id']
+            except FileNotFoundError:
+                pass
+            self._index = index
+        return self._index
+
+    def _append_index(self, entry: dict):
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n"
+        with open(self.index_path, 'ab') as f:
+            f.write(line.encode('utf-8'))
+
+    def _index_add(self, key: str, session_id: str):
+        with self._index_lock:
+            index = self._load_index()
+            if index.get(key) == session_id:
+                return
+            self._append_index({'key': key, 'session_id': session_id})
+            index[key] = session_id
+
+    def _index_remove(self, key: str):
+        with self._index_lock:
+            index = self._load_index()
+            if key not in index:
+                return
+            self._append_index({'key': key, 'deleted': True})
+            del index[key]
+
+    def rebuild_index(self) -> int:
+        """
+        shard 디렉토리를 훑어 역색인을 새로 작성 (삭제 기록 정리 / 색인 손상 복구)
+
+        세션 ID는 각 파일의 session_id 필드에서 읽습니다. 색인한 세션 수를 반환합니다.
+        """
+        index = {}
+        extensions = set(self._all_extensions())
+        for path in sorted(self.save_dir.glob("??/??/*")):
+            if path.suffix not in extensions or path.name.startswith('.'):
+                continue
+            try:
+                data = read_file(path)
+            except CorruptStateError as e:
+                print(f"[WARNING] 색인에서 제외: {path.name} ({e})")
+                continue
+            if data and data.get('session_id') is not None:
+                index[path.stem] = data['session_id']
+
+        payload = "".join(
+            json.dumps({'key': key, 'session_id': session_id}, ensure_ascii=False, separators=(',', ':')) + "\n"
+            for key, session_id in index.items()
+        )
+        with self._index_lock:
+            atomic_write(self.index_path, payload.encode('utf-8'))
+            self._index = index
+        return len(index)
+
+
+def reshard_flat_dir(storage: FileStorage) -> Dict[str, int]:
+    """
+    save_dir 바로 아래의 flat 파일을 sharded 위치로 옮기기
+
+    Returns:
+        {"moved": n, "failed": n}
+    """
+    if storage.layout != "sharded":
+        raise ValueError("sharded 레이아웃 저장소에서만 사용할 수 있습니다")
+
+    result = {'moved': 0, 'failed': 0}
+    for session_id in storage._flat_session_ids():
+        try:
+            data = storage.load(session_id)
+        except CorruptStateError as e:
+            print(f"[WARNING] 이동 실패: {session_id} ({type(e).__name__}): {e}")
+            result['failed'] += 1
+            continue
+        if data is not None:
+            storage.save(session_id, data)
+            result['moved'] += 1
+    print(f"[GameStateStorage] sharded 레이아웃 이동 완료: {result}")
+    return result
+
+
+class SQLiteStorage(GameStateStorage):
+    """
+    SQLite(WAL) 저장소
+
+    - journal_mode=WAL + synchronous=NORMAL: 저장 한 번이 WAL 파일 append 한 번이며,
+      프로세스가 쓰기 도중 죽어도 마지막 커밋 상태로 복구됩니다.
+    - 연결 하나를 락으로 보호해 공유합니다. (Flask threaded 모드는 요청마다
+      새 스레드를 쓰므로 스레드별 연결을 두면 연결이 계속 늘어납니다)
+    """
+
+    name = "sqlite"
+
+    SCHEMA = f"""
+        CREATE TABLE IF NOT EXISTS game_states (
+            session_id TEXT PRIMARY KEY,
+            current_month INTEGER NOT NULL,
+            current_phase TEXT,
+            current_storybook_id TEXT,
+            {", ".join(f"{column} INTEGER" for column in STAT_COLUMNS)},
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_game_states_month ON game_states (current_month);
+        CREATE INDEX IF NOT EXISTS idx_game_states_phase ON game_states (current_phase);
+        CREATE INDEX IF NOT EXISTS idx_game_states_updated ON game_states (updated_at);
+    """
+
+    def __init__(self, db_path: Path, busy_timeout_ms: int = 5000):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(
+            str(self.db_path),
+            check_same_thread=False,
+            isolation_level=None  # 트랜잭션은 직접 BEGIN/COMMIT
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            self._conn.executescript(self.SCHEMA)
+
+        columns = ("session_id", "current_month", "current_phase", "current_storybook_id",
+                   *STAT_COLUMNS, "data", "updated_at")
+        self._upsert_sql = (
+            f"INSERT INTO game_states ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT(session_id) DO UPDATE SET "
+            + ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+        )
+
+    @staticmethod
+    def _to_row(session_id: str, data: dict) -> tuple:
+        """dict → (타입 컬럼..., 나머지 JSON)"""
+        rest = dict(data)
+        rest.pop('session_id', None)
+        month = rest.pop('current_month', 3)
+        phase = rest.pop('current_phase', None)
+        storybook_id = rest.pop('current_storybook_id', None)
+
+        stats = dict(rest.pop('stats', None) or {})
+        stat_values = [stats.pop(column, None) for column in STAT_COLUMNS]
+        if stats:
+            # 컬럼에 없는 스탯은 JSON 쪽에 보존
+            rest['stats'] = stats
+
+        blob = json.dumps(rest, ensure_ascii=False, separators=(',', ':'))
+        return (session_id, month, phase, storybook_id, *stat_values, blob, time.time())
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> dict:
+        """행 → GameState.to_dict() 형식"""
+        data = json.loads(row['data'])
+        stats = data.pop('stats', {})
+        for column in STAT_COLUMNS:
+            if row[column] is not None:
+                stats[column] = row[column]
+        return {
+            'session_id': row['session_id'],
+            'current_month': row['current_month'],
+            'current_phase': row['current_phase'],
+            'current_storybook_id': row['current_storybook_id'],
+            'stats': stats,
+            **data
+        }
+
+    def load(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM game_states WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return self._from_row(row) if row is not None else None
+
+    def save(self, session_id: str, data: dict):
+        row = self._to_row(session_id, data)
+        with self._lock:
+            self._conn.execute(self._upsert_sql, row)
+
+    def save_many(self, items: Iterable[Tuple[str, dict]]):
+        rows = [self._to_row(session_id, data) for session_id, data in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(self._upsert_sql, rows)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM game_states WHERE session_id = ?", (session_id,))
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT session_id FROM game_states ORDER BY session_id").fetchall()
+        return [row['session_id'] for row in rows]
+
+    def sessions_in_month(self, month: int) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id FROM game_states WHERE current_month = ? ORDER BY session_id", (month,)
+            ).fetchall()
+        return [row['session_id'] for row in rows]
+
+    def idle_sessions(self, before: float, limit: int = 0) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id FROM game_states WHERE updated_at < ? ORDER BY updated_at LIMIT ?",
+                (before, limit if limit > 0 else -1)
+            ).fetchall()
+        return [row['session_id'] for row in rows]
+
+    def count(self) -> int:
+        """저장된 세션 수"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM game_states").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_json_dir(json_dir: Path, storage: GameStateStorage, overwrite: bool = False) -> Dict[str, int]:
+    """
+    기존 {session_id}.json 파일을 저장소로 가져오기
+
+    Args:
+        json_dir: JSON 파일 디렉토리
+        storage: 대상 저장소
+        overwrite: 이미 저장소에 있는 세션도 덮어쓸지 여부
+
+    Returns:
+        {"imported": n, "skipped": n, "failed": n}
+    """
+    result = {'imported': 0, 'skipped': 0, 'failed': 0}
+    existing = set() if overwrite else set(storage.session_ids())
+    # sharded로 읽으면 flat 파일과 sharded 파일을 모두 찾음
+    source = FileStorage(json_dir, layout="sharded")
+
+    items = []
+    for session_id in source.session_ids():
+        if session_id in existing:
+            result['skipped'] += 1
+            continue
+        try:
+            data = source.load(session_id)
+        except CorruptStateError as e:
+            print(f"[WARNING] 마이그레이션 실패: {session_id} ({type(e).__name__}): {e}")
+            result['failed'] += 1
+            continue
+        items.append((session_id, data))
+
+    storage.save_many(items)
+    result['imported'] = len(items)
+    print(f"[GameStateStorage] JSON 마이그레이션 완료: {result}")
+    return result
+
+
+def create_storage(
+    storage_config: Optional[dict],
+    json_dir: Path = DEFAULT_JSON_DIR,
+    shared_config: Optional[dict] = None
+) -> GameStateStorage:
+    """
+    설정으로 저장소 생성
+
+    Args:
+        storage_config: chatbot_config.json의 "storage" 섹션
+            backend: "sqlite" | "journal" | "shared" | "file" (기본 "file", 예전 이름 "json"도 허용)
+                     "shared"는 shared_config의 Redis 호환 서버를 사용 (여러 워커/노드)
+            file_format: file 저장소의 직렬화 형식 "json_pretty" | "json" | "msgpack" (기본 "json")
+            file_layout: file 저장소의 디렉토리 구성 "flat" | "sharded" (기본 "flat", FileStorage 참고)
+            sqlite_path: SQLite 파일 경로 (BASE_DIR 기준 상대 경로 가능)
+            journal_dir: journal 저장소 디렉토리 (BASE_DIR 기준 상대 경로 가능)
+            snapshot_every: journal 저장소의 스냅샷 간격 (기본 50)
+            journal_fsync: journal 기록마다 fsync 여부 (기본 True)
+            auto_migrate: SQLite/journal 저장소가 비어 있으면 json_dir의 파일을 가져옴 (기본 True)
+        json_dir: JSON 파일 디렉토리
+        shared_config: chatbot_config.json의 "shared_store" 섹션 (backend가 "shared"일 때)
+    """
+    storage_config = storage_config or {}
+    backend = storage_config.get('backend', 'file')
+
+    if backend in ('file', 'json'):
+        return FileStorage(
+            json_dir,
+            fmt=storage_config.get('file_format', FORMAT_JSON),
+            layout=storage_config.get('file_layout', 'flat')
+        )
+
+    if backend == 'sqlite':
+        db_path = Path(storage_config.get('sqlite_path') or DEFAULT_SQLITE_PATH)
+        if not db_path.is_absolute():
+            db_path = BASE_DIR / db_path
+        storage = SQLiteStorage(db_path, busy_timeout_ms=storage_config.get('busy_timeout_ms', 5000))
+        if storage_config.get('auto_migrate', True) and storage.count() == 0 and Path(json_dir).exists():
+            migrate_json_dir(json_dir, storage)
+        print(f"[GameStateStorage] SQLite 저장소 사용: {db_path}")
+        return storage
+
+    if backend == 'journal':
+        from .game_state_journal import DEFAULT_JOURNAL_DIR, JournalStorage
+
+        journal_dir = Path(storage_config.get('journal_dir') or DEFAULT_JOURNAL_DIR)
+        if not journal_dir.is_absolute():
+            journal_dir = BASE_DIR / journal_dir
+        storage = JournalStorage(
+            journal_dir,
+            snapshot_every=storage_config.get('snapshot_every', 50),
+            fsync=storage_config.get('journal_fsync', True)
+        )
+        if storage_config.get('auto_migrate', True) and not storage.session_ids() and Path(json_dir).exists():
+            migrate_json_dir(json_dir, storage)
+        print(f"[GameStateStorage] 저널 저장소 사용: {journal_dir}")
+        return storage
+
+    if backend == 'shared':
+        from .shared_store import SharedStorage, get_shared_backend
+
+        shared_config = shared_config or {}
+        storage = SharedStorage(
+            get_shared_backend(shared_config),
+            key_prefix=shared_config.get('key_prefix', 'bbgame:'),
+            lock_ttl_ms=shared_config.get('lock_ttl_ms', 30000),
+            lock_wait_s=shared_config.get('lock_wait_s', 10.0)
+        )
+        if storage_config.get('auto_migrate', True) and not storage.session_ids() and Path(json_dir).exists():
+            migrate_json_dir(json_dir, storage)
+        return storage
+
+    raise ValueError(f"지원하지 않는 저장소 backend입니다: {backend}")
+
+
+if __name__ == "__main__":
+    """
+    저장소 관리 도구
+
+    실행 방법:
+    python -m services.game_state_storage migrate [--overwrite]   # 기존 JSON 게임 상태를 SQLite로 가져오기
+    python -m services.game_state_storage reshard                 # flat JSON 파일을 sharded 레이아웃으로 이동
+    python -m services.game_state_storage reindex                 # sharded 역색인 다시 작성
+    """
+    commands = ("migrate", "reshard", "reindex")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print("사용법: python -m services.game_state_storage migrate [--overwrite] | reshard | reindex")
+        sys.exit(1)
+
+    config_path = BASE_DIR / "config" / "chatbot_config.json"
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f).get('storage', {})
+
+    if sys.argv[1] in ("reshard", "reindex"):
+        file_storage = FileStorage(
+            DEFAULT_JSON_DIR, fmt=config.get('file_format', FORMAT_JSON), layout="sharded"
+        )
+        if sys.argv[1] == "reshard":
+            stats = reshard_flat_dir(file_storage)
+            print(f"이동 {stats['moved']}개 / 실패 {stats['failed']}개")
+        print(f"색인 {file_storage.rebuild_index()}개: {file_storage.index_path}")
+        sys.exit(0)
+
+    db_path = Path(config.get('sqlite_path') or DEFAULT_SQLITE_PATH)
+    if not db_path.is_absolute():
+        db_path = BASE_DIR / db_path
+
+    target = SQLiteStorage(db_path)
+    stats = migrate_json_dir(DEFAULT_JSON_DIR, target, overwrite="--overwrite" in sys.argv)
+    print(f"대상: {db_path}")
+    print(f"가져옴 {stats['imported']}개 / 건너뜀 {stats['skipped']}개 / 실패 {stats['failed']}개")
+    target.close()
@@ -0,0 +1,257 @@
+"""
+스토리북/챗봇 이미지 최적화 (빌드 시점)
+
+static/images/chatbot/의 원본 PNG는 장당 1.5~2MB라 스토리북 한 권을 여는 데 수 MB를 받았습니다.
+
+이 모듈은 빌드할 때 한 번
+- 원본을 여러 너비(WIDTHS)로 줄이고
+- WebP(와 Pillow가 지원하면 AVIF)로 변환해
+- 내용 해시가 들어간 파일 이름으로 static/images/optimized/에 저장하고
+- 설정의 이미지 경로("./static/images/chatbot/3_month.png") → 변환본 목록을
+  manifest.json에 기록합니다.
+
+실행 중에는 ImageManifest가 manifest.json을 읽어 스토리북 페이지에 srcset을 붙입니다.
+(파일 이름에 해시가 있으므로 app.py가 해당 경로를 immutable로 장기 캐시)
+manifest.json이 없으면 원본 이미지를 그대로 사용합니다.
+
+빌드 (Pillow 필요, 원본이 바뀌지 않은 이미지는 건너뜀):
+    python -m services.image_pipeline build [--force]
+현황:
+    python -m services.image_pipeline stats
+"""
+
+import hashlib
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .state_codec import atomic_write
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SOURCE_DIRS = (
+    BASE_DIR / "static" / "images" / "chatbot",
+)
+OUTPUT_DIR = BASE_DIR / "static" / "images" / "optimized"
+MANIFEST_PATH = OUTPUT_DIR / "manifest.json"
+# app.py가 immutable 캐시를 적용할 URL 접두사
+OUTPUT_URL_PREFIX = "/static/images/optimized/"
+
+SOURCE_SUFFIXES = (".png", ".jpg", ".jpeg")
+WIDTHS = (480, 960, 1440)
+QUALITY = {"webp": 80, "avif": 55}
+
+# 스토리북 이미지는 책의 한쪽 면(데스크톱 기준 화면 절반)에 표시됨
+DEFAULT_SIZES = "(max-width: 768px) 100vw, 50vw"
+
+
+def config_path_of(path: Path) -> str:
+    """파일 경로 → 설정에서 쓰는 형식 ("./static/...")"""
+    return "./" + path.resolve().relative_to(BASE_DIR).as_posix()
+
+
+# ============================================================================
+# 실행 중 조회
+# ============================================================================
+
+class ImageManifest:
+    """manifest.json 조회 (설정 이미지 경로 → srcset)"""
+
+    def __init__(self, entries: Optional[Dict[str, dict]] = None):
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path: Path = MANIFEST_PATH) -> 'ImageManifest':
+        """manifest.json 로드 (없으면 빈 manifest)"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f).get('images', {}))
+        except FileNotFoundError:
+            return cls()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def image_set(self, image: str) -> Optional[dict]:
+        """
+        설정 이미지 경로의 변환본
+
+        Returns:
+            {"avif": "url 480w, ...", "webp": "...", "src": 기본 변환본, "sizes": ..., "width", "height"}
+            변환본이 없으면 None
+        """
+        entry = self.entries.get(image)
+        if not entry:
+            return None
+        image_set = {
+            fmt: ", ".join(f"{url} {width}w" for width, url in entry[fmt])
+            for fmt in ("avif", "webp") if entry.get(fmt)
+        }
+        if 'webp' not in image_set:
+            return None
+        # srcset을 지원하지 않는 경우에 쓸 중간 크기 WebP
+        webp = entry['webp']
+        image_set['src'] = webp[min(1, len(webp) - 1)][1]
+        image_set['sizes'] = DEFAULT_SIZES
+        image_set['width'] = entry['width']
+        image_set['height'] = entry['height']
+        return image_set
+
+    def with_image_sets(self, storybook: dict) -> dict:
+        """
+        페이지마다 image_set을 붙인 사본 반환 (원본 dict는 수정하지 않음)
+
+        변환본이 하나도 없으면 원본을 그대로 반환합니다.
+        """
+        pages = storybook.get('pages')
+        if not self.entries or not pages:
+            return storybook
+        new_pages = []
+        for page in pages:
+            image_set = self.image_set(page.get('image', ''))
+            new_pages.append({**page, 'image_set': image_set} if image_set else page)
+        return {**storybook, 'pages': new_pages}
+
+
+# ============================================================================
+# 빌드
+# ============================================================================
+
+def _load_pillow():
+    try:
+        from PIL import Image, features
+    except ImportError:
+        print("[ImagePipeline] Pillow가 필요합니다: pip install Pillow")
+        sys.exit(1)
+    return Image, features
+
+
+def _encode(image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        image.save(buffer, format="WEBP", quality=QUALITY["webp"], method=6)
+    else:
+        image.save(buffer, format="AVIF", quality=QUALITY["avif"])
+    return buffer.getvalue()
+
+
+def build(force: bool = False) -> dict:
+    """
+    원본 이미지를 변환하고 manifest.json 갱신
+
+    Args:
+        force: 원본이 바뀌지 않았어도 다시 변환
+
+    Returns:
+        {"converted": 변환한 원본 수, "skipped": 건너뛴 수, "bytes_before": 원본 합계, "bytes_after": 변환본 합계}
+    """
+    Image, features = _load_pillow()
+    formats = ["webp"] + (["avif"] if features.check("avif") else [])
+    if "avif" not in formats:
+        print("[ImagePipeline] 이 Pillow는 AVIF를 지원하지 않아 WebP만 생성합니다")
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    previous = ImageManifest.load().entries
+    entries: Dict[str, dict] = {}
+    converted = skipped = 0
+
+    sources = sorted(
+        path for source_dir in SOURCE_DIRS if source_dir.is_dir()
+        for path in source_dir.rglob("*") if path.suffix.lower() in SOURCE_SUFFIXES
+    )
+    for source in sources:
+        key = config_path_of(source)
+        source_hash = hashlib.sha256(source.read_bytes()).hexdigest()[:16]
+
+        old = previous.get(key)
+        if (not force and old and old.get('source_hash') == source_hash
+                and all(old.get(fmt) for fmt in formats)
+                and all(_output_path(url).is_file() for fmt in formats for _, url in old[fmt])):
+            entries[key] = old
+            skipped += 1
+            continue
+
+        with Image.open(source) as original:
+            original.load()
+            width, height = original.size
+            has_alpha = original.mode in ("RGBA", "LA") or "transparency" in original.info
+            base = original.convert("RGBA" if has_alpha else "RGB")
+
+        entry = {'source_hash': source_hash, 'width': width, 'height': height}
+        # 원본보다 큰 너비는 만들지 않음 (원본이 가장 작은 너비보다 작으면 원본 크기 하나)
+        widths = [w for w in WIDTHS if w < width] + [min(width, WIDTHS[-1])]
+        for fmt in formats:
+            variants = []
+            for target_width in sorted(set(widths)):
+                target_height = max(1, round(height * target_width / width))
+                resized = base if target_width == width else base.resize(
+                    (target_width, target_height), Image.LANCZOS
+                )
+                data = _encode(resized, fmt)
+                digest = hashlib.sha256(data).hexdigest()[:10]
+                name = f"{source.stem}-{target_width}w.{digest}.{fmt}"
+                (OUTPUT_DIR / name).write_bytes(data)
+                variants.append([target_width, f".{OUTPUT_URL_PREFIX}{name}"])
+            entry[fmt] = variants
+        entries[key] = entry
+        converted += 1
+        print(f"[ImagePipeline] {key} ({width}x{height}) → {len(set(widths))}개 너비 x {len(formats)}개 형식")
+
+    manifest = {'version': 1, 'sizes': DEFAULT_SIZES, 'images': entries}
+    atomic_write(MANIFEST_PATH, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    removed = _remove_unreferenced(entries)
+    stats = _stats(entries)
+    print(f"[ImagePipeline] 변환 {converted}개, 건너뜀 {skipped}개, 오래된 파일 삭제 {removed}개")
+    return {'converted': converted, 'skipped': skipped, **stats}
+
+
+def _output_path(url: str) -> Path:
+    return OUTPUT_DIR / url.rsplit('/', 1)[-1]
+
+
+def _remove_unreferenced(entries: Dict[str, dict]) -> int:
+    """manifest에 없는 이전 빌드 결과 삭제"""
+    referenced = {_output_path(url).name for entry in entries.values()
+                  for fmt in ("webp", "avif") for _, url in entry.get(fmt, [])}
+    removed = 0
+    for path in OUTPUT_DIR.iterdir():
+        if path.suffix in (".webp", ".avif") and path.name not in referenced:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def _stats(entries: Dict[str, dict]) -> dict:
+    bytes_before = sum((BASE_DIR / key).stat().st_size for key in entries if (BASE_DIR / key).is_file())
+    # 표시 크기 960px 기준으로 실제로 받게 될 WebP 크기
+    bytes_after = 0
+    for entry in entries.values():
+        variants: List[list] = entry.get('webp', [])
+        if variants:
+            bytes_after += _output_path(variants[min(1, len(variants) - 1)][1]).stat().st_size
+    return {'images': len(entries), 'bytes_before': bytes_before, 'bytes_after': bytes_after}
+
+
+if __name__ == "__main__":
+    """
+    이미지 변환
+
+    실행 방법:
+    python -m services.image_pipeline build [--force]
+    python -m services.image_pipeline stats
+    """
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "build":
+        result = build(force="--force" in sys.argv[2:])
+    elif command == "stats":
+        result = _stats(ImageManifest.load().entries)
+    else:
+        print("사용법: python -m services.image_pipeline build [--force] | stats")
+        sys.exit(1)
+
+    print(f"이미지 {result['images']}개: 원본 {result['bytes_before'] / 1024 / 1024:.1f}MB → "
+          f"WebP(960w) {result['bytes_after'] / 1024:.0f}KB")
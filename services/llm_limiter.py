@@ -0,0 +1,346 @@
+"""
+외부 LLM 호출 승인 제어 (Admission Control)
+
+트래픽이 몰리면 모든 요청 스레드가 동시에 OpenAI를 호출해 429가 발생하고,
+사용자에게는 "일시적인 오류" 응답만 보이게 됩니다.
+
+이 모듈은 LLM/임베딩 호출을 전역에서 관리합니다.
+- 모델 프로필(모델 이름)별 동시 실행 수 제한
+- 우선순위 대기열 (대화 응답 > 판정기 > 힌트)
+- 토큰 버킷으로 분당 요청 수 페이싱
+- 429 / 5xx / 연결 오류 시 지터가 섞인 지수 백오프 재시도
+- 대기열 길이, 대기 시간, 재시도 횟수 등 메트릭 제공
+
+설정은 config/chatbot_config.json의 "llm_limits"에서 읽습니다.
+"""
+
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# 우선순위 (숫자가 작을수록 먼저 처리)
+PRIORITY_INTERACTIVE = 0  # 사용자 대화 응답, RAG 임베딩
+PRIORITY_JUDGE = 1        # 스탯/이벤트/타석 판정
+PRIORITY_BACKGROUND = 2   # 힌트 등 부가 기능
+
+DEFAULT_PROFILE = {
+    "max_concurrency": 8,
+    "requests_per_minute": 0,  # 0이면 페이싱 없음
+    "burst": 0                 # 0이면 max_concurrency와 동일
+}
+
+T = TypeVar('T')
+
+
+class _ProfileGate:
+    """
+    모델 프로필 하나의 동시성/페이싱 게이트
+
+    대기 중인 호출은 (우선순위, 도착 순서) 힙에 들어가며,
+    힙의 맨 앞 호출만 슬롯과 토큰을 가져갈 수 있습니다.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, requests_per_minute: float, burst: int):
+        self.name = name
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.refill_rate = max(0.0, float(requests_per_minute)) / 60.0
+        self.capacity = float(burst or self.max_concurrency)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+
+        self.active = 0
+        self._waiters: list = []
+        self._cond = threading.Condition()
+
+        # 메트릭
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    def acquire(self, priority: int, ticket_id: int) -> float:
+        """
+        실행 슬롯 획득 (대기 시간 반환)
+
+        Args:
+            priority: 우선순위 (PRIORITY_*)
+            ticket_id: 같은 우선순위 내 도착 순서
+        """
+        ticket = (priority, ticket_id)
+        started = time.monotonic()
+
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    self._refill()
+                    is_head = self._waiters[0] == ticket
+                    has_slot = self.active < self.max_concurrency
+                    has_token = self.refill_rate == 0 or self.tokens >= 1
+
+                    if is_head and has_slot and has_token:
+                        heapq.heappop(self._waiters)
+                        self.active += 1
+                        if self.refill_rate:
+                            self.tokens -= 1
+                        # 다음 대기자가 바로 진행할 수 있는지 확인하도록 깨움
+                        self._cond.notify_all()
+                        break
+
+                    timeout = None
+                    if is_head and has_slot and not has_token:
+                        timeout = (1 - self.tokens) / self.refill_rate
+                    self._cond.wait(timeout)
+            except BaseException:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+            waited = time.monotonic() - started
+            self.admitted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+        return waited
+
+    def release(self):
+        """실행 슬롯 반환"""
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def _refill(self):
+        """토큰 버킷 보충 (self._cond 보유 상태에서 호출)"""
+        if not self.refill_rate:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+
+    def snapshot(self) -> dict:
+        """메트릭 스냅샷"""
+        with self._cond:
+            return {
+                'queue_depth': len(self._waiters),
+                'active': self.active,
+                'max_concurrency': self.max_concurrency,
+                'requests_per_minute': round(self.refill_rate * 60, 2),
+                'admitted': self.admitted,
+                'avg_wait_ms': round(self.total_wait / self.admitted * 1000, 2) if self.admitted else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 2),
+                'retries': self.retries,
+                'rate_limited': self.rate_limited,
+                'failures': self.failures
+            }
+
+
+class LLMLimiter:
+    """
+    전역 LLM 호출 제한기
+
+    사용 예:
+        limiter = get_llm_limiter()
+        response = limiter.call("gpt-4o-mini", lambda: chain.invoke(...), priority=PRIORITY_JUDGE)
+
+        for chunk in limiter.stream("gpt-4o-mini", lambda: chain.stream(...)):
+            ...
+    """
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, dict]] = None,
+        max_retries: int = 3,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 8.0
+    ):
+        """
+        Args:
+            profiles: {모델 이름: {"max_concurrency", "requests_per_minute", "burst"}}
+                      "default" 키는 목록에 없는 모델에 적용
+            max_retries: 재시도 가능한 오류의 최대 재시도 횟수
+            backoff_base_s: 첫 재시도 기본 대기 시간
+            backoff_max_s: 재시도 대기 시간 상한
+        """
+        self.profiles = profiles or {}
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base_s
+        self.backoff_max = backoff_max_s
+
+        self._gates: Dict[str, _ProfileGate] = {}
+        self._gates_lock = threading.Lock()
+        self._tickets = itertools.count()
+
+    @classmethod
+    def from_config(cls, limits_config: Optional[dict]) -> 'LLMLimiter':
+        """chatbot_config.json의 "llm_limits" 섹션으로 생성"""
+        limits_config = limits_config or {}
+        return cls(
+            profiles=limits_config.get('profiles', {}),
+            max_retries=limits_config.get('max_retries', 3),
+            backoff_base_s=limits_config.get('backoff_base_s', 0.5),
+            backoff_max_s=limits_config.get('backoff_max_s', 8.0)
+        )
+
+    def call(self, profile: str, fn: Callable[[], T], *, priority: int = PRIORITY_JUDGE) -> T:
+        """
+        슬롯을 얻은 뒤 fn 실행 (재시도 가능한 오류는 백오프 후 재시도)
+
+        Args:
+            profile: 모델 프로필 이름 (보통 모델 이름)
+            fn: 실제 호출 함수
+            priority: 대기열 우선순위
+        """
+        gate = self._gate(profile)
+        attempt = 0
+        while True:
+            gate.acquire(priority, next(self._tickets))
+            try:
+                return fn()
+            except Exception as e:
+                delay = self._handle_failure(gate, e, attempt)
+            finally:
+                gate.release()
+            attempt += 1
+            time.sleep(delay)
+
+    def stream(self, profile: str, factory: Callable[[], Iterable[T]], *, priority: int = PRIORITY_INTERACTIVE) -> Iterator[T]:
+        """
+        스트리밍 호출 (스트림이 끝날 때까지 슬롯 유지)
+
+        첫 청크를 받기 전에 실패한 경우에만 재시도합니다.
+        (이미 일부를 클라이언트에 보냈다면 재시도하면 응답이 중복되므로)
+        """
+        gate = self._gate(profile)
+        attempt = 0
+        while True:
+            gate.acquire(priority, next(self._tickets))
+            started = False
+            try:
+                for chunk in factory():
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started:
+                    gate.failures += 1
+                    raise
+                delay = self._handle_failure(gate, e, attempt)
+            finally:
+                gate.release()
+            attempt += 1
+            time.sleep(delay)
+
+    def metrics(self) -> dict:
+        """프로필별 대기열/대기 시간/재시도 메트릭"""
+        with self._gates_lock:
+            gates = list(self._gates.values())
+        return {gate.name: gate.snapshot() for gate in gates}
+
+    def _handle_failure(self, gate: _ProfileGate, error: Exception, attempt: int) -> float:
+        """
+        실패 처리: 재시도 불가능하거나 횟수 초과면 예외를 다시 발생, 아니면 대기 시간 반환
+        """
+        status = _status_code(error)
+        if status == 429:
+            gate.rate_limited += 1
+
+        if not _is_retryable(error, status) or attempt >= self.max_retries:
+            gate.failures += 1
+            raise error
+
+        gate.retries += 1
+        retry_after = _retry_after(error)
+        backoff = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        delay = max(retry_after or 0.0, backoff * random.uniform(0.5, 1.5))
+        print(f"[LLMLimiter] {gate.name} 재시도 {attempt + 1}/{self.max_retries} "
+              f"({type(error).__name__}, status={status}) - {delay:.2f}초 후")
+        return delay
+
+    def _gate(self, profile: str) -> _ProfileGate:
+        """프로필 게이트 반환 (없으면 설정으로 생성)"""
+        gate = self._gates.get(profile)
+        if gate is None:
+            with self._gates_lock:
+                gate = self._gates.get(profile)
+                if gate is None:
+                    settings = dict(DEFAULT_PROFILE)
+                    settings.update(self.profiles.get('default', {}))
+                    settings.update(self.profiles.get(profile, {}))
+                    gate = _ProfileGate(
+                        name=profile,
+                        max_concurrency=settings['max_concurrency'],
+                        requests_per_minute=settings['requests_per_minute'],
+                        burst=settings['burst']
+                    )
+                    self._gates[profile] = gate
+        return gate
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """openai 예외에서 HTTP 상태 코드 추출 (없으면 None)"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def _is_retryable(error: Exception, status: Optional[int]) -> bool:
+    """429, 5xx, 연결/타임아웃 오류만 재시도"""
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in ('APIConnectionError', 'APITimeoutError', 'TimeoutError', 'ConnectionError')
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Retry-After 헤더 값(초)"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+def profile_for(llm) -> str:
+    """LangChain ChatOpenAI 인스턴스의 프로필 이름 (모델 이름)"""
+    return getattr(llm, 'model_name', None) or getattr(llm, 'model', None) or 'default'
+
+
+# ============================================================================
+# 싱글톤 패턴
+# ============================================================================
+
+_llm_limiter: LLMLimiter | None = None
+_llm_limiter_lock = threading.Lock()
+
+
+def get_llm_limiter() -> LLMLimiter:
+    """싱글톤 LLMLimiter 인스턴스 반환 (chatbot_config.json의 llm_limits 사용)"""
+    global _llm_limiter
+    if _llm_limiter is None:
+        with _llm_limiter_lock:
+            if _llm_limiter is None:
+                config_path = BASE_DIR / "config" / "chatbot_config.json"
+                try:
+                    with open(config_path, 'r', encoding='utf-8') as f:
+                        limits_config = json.load(f).get('llm_limits', {})
+                except (FileNotFoundError, json.JSONDecodeError) as e:
+                    print(f"[WARNING] llm_limits 설정 로드 실패 ({type(e).__name__}): {e}")
+                    limits_config = {}
+                _llm_limiter = LLMLimiter.from_config(limits_config)
+    return _llm_limiter
@@ -0,0 +1,261 @@
+"""
+작업별 모델 라우팅
+
+예전에는 모든 호출이 ChatbotService.__init__에 하드코딩된
+gpt-4o-mini (temperature=0.7, max_tokens=500) 설정을 공유했습니다.
+짧은 JSON만 돌려주면 되는 판정기(스탯/이벤트/힌트/타석)까지 대화 응답 설정을 물려받았습니다.
+
+이 모듈은 chatbot_config.json의 "model_routing" 표를 읽어
+작업(task)마다 모델, max_tokens, temperature, timeout, JSON 모드를 따로 정합니다.
+호출은 LLMLimiter를 거치며, 작업별 지연 시간과 토큰 사용량을 기록해
+SLO(slo_ms) 위반 여부와 함께 메트릭으로 제공합니다.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+from .llm_limiter import get_llm_limiter, PRIORITY_INTERACTIVE, PRIORITY_JUDGE
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# 작업 이름
+TASK_REPLY = "reply"
+TASK_STAT_JUDGE = "stat_judge"
+TASK_EVENT_JUDGE = "event_judge"
+TASK_HINT_JUDGE = "hint_judge"
+TASK_AT_BAT_SCORER = "at_bat_scorer"
+TASK_EMBEDDING = "embedding"
+
+# 설정이 없을 때 사용할 기본 라우팅 (기존 하드코딩 값과 동일한 모델)
+DEFAULT_ROUTES = {
+    TASK_REPLY: {"model": "gpt-4o-mini", "max_tokens": 500, "temperature": 0.7, "timeout_s": 30, "slo_ms": 1500},
+    TASK_STAT_JUDGE: {"model": "gpt-4o-mini", "max_tokens": 150, "temperature": 0.2, "timeout_s": 5, "json_mode": True, "slo_ms": 2000},
+    TASK_EVENT_JUDGE: {"model": "gpt-4o-mini", "max_tokens": 120, "temperature": 0.2, "timeout_s": 3, "json_mode": True, "slo_ms": 2000},
+    TASK_HINT_JUDGE: {"model": "gpt-4o-mini", "max_tokens": 100, "temperature": 0.2, "timeout_s": 3, "json_mode": True, "slo_ms": 2000},
+    TASK_AT_BAT_SCORER: {"model": "gpt-4o-mini", "max_tokens": 60, "temperature": 0.2, "timeout_s": 10, "json_mode": True, "slo_ms": 3000},
+    TASK_EMBEDDING: {"model": "text-embedding-3-large", "timeout_s": 10, "slo_ms": 800},
+}
+
+# 지연 시간 백분위 계산에 사용할 최근 샘플 수
+LATENCY_SAMPLES = 200
+
+T = TypeVar('T')
+
+
+class _TaskStats:
+    """작업 하나의 지연 시간 / 토큰 사용량 누적"""
+
+    def __init__(self, slo_ms: Optional[float]):
+        self.slo_ms = slo_ms
+        self.calls = 0
+        self.errors = 0
+        self.slo_violations = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, latency_ms: float, input_tokens: int, output_tokens: int, ok: bool):
+        self.calls += 1
+        if not ok:
+            self.errors += 1
+        if self.slo_ms and latency_ms > self.slo_ms:
+            self.slo_violations += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.latencies.append(latency_ms)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.latencies)
+        percentile = lambda p: round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 1) if ordered else 0.0
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'slo_ms': self.slo_ms,
+            'slo_violations': self.slo_violations,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens
+        }
+
+
+class ModelRouter:
+    """
+    작업별 모델 라우터
+
+    사용 예:
+        router = get_model_router()
+        llm = router.llm_for(TASK_STAT_JUDGE)
+        chain = prompt | llm
+        response = router.invoke(TASK_STAT_JUDGE, lambda: chain.invoke(inputs))
+    """
+
+    def __init__(self, routes: Optional[Dict[str, dict]] = None, api_key: Optional[str] = None):
+        """
+        Args:
+            routes: {작업 이름: {"model", "max_tokens", "temperature", "timeout_s", "json_mode", "slo_ms"}}
+                    지정하지 않은 항목은 DEFAULT_ROUTES 값 사용
+            api_key: OpenAI API 키 (None이면 환경변수)
+        """
+        self.routes: Dict[str, dict] = {}
+        for task, default in DEFAULT_ROUTES.items():
+            route = dict(default)
+            route.update((routes or {}).get(task, {}))
+            self.routes[task] = route
+        for task, route in (routes or {}).items():
+            self.routes.setdefault(task, dict(route))
+
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self._llms: Dict[str, object] = {}
+        self._stats: Dict[str, _TaskStats] = {
+            task: _TaskStats(route.get('slo_ms')) for task, route in self.routes.items()
+        }
+        self._lock = threading.Lock()
+
+    def route(self, task: str) -> dict:
+        """작업 라우팅 설정 반환"""
+        if task not in self.routes:
+            raise ValueError(f"라우팅 설정이 없는 작업입니다: {task}")
+        return self.routes[task]
+
+    def model_for(self, task: str) -> str:
+        """작업에 배정된 모델 이름"""
+        return self.route(task)['model']
+
+    def llm_for(self, task: str):
+        """
+        작업 전용 ChatOpenAI 인스턴스 반환 (작업별로 한 번만 생성)
+
+        json_mode가 켜진 작업은 response_format=json_object로 호출합니다.
+        """
+        llm = self._llms.get(task)
+        if llm is None:
+            with self._lock:
+                llm = self._llms.get(task)
+                if llm is None:
+                    llm = self._create_llm(task)
+                    self._llms[task] = llm
+        return llm
+
+    def invoke(self, task: str, fn: Callable[[], T], *, priority: int = PRIORITY_JUDGE) -> T:
+        """
+        LLMLimiter를 거쳐 fn 실행 후 지연 시간/토큰 사용량 기록
+        """
+        started = time.monotonic()
+        try:
+            result = get_llm_limiter().call(self.model_for(task), fn, priority=priority)
+        except Exception:
+            self._record(task, started, (0, 0), ok=False)
+            raise
+        self._record(task, started, _usage_of(result), ok=True)
+        return result
+
+    def stream(self, task: str, factory: Callable[[], Iterable[T]], *, priority: int = PRIORITY_INTERACTIVE) -> Iterator[T]:
+        """
+        스트리밍 호출 (지연 시간은 첫 청크까지, 토큰 사용량은 스트림 전체 합계)
+        """
+        started = time.monotonic()
+        first_chunk_at = None
+        input_tokens = output_tokens = 0
+        try:
+            for chunk in get_llm_limiter().stream(self.model_for(task), factory, priority=priority):
+                if first_chunk_at is None:
+                    first_chunk_at = time.monotonic()
+                chunk_in, chunk_out = _usage_of(chunk)
+                input_tokens += chunk_in
+                output_tokens += chunk_out
+                yield chunk
+        except Exception:
+            self._record(task, started, (input_tokens, output_tokens), ok=False)
+            raise
+        self._record(task, started, (input_tokens, output_tokens), ok=True, ended=first_chunk_at)
+
+    def metrics(self) -> dict:
+        """작업별 모델 / 지연 시간 / 토큰 사용량"""
+        with self._lock:
+            return {
+                task: {'model': self.routes[task]['model'], **stats.snapshot()}
+                for task, stats in self._stats.items()
+            }
+
+    def _record(self, task: str, started: float, usage: Tuple[int, int], ok: bool, ended: Optional[float] = None):
+        latency_ms = ((ended or time.monotonic()) - started) * 1000
+        with self._lock:
+            stats = self._stats.setdefault(task, _TaskStats(self.routes.get(task, {}).get('slo_ms')))
+            stats.record(latency_ms, usage[0], usage[1], ok)
+
+    def _create_llm(self, task: str):
+        """라우팅 설정으로 ChatOpenAI 생성"""
+        from langchain_openai import ChatOpenAI
+
+        route = self.route(task)
+        kwargs = {
+            'model': route['model'],
+            'temperature': route.get('temperature', 0.7),
+            'timeout': route.get('timeout_s'),
+            'api_key': self.api_key,
+            # 재시도는 llm_limiter가 담당 (SDK 재시도까지 겹치면 시도 횟수가 곱해지고 속도 제한을 우회함)
+            'max_retries': 0
+        }
+        if route.get('max_tokens'):
+            kwargs['max_tokens'] = route['max_tokens']
+        if route.get('json_mode'):
+            kwargs['model_kwargs'] = {"response_format": {"type": "json_object"}}
+        if task == TASK_REPLY:
+            # 스트리밍 응답에서도 토큰 사용량을 받기 위함
+            kwargs['stream_usage'] = True
+
+        print(f"[ModelRouter] {task} → {route['model']} "
+              f"(max_tokens={route.get('max_tokens')}, temperature={route.get('temperature')}, "
+              f"timeout={route.get('timeout_s')}s, json={bool(route.get('json_mode'))})")
+        return ChatOpenAI(**kwargs)
+
+
+def _usage_of(result) -> Tuple[int, int]:
+    """LangChain 메시지 / OpenAI 응답에서 (입력 토큰, 출력 토큰) 추출"""
+    usage_metadata = getattr(result, 'usage_metadata', None)
+    if usage_metadata:
+        return usage_metadata.get('input_tokens', 0), usage_metadata.get('output_tokens', 0)
+
+    response_metadata = getattr(result, 'response_metadata', None) or {}
+    token_usage = response_metadata.get('token_usage') if isinstance(response_metadata, dict) else None
+    if token_usage:
+        return token_usage.get('prompt_tokens', 0), token_usage.get('completion_tokens', 0)
+
+    # OpenAI SDK 응답 (임베딩)
+    usage = getattr(result, 'usage', None)
+    if usage is not None:
+        return getattr(usage, 'prompt_tokens', 0) or 0, getattr(usage, 'completion_tokens', 0) or 0
+
+    return 0, 0
+
+
+# ============================================================================
+# 싱글톤 패턴
+# ============================================================================
+
+_model_router: ModelRouter | None = None
+_model_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """싱글톤 ModelRouter 인스턴스 반환 (chatbot_config.json의 model_routing 사용)"""
+    global _model_router
+    if _model_router is None:
+        with _model_router_lock:
+            if _model_router is None:
+                config_path = BASE_DIR / "config" / "chatbot_config.json"
+                try:
+                    with open(config_path, 'r', encoding='utf-8') as f:
+                        routes = json.load(f).get('model_routing', {})
+                except (FileNotFoundError, json.JSONDecodeError) as e:
+                    print(f"[WARNING] model_routing 설정 로드 실패 ({type(e).__name__}): {e}")
+                    routes = {}
+                _model_router = ModelRouter(routes)
+    return _model_router
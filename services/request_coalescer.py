@@ -0,0 +1,240 @@
+"""
+중복 채팅 요청 병합 (In-flight Request Coalescing)
+
+더블클릭이나 클라이언트 재시도로 같은 세션에서 같은 메시지가 동시에 들어오면
+/api/chat/stream 파이프라인이 두 번 실행되어 LLM 비용이 두 배가 되고,
+대화 히스토리에도 사용자 메시지가 두 번 저장됩니다.
+
+이 모듈은 (세션, 메시지 해시, 클라이언트 요청 ID)를 키로 하는 in-flight 맵을 관리합니다.
+같은 키로 들어온 두 번째 요청은 새 생성을 시작하지 않고,
+첫 번째 요청의 토큰 스트림에 붙어서 같은 이벤트를 처음부터 그대로 받습니다.
+"""
+
+import hashlib
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+
+CoalesceKey = Tuple[str, str, str]
+
+
+class InFlightStream:
+    """
+    진행 중인 스트리밍 응답 하나
+
+    생산자 스레드가 이벤트를 events 리스트에 추가하고,
+    구독자(첫 요청 + 병합된 요청)는 각자 자기 인덱스를 따라가며 읽습니다.
+    """
+
+    def __init__(self):
+        self.events: list = []
+        self.done = False
+        self.failed = False
+        self.finished_at: Optional[float] = None
+        self.subscribers = 0
+        self._cond = threading.Condition()
+
+    def publish(self, event: dict):
+        """이벤트 추가 후 대기 중인 구독자 깨우기"""
+        with self._cond:
+            self.events.append(event)
+            if event.get('type') == 'error':
+                self.failed = True
+            self._cond.notify_all()
+
+    def finish(self):
+        """스트림 종료 표시"""
+        with self._cond:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._cond.notify_all()
+
+    def subscribe(self, idle_timeout: float) -> 'Subscription':
+        """
+        처음부터 끝까지 이벤트 재생
+
+        Args:
+            idle_timeout: 새 이벤트 없이 기다릴 최대 시간(초)
+        """
+        return Subscription(self, idle_timeout)
+
+
+class Subscription:
+    """
+    InFlightStream 구독 하나
+
+    이터레이터로 쓰거나, next_event(timeout)으로 제한 시간을 두고 기다릴 수 있습니다.
+    (SSEFramer가 별도 스레드 없이 토큰 묶음 전송/heartbeat 시점을 지키는 데 사용)
+    """
+
+    def __init__(self, stream: InFlightStream, idle_timeout: float):
+        self._stream = stream
+        self._idle_timeout = idle_timeout
+        self._index = 0
+        self._buffer: deque = deque()
+        self._last_event = time.monotonic()
+
+    def __iter__(self) -> 'Subscription':
+        return self
+
+    def __next__(self) -> dict:
+        return self.next_event(None)
+
+    def next_event(self, timeout: Optional[float]) -> Optional[dict]:
+        """
+        다음 이벤트 (timeout초 안에 없으면 None, timeout이 None이면 올 때까지 대기)
+
+        Raises:
+            StopIteration: 스트림이 끝났거나 idle_timeout 동안 새 이벤트가 없음
+        """
+        if self._buffer:
+            return self._buffer.popleft()
+
+        stream = self._stream
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with stream._cond:
+            while self._index >= len(stream.events) and not stream.done:
+                now = time.monotonic()
+                idle_left = self._last_event + self._idle_timeout - now
+                if idle_left <= 0:
+                    print(f"[Coalescer] 스트림 대기 시간 초과 ({self._idle_timeout}초)")
+                    raise StopIteration
+                if deadline is not None and now >= deadline:
+                    return None
+                stream._cond.wait(idle_left if deadline is None else min(idle_left, deadline - now))
+            if self._index >= len(stream.events):
+                raise StopIteration
+            # 쌓인 이벤트를 한 번에 가져와 락 밖에서 전달 (느린 클라이언트가 생산자를 막지 않도록)
+            self._buffer.extend(stream.events[self._index:])
+            self._index = len(stream.events)
+
+        self._last_event = time.monotonic()
+        return self._buffer.popleft()
+
+
+class RequestCoalescer:
+    """
+    세션 + 메시지 단위 중복 요청 병합기
+
+    - 첫 요청(leader)은 백그라운드 스레드에서 실제 파이프라인을 실행합니다.
+    - 같은 키의 후속 요청은 진행 중인 스트림을 구독합니다.
+    - 완료된 스트림은 replay_window 동안 남겨 두어, 응답이 끝난 직후 도착한
+      재시도도 새 생성 없이 같은 결과를 받습니다.
+    - 오류로 끝난 스트림은 완료 즉시 제거하여, 재전송하면 새로 생성합니다.
+    """
+
+    def __init__(self, replay_window: float = 5.0, idle_timeout: float = 60.0):
+        """
+        Args:
+            replay_window: 완료된 스트림을 재사용할 시간(초)
+            idle_timeout: 구독자가 다음 이벤트를 기다릴 최대 시간(초)
+        """
+        self.replay_window = replay_window
+        self.idle_timeout = idle_timeout
+        self._inflight: Dict[CoalesceKey, InFlightStream] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(session_id: str, message: str, request_id: Optional[str] = None) -> CoalesceKey:
+        """
+        병합 키 생성
+
+        request_id가 없으면 같은 세션의 같은 메시지끼리 병합됩니다.
+        """
+        digest = hashlib.sha256(message.encode('utf-8')).hexdigest()
+        return (session_id, digest, request_id or '')
+
+    def stream(
+        self,
+        session_id: str,
+        message: str,
+        request_id: Optional[str],
+        producer: Callable[[], Iterable[dict]]
+    ) -> Subscription:
+        """
+        스트리밍 이벤트 반환 (필요할 때만 producer 실행)
+
+        Args:
+            session_id: 사용자 식별자
+            message: 사용자 메시지
+            request_id: 클라이언트가 보낸 요청 ID (재시도 시 동일)
+            producer: 실제 이벤트를 생성하는 함수 (예: generate_response_stream 호출)
+
+        Returns:
+            이벤트 dict 이터레이터 (Subscription)
+        """
+        key = self.make_key(session_id, message, request_id)
+
+        with self._lock:
+            self._evict_finished()
+            entry = self._inflight.get(key)
+            is_leader = entry is None
+            if is_leader:
+                entry = InFlightStream()
+                self._inflight[key] = entry
+            entry.subscribers += 1
+
+        if is_leader:
+            worker = threading.Thread(
+                target=self._run,
+                args=(key, entry, producer),
+                name=f"coalesce-{session_id}",
+                daemon=True
+            )
+            worker.start()
+        else:
+            print(f"[Coalescer] 중복 요청 병합: {session_id} (구독자 {entry.subscribers}명)")
+
+        return entry.subscribe(self.idle_timeout)
+
+    def inflight_count(self) -> int:
+        """현재 추적 중인 스트림 수 (완료 후 재사용 대기 포함)"""
+        with self._lock:
+            return len(self._inflight)
+
+    def _run(self, key: CoalesceKey, entry: InFlightStream, producer: Callable[[], Iterable[dict]]):
+        """producer를 끝까지 실행하며 이벤트를 발행"""
+        try:
+            for event in producer():
+                entry.publish(event)
+        except Exception as e:
+            print(f"[ERROR] 병합 스트림 생성 실패: {e}")
+            entry.publish({
+                'type': 'error',
+                'content': "죄송해요, 일시적인 오류가 발생했어요. 다시 시도해주세요."
+            })
+        finally:
+            entry.finish()
+            # 오류 결과는 재생하지 않음 (이미 구독 중인 요청은 entry를 들고 있어 끝까지 받음)
+            if entry.failed:
+                with self._lock:
+                    if self._inflight.get(key) is entry:
+                        del self._inflight[key]
+
+    def _evict_finished(self):
+        """재사용 시간이 지난 완료 스트림 제거 (self._lock 보유 상태에서 호출)"""
+        now = time.monotonic()
+        expired = [
+            key for key, entry in self._inflight.items()
+            if entry.done and entry.finished_at is not None
+            and now - entry.finished_at > self.replay_window
+        ]
+        for key in expired:
+            del self._inflight[key]
+
+
+# ============================================================================
+# 싱글톤 패턴
+# ============================================================================
+
+_request_coalescer: RequestCoalescer | None = None
+
+
+def get_request_coalescer() -> RequestCoalescer:
+    """싱글톤 RequestCoalescer 인스턴스 반환"""
+    global _request_coalescer
+    if _request_coalescer is None:
+        _request_coalescer = RequestCoalescer()
+    return _request_coalescer
@@ -0,0 +1,333 @@
+"""
+세션 캐시 (LRU + 유휴 TTL + 크기 제한)
+
+GameStateManager._states와 ChatbotService.store는 한 번 접속한 사용자를
+재시작 전까지 계속 메모리에 들고 있었습니다.
+
+SessionCache는 세션 ID → 객체 매핑을 다음 기준으로 정리합니다.
+- max_entries: 최대 세션 수
+- max_bytes: 세션별 추정 크기 합계 상한
+- idle_ttl_s: 마지막 접근 후 이 시간이 지나면 제거
+- 한도를 넘으면 가장 오래 접근하지 않은 세션부터 제거 (LRU)
+
+제거 직전에 on_evict(key, value)를 호출하며, 콜백이 False를 반환하면
+해당 세션은 제거하지 않습니다. (사용 중인 세션, 저장 실패 등)
+콜백은 캐시 락을 놓은 뒤 호출되므로 저장처럼 오래 걸리는 작업이 다른 세션의
+get/put을 막지 않습니다. 제거 대상은 콜백이 끝날 때까지 캐시에 남아 있고,
+그 사이 다시 접근되거나 교체되면 제거하지 않습니다.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator, List, Optional
+
+
+_MISSING = object()
+
+# 제거 사유 (메트릭 구분)
+_EXPIRED = "expired"
+_EVICTED = "evicted"
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'last_access', 'evicting')
+
+    def __init__(self, value: Any, size: int, last_access: float):
+        self.value = value
+        self.size = size
+        self.last_access = last_access
+        self.evicting = False  # on_evict 호출 대기/진행 중
+
+
+class SessionCache:
+    """
+    세션 단위 LRU/TTL 캐시
+
+    dict처럼 사용할 수 있습니다. (get / [] / in / len)
+    get과 []는 최근 접근으로 기록하고, peek은 순서를 바꾸지 않습니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        idle_ttl_s: float = 0,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        on_evict: Optional[Callable[[Hashable, Any], bool]] = None
+    ):
+        """
+        Args:
+            name: 메트릭 표시용 이름
+            max_entries: 최대 세션 수 (0이면 제한 없음)
+            max_bytes: 추정 크기 합계 상한 (0이면 제한 없음)
+            idle_ttl_s: 유휴 만료 시간(초) (0이면 만료 없음)
+            sizeof: 값의 추정 크기(바이트) 계산 함수
+            on_evict: 제거 전 콜백 (False 반환 시 제거 보류)
+        """
+        self.name = name
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.idle_ttl_s = max(0.0, float(idle_ttl_s))
+        self._sizeof = sizeof or (lambda value: sys.getsizeof(value))
+        self._on_evict = on_evict
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        # 메트릭
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.vetoed = 0
+
+    @classmethod
+    def from_config(cls, name: str, cache_config: Optional[dict], **kwargs) -> 'SessionCache':
+        """chatbot_config.json의 "session_cache" 하위 섹션으로 생성"""
+        cache_config = cache_config or {}
+        return cls(
+            name,
+            max_entries=cache_config.get('max_entries', 0),
+            max_bytes=cache_config.get('max_bytes', 0),
+            idle_ttl_s=cache_config.get('idle_ttl_s', 0),
+            **kwargs
+        )
+
+    # ------------------------------------------------------------------
+    # dict 호환 인터페이스
+    # ------------------------------------------------------------------
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """값 반환 (최근 접근으로 기록, 없으면 default)"""
+        with self._lock:
+            pending = self._expire()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                value = default
+            else:
+                self.hits += 1
+                entry.last_access = time.monotonic()
+                self._entries.move_to_end(key)
+                value = entry.value
+        self._run_evictions(pending)
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """값 반환 (접근 기록 없음, flush 등 내부 작업용)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.value if entry is not None else default
+
+    def put(self, key: Hashable, value: Any):
+        """값 저장 후 한도를 넘으면 오래된 세션 제거"""
+        size = self._measure(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = _Entry(value, size, time.monotonic())
+            self._bytes += size
+            pending = self._expire()
+            pending += self._enforce_limits(protect=key)
+        self._run_evictions(pending)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """값 제거 (콜백 호출 없음)"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self._bytes -= entry.size
+            return entry.value
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self.put(key, value)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.keys())
+
+    def keys(self) -> List[Hashable]:
+        """현재 키 목록 (오래된 순)"""
+        with self._lock:
+            return list(self._entries.keys())
+
+    # ------------------------------------------------------------------
+    # 크기 / 만료 관리
+    # ------------------------------------------------------------------
+
+    def refresh_size(self, key: Hashable):
+        """값이 제자리에서 커졌을 때 크기 다시 계산"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            value = entry.value
+        size = self._measure(value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.value is not value:
+                return
+            self._bytes += size - entry.size
+            entry.size = size
+            pending = self._enforce_limits(protect=key)
+        self._run_evictions(pending)
+
+    def sweep(self) -> int:
+        """유휴 만료 및 한도 초과 세션 정리 (제거한 수 반환)"""
+        with self._lock:
+            before = self.evictions + self.expirations
+            pending = self._expire()
+            pending += self._enforce_limits(protect=None)
+        self._run_evictions(pending)
+        with self._lock:
+            return self.evictions + self.expirations - before
+
+    def stats(self) -> dict:
+        """캐시 메트릭"""
+        with self._lock:
+            sizes = [entry.size for entry in self._entries.values()]
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'idle_ttl_s': self.idle_ttl_s,
+                'largest_entry_bytes': max(sizes) if sizes else 0,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'vetoed': self.vetoed
+            }
+
+    def _measure(self, value: Any) -> int:
+        try:
+            return int(self._sizeof(value))
+        except Exception as e:
+            print(f"[SessionCache] {self.name}: 크기 계산 실패 ({type(e).__name__}): {e}")
+            return 0
+
+    def _expire(self) -> list:
+        """
+        idle_ttl_s가 지난 세션 제거 (self._lock 보유 상태에서 호출)
+
+        Returns:
+            락을 놓은 뒤 _run_evictions에 넘길 제거 대기 목록
+        """
+        pending = []
+        if not self.idle_ttl_s:
+            return pending
+        deadline = time.monotonic() - self.idle_ttl_s
+        # 오래된 순으로 정렬되어 있으므로 만료되지 않은 항목을 만나면 중단
+        for key in list(self._entries.keys()):
+            entry = self._entries[key]
+            if entry.last_access > deadline:
+                break
+            self._remove(key, entry, _EXPIRED, pending)
+        return pending
+
+    def _enforce_limits(self, protect: Optional[Hashable]) -> list:
+        """max_entries / max_bytes 초과분 제거 (self._lock 보유 상태에서 호출, 제거 대기 목록 반환)"""
+        pending = []
+        if not self._over_limit(len(self._entries), self._bytes):
+            return pending
+        # 콜백을 기다리는 항목은 이미 빠진 것으로 보고 추가 대상을 고름
+        remaining = [entry for entry in self._entries.values() if not entry.evicting]
+        count, size = len(remaining), sum(entry.size for entry in remaining)
+        for key in list(self._entries.keys()):
+            if not self._over_limit(count, size):
+                break
+            entry = self._entries[key]
+            if key == protect or entry.evicting:
+                continue
+            self._remove(key, entry, _EVICTED, pending)
+            count -= 1
+            size -= entry.size
+        return pending
+
+    def _over_limit(self, count: int, size: int) -> bool:
+        return bool(
+            (self.max_entries and count > self.max_entries)
+            or (self.max_bytes and size > self.max_bytes)
+        )
+
+    def _remove(self, key: Hashable, entry: _Entry, reason: str, pending: list):
+        """
+        제거 (self._lock 보유 상태에서 호출)
+
+        콜백이 없으면 바로 제거하고, 있으면 제거 대기로 표시한 뒤 pending에 추가합니다.
+        """
+        if self._on_evict is None:
+            self._delete(key, entry, reason)
+        elif not entry.evicting:
+            entry.evicting = True
+            pending.append((key, entry, entry.last_access, reason))
+
+    def _delete(self, key: Hashable, entry: _Entry, reason: str):
+        del self._entries[key]
+        self._bytes -= entry.size
+        if reason == _EXPIRED:
+            self.expirations += 1
+        else:
+            self.evictions += 1
+
+    def _run_evictions(self, pending: list):
+        """제거 대기 항목의 콜백 실행 후 제거 (self._lock 없이 호출)"""
+        for key, entry, last_access, reason in pending:
+            try:
+                allowed = self._on_evict(key, entry.value)
+            except Exception as e:
+                print(f"[SessionCache] {self.name}: 제거 콜백 실패 ({type(e).__name__}): {e}")
+                allowed = False
+
+            with self._lock:
+                entry.evicting = False
+                if allowed is False:
+                    self.vetoed += 1
+                elif self._entries.get(key) is entry and entry.last_access == last_access:
+                    self._delete(key, entry, reason)
+                # 그 사이 다시 접근되었거나 교체/삭제된 항목은 그대로 둠
+
+
+def process_rss_bytes() -> Optional[int]:
+    """
+    현재 프로세스의 상주 메모리(RSS) 크기
+
+    Linux는 /proc/self/statm의 현재 값을, 그 외 POSIX는 getrusage의 최대값을 사용합니다.
+    (Windows 등 확인할 수 없으면 None)
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, Linux는 KB 단위
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
@@ -0,0 +1,421 @@
+"""
+여러 프로세스/노드가 함께 쓰는 공유 저장소 (Redis 프로토콜)
+
+render.yaml은 gunicorn app:app으로 실행되므로 워커가 여러 개면 각 프로세스가
+자기만의 _states와 대화 히스토리를 들고 있어, 요청이 어느 워커로 가느냐에 따라
+스탯이 달라지고 대화 기록이 사라집니다.
+
+이 모듈은 게임 상태와 대화 히스토리를 Redis 호환 서버(Redis, Valkey, KeyDB 등)에 둡니다.
+- 세션 락: SET NX PX 기반 분산 락 (워커가 죽어도 lock_ttl_ms 후 자동 해제)
+  잡고 있는 동안에는 워커당 하나인 연장 스레드가 lock_ttl_ms / 3마다 만료 시간을 늘리므로
+  LLM 호출처럼 오래 걸리는 요청도 락을 유지합니다. 연장에 실패하면(다른 워커가 가져감) 저장을 거절합니다.
+- 버전: 상태마다 정수 버전을 두고 compare-and-set으로 저장 (락 만료 시 덮어쓰기 방지)
+- 로컬 캐시: 각 워커의 GameStateManager 캐시는 세션 락을 잡을 때 원격 버전만 비교해
+  바뀐 경우에만 다시 읽습니다.
+
+url이 "memory://"이면 프로세스 내부 구현(InProcessBackend)을 사용합니다. (테스트/단일 프로세스용)
+
+설정은 config/chatbot_config.json의 "shared_store"에서 읽으며,
+환경변수 REDIS_URL이 있으면 url보다 우선합니다.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .game_state_storage import BASE_DIR, GameStateStorage
+from .session_cache import SessionCache
+from .state_codec import decode, encode
+
+
+class StaleStateError(RuntimeError):
+    """다른 워커가 먼저 저장해 버전이 맞지 않음"""
+
+
+class SessionBusyError(TimeoutError):
+    """세션 락을 제한 시간 안에 얻지 못함"""
+
+
+# ============================================================================
+# 키-값 백엔드
+# ============================================================================
+
+class SharedBackend:
+    """
+    공유 저장소가 사용하는 최소 연산
+
+    버전 값은 키가 없으면 0이며, store()가 성공할 때마다 1씩 증가합니다.
+    """
+
+    def load(self, key: str) -> Tuple[int, Optional[bytes]]:
+        """(버전, 내용) 반환"""
+        raise NotImplementedError
+
+    def version(self, key: str) -> int:
+        """현재 버전 (내용은 읽지 않음)"""
+        raise NotImplementedError
+
+    def store(self, key: str, payload: bytes, expected_version: Optional[int] = None) -> Optional[int]:
+        """
+        내용 저장 후 새 버전 반환
+
+        expected_version이 주어졌는데 현재 버전과 다르면 저장하지 않고 None 반환
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def keys(self, prefix: str) -> List[str]:
+        raise NotImplementedError
+
+    def acquire_lock(self, name: str, token: str, ttl_ms: int) -> bool:
+        """락이 비어 있으면 token으로 잡고 True"""
+        raise NotImplementedError
+
+    def release_lock(self, name: str, token: str):
+        """token이 일치할 때만 락 해제"""
+        raise NotImplementedError
+
+    def extend_lock(self, name: str, token: str, ttl_ms: int) -> bool:
+        """token이 일치할 때만 락 만료 시간을 ttl_ms 뒤로 연장 (이미 잃었으면 False)"""
+        raise NotImplementedError
+
+    def list_append(self, key: str, values: Sequence[bytes]):
+        raise NotImplementedError
+
+    def list_range(self, key: str, start: int, end: int) -> List[bytes]:
+        """Redis LRANGE와 같은 규칙 (end 포함, 음수는 끝에서부터)"""
+        raise NotImplementedError
+
+    def list_length(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class InProcessBackend(SharedBackend):
+    """프로세스 내부 구현 (Redis 없이 같은 동작을 흉내 냄)"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[int, bytes]] = {}
+        self._locks: Dict[str, Tuple[str, float]] = {}
+        self._lists: Dict[str, List[bytes]] = {}
+        self._mutex = threading.Lock()
+
+    def load(self, key: str) -> Tuple[int, Optional[bytes]]:
+        with self._mutex:
+            return self._values.get(key, (0, None))
+
+    def version(self, key: str) -> int:
+        with self._mutex:
+            return self._values.get(key, (0, None))[0]
+
+    def store(self, key: str, payload: bytes, expected_version: Optional[int] = None) -> Optional[int]:
+        with self._mutex:
+            current = self._values.get(key, (0, None))[0]
+            if expected_version is not None and expected_version != current:
+                return None
+            self._values[key] = (current + 1, payload)
+            return current + 1
+
+    def delete(self, key: str):
+        with self._mutex:
+            self._values.pop(key, None)
+            self._lists.pop(key, None)
+
+    def keys(self, prefix: str) -> List[str]:
+        with self._mutex:
+            return [key for key in (*self._values, *self._lists) if key.startswith(prefix)]
+
+    def acquire_lock(self, name: str, token: str, ttl_ms: int) -> bool:
+        now = time.monotonic()
+        with self._mutex:
+            holder = self._locks.get(name)
+            if holder is not None and holder[1] > now:
+                return False
+            self._locks[name] = (token, now + ttl_ms / 1000.0)
+            return True
+
+    def release_lock(self, name: str, token: str):
+        with self._mutex:
+            holder = self._locks.get(name)
+            if holder is not None and holder[0] == token:
+                del self._locks[name]
+
+    def extend_lock(self, name: str, token: str, ttl_ms: int) -> bool:
+        now = time.monotonic()
+        with self._mutex:
+            holder = self._locks.get(name)
+            if holder is None or holder[0] != token or holder[1] <= now:
+                return False
+            self._locks[name] = (token, now + ttl_ms / 1000.0)
+            return True
+
+    def list_append(self, key: str, values: Sequence[bytes]):
+        with self._mutex:
+            self._lists.setdefault(key, []).extend(values)
+
+    def list_range(self, key: str, start: int, end: int) -> List[bytes]:
+        with self._mutex:
+            items = self._lists.get(key, [])
+            length = len(items)
+            start = max(0, start + length if start < 0 else start)
+            end = end + length if end < 0 else end
+            return list(items[start:end + 1])
+
+    def list_length(self, key: str) -> int:
+        with self._mutex:
+            return len(self._lists.get(key, []))
+
+
+class RedisBackend(SharedBackend):
+    """Redis 호환 서버 구현 (redis 패키지 필요)"""
+
+    # 버전 비교 후 저장 (키는 {"v": 버전, "d": 내용} 해시)
+    _STORE_SCRIPT = """
+        local current = tonumber(redis.call('HGET', KEYS[1], 'v') or '0')
+        if ARGV[2] ~= '' and tonumber(ARGV[2]) ~= current then
+            return -1
+        end
+        current = current + 1
+        redis.call('HSET', KEYS[1], 'v', current, 'd', ARGV[1])
+        return current
+    """
+
+    # 내 토큰일 때만 락 삭제
+    _RELEASE_SCRIPT = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('DEL', KEYS[1])
+        end
+        return 0
+    """
+
+    # 내 토큰일 때만 락 만료 연장
+    _EXTEND_SCRIPT = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._store = self._client.register_script(self._STORE_SCRIPT)
+        self._release = self._client.register_script(self._RELEASE_SCRIPT)
+        self._extend = self._client.register_script(self._EXTEND_SCRIPT)
+
+    def load(self, key: str) -> Tuple[int, Optional[bytes]]:
+        version, payload = self._client.hmget(key, 'v', 'd')
+        return int(version or 0), payload
+
+    def version(self, key: str) -> int:
+        return int(self._client.hget(key, 'v') or 0)
+
+    def store(self, key: str, payload: bytes, expected_version: Optional[int] = None) -> Optional[int]:
+        expected = '' if expected_version is None else str(expected_version)
+        result = int(self._store(keys=[key], args=[payload, expected]))
+        return None if result < 0 else result
+
+    def delete(self, key: str):
+        self._client.delete(key)
+
+    def keys(self, prefix: str) -> List[str]:
+        return [key.decode('utf-8') for key in self._client.scan_iter(match=f"{prefix}*", count=500)]
+
+    def acquire_lock(self, name: str, token: str, ttl_ms: int) -> bool:
+        return bool(self._client.set(name, token, nx=True, px=ttl_ms))
+
+    def release_lock(self, name: str, token: str):
+        self._release(keys=[name], args=[token])
+
+    def extend_lock(self, name: str, token: str, ttl_ms: int) -> bool:
+        return bool(self._extend(keys=[name], args=[token, ttl_ms]))
+
+    def list_append(self, key: str, values: Sequence[bytes]):
+        if values:
+            self._client.rpush(key, *values)
+
+    def list_range(self, key: str, start: int, end: int) -> List[bytes]:
+        return self._client.lrange(key, start, end)
+
+    def list_length(self, key: str) -> int:
+        return self._client.llen(key)
+
+
+# ============================================================================
+# 게임 상태 저장소
+# ============================================================================
+
+class _HeldLock:
+    """이 워커가 잡고 있는 세션 락"""
+
+    __slots__ = ('name', 'token', 'lost')
+
+    def __init__(self, name: str, token: str):
+        self.name = name
+        self.token = token
+        self.lost = False  # 연장 실패 (만료 후 다른 워커가 잡았을 수 있음)
+
+
+class SharedStorage(GameStateStorage):
+    """
+    공유 백엔드 기반 게임 상태 저장소
+
+    GameStateManager는 shared=True인 저장소를 만나면
+    - 가장 바깥 session_lock()에서 session_guard()로 분산 락을 잡고
+    - is_stale()이 True면 로컬 캐시를 버리고 다시 로드하며
+    - 저장을 즉시 기록(sync)합니다.
+    """
+
+    name = "shared"
+    shared = True
+
+    def __init__(
+        self,
+        backend: SharedBackend,
+        key_prefix: str = "bbgame:",
+        lock_ttl_ms: int = 30000,
+        lock_wait_s: float = 10.0
+    ):
+        """
+        Args:
+            backend: 키-값 백엔드
+            key_prefix: 모든 키 앞에 붙는 접두사
+            lock_ttl_ms: 분산 락 유지 시간 (락을 잡은 워커가 죽었을 때 자동 해제까지)
+            lock_wait_s: 락 대기 최대 시간
+        """
+        self.backend = backend
+        self.key_prefix = key_prefix
+        self.lock_ttl_ms = int(lock_ttl_ms)
+        self.lock_wait_s = lock_wait_s
+        # 이 워커가 마지막으로 읽거나 쓴 버전
+        self._known_versions = SessionCache("shared_versions", max_entries=10000)
+        # 잡고 있는 세션 락 (세션 ID → _HeldLock), 연장 스레드가 주기적으로 연장
+        self._held: Dict[str, _HeldLock] = {}
+        self._held_lock = threading.Lock()
+        self._renewer: Optional[threading.Thread] = None
+
+    def _state_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}state:{session_id}"
+
+    def _lock_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}lock:{session_id}"
+
+    def load(self, session_id: str) -> Optional[dict]:
+        version, payload = self.backend.load(self._state_key(session_id))
+        self._known_versions.put(session_id, version)
+        return decode(payload) if payload is not None else None
+
+    def save(self, session_id: str, data: dict):
+        held = self._held.get(session_id)
+        if held is not None and held.lost:
+            raise StaleStateError(f"세션 락이 만료되어 저장하지 않았습니다: {session_id}")
+
+        key = self._state_key(session_id)
+        expected = self._known_versions.get(session_id)
+        if expected is None:
+            # 버전 캐시에서 밀려난 세션: 무조건 덮어쓰지 않고 현재 버전으로 비교 저장
+            # (락을 잡을 때 is_stale로 다시 읽었으므로 락을 유지하는 동안에는 이 버전이 최신)
+            expected = self.backend.version(key)
+        version = self.backend.store(key, encode(data), expected)
+        if version is None:
+            self._known_versions.pop(session_id)
+            raise StaleStateError(f"다른 워커가 먼저 저장한 세션입니다: {session_id}")
+        self._known_versions.put(session_id, version)
+
+    def delete(self, session_id: str):
+        self.backend.delete(self._state_key(session_id))
+        self._known_versions.pop(session_id)
+
+    def session_ids(self) -> List[str]:
+        prefix = self._state_key("")
+        return sorted(key[len(prefix):] for key in self.backend.keys(prefix))
+
+    def is_stale(self, session_id: str) -> bool:
+        """다른 워커가 저장해 로컬 사본이 오래되었는지 여부 (버전만 조회)"""
+        known = self._known_versions.get(session_id)
+        return known is None or self.backend.version(self._state_key(session_id)) != known
+
+    @contextmanager
+    def session_guard(self, session_id: str) -> Iterator[None]:
+        """세션 분산 락 (lock_wait_s 안에 못 얻으면 SessionBusyError)"""
+        name = self._lock_key(session_id)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_wait_s
+        delay = 0.005
+        while not self.backend.acquire_lock(name, token, self.lock_ttl_ms):
+            if time.monotonic() >= deadline:
+                raise SessionBusyError(f"세션 락 대기 시간 초과: {session_id}")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+        held = _HeldLock(name, token)
+        with self._held_lock:
+            self._held[session_id] = held
+            if self._renewer is None:
+                self._renewer = threading.Thread(target=self._renew_loop, name="shared-lock-renewer", daemon=True)
+                self._renewer.start()
+        try:
+            yield
+        finally:
+            with self._held_lock:
+                if self._held.get(session_id) is held:
+                    del self._held[session_id]
+            self.backend.release_lock(name, token)
+
+    def _renew_loop(self):
+        """잡고 있는 세션 락을 lock_ttl_ms / 3마다 연장 (워커당 스레드 하나)"""
+        interval = self.lock_ttl_ms / 3000.0
+        while True:
+            time.sleep(interval)
+            with self._held_lock:
+                held_locks = list(self._held.values())
+            for held in held_locks:
+                if held.lost:
+                    continue
+                try:
+                    extended = self.backend.extend_lock(held.name, held.token, self.lock_ttl_ms)
+                except Exception as e:
+                    # 일시적인 연결 오류는 다음 주기에 다시 시도 (그 사이 만료되면 다음 연장에서 lost)
+                    print(f"[SharedStore] 세션 락 연장 실패 ({type(e).__name__}): {e}")
+                    continue
+                if not extended:
+                    held.lost = True
+                    print(f"[SharedStore] 세션 락을 잃었습니다 (만료됨): {held.name}")
+
+
+# ============================================================================
+# 싱글톤 패턴
+# ============================================================================
+
+_shared_backend: SharedBackend | None = None
+_shared_backend_lock = threading.Lock()
+
+
+def get_shared_backend(shared_config: Optional[dict] = None) -> SharedBackend:
+    """
+    싱글톤 공유 백엔드 반환
+
+    Args:
+        shared_config: chatbot_config.json의 "shared_store" 섹션 (None이면 설정 파일에서 읽음)
+    """
+    global _shared_backend
+    if _shared_backend is None:
+        with _shared_backend_lock:
+            if _shared_backend is None:
+                if shared_config is None:
+                    config_path = BASE_DIR / "config" / "chatbot_config.json"
+                    with open(config_path, 'r', encoding='utf-8') as f:
+                        shared_config = json.load(f).get('shared_store', {})
+                url = os.getenv("REDIS_URL") or shared_config.get('url') or "memory://"
+                if url.startswith("memory://"):
+                    _shared_backend = InProcessBackend()
+                else:
+                    _shared_backend = RedisBackend(url)
+                print(f"[SharedStore] 백엔드: {url.split('@')[-1]}")
+    return _shared_backend
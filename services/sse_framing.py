@@ -0,0 +1,157 @@
+"""
+SSE 프레이밍 (토큰 스트림 묶음 전송)
+
+generate_response_stream은 토큰마다 이벤트 dict를 하나씩 내보냅니다.
+이를 그대로 json.dumps + SSE write 하면 답변 하나에 수백 번의 작은 write와
+클라이언트 JSON.parse가 발생합니다.
+
+이 모듈은 연속된 token 이벤트를 N ms 또는 M 바이트 단위로 하나의 프레임으로 묶습니다.
+- 첫 토큰은 즉시 전송 (체감 지연 유지)
+- token 외 이벤트(metadata, done, event_update 등)는 대기 중인 토큰을 먼저 보낸 뒤 즉시 전송
+- 고정 프레이밍 바이트는 미리 인코딩
+- 일정 시간 아무것도 보내지 않으면 heartbeat 주석(": heartbeat")을 전송
+
+클라이언트(chatbot.js)는 token content를 이어 붙이고 "data: "로 시작하지 않는 블록은
+무시하므로 프레임 형식 변경 없이 그대로 동작합니다.
+"""
+
+import json
+import time
+from typing import Iterable, Iterator, List, Optional
+
+
+# 미리 인코딩한 고정 바이트
+DATA_PREFIX = b"data: "
+FRAME_END = b"\n\n"
+TOKEN_PREFIX = b'data: {"type": "token", "content": '
+TOKEN_SUFFIX = b"}\n\n"
+HEARTBEAT_FRAME = b": heartbeat\n\n"
+
+
+class SSEFramer:
+    """
+    이벤트 dict 스트림을 SSE 바이트 프레임으로 변환
+
+    설정(chatbot_config.json의 "streaming"):
+        flush_interval_ms: 토큰을 모아 보낼 최대 대기 시간 (기본 40ms)
+        max_frame_bytes: 이 크기 이상 모이면 즉시 전송 (기본 512바이트)
+        heartbeat_interval_s: 무전송 구간 heartbeat 간격 (0이면 끔, 기본 15초)
+    """
+
+    def __init__(
+        self,
+        flush_interval_ms: int = 40,
+        max_frame_bytes: int = 512,
+        heartbeat_interval_s: float = 15.0
+    ):
+        self.flush_interval = max(0, flush_interval_ms) / 1000.0
+        self.max_frame_bytes = max(1, max_frame_bytes)
+        self.heartbeat_interval = max(0.0, heartbeat_interval_s)
+
+    @classmethod
+    def from_config(cls, streaming_config: Optional[dict]) -> 'SSEFramer':
+        """설정 dict에서 프레이머 생성 (없는 키는 기본값)"""
+        streaming_config = streaming_config or {}
+        return cls(
+            flush_interval_ms=streaming_config.get('flush_interval_ms', 40),
+            max_frame_bytes=streaming_config.get('max_frame_bytes', 512),
+            heartbeat_interval_s=streaming_config.get('heartbeat_interval_s', 15.0)
+        )
+
+    @staticmethod
+    def encode_event(event: dict) -> bytes:
+        """일반 이벤트 하나를 SSE 프레임으로 인코딩"""
+        return DATA_PREFIX + json.dumps(event, ensure_ascii=False).encode('utf-8') + FRAME_END
+
+    @staticmethod
+    def encode_tokens(parts: List[str]) -> bytes:
+        """여러 토큰을 token 이벤트 하나로 합쳐 인코딩"""
+        content = json.dumps(''.join(parts), ensure_ascii=False).encode('utf-8')
+        return TOKEN_PREFIX + content + TOKEN_SUFFIX
+
+    def frames(self, events: Iterable[dict]) -> Iterator[bytes]:
+        """
+        이벤트 스트림을 묶음 프레임으로 변환
+
+        events에 next_event(timeout)이 있으면(RequestCoalescer의 Subscription) 다음 flush나
+        heartbeat 시점까지만 기다리므로, 별도 스레드 없이 업스트림이 멈춘 동안에도
+        대기 중인 토큰 전송과 heartbeat가 제시간에 이루어집니다.
+        일반 이터러블은 이벤트가 도착할 때만 flush 시점을 확인합니다. (heartbeat 없음)
+        원본에서 발생한 예외는 대기 토큰을 보낸 뒤 그대로 다시 발생시킵니다.
+        """
+        next_event = getattr(events, 'next_event', None)
+        if next_event is None:
+            iterator = iter(events)
+            next_event = lambda timeout: next(iterator)
+
+        pending: List[str] = []
+        pending_bytes = 0
+        flush_deadline: Optional[float] = None
+        first_token_sent = False
+        last_write = time.monotonic()
+
+        while True:
+            try:
+                item = next_event(self._next_timeout(flush_deadline, last_write))
+            except StopIteration:
+                if pending:
+                    yield self.encode_tokens(pending)
+                return
+            except Exception:
+                if pending:
+                    yield self.encode_tokens(pending)
+                raise
+
+            if item is None:
+                # 제한 시간 만료: 모아 둔 토큰 전송 또는 heartbeat
+                now = time.monotonic()
+                if pending and flush_deadline is not None and now >= flush_deadline:
+                    yield self.encode_tokens(pending)
+                    pending, pending_bytes, flush_deadline = [], 0, None
+                    last_write = now
+                elif self.heartbeat_interval and now - last_write >= self.heartbeat_interval:
+                    yield HEARTBEAT_FRAME
+                    last_write = now
+                continue
+
+            if item.get('type') == 'token':
+                token = item.get('content') or ''
+                if not token:
+                    continue
+
+                # 첫 토큰은 즉시 전송
+                if not first_token_sent:
+                    first_token_sent = True
+                    yield self.encode_tokens([token])
+                    last_write = time.monotonic()
+                    continue
+
+                pending.append(token)
+                pending_bytes += len(token.encode('utf-8'))
+                if flush_deadline is None:
+                    flush_deadline = time.monotonic() + self.flush_interval
+
+                if pending_bytes >= self.max_frame_bytes or time.monotonic() >= flush_deadline:
+                    yield self.encode_tokens(pending)
+                    pending, pending_bytes, flush_deadline = [], 0, None
+                    last_write = time.monotonic()
+                continue
+
+            # token 외 이벤트: 대기 토큰 먼저 전송 후 즉시 전송
+            if pending:
+                yield self.encode_tokens(pending)
+                pending, pending_bytes, flush_deadline = [], 0, None
+            yield self.encode_event(item)
+            last_write = time.monotonic()
+
+    def _next_timeout(self, flush_deadline: Optional[float], last_write: float) -> Optional[float]:
+        """다음 flush 또는 heartbeat까지 남은 시간 (None이면 무한 대기)"""
+        now = time.monotonic()
+        deadlines = []
+        if flush_deadline is not None:
+            deadlines.append(flush_deadline - now)
+        if self.heartbeat_interval:
+            deadlines.append(last_write + self.heartbeat_interval - now)
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines))
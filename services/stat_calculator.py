@@ -10,6 +10,10 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 import json
 
+from .llm_limiter import PRIORITY_JUDGE
+from .model_router import get_model_router, TASK_STAT_JUDGE
+from .circuit_breaker import get_breaker, STAGE_STAT_JUDGE
+
 
 class StatCalculator:
     """
@@ -21,12 +25,14 @@ class StatCalculator:
     3. 변화 이유 설명
     """
 
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(self, llm: ChatOpenAI, router=None):
         """
         Args:
-            llm: ChatOpenAI 인스턴스
+            llm: ChatOpenAI 인스턴스 (stat_judge 라우팅)
+            router: 호출 기록용 ModelRouter (None이면 싱글톤)
         """
         self.llm = llm
+        self.router = router or get_model_router()
 
     def analyze_conversation(
         self,
@@ -125,13 +131,24 @@ class StatCalculator:
             # 컨텍스트 정보 구성
             context_info = f"[대화 맥락]\n{conversation_context}" if conversation_context else ""
 
-            response = chain.invoke({
+            inputs = {
                 "current_month": game_state.current_month,
                 "current_stats": json.dumps(current_stats, ensure_ascii=False),
                 "user_message": user_message,
                 "bot_reply": bot_reply,
                 "context_info": context_info
-            })
+            }
+            # stat_judge 브레이커가 차단 중이거나 호출이 실패하면 스탯 변화 없음
+            response = get_breaker(STAGE_STAT_JUDGE).call(
+                lambda: self.router.invoke(
+                    TASK_STAT_JUDGE,
+                    lambda: chain.invoke(inputs),
+                    priority=PRIORITY_JUDGE
+                ),
+                fallback=lambda: None
+            )
+            if response is None:
+                return ({}, "스탯 분석 생략 (판정기 응답 지연)")
 
             # JSON 파싱
             result = json.loads(response.content)
@@ -0,0 +1,198 @@
+"""
+게임 상태 직렬화 / 원자적 파일 쓰기
+
+기존 저장 방식은 json.dump(..., indent=2)로 대상 파일에 바로 썼기 때문에
+파일이 크고, 쓰는 도중 프로세스가 죽으면 반쯤 쓰인 파일이 남았습니다.
+
+지원 형식:
+- "json_pretty": 기존 형식 (들여쓰기 JSON, 읽기 호환용)
+- "json": 공백 없는 JSON
+- "msgpack": MessagePack 바이너리 (msgpack 패키지가 없으면 "json"으로 대체)
+
+읽을 때는 첫 바이트로 형식을 자동 판별하므로, 형식을 바꿔도 기존 파일을 그대로 읽습니다.
+
+벤치마크:
+    python -m services.state_codec bench
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    import msgpack
+except ImportError:  # 선택 의존성
+    msgpack = None
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+FORMAT_JSON_PRETTY = "json_pretty"
+FORMAT_JSON = "json"
+FORMAT_MSGPACK = "msgpack"
+
+FORMATS = (FORMAT_JSON_PRETTY, FORMAT_JSON, FORMAT_MSGPACK)
+
+
+class CorruptStateError(ValueError):
+    """저장된 상태를 해석할 수 없음 (잘린 파일, 알 수 없는 형식 등)"""
+
+
+def resolve_format(fmt: str) -> str:
+    """사용 가능한 형식으로 변환 (msgpack 미설치 시 json)"""
+    if fmt not in FORMATS:
+        raise ValueError(f"지원하지 않는 직렬화 형식입니다: {fmt}")
+    if fmt == FORMAT_MSGPACK and msgpack is None:
+        print("[WARNING] msgpack 패키지가 없어 json 형식으로 저장합니다")
+        return FORMAT_JSON
+    return fmt
+
+
+def encode(data: dict, fmt: str = FORMAT_JSON) -> bytes:
+    """dict → bytes"""
+    if fmt == FORMAT_MSGPACK:
+        return msgpack.packb(data, use_bin_type=True)
+    if fmt == FORMAT_JSON_PRETTY:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def detect_format(raw: bytes) -> str:
+    """
+    바이트 내용으로 형식 판별
+
+    MessagePack map은 0x80~0x8f(fixmap), 0xde, 0xdf로 시작하므로
+    '{'(또는 BOM/공백)로 시작하는 JSON과 겹치지 않습니다.
+    """
+    if not raw:
+        raise CorruptStateError("빈 파일입니다")
+    head = raw.lstrip(b'\xef\xbb\xbf \t\r\n')[:1]
+    if head == b'{':
+        return FORMAT_JSON
+    first = raw[0]
+    if 0x80 <= first <= 0x8f or first in (0xde, 0xdf):
+        return FORMAT_MSGPACK
+    raise CorruptStateError(f"알 수 없는 형식입니다 (첫 바이트 0x{first:02x})")
+
+
+def decode(raw: bytes) -> dict:
+    """bytes → dict (형식 자동 판별)"""
+    fmt = detect_format(raw)
+    try:
+        if fmt == FORMAT_MSGPACK:
+            if msgpack is None:
+                raise CorruptStateError("msgpack 형식이지만 msgpack 패키지가 설치되어 있지 않습니다")
+            data = msgpack.unpackb(raw, raw=False)
+        else:
+            data = json.loads(raw.decode('utf-8-sig'))
+    except CorruptStateError:
+        raise
+    except Exception as e:
+        raise CorruptStateError(f"{fmt} 해석 실패 ({type(e).__name__}): {e}") from e
+
+    if not isinstance(data, dict):
+        raise CorruptStateError(f"최상위 값이 객체가 아닙니다: {type(data).__name__}")
+    return data
+
+
+def atomic_write(path: Path, payload: bytes):
+    """
+    임시 파일 → fsync → rename 순서로 원자적 쓰기
+
+    같은 디렉토리에 임시 파일을 만들어 os.replace로 교체하므로,
+    중간에 프로세스가 죽어도 대상 파일은 이전 내용 또는 새 내용 중 하나입니다.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+    # rename 자체를 디스크에 반영 (디렉토리 fsync는 POSIX에서만 가능)
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def read_file(path: Path) -> Optional[dict]:
+    """파일에서 상태 읽기 (없으면 None, 손상되었으면 CorruptStateError)"""
+    try:
+        raw = Path(path).read_bytes()
+    except FileNotFoundError:
+        return None
+    return decode(raw)
+
+
+def _benchmark(rounds: int = 200):
+    """저장된 게임 상태로 형식별 크기 / 저장 / 로드 시간 비교"""
+    source_dir = BASE_DIR / "static" / "data" / "game_states"
+    states = []
+    # flat / sharded 레이아웃 모두
+    for path in sorted([*source_dir.glob("*.json"), *source_dir.glob("??/??/*.json")]):
+        try:
+            states.append(read_file(path))
+        except CorruptStateError as e:
+            print(f"[WARNING] 건너뜀: {path.name} ({e})")
+
+    if not states:
+        print(f"벤치마크할 게임 상태가 없습니다: {source_dir}")
+        return
+
+    print(f"게임 상태 {len(states)}개 x {rounds}회")
+    print(f"{'format':<12} {'avg bytes':>10} {'save us':>10} {'load us':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in FORMATS:
+            if fmt == FORMAT_MSGPACK and msgpack is None:
+                print(f"{fmt:<12} {'(msgpack 미설치)':>10}")
+                continue
+
+            paths = [Path(tmp) / f"{i}.{fmt}" for i in range(len(states))]
+            total_bytes = sum(len(encode(state, fmt)) for state in states)
+
+            started = time.perf_counter()
+            for _ in range(rounds):
+                for path, state in zip(paths, states):
+                    atomic_write(path, encode(state, fmt))
+            save_us = (time.perf_counter() - started) / (rounds * len(states)) * 1e6
+
+            started = time.perf_counter()
+            for _ in range(rounds):
+                for path in paths:
+                    read_file(path)
+            load_us = (time.perf_counter() - started) / (rounds * len(states)) * 1e6
+
+            print(f"{fmt:<12} {total_bytes / len(states):>10.0f} {save_us:>10.1f} {load_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    """
+    직렬화 형식 벤치마크
+
+    실행 방법:
+    python -m services.state_codec bench [반복 횟수]
+    """
+    if len(sys.argv) < 2 or sys.argv[1] != "bench":
+        print("사용법: python -m services.state_codec bench [반복 횟수]")
+        sys.exit(1)
+    _benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 200)
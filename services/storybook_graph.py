@@ -0,0 +1,260 @@
+"""
+스토리북 그래프 (컴파일된 스토리북 설정)
+
+storybook_config.json을 로드 시점에 한 번 검증하고, 요청 처리 중에는
+문자열 조합이나 completion_action 해석 없이 dict 조회만 하도록 미리 계산해 둡니다.
+
+- 노드: 스토리북 ID → StorybookNode (월, 제목, 완료 동작, 원본 데이터)
+- 완료 동작: CompletionAction (문자열/딕셔너리 두 형식을 하나로 정규화)
+- 월 전환: 월 → "{월}_to_{월+1}_transition" 노드 ID
+- 다음 후보: 스토리북 ID → 이어서 보여줄 수 있는 스토리북 ID들 (미리 받아두기용)
+- 월별 목표: 월 → MonthGoals
+- 엔딩: 엔딩 ID → 엔딩 데이터
+
+잘못된 참조(없는 스토리북 ID, 알 수 없는 완료 동작, 없는 스탯 이름 등)는
+StorybookConfigError로 시작 시점에 드러납니다. 이미지 파일이 없는 경우는 경고만 남깁니다.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .game_rules import ENDING_IDS, FALLBACK_ENDING_ID
+from .game_state_manager import STAT_NAMES
+
+
+ACTION_START_CHAT = "start_chat_mode"
+ACTION_SHOW_NEXT = "show_next_storybook"
+ACTION_DETERMINE_ENDING = "determine_ending"
+ACTION_GAME_END = "game_end"
+ACTIONS = (ACTION_START_CHAT, ACTION_SHOW_NEXT, ACTION_DETERMINE_ENDING, ACTION_GAME_END)
+
+FIRST_MONTH = 3
+FINAL_MONTH = 9
+
+# 9월에 채팅을 마치면 보여줄 스토리북 (엔딩 결정)
+FINAL_STORYBOOK_ID = "9_opening"
+
+# 8월 대회: 채팅을 마치면 타석 결과에 따라 app.py에서 고르는 스토리북
+TOURNAMENT_MONTH = 8
+TOURNAMENT_RESULT_IDS = ("8_result_homerun", "8_result_hit", "8_result_strikeout")
+# 안타 이후 도루 선택 결과
+STEAL_RESULT_IDS = ("8_steal_success", "8_steal_fail")
+
+# 다음 스토리북을 설정이 아니라 코드에서 고르는 스토리북 → 후보
+# (8월 대회 전이거나 삼진이면 채팅 후 타석 결과를 계산, 안타면 도루 분기)
+CODE_BRANCHES = {
+    "8_opening": TOURNAMENT_RESULT_IDS,
+    "8_result_strikeout": TOURNAMENT_RESULT_IDS,
+    "8_result_hit": STEAL_RESULT_IDS,
+}
+
+# 코드에서 직접 지정하는 스토리북
+REQUIRED_STORYBOOK_IDS = ("3_opening", FINAL_STORYBOOK_ID) + TOURNAMENT_RESULT_IDS + STEAL_RESULT_IDS
+
+# 엔딩 매트릭스 + 스페셜 엔딩 (ENDING_IDS), 최하위 엔딩 (FALLBACK_ENDING_ID)은 game_rules에 정의
+
+
+class StorybookConfigError(ValueError):
+    """스토리북 설정 검증 실패"""
+
+
+@dataclass(frozen=True)
+class CompletionAction:
+    """스토리북 완료 시 동작"""
+    type: str
+    message: str = ""
+    next_storybook_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class StorybookNode:
+    """
+    스토리북 하나
+
+    data는 API 응답에 그대로 쓰는 원본 dict이므로 수정하지 않습니다.
+    """
+    id: str
+    month: int
+    title: str
+    completion: CompletionAction
+    data: dict
+
+
+@dataclass(frozen=True)
+class MonthGoals:
+    """월별 목표 (스탯 이름 → 필요 값)"""
+    month: int
+    description: str
+    required: Mapping[str, int]
+
+    def to_dict(self) -> dict:
+        """config 형식 dict ({"description": ..., 스탯: 값, ...})"""
+        return {'description': self.description, **self.required}
+
+
+@dataclass(frozen=True)
+class StorybookGraph:
+    """검증을 마친 읽기 전용 스토리북 그래프 (config는 원본 설정 dict)"""
+    config: Mapping[str, object]
+    nodes: Mapping[str, StorybookNode]
+    transitions: Mapping[int, str]
+    successors: Mapping[str, Tuple[str, ...]]
+    goals: Mapping[int, MonthGoals]
+    endings: Mapping[str, dict]
+    warnings: Tuple[str, ...]
+
+    @classmethod
+    def compile(cls, config: dict, base_dir: Path) -> 'StorybookGraph':
+        """
+        설정 dict를 검증해 그래프로 변환
+
+        Args:
+            config: storybook_config.json 내용
+            base_dir: 이미지 경로("./static/...")의 기준 디렉토리
+
+        Raises:
+            StorybookConfigError: 검증 실패 (발견한 문제를 모두 포함)
+        """
+        errors: List[str] = []
+        warnings: List[str] = []
+
+        storybooks = config.get('storybooks', {})
+        nodes: Dict[str, StorybookNode] = {}
+        for storybook_id, data in storybooks.items():
+            node = _compile_node(storybook_id, data, errors)
+            if node is not None:
+                nodes[storybook_id] = node
+            for stat in data.get('stat_changes', {}):
+                if stat not in STAT_NAMES:
+                    errors.append(f"{storybook_id}: 알 수 없는 스탯 '{stat}' (stat_changes)")
+            _check_images(storybook_id, data, base_dir, warnings)
+
+        # 다음 스토리북 참조
+        for node in nodes.values():
+            next_id = node.completion.next_storybook_id
+            if next_id is not None and next_id not in storybooks:
+                errors.append(f"{node.id}: 다음 스토리북 '{next_id}'가 없습니다")
+            if node.completion.type == ACTION_SHOW_NEXT and next_id is None and node.id not in CODE_BRANCHES:
+                # 8월 대회 결과처럼 코드에서 분기하는 스토리북이 아니면 진행이 멈춤
+                warnings.append(f"{node.id}: 다음 스토리북이 지정되지 않았습니다")
+
+        for storybook_id in REQUIRED_STORYBOOK_IDS:
+            if storybook_id not in storybooks:
+                errors.append(f"필수 스토리북 '{storybook_id}'가 없습니다")
+
+        # 월 전환 (3→4 ... 8→9)
+        transitions = {}
+        for month in range(FIRST_MONTH, FINAL_MONTH):
+            transition_id = f"{month}_to_{month + 1}_transition"
+            if transition_id in storybooks:
+                transitions[month] = transition_id
+            else:
+                errors.append(f"{month}월 전환 스토리북 '{transition_id}'가 없습니다")
+
+        goals = _compile_goals(config.get('month_goals', {}), errors)
+        for month in range(FIRST_MONTH, FINAL_MONTH):
+            if month not in goals:
+                warnings.append(f"{month}월 목표(month_goals)가 없습니다")
+
+        endings = config.get('endings', {})
+        for ending_id in ENDING_IDS:
+            if ending_id not in endings:
+                errors.append(f"엔딩 '{ending_id}'가 없습니다")
+        for ending_id, data in endings.items():
+            _check_images(f"엔딩 {ending_id}", data, base_dir, warnings)
+
+        if errors:
+            raise StorybookConfigError("스토리북 설정 오류:\n- " + "\n- ".join(errors))
+
+        return cls(
+            config=MappingProxyType(config),
+            nodes=MappingProxyType(nodes),
+            transitions=MappingProxyType(transitions),
+            successors=MappingProxyType({
+                node.id: _successors(node, transitions) for node in nodes.values()
+            }),
+            goals=MappingProxyType(goals),
+            endings=MappingProxyType(dict(endings)),
+            warnings=tuple(warnings)
+        )
+
+
+def _compile_node(storybook_id: str, data: dict, errors: List[str]) -> Optional[StorybookNode]:
+    if data.get('id', storybook_id) != storybook_id:
+        errors.append(f"{storybook_id}: id 필드가 키와 다릅니다 ('{data.get('id')}')")
+    if not data.get('pages'):
+        errors.append(f"{storybook_id}: 페이지가 없습니다")
+
+    month = data.get('month')
+    if not isinstance(month, int) or not FIRST_MONTH <= month <= FINAL_MONTH:
+        errors.append(f"{storybook_id}: 월이 올바르지 않습니다 ({month!r})")
+        return None
+
+    # completion_action은 문자열(간단한 형식) 또는 딕셔너리(확장 형식)
+    raw_action = data.get('completion_action', ACTION_START_CHAT)
+    if isinstance(raw_action, str):
+        action = CompletionAction(raw_action, "", data.get('next_storybook_id'))
+    elif isinstance(raw_action, dict):
+        action = CompletionAction(
+            raw_action.get('type', ACTION_START_CHAT),
+            raw_action.get('message', ""),
+            raw_action.get('next_storybook_id')
+        )
+    else:
+        errors.append(f"{storybook_id}: completion_action 형식이 올바르지 않습니다")
+        return None
+
+    if action.type not in ACTIONS:
+        errors.append(f"{storybook_id}: 알 수 없는 완료 동작 '{action.type}'")
+        return None
+
+    return StorybookNode(storybook_id, month, data.get('title', ''), action, data)
+
+
+def _successors(node: StorybookNode, transitions: Dict[int, str]) -> Tuple[str, ...]:
+    """이 스토리북 다음에 올 수 있는 스토리북 (게임 상태와 무관한 전체 후보)"""
+    action = node.completion
+    if node.id in CODE_BRANCHES:
+        return CODE_BRANCHES[node.id]
+
+    if action.type == ACTION_SHOW_NEXT:
+        return (action.next_storybook_id,) if action.next_storybook_id is not None else ()
+
+    if action.type == ACTION_START_CHAT:
+        # 채팅을 마치면 월 전환 (9월은 엔딩 결정)
+        if node.month == FINAL_MONTH:
+            return (FINAL_STORYBOOK_ID,)
+        return (transitions[node.month],)
+
+    # 엔딩 결정 / 게임 종료
+    return ()
+
+
+def _compile_goals(month_goals: dict, errors: List[str]) -> Dict[int, MonthGoals]:
+    goals = {}
+    for month_key, raw in month_goals.items():
+        if not str(month_key).isdigit():
+            errors.append(f"month_goals: 월 키가 숫자가 아닙니다 ('{month_key}')")
+            continue
+        required = {}
+        for stat, value in raw.items():
+            if stat == 'description':
+                continue
+            if stat not in STAT_NAMES:
+                errors.append(f"month_goals[{month_key}]: 알 수 없는 스탯 '{stat}'")
+            elif not isinstance(value, int) or not 0 <= value <= 100:
+                errors.append(f"month_goals[{month_key}]: {stat} 목표가 0~100 정수가 아닙니다 ({value!r})")
+            else:
+                required[stat] = value
+        month = int(month_key)
+        goals[month] = MonthGoals(month, raw.get('description', ''), MappingProxyType(required))
+    return goals
+
+
+def _check_images(owner: str, data: dict, base_dir: Path, warnings: List[str]):
+    for index, page in enumerate(data.get('pages', [])):
+        image = page.get('image')
+        if image and not (base_dir / image).is_file():
+            warnings.append(f"{owner} {index + 1}페이지: 이미지 파일이 없습니다 ({image})")
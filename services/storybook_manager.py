@@ -6,10 +6,77 @@
 """
 
 import json
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
 import random # <<수정: 확률 계산 위해 추가
 
+from .config_service import CONFIG_IMAGE_MANIFEST, CONFIG_STORYBOOK, get_config_service
+from . import game_rules
+from .storybook_graph import (
+    FALLBACK_ENDING_ID, FINAL_STORYBOOK_ID, TOURNAMENT_MONTH, TOURNAMENT_RESULT_IDS,
+    CompletionAction, StorybookGraph
+)
+from .image_pipeline import MANIFEST_PATH, ImageManifest
+from .storybook_payloads import StorybookPayload, build_payloads, link_header, prefetch_entry
+
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "storybook_config.json"
+
+
+def compile_storybook_config(config: dict, config_path: Path) -> StorybookGraph:
+    """
+    설정 dict를 검증해 그래프로 변환 (경고는 출력만 함)
+
+    Raises:
+        StorybookConfigError: 잘못된 참조가 있을 경우
+    """
+    graph = StorybookGraph.compile(config, Path(config_path).resolve().parent.parent)
+    for warning in graph.warnings:
+        print(f"[WARNING] {warning}")
+    return graph
+
+
+@dataclass(frozen=True)
+class StorybookSnapshot:
+    """
+    그래프와 그 그래프로 미리 만든 응답 (한 번에 교체되는 읽기 전용 묶음)
+
+    요청 처리 중에는 이 객체를 한 번만 읽어 사용하므로, 교체 중에도
+    새 그래프와 이전 응답 캐시가 섞이지 않습니다.
+    """
+    graph: StorybookGraph
+    views: Mapping[str, dict]
+    ending_views: Mapping[str, dict]
+    payloads: Mapping[str, StorybookPayload]
+    prefetch_links: Mapping[str, str]
+
+    @classmethod
+    def build(cls, graph: StorybookGraph, manifest: ImageManifest) -> 'StorybookSnapshot':
+        """
+        그래프로 응답 캐시(직렬화/압축)와 페이지 이미지 srcset, Link 헤더를 미리 만듦
+        """
+        # 응답에 쓰는 스토리북/엔딩 (페이지에 image_set을 붙인 사본)
+        views = {node.id: manifest.with_image_sets(node.data) for node in graph.nodes.values()}
+        ending_views = {ending_id: manifest.with_image_sets(data) for ending_id, data in graph.endings.items()}
+        payloads = build_payloads(views)
+        # 스토리북 응답에 붙일 Link 헤더 (게임 상태와 무관한 다음 후보 전체)
+        prefetch_links = {
+            storybook_id: link_header([
+                prefetch_entry(next_id, views[next_id], payloads[next_id])
+                for next_id in next_ids
+            ])
+            for storybook_id, next_ids in graph.successors.items()
+        }
+        return cls(
+            graph=graph,
+            views=MappingProxyType(views),
+            ending_views=MappingProxyType(ending_views),
+            payloads=MappingProxyType(payloads),
+            prefetch_links=MappingProxyType(prefetch_links),
+        )
+
 
 class StorybookManager:
     """
@@ -24,26 +91,54 @@ class StorybookManager:
     4. 다음 스토리북 진행 제어
     """
 
-    def __init__(self, config_path: str = None):
+    def __init__(self, config_path: str = None, graph: Optional[StorybookGraph] = None):
         """
         스토리북 관리자 초기화
 
         Args:
             config_path: storybook_config.json 경로 (None이면 기본 경로)
+            graph: 이미 컴파일한 그래프 (ConfigService가 로드한 경우, None이면 직접 로드)
         """
         print("[StorybookManager] 초기화 중...")
 
         # 기본 경로 설정
-        if config_path is None:
-            base_dir = Path(__file__).resolve().parent.parent
-            config_path = base_dir / "config" / "storybook_config.json"
-        else:
-            config_path = Path(config_path)
+        self.config_path = DEFAULT_CONFIG_PATH if config_path is None else Path(config_path)
+
+        # 빌드된 이미지 변환본 (없으면 원본 이미지 사용)
+        self.image_manifest = ImageManifest.load()
+
+        if graph is None:
+            graph = compile_storybook_config(self.load_config(), self.config_path)
+        self.apply_graph(graph)
 
-        self.config_path = config_path
-        self.config = self.load_config()
+        print(f"[StorybookManager] 초기화 완료: {len(self.graph.nodes)}개 스토리북 로드됨")
 
-        print(f"[StorybookManager] 초기화 완료: {len(self.config.get('storybooks', {}))}개 스토리북 로드됨")
+    @property
+    def snapshot(self) -> StorybookSnapshot:
+        """현재 그래프와 응답 캐시 (한 요청 안에서는 한 번만 읽어 사용)"""
+        return self._snapshot
+
+    @property
+    def graph(self) -> StorybookGraph:
+        return self._snapshot.graph
+
+    @property
+    def config(self) -> Mapping[str, object]:
+        return self._snapshot.graph.config
+
+    def apply_graph(self, graph: StorybookGraph):
+        """
+        새 그래프로 교체 (설정 파일이 바뀌었을 때 ConfigService가 호출)
+
+        응답 캐시까지 모두 만든 뒤 스냅샷 참조 하나만 바꾸므로, 진행 중인 요청은
+        교체 전 스냅샷을 계속 사용하고 다음 요청부터 새 스냅샷을 봅니다.
+        """
+        self._snapshot = StorybookSnapshot.build(graph, self.image_manifest)
+
+    def apply_image_manifest(self, manifest: ImageManifest):
+        """이미지 변환본이 다시 빌드되었을 때 현재 그래프의 응답을 새로 만듦"""
+        self.image_manifest = manifest
+        self.apply_graph(self._snapshot.graph)
 
     def load_config(self) -> dict:
         """
@@ -83,16 +178,82 @@ class StorybookManager:
         Raises:
             ValueError: 스토리북 ID가 존재하지 않을 경우
         """
-        storybooks = self.config.get('storybooks', {})
-
-        if storybook_id not in storybooks:
-            error_msg = f"스토리북 ID '{storybook_id}'가 존재하지 않습니다. 사용 가능한 ID: {list(storybooks.keys())}"
+        snapshot = self._snapshot
+        node = snapshot.graph.nodes.get(storybook_id)
+        if node is None:
+            error_msg = f"스토리북 ID '{storybook_id}'가 존재하지 않습니다. 사용 가능한 ID: {list(snapshot.graph.nodes)}"
             print(f"[ERROR] {error_msg}")
             raise ValueError(error_msg)
+        return snapshot.views[storybook_id]
+
+    def get_payload(self, storybook_id: str) -> StorybookPayload:
+        """
+        스토리북 HTTP 응답 캐시 (버전/ETag, 미리 압축한 본문)
+
+        Raises:
+            ValueError: 스토리북 ID가 존재하지 않을 경우
+        """
+        return self.get_response_cache(storybook_id)[0]
+
+    def get_response_cache(self, storybook_id: str) -> Tuple[StorybookPayload, Optional[str]]:
+        """
+        스토리북 HTTP 응답 캐시와 Link 헤더 (같은 스냅샷에서 함께 읽음)
+
+        Raises:
+            ValueError: 스토리북 ID가 존재하지 않을 경우
+        """
+        snapshot = self._snapshot
+        payload = snapshot.payloads.get(storybook_id)
+        if payload is None:
+            raise ValueError(f"스토리북 ID '{storybook_id}'가 존재하지 않습니다")
+        return payload, snapshot.prefetch_links.get(storybook_id)
+
+    def is_tournament_pending(self, game_state) -> bool:
+        """8월 채팅을 마치면 대회 타석 결과를 계산해야 하는지 여부 (삼진이면 다시 도전)"""
+        return (game_state.current_month == TOURNAMENT_MONTH
+                and game_state.flags.get('tournament_result') == 'strikeout')
+
+    def predict_next_storybooks(self, game_state) -> Tuple[str, ...]:
+        """
+        이 사용자가 다음에 보게 될 스토리북 후보
+
+        스토리북을 읽는 중이면 그 스토리북의 다음 후보,
+        채팅 중이면 월 진행 시 보여줄 스토리북 (8월 대회 전이면 타석 결과 3가지)
+        """
+        if game_state.current_phase == "storybook" and game_state.current_storybook_id:
+            return self.graph.successors.get(game_state.current_storybook_id, ())
+        if game_state.current_phase == "chat":
+            if self.is_tournament_pending(game_state):
+                return TOURNAMENT_RESULT_IDS
+            next_id = self.get_next_storybook_id(game_state)
+            return (next_id,) if next_id else ()
+        return ()
+
+    def prefetch_manifest(self, storybook_ids) -> list:
+        """
+        미리 받아둘 스토리북 목록 ([{"id", "url", "images"}, ...])
 
-        storybook = storybooks[storybook_id]
-        print(f"[StorybookManager] 스토리북 로드: {storybook_id} - {storybook.get('title', 'Unknown')}")
-        return storybook
+        url은 버전이 박힌 주소라 클라이언트가 받아두면 나중 요청이 브라우저 캐시에서 바로 나옵니다.
+        """
+        snapshot = self._snapshot
+        views, payloads = snapshot.views, snapshot.payloads
+        return [
+            prefetch_entry(storybook_id, views[storybook_id], payloads[storybook_id])
+            for storybook_id in storybook_ids
+            if storybook_id in views and storybook_id in payloads
+        ]
+
+    def get_completion_action(self, storybook_id: str) -> CompletionAction:
+        """
+        스토리북 완료 시 동작 (로드 시점에 정규화된 값)
+
+        Raises:
+            ValueError: 스토리북 ID가 존재하지 않을 경우
+        """
+        node = self.graph.nodes.get(storybook_id)
+        if node is None:
+            raise ValueError(f"스토리북 ID '{storybook_id}'가 존재하지 않습니다")
+        return node.completion
 
     def get_current_storybook(self, game_state) -> Optional[dict]:
         """
@@ -110,17 +271,16 @@ class StorybookManager:
         """
         # chat 모드이면 None 반환
         if game_state.current_phase == "chat":
-            print("[StorybookManager] 현재 채팅 모드입니다. 스토리북 없음.")
             return None
 
         # storybook 모드이고 current_storybook_id가 있으면 해당 스토리북 반환
         if game_state.current_phase == "storybook" and game_state.current_storybook_id:
-            try:
-                storybook = self.get_storybook(game_state.current_storybook_id)
-                return storybook
-            except ValueError:
+            snapshot = self._snapshot
+            node = snapshot.graph.nodes.get(game_state.current_storybook_id)
+            if node is None:
                 print(f"[WARNING] 유효하지 않은 스토리북 ID: {game_state.current_storybook_id}")
                 return None
+            return snapshot.views[node.id]
 
         # 그 외의 경우 None 반환
         return None
@@ -145,59 +305,27 @@ class StorybookManager:
         # 확인할 월 결정
         target_month = month if month is not None else game_state.current_month
 
-        # 월별 목표 가져오기
-        goals = self.get_month_goals(target_month)
-
-        if not goals:
-            print(f"[WARNING] {target_month}월의 목표가 없습니다.")
+        # 월별 목표 (없는 월은 로드 시점에 경고)
+        goals = self.graph.goals.get(target_month)
+        if goals is None or not goals.required:
             return (False, {
                 "achieved": {},
                 "current": {},
                 "required": {}
             })
 
-        # 현재 스탯 가져오기
-        current_stats = game_state.stats.to_dict()
-
-        # <<< 수정 시작: 오래된 stat_mapping 제거 >>>
-        # 이유: 이제 config 파일과 GameState의 스탯 이름이 일치하므로 매핑이 필요 없습니다.
-        # stat_mapping = {
-        #     'running': 'speed'
-        # }
-        # <<< 수정 끝 >>>
-
         # 각 목표 달성 여부 확인
-        achieved = {}
-        required = {}
-        current = {}
-
-        for stat_name, goal_value in goals.items():
-            # description 필드는 스킵
-            if stat_name == "description":
-                continue
-
-            # <<< 수정 시작: stat_mapping 로직 제거 >>>
-            current_value = current_stats.get(stat_name, 0)
-            # <<< 수정 끝 >>>
-            is_achieved = current_value >= goal_value
-
-            achieved[stat_name] = is_achieved
-            required[stat_name] = goal_value
-            current[stat_name] = current_value
-
-        # 모든 목표 달성 여부
-        all_achieved = all(achieved.values()) if achieved else False
+        current_stats = game_state.stats.as_mapping()
+        required = dict(goals.required)
+        current = {stat_name: current_stats.get(stat_name, 0) for stat_name in required}
+        achieved = {stat_name: current[stat_name] >= goal_value for stat_name, goal_value in required.items()}
 
         result = {
             "achieved": achieved,
             "current": current,
             "required": required
         }
-
-        print(f"[StorybookManager] {target_month}월 목표 확인: 달성 여부 = {all_achieved}")
-        print(f"[StorybookManager] 세부 사항: {result}")
-
-        return (all_achieved, result)
+        return (all(achieved.values()), result)
 
     def get_next_storybook_id(self, game_state) -> Optional[str]:
         """
@@ -216,34 +344,18 @@ class StorybookManager:
         """
         # chat 모드가 아니면 None 반환
         if game_state.current_phase != "chat":
-            print("[StorybookManager] 현재 채팅 모드가 아닙니다. 다음 스토리북 없음.")
             return None
 
         current_month = game_state.current_month
 
         # 9월이면 엔딩 결정 스토리북으로 이동
+        # ("9_ending"이 아닌 "9_opening"으로 해야 엔딩 결정 로직이 실행됨)
         if current_month == 9:
-            print("[StorybookManager] 9월 - 엔딩 스토리북으로 이동")
-            return "9_opening" # <<< 수정: "9_ending"이 아닌 "9_opening"으로 해야 엔딩 결정 로직이 실행됨
-
-        # 9월 이상이면 None (게임 종료)
-        if current_month >= 9:
-            print("[StorybookManager] 9월 이후 - 게임 종료")
-            return None
-
-        # 목표 달성 여부 확인 (디버깅 모드: 체크만 하고 항상 통과)
-        all_achieved, goal_info = self.check_goals_achieved(game_state)
+            return FINAL_STORYBOOK_ID
 
-        # 디버깅 모드: 목표 달성 여부와 상관없이 다음 월로 진행
-        next_month = current_month + 1
-        transition_id = f"{current_month}_to_{next_month}_transition"
-
-        if all_achieved:
-            print(f"[StorybookManager] 목표 달성! 전환 스토리북: {transition_id}")
-        else:
-            print(f"[StorybookManager] [디버깅 모드] 목표 미달성이지만 강제 진행: {transition_id}")
-
-        return transition_id
+        # 디버깅 모드: 목표 달성 여부와 상관없이 다음 월 전환 스토리북으로 진행
+        # (전환 스토리북은 로드 시점에 존재를 확인했으므로 조회만 함, 9월 이후면 None)
+        return self.graph.transitions.get(current_month)
 
     # <<< 수정 시작: 엔딩 결정 함수를 최신 기획(스탯 총합 + 대회 결과)에 맞게 전면 수정 >>>
     # 이유: 기존 로직은 오래된 스탯('power')과 잘못된 계산 방식(A/B/C 평균)을 사용하고 있어 치명적인 오류를 발생시킵니다.
@@ -251,47 +363,27 @@ class StorybookManager:
         """
         최종 엔딩 결정 (스탯 총합 + 8월 대회 결과 플래그)
         """
-        stats = game_state.stats
-        flags = game_state.flags
-
         # 1. 스탯 총합 계산 (친밀도, 멘탈 제외 4개 기술/신체 스탯, 최대 400점)
-        total_score = stats.batting + stats.speed + stats.defense + stats.stamina
-        
+        total_score = game_rules.ending_score(game_state.stats)
+
         # 2. 8월 대회 결과 가져오기 (이 플래그는 8월 이벤트에서 설정되어야 함)
         # 기본값은 '삼진(strikeout)'
-        tournament_result = flags.get('tournament_result', 'strikeout')
-
-        # 3. 스탯 총합에 따라 '스탯 범위' 결정
-        stat_range = 4 # 기본값은 최하위 범위
-        if total_score >= 320:   # 400점 만점에 320 이상 (S급 선수)
-            stat_range = 1
-        elif total_score >= 240: # 240 이상 (A급 선수)
-            stat_range = 2
-        elif total_score >= 150: # 150 이상 (B급 선수)
-            stat_range = 3
-        
-        # 4. 엔딩 매트릭스에 따라 엔딩 ID 결정
-        # 예: 범위 1 선수가 홈런을 치면 'A1' 엔딩
-        ending_map = {
-            1: {'homerun': 'A1', 'hit_steal': 'A2', 'hit': 'A3', 'strikeout': 'A4'},
-            2: {'homerun': 'B1', 'hit_steal': 'B2', 'hit': 'B3', 'strikeout': 'B4'},
-            3: {'homerun': 'C1', 'hit_steal': 'C2', 'hit': 'C3', 'strikeout': 'C4'},
-            4: {'homerun': 'D1', 'hit_steal': 'D2', 'hit': 'D3', 'strikeout': 'D4'}
-        }
-        
-        ending_id = ending_map.get(stat_range, {}).get(tournament_result, 'D4')
+        tournament_result = game_state.flags.get('tournament_result', game_rules.DEFAULT_TOURNAMENT_RESULT)
+
+        # 3~4. 스탯 범위와 대회 결과로 엔딩 매트릭스에서 엔딩 ID 결정 (기준은 game_rules)
+        range_ = game_rules.stat_range(total_score)
+        ending_id = game_rules.ending_id(range_, tournament_result)
 
         # 5. 스페셜 엔딩 (메이저리그) 처리: 범위 1 + 홈런일 경우 5% 확률
-        if ending_id == 'A1' and random.random() < 0.05:
-            ending_id = 'S' # Special Ending
+        if ending_id == game_rules.SPECIAL_ENDING_BASE_ID and random.random() < game_rules.SPECIAL_ENDING_PROB:
+            ending_id = game_rules.SPECIAL_ENDING_ID
 
-        # 6. 엔딩 데이터 가져오기
-        endings = self.config.get('endings', {})
-        ending_data = endings.get(ending_id, endings.get('D4')) # ID가 없으면 최하위 엔딩(D4)으로 처리
+        # 6. 엔딩 데이터 가져오기 (ID가 없으면 최하위 엔딩(D4)으로 처리)
+        endings = self._snapshot.ending_views
+        ending_data = endings.get(ending_id, endings[FALLBACK_ENDING_ID])
 
-        print(f"[엔딩 결정] 최종 스탯 총합: {total_score} (범위 {stat_range})")
-        print(f"[엔딩 결정] 대회 결과: {tournament_result}")
-        print(f"[엔딩 결정] 최종 엔딩 ID: {ending_id} - {ending_data.get('title')}")
+        print(f"[엔딩 결정] 스탯 총합 {total_score} (범위 {range_}), 대회 결과 {tournament_result} "
+              f"→ {ending_id} - {ending_data.get('title')}")
 
         return ending_data
     # <<< 수정 끝 >>>
@@ -306,15 +398,8 @@ class StorybookManager:
         Returns:
             dict: 목표 딕셔너리 (없으면 빈 딕셔너리)
         """
-        month_goals = self.config.get('month_goals', {})
-        goals = month_goals.get(str(month), {})
-
-        if goals:
-            print(f"[StorybookManager] {month}월 목표: {goals.get('description', 'N/A')}")
-        else:
-            print(f"[WARNING] {month}월의 목표가 설정되지 않았습니다.")
-
-        return goals
+        goals = self.graph.goals.get(month)
+        return goals.to_dict() if goals is not None else {}
 
 
 # ============================================================================
@@ -337,7 +422,27 @@ def get_storybook_manager() -> StorybookManager:
     """
     global _storybook_manager
     if _storybook_manager is None:
-        _storybook_manager = StorybookManager()
+        try:
+            service = get_config_service()
+        except (FileNotFoundError, ValueError) as e:
+            # chatbot_config.json을 못 읽으면 핫 리로드 없이 동작
+            print(f"[WARNING] 설정 감시를 사용할 수 없습니다 ({type(e).__name__}): {e}")
+            _storybook_manager = StorybookManager()
+            return _storybook_manager
+
+        # 파일이 바뀌면 감시 스레드에서 다시 컴파일하고, 검증을 통과한 그래프만 교체
+        graph = service.watch(
+            CONFIG_STORYBOOK, DEFAULT_CONFIG_PATH,
+            lambda config: compile_storybook_config(config, DEFAULT_CONFIG_PATH)
+        )
+        manager = StorybookManager(DEFAULT_CONFIG_PATH, graph=graph)
+        service.subscribe(CONFIG_STORYBOOK, manager.apply_graph)
+
+        # 이미지를 다시 빌드하면 재시작 없이 새 srcset 적용
+        if MANIFEST_PATH.is_file():
+            service.watch(CONFIG_IMAGE_MANIFEST, MANIFEST_PATH, lambda data: ImageManifest(data.get('images', {})))
+            service.subscribe(CONFIG_IMAGE_MANIFEST, manager.apply_image_manifest)
+        _storybook_manager = manager
     return _storybook_manager
 
 
@@ -350,7 +455,7 @@ if __name__ == "__main__":
     로컬 테스트용
 
     실행 방법:
-    python services/storybook_manager.py
+    python -m services.storybook_manager
     """
     # <<< 수정 시작: 테스트 코드를 최신 스탯 시스템과 엔딩 로직에 맞게 전면 수정 >>>
     print("=" * 60)
@@ -359,7 +464,7 @@ if __name__ == "__main__":
 
     # GameState 임포트 (테스트를 위해)
     try:
-        from game_state_manager import GameState
+        from .game_state_manager import GameState
     except ImportError:
         print("[ERROR] game_state_manager.py를 찾을 수 없어 테스트를 진행할 수 없습니다.")
         exit()
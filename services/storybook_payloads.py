@@ -0,0 +1,173 @@
+"""
+스토리북 응답 캐시 (HTTP 캐싱용 사전 직렬화)
+
+/api/storybook/<id>는 매 요청마다 같은 스토리북 JSON을 다시 직렬화했고,
+사용자별 스탯(current_stats)을 함께 넣어 브라우저/CDN이 캐시할 수 없었습니다.
+
+이 모듈은 그래프가 바뀔 때(시작, 설정 핫 리로드) 한 번만
+- 응답 본문(JSON bytes)을 만들고
+- 내용 해시로 버전/ETag를 정하고
+- gzip(과 brotli 패키지가 있으면 br)으로 미리 압축해 둡니다.
+요청 처리에서는 Accept-Encoding에 맞는 bytes를 고르기만 합니다.
+
+사용자별 값은 /api/storybook/<id>/overlay로 분리되어 있습니다.
+"""
+
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli  # 선택 사항: pip install Brotli
+except ImportError:
+    brotli = None
+
+
+# 이보다 작은 본문은 압축하지 않음 (헤더 오버헤드가 더 큼)
+MIN_COMPRESS_BYTES = 512
+
+
+@dataclass(frozen=True)
+class StorybookPayload:
+    """스토리북 하나의 직렬화/압축된 응답"""
+    version: str
+    body: bytes
+    gzip_body: Optional[bytes]
+    br_body: Optional[bytes]
+
+    @property
+    def etag(self) -> str:
+        """압축하지 않은 본문의 ETag"""
+        return self.etag_for(None)
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """
+        Content-Encoding별 강한 ETag (예: "<버전>-gzip")
+
+        같은 버전이라도 압축 방식마다 bytes가 다르므로 표현(representation)마다 다른 값을 씁니다.
+        """
+        return f'"{self.version}-{encoding}"' if encoding else f'"{self.version}"'
+
+    def encoded(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """
+        Accept-Encoding에 맞는 (본문, Content-Encoding) 반환
+
+        br > gzip > 압축 없음 순으로 선택합니다. (q 값은 0인 경우만 제외)
+        """
+        accepted = _accepted_encodings(accept_encoding)
+        if self.br_body is not None and 'br' in accepted:
+            return self.br_body, 'br'
+        if self.gzip_body is not None and 'gzip' in accepted:
+            return self.gzip_body, 'gzip'
+        return self.body, None
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """If-None-Match 헤더가 현재 버전을 가리키는지 여부"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        # 인코딩별 ETag("-gzip", "-br")와 프록시가 붙이는 약한 ETag(W/)도 같은 버전으로 취급
+        # (If-None-Match는 약한 비교: 버전이 같으면 캐시의 어떤 인코딩이든 아직 유효)
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag.strip('"').split('-')[0] == self.version:
+                return True
+        return False
+
+
+def build_payloads(storybooks: Dict[str, dict]) -> Dict[str, StorybookPayload]:
+    """
+    스토리북 ID → 응답 캐시
+
+    Args:
+        storybooks: 스토리북 ID → 스토리북 데이터 (StorybookGraph 노드의 data)
+    """
+    return {storybook_id: build_payload(data) for storybook_id, data in storybooks.items()}
+
+
+def build_payload(storybook: dict) -> StorybookPayload:
+    """스토리북 하나의 응답 생성 (버전은 내용의 SHA-256 앞 16자리)"""
+    canonical = json.dumps(storybook, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    version = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+    body = json.dumps(
+        {'success': True, 'version': version, 'storybook': storybook},
+        ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+    gzip_body = br_body = None
+    if len(body) >= MIN_COMPRESS_BYTES:
+        # mtime=0: 같은 내용이면 워커/배포가 달라도 같은 bytes
+        gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            br_body = brotli.compress(body, quality=11)
+    return StorybookPayload(version, body, gzip_body, br_body)
+
+
+def _accepted_encodings(accept_encoding: str) -> frozenset:
+    accepted = set()
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        params = params.replace(' ', '')
+        if coding and params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.strip().lower())
+    return frozenset(accepted)
+
+
+# ============================================================================
+# 다음 스토리북 미리 받기 (prefetch)
+# ============================================================================
+
+def storybook_url(storybook_id: str, payload: StorybookPayload) -> str:
+    """버전이 박힌 스토리북 URL (immutable 캐시 대상)"""
+    return f"/api/storybook/{storybook_id}?v={payload.version}"
+
+
+def image_urls(storybook: dict) -> list:
+    """
+    미리 받을 원본 이미지 URL (중복 제거, 순서 유지)
+
+    변환본(image_set)이 있는 페이지는 화면 크기에 따라 받을 파일이 달라지므로 제외합니다.
+    (클라이언트가 스토리북 JSON을 받은 뒤 표시할 때와 같은 srcset/sizes로 미리 받음)
+    """
+    urls = []
+    for page in storybook.get('pages', []):
+        image = page.get('image')
+        if image and not page.get('image_set'):
+            # 설정은 "./static/..." 형식 → Link 헤더에서는 절대 경로
+            url = image[1:] if image.startswith('./') else image
+            if url not in urls:
+                urls.append(url)
+    return urls
+
+
+def prefetch_entry(storybook_id: str, storybook: dict, payload: StorybookPayload) -> dict:
+    """prefetch 목록 항목 ({"id", "url", "images"})"""
+    return {
+        'id': storybook_id,
+        'url': storybook_url(storybook_id, payload),
+        'images': image_urls(storybook)
+    }
+
+
+def link_header(entries: list) -> str:
+    """
+    prefetch 목록을 Link 헤더 값으로 변환
+
+    다음 스토리북은 지금 화면이 아니라 다음 이동에서 쓰이므로 rel=prefetch를 사용합니다.
+    (rel=preload는 현재 화면용 최우선 요청이라, 몇 초 안에 쓰지 않으면 브라우저가 경고함)
+    """
+    links = []
+    seen = set()
+    for entry in entries:
+        links.append(f"<{entry['url']}>; rel=prefetch; as=fetch")
+        for url in entry['images']:
+            if url not in seen:
+                seen.add(url)
+                links.append(f"<{url}>; rel=prefetch; as=image")
+    return ", ".join(links)
@@ -18,6 +18,72 @@ FOCUS_LABELS = {
 }
 
 
+# 월별 훈련 횟수 제한 (회복 세션 포함 모든 세션에 적용)
+MAX_TRAININGS_PER_MONTH = {
+    3: 5, 4: 5, 5: 5,  # 초반: 5회
+    6: 4, 7: 4,         # 중반: 4회
+    8: 3, 9: 3          # 대회 준비: 3회
+}
+DEFAULT_MAX_TRAININGS = 3
+
+# 회복 세션이 아닌 훈련에 필요한 최소 체력
+MIN_TRAINING_STAMINA = 20
+# 단일 항목 집중 시 추가 상승(+1)을 받는 강도
+FOCUS_BONUS_INTENSITY = 90
+
+
+@dataclass(frozen=True)
+class IntensityTier:
+    """Balancing values for intensities up to ``max_intensity``."""
+
+    max_intensity: int
+    label: str
+    base_gain: int
+    stamina_change: int
+    is_recovery: bool = False
+
+
+INTENSITY_TIERS = (
+    IntensityTier(20, "Recovery Session", 0, 10, is_recovery=True),
+    IntensityTier(40, "Light Training", 2, 4),
+    IntensityTier(70, "Standard Training", 4, -6),
+    IntensityTier(85, "Focused Training", 6, -12),
+    IntensityTier(100, "High-Intensity Training", 8, -20),
+)
+
+
+def intensity_tier(intensity: int) -> IntensityTier:
+    """Return the tier that applies to a 0-100 intensity."""
+    for tier in INTENSITY_TIERS:
+        if intensity <= tier.max_intensity:
+            return tier
+    return INTENSITY_TIERS[-1]
+
+
+def max_trainings(month: int) -> int:
+    """Number of sessions (recovery included) allowed in ``month``."""
+    return MAX_TRAININGS_PER_MONTH.get(month, DEFAULT_MAX_TRAININGS)
+
+
+def stat_gain(base_gain: int, focus_count: int, intensity: int) -> int:
+    """
+    Derive the stat gain for each focused area.
+    """
+    if base_gain <= 0 or focus_count <= 0:
+        return 0
+
+    gain = base_gain
+    if focus_count > 1:
+        gain = max(1, gain - 1)
+    if focus_count > 2:
+        gain = max(1, gain - 1)
+
+    if intensity >= FOCUS_BONUS_INTENSITY and focus_count == 1:
+        gain += 1
+
+    return gain
+
+
 @dataclass
 class TrainingOutcome:
     """Structured response for a training session."""
@@ -57,13 +123,7 @@ class TrainingManager:
         if month not in TRAINABLE_MONTHS:
             raise ValueError("Training is only available in April, June, and July.")
 
-        # 월별 훈련 횟수 제한 (회복 세션 포함 모든 세션에 적용)
-        max_trainings = {
-            3: 5, 4: 5, 5: 5,  # 초반: 5회
-            6: 4, 7: 4,         # 중반: 4회
-            8: 3, 9: 3          # 대회 준비: 3회
-        }
-        max_count = max_trainings.get(month, 3)
+        max_count = max_trainings(month)
         if game_state.training_count_this_month >= max_count:
             raise ValueError(f"이번 달 훈련 횟수를 초과했습니다. (최대 {max_count}회)")
 
@@ -72,37 +132,15 @@ class TrainingManager:
         focus_count = len(focus_list)
 
         # Determine training tier based on intensity.
-        if intensity <= 20:
-            intensity_label = "Recovery Session"
-            base_gain = 0
-            stamina_change = 10
-            is_recovery_session = True
-        elif intensity <= 40:
-            intensity_label = "Light Training"
-            base_gain = 2
-            stamina_change = 4
-            is_recovery_session = False
-        elif intensity <= 70:
-            intensity_label = "Standard Training"
-            base_gain = 4
-            stamina_change = -6
-            is_recovery_session = False
-        elif intensity <= 85:
-            intensity_label = "Focused Training"
-            base_gain = 6
-            stamina_change = -12
-            is_recovery_session = False
-        else:
-            intensity_label = "High-Intensity Training"
-            base_gain = 8
-            stamina_change = -20
-            is_recovery_session = False
+        tier = intensity_tier(intensity)
+        intensity_label = tier.label
+        stamina_change = tier.stamina_change
 
         # 체력 검증 (회복 세션은 체력과 무관하게 가능)
-        if not is_recovery_session and game_state.stats.stamina < 20:
+        if not tier.is_recovery and game_state.stats.stamina < MIN_TRAINING_STAMINA:
             raise ValueError("체력이 너무 낮습니다. 회복 세션(강도 20 이하)을 이용하세요.")
 
-        per_stat_gain = self._calculate_stat_gain(base_gain, focus_count, intensity)
+        per_stat_gain = stat_gain(tier.base_gain, focus_count, intensity)
 
         stat_changes: Dict[str, int] = {}
         if per_stat_gain > 0:
@@ -160,6 +198,66 @@ class TrainingManager:
             conversation_note=conversation_note,
         )
 
+    def validate_plan(self, *, game_state, sessions: Sequence[dict]) -> None:
+        """
+        Check an ordered list of sessions against the month's rules without
+        touching ``game_state``.
+
+        Stamina is carried from one step to the next (with the same 0-100
+        clamping as ``apply_changes``), so a plan is only accepted when every
+        step would succeed when executed in order.
+
+        Raises:
+            ValueError: with the failing step number when any session would be
+                rejected or has a non-numeric intensity.
+        """
+        month = game_state.current_month
+        if month not in TRAINABLE_MONTHS:
+            raise ValueError("Training is only available in April, June, and July.")
+        if not sessions:
+            raise ValueError("훈련 계획이 비어 있습니다.")
+
+        max_count = max_trainings(month)
+        remaining = max_count - game_state.training_count_this_month
+        if len(sessions) > remaining:
+            raise ValueError(
+                f"이번 달 훈련 횟수를 초과했습니다. (최대 {max_count}회, 남은 횟수 {max(remaining, 0)}회)"
+            )
+
+        stamina = game_state.stats.stamina
+        for step, session in enumerate(sessions, start=1):
+            try:
+                intensity = int(session.get("intensity", 50))
+            except (TypeError, ValueError, OverflowError):
+                raise ValueError(f"{step}번째 훈련: 훈련 강도가 올바르지 않습니다.") from None
+            tier = intensity_tier(max(0, min(100, intensity)))
+            if not tier.is_recovery and stamina < MIN_TRAINING_STAMINA:
+                raise ValueError(
+                    f"{step}번째 훈련: 체력이 너무 낮습니다. 회복 세션(강도 20 이하)을 이용하세요."
+                )
+            stamina = max(0, min(100, stamina + tier.stamina_change))
+
+    def execute_plan(self, *, game_state, sessions: Sequence[dict]) -> List[TrainingOutcome]:
+        """
+        Validate and run a month's sessions in order.
+
+        Nothing is applied unless the whole plan passes ``validate_plan``, so
+        the caller can hold one lock and persist once for the batch.
+
+        Args:
+            game_state: GameState instance (mutated in place).
+            sessions: ordered ``{"intensity": int, "focuses": [...]}`` mappings.
+        """
+        self.validate_plan(game_state=game_state, sessions=sessions)
+        return [
+            self.execute(
+                game_state=game_state,
+                intensity=session.get("intensity", 50),
+                focuses=session.get("focuses", []),
+            )
+            for session in sessions
+        ]
+
     @staticmethod
     def _normalise_focuses(focuses: Sequence[str]) -> List[str]:
         cleaned = []
@@ -172,25 +270,6 @@ class TrainingManager:
             return list(VALID_FOCUSES)
         return cleaned
 
-    @staticmethod
-    def _calculate_stat_gain(base_gain: int, focus_count: int, intensity: int) -> int:
-        """
-        Derive the stat gain for each focused area.
-        """
-        if base_gain <= 0 or focus_count <= 0:
-            return 0
-
-        gain = base_gain
-        if focus_count > 1:
-            gain = max(1, gain - 1)
-        if focus_count > 2:
-            gain = max(1, gain - 1)
-
-        if intensity >= 90 and focus_count == 1:
-            gain += 1
-
-        return gain
-
 
 _training_manager: TrainingManager | None = None
 
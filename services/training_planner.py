@@ -0,0 +1,665 @@
+"""
+훈련 계획 최적화 (오프라인 DP + 사전 계산 표)
+
+TrainingManager의 규칙(강도 구간별 상승량/체력 변화, 월별 횟수 제한, 체력 20 미만 제한)과
+월별 체력 회복은 모두 결정적이므로, 4/6/7월 훈련 세션(슬롯)을 단계로 하는 DP로
+목표 엔딩에 도달할 확률이 가장 높은 계획을 미리 계산할 수 있습니다.
+
+상태: (체력, 주루, 타격+수비)
+- 엔딩 점수는 타격+수비+주루+체력 합계이고 도루 확률에만 주루가 따로 쓰이므로
+  타격/수비는 합계 하나로 다룹니다. (단일 집중은 둘 중 낮은 쪽에 적용, 한쪽만 100에 닿는 경우는 근사)
+- 훈련과 월별 회복 외에는 체력/기술 스탯이 바뀌지 않으므로(채팅은 친밀도/멘탈만 변경)
+  시작 상태에서 도달 가능한 상태만 앞으로 전개합니다. (슬롯당 많아야 수십만 개)
+행동: 쉬기 또는 강도 구간(대표값) × 집중 조합 (주루 / 타격·수비 1~2개)
+목표: 9월 엔딩 점수의 스탯 범위 × 8월 대회 결과 확률 (game_rules)
+- 조언 점수, 멘탈, 친밀도, 도루 공포증 극복 여부는 훈련으로 바꿀 수 없으므로 가정값 사용
+
+빌드하면 기본 스탯에서 출발해
+- 슬롯마다 (상태 → 목표 엔딩별 최선의 행동) 표와
+- 목표 엔딩별 파레토 전선 (훈련 세션 수 ↔ 도달 확률)
+을 static/data/training_plans.npz에 저장합니다.
+/api/training/plan은 표를 따라가기만 하므로 밀리초 단위로 응답합니다.
+(표에 없는 상태면 가장 가까운 표 상태의 계획을 사용, 그런 상태도 없으면 현재 상태에서 작은 DP를 직접 계산,
+ 규칙 파일이 바뀌었으면 다시 빌드해야 함)
+
+실행 방법:
+    python -m services.training_planner build [--advice 6] [--mental 50] [--intimacy 30] [--overcome]
+    python -m services.training_planner show [엔딩 ID ...]
+"""
+
+import hashlib
+import io
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import game_rules
+from .ending_simulator import apply_rule
+from .game_state_manager import STAT_DEFAULTS, STAT_NAMES
+from .state_codec import atomic_write
+from .storybook_graph import FINAL_MONTH, FIRST_MONTH, TOURNAMENT_MONTH
+from .training_manager import (
+    INTENSITY_TIERS, MIN_TRAINING_STAMINA, TRAINABLE_MONTHS, VALID_FOCUSES,
+    intensity_tier, max_trainings, stat_gain
+)
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+TABLES_PATH = BASE_DIR / "static" / "data" / "training_plans.npz"
+
+# 표를 만든 규칙 (내용이 바뀌면 표를 다시 빌드해야 함)
+RULE_SOURCES = (
+    Path(__file__).resolve().parent / "game_rules.py",
+    Path(__file__).resolve().parent / "training_manager.py",
+)
+
+# 훈련으로 바꿀 수 없는 값의 가정 (대회 타석/도루 확률 계산용)
+DEFAULT_ASSUMPTIONS = {
+    'advice_total': 6,  # 조언 점수 합계 (3~9, 4~6이면 멘탈 계수 1.0)
+    'mental': 50,
+    'intimacy': 30,
+    'steal_phobia_overcome': False,
+}
+
+# 표로 처리할 수 없는 상태에서 직접 계산할 때의 한도 (한 슬롯의 상태 수, 넘으면 포기)
+# 체력이 낮을수록 전개되는 상태가 적으므로 6월 이후 저체력 상태는 대개 0.5초 안에 끝남
+LIVE_SOLVE_MAX_STATES = 50_000
+LIVE_SOLVE_CACHE_SIZE = 32
+
+# 훈련 슬롯 (월, 그 달의 몇 번째 세션)
+SLOTS = tuple((month, slot) for month in sorted(TRAINABLE_MONTHS) for slot in range(max_trainings(month)))
+TERMINAL_LAYER = len(SLOTS)
+
+# 상태 열: 체력, 주루, 타격+수비
+_STAMINA, _SPEED, _OTHER = 0, 1, 2
+_STATE_MAX = np.array([100, 100, 200])
+_OTHER_STATS = ('batting', 'defense')
+
+
+@dataclass(frozen=True)
+class PlanAction:
+    """계획의 한 슬롯"""
+    intensity: Optional[int]  # None이면 쉬기 (세션을 쓰지 않음)
+    speed: int = 0            # 주루 집중 여부 (0/1)
+    other: int = 0            # 타격/수비 중 집중 항목 수 (0~2)
+
+    @property
+    def tier(self):
+        return intensity_tier(self.intensity) if self.intensity is not None else None
+
+    def gain(self) -> int:
+        """집중 항목 하나당 상승량"""
+        tier = self.tier
+        return stat_gain(tier.base_gain, self.speed + self.other, self.intensity) if tier else 0
+
+    def delta(self) -> Tuple[int, int, int]:
+        """(체력, 주루, 타격+수비) 변화"""
+        if self.tier is None:
+            return (0, 0, 0)
+        return (self.tier.stamina_change, self.speed * self.gain(), self.other * self.gain())
+
+    def focuses(self, batting: int, defense: int) -> List[str]:
+        """훈련 요청에 쓸 집중 항목 (타격/수비 하나면 낮은 쪽)"""
+        if self.tier is not None and self.tier.is_recovery:
+            return sorted(VALID_FOCUSES)
+        focuses = ['speed'] if self.speed else []
+        if self.other == 2:
+            focuses += list(_OTHER_STATS)
+        elif self.other == 1:
+            focuses.append('batting' if batting <= defense else 'defense')
+        return focuses
+
+
+def _build_actions() -> Tuple[PlanAction, ...]:
+    # 같은 구간이면 체력 변화가 같으므로 상승량이 가장 큰 값(구간 상한)만 고려
+    # 쉬기가 0번: 확률이 같으면 세션을 덜 쓰는 계획을 고름
+    actions = [PlanAction(None)]
+    for tier in INTENSITY_TIERS:
+        if tier.is_recovery:
+            actions.append(PlanAction(tier.max_intensity))
+            continue
+        for speed, other in ((1, 0), (0, 1), (0, 2), (1, 1), (1, 2)):
+            actions.append(PlanAction(tier.max_intensity, speed, other))
+    return tuple(actions)
+
+
+ACTIONS = _build_actions()
+_DELTAS = np.array([action.delta() for action in ACTIONS], dtype=np.int16)
+# 체력이 MIN_TRAINING_STAMINA 미만이면 거절되는 행동 (쉬기/회복 세션 제외)
+_GATED = np.array([action.tier is not None and not action.tier.is_recovery for action in ACTIONS])
+_USES_SESSION = np.array([action.intensity is not None for action in ACTIONS], dtype=np.int16)
+
+
+def rules_digest() -> str:
+    """규칙 파일 내용 해시"""
+    digest = hashlib.sha256()
+    for path in RULE_SOURCES:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _keys(states: np.ndarray) -> np.ndarray:
+    return (states[:, _STAMINA].astype(np.int32) * 101 + states[:, _SPEED]) * 201 + states[:, _OTHER]
+
+
+def _recover(stamina, from_month: int, to_month: int):
+    """from_month 다음 달부터 to_month까지 새 달마다 체력 회복 (app.py 월 진행과 같은 순서/상한)"""
+    for month in range(from_month + 1, to_month + 1):
+        stamina = np.minimum(stamina + game_rules.monthly_stamina_recovery(month), 100)
+    return stamina
+
+
+def _expand(states: np.ndarray, layer: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    layer 슬롯에서 모든 행동 적용
+
+    Returns:
+        (다음 슬롯 상태 (n, 행동 수, 3), 허용 여부 (n, 행동 수))
+    """
+    children = np.clip(states[:, None, :] + _DELTAS[None], 0, _STATE_MAX).astype(np.int16)
+    allowed = ~(_GATED[None, :] & (states[:, _STAMINA:_STAMINA + 1] < MIN_TRAINING_STAMINA))
+    month = SLOTS[layer][0]
+    if layer + 1 < TERMINAL_LAYER and SLOTS[layer + 1][0] != month:
+        children[..., _STAMINA] = _recover(children[..., _STAMINA], month, SLOTS[layer + 1][0])
+    return children, allowed
+
+
+def _outcome(terminal: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """마지막 훈련 이후 상태 → (대회 때 체력, 엔딩 점수)"""
+    stamina_tournament = _recover(terminal[:, _STAMINA].astype(np.int32), SLOTS[-1][0], TOURNAMENT_MONTH)
+    stamina_final = _recover(stamina_tournament, TOURNAMENT_MONTH, FINAL_MONTH)
+    score = terminal[:, _SPEED].astype(np.int32) + terminal[:, _OTHER] + stamina_final
+    return stamina_tournament, score
+
+
+def _objective(terminal: np.ndarray, assumptions: dict) -> np.ndarray:
+    """마지막 훈련 이후 상태 → 엔딩별 도달 확률 (n, len(ENDING_IDS))"""
+    stamina_tournament, score = _outcome(terminal)
+    ranges = apply_rule(game_rules.stat_range, score)
+
+    advice_total = int(assumptions['advice_total'])
+    at_bat = apply_rule(
+        lambda stamina: tuple(
+            game_rules.at_bat_probabilities(advice_total, stamina)[2][name]
+            for name in ("homerun", "hit", "strikeout")
+        ),
+        stamina_tournament
+    ) / 100.0
+    steal = apply_rule(
+        lambda speed: game_rules.steal_success_probability(
+            speed, int(assumptions['mental']), int(assumptions['intimacy']),
+            bool(assumptions['steal_phobia_overcome'])
+        ),
+        terminal[:, _SPEED]
+    ) / 100.0
+    result_probs = {
+        'homerun': at_bat[:, 0],
+        'hit_steal': at_bat[:, 1] * steal,
+        'hit': at_bat[:, 1] * (1 - steal),
+        'strikeout': at_bat[:, 2],
+    }
+
+    special = game_rules.ENDING_IDS.index(game_rules.SPECIAL_ENDING_ID)
+    values = np.zeros((len(terminal), len(game_rules.ENDING_IDS)), dtype=np.float32)
+    for range_ in range(1, game_rules.LOWEST_STAT_RANGE + 1):
+        in_range = ranges == range_
+        for result, probability in result_probs.items():
+            ending = game_rules.ending_id(range_, result)
+            probability = np.where(in_range, probability, 0.0)
+            if ending == game_rules.SPECIAL_ENDING_BASE_ID:
+                values[:, special] += probability * game_rules.SPECIAL_ENDING_PROB
+                probability = probability * (1 - game_rules.SPECIAL_ENDING_PROB)
+            values[:, game_rules.ENDING_IDS.index(ending)] += probability
+    return values
+
+
+class TrainingPlanner:
+    """
+    훈련 계획 표 (슬롯별 도달 가능 상태 + 목표 엔딩별 최선의 행동)
+
+    states[layer]는 _keys 순으로 정렬된 상태 배열, policies[layer][i, 엔딩]은 ACTIONS 인덱스입니다.
+    start_layer 이전 슬롯은 None입니다.
+    """
+
+    def __init__(self, start_layer: int, states: list, policies: list, assumptions: dict,
+                 fronts: Optional[dict] = None, digest: str = ""):
+        self.start_layer = start_layer
+        self.states = states
+        self.policies = policies
+        self.keys = [None if layer_states is None else _keys(layer_states) for layer_states in states]
+        self.assumptions = assumptions
+        self.fronts = fronts or {}
+        self.digest = digest
+        # 직접 계산한 계획 ((슬롯, 상태) → TrainingPlanner, 한도를 넘었으면 None)
+        self._live_plans: 'OrderedDict[tuple, Optional[TrainingPlanner]]' = OrderedDict()
+        self._live_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 계산
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def solve(cls, start: Tuple[int, int, int], start_layer: int = 0,
+              assumptions: Optional[dict] = None, with_fronts: bool = False,
+              max_states: Optional[int] = None) -> Optional['TrainingPlanner']:
+        """
+        start 상태(start_layer 슬롯 직전)에서 DP 계산
+
+        Args:
+            start: (체력, 주루, 타격+수비)
+            with_fronts: 목표 엔딩별 파레토 전선도 계산 (빌드용)
+            max_states: 한 슬롯의 상태 수가 이를 넘으면 중단하고 None 반환 (요청 처리 중 계산용)
+        """
+        assumptions = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+        size = TERMINAL_LAYER + 1
+        states: list = [None] * size
+        sessions: list = [None] * size
+        parents: list = [None] * size
+        parent_actions: list = [None] * size
+        states[start_layer] = np.minimum(np.array([start], dtype=np.int16), _STATE_MAX).astype(np.int16)
+        sessions[start_layer] = np.zeros(1, dtype=np.int16)
+
+        # 1. 앞으로 전개: 같은 상태에 도달하는 경로 중 세션을 가장 적게 쓴 경로만 남김
+        for layer in range(start_layer, TERMINAL_LAYER):
+            children, allowed = _expand(states[layer], layer)
+            rows, actions = np.nonzero(allowed)
+            candidates = children[rows, actions]
+            candidate_sessions = sessions[layer][rows] + _USES_SESSION[actions]
+            keys = _keys(candidates)
+            order = np.lexsort((candidate_sessions, keys))
+            sorted_keys = keys[order]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+            pick = order[first]
+            states[layer + 1] = candidates[pick]
+            sessions[layer + 1] = candidate_sessions[pick]
+            parents[layer + 1] = rows[pick]
+            parent_actions[layer + 1] = actions[pick]
+            if max_states is not None and len(pick) > max_states:
+                return None
+
+        planner = cls(start_layer, states, [None] * TERMINAL_LAYER, assumptions, digest=rules_digest())
+        terminal_values = _objective(states[TERMINAL_LAYER], assumptions)
+
+        # 2. 뒤로 계산: 목표 엔딩별로 도달 확률이 가장 높은 행동
+        values = terminal_values
+        for layer in reversed(range(start_layer, TERMINAL_LAYER)):
+            children, allowed = _expand(states[layer], layer)
+            next_keys = planner.keys[layer + 1]
+            best = np.full((len(states[layer]), values.shape[1]), -1.0, dtype=np.float32)
+            policy = np.zeros(best.shape, dtype=np.int8)
+            for action in range(len(ACTIONS)):
+                index = np.minimum(np.searchsorted(next_keys, _keys(children[:, action])), len(next_keys) - 1)
+                candidate = np.where(allowed[:, action, None], values[index], -1.0)
+                better = candidate > best
+                best = np.where(better, candidate, best)
+                policy[better] = action
+            planner.policies[layer] = policy
+            values = best
+
+        if with_fronts:
+            planner.fronts = planner._pareto_fronts(terminal_values, sessions, parents, parent_actions)
+
+        # 전개용 중간 값은 버리고 표만 남김 (마지막 슬롯 이후 상태는 조회에 쓰지 않음)
+        planner.states[TERMINAL_LAYER] = planner.keys[TERMINAL_LAYER] = None
+        return planner
+
+    def _pareto_fronts(self, terminal_values, sessions, parents, parent_actions) -> Dict[str, list]:
+        """목표 엔딩별 (세션 수, 확률) 파레토 전선: 세션을 더 쓸 때 확률이 올라가는 지점만"""
+        terminal_sessions = sessions[TERMINAL_LAYER]
+        start = self.states[self.start_layer][0]
+        fronts = {}
+        for column, ending in enumerate(game_rules.ENDING_IDS):
+            front = []
+            best = 0.0
+            for count in range(int(terminal_sessions.max()) + 1):
+                candidates = np.flatnonzero(terminal_sessions == count)
+                if len(candidates) == 0:
+                    continue
+                index = candidates[np.argmax(terminal_values[candidates, column])]
+                probability = float(terminal_values[index, column])
+                if probability <= best + 1e-9:
+                    continue
+                best = probability
+                path = []
+                for layer in range(TERMINAL_LAYER, self.start_layer, -1):
+                    path.append((layer - 1, int(parent_actions[layer][index])))
+                    index = parents[layer][index]
+                path.reverse()
+                terminal = self._walk(start, path)
+                front.append(self._describe(start, path, terminal, column))
+            fronts[ending] = front
+        return fronts
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+
+    def index_of(self, layer: int, state: Tuple[int, int, int]) -> Optional[int]:
+        """표에서 상태 위치 (없으면 None)"""
+        keys = self.keys[layer] if layer < len(self.keys) else None
+        if keys is None:
+            return None
+        key = _keys(np.array([state]))[0]
+        index = int(np.searchsorted(keys, key))
+        return index if index < len(keys) and keys[index] == key else None
+
+    def nearest_index(self, layer: int, state: Tuple[int, int, int]) -> Optional[int]:
+        """
+        표에서 state와 가장 가까운 상태 위치 (후보가 없으면 None)
+
+        체력이 state 이하인 상태만 고릅니다. 체력 변화는 행동에만 달려 있고 시작 체력에 대해
+        단조이므로, 그 상태의 계획은 state에서 실행해도 체력 제한에 걸리지 않습니다.
+        """
+        states = self.states[layer] if layer < len(self.states) else None
+        if states is None:
+            return None
+        stamina, speed, other = (int(value) for value in state)
+        candidates = np.flatnonzero(states[:, _STAMINA] <= stamina)
+        if len(candidates) == 0:
+            return None
+        rows = states[candidates].astype(np.int32)
+        distance = (stamina - rows[:, _STAMINA]) + np.abs(rows[:, _SPEED] - speed) + np.abs(rows[:, _OTHER] - other)
+        return int(candidates[np.argmin(distance)])
+
+    def live_planner(self, layer: int, state: Tuple[int, int, int]) -> Optional['TrainingPlanner']:
+        """
+        표로 처리할 수 없는 상태에서 직접 계산한 계획 (LIVE_SOLVE_MAX_STATES를 넘으면 None)
+
+        결과는 (슬롯, 상태)별로 LIVE_SOLVE_CACHE_SIZE개까지 보관합니다. (한도 초과도 보관해 다시 시도하지 않음)
+        """
+        key = (layer, tuple(int(value) for value in state))
+        with self._live_lock:
+            if key in self._live_plans:
+                self._live_plans.move_to_end(key)
+                return self._live_plans[key]
+        planner = TrainingPlanner.solve(key[1], layer, self.assumptions, max_states=LIVE_SOLVE_MAX_STATES)
+        with self._live_lock:
+            self._live_plans[key] = planner
+            self._live_plans.move_to_end(key)
+            while len(self._live_plans) > LIVE_SOLVE_CACHE_SIZE:
+                self._live_plans.popitem(last=False)
+        return planner
+
+    def best_path(self, layer: int, state: Tuple[int, int, int], ending: str) -> Optional[List[Tuple[int, int]]]:
+        """state에서 목표 엔딩까지 표를 따라간 [(슬롯, 행동 인덱스), ...] (표에 없는 상태면 None)"""
+        column = game_rules.ENDING_IDS.index(ending)
+        index = self.index_of(layer, state)
+        if index is None:
+            return None
+        return self._follow(layer, index, column)
+
+    def _follow(self, layer: int, index: int, column: int) -> List[Tuple[int, int]]:
+        """표의 layer 슬롯 index 상태에서 정책을 따라간 경로"""
+        path = []
+        current = self.states[layer][index:index + 1]
+        for step in range(layer, TERMINAL_LAYER):
+            action = int(self.policies[step][index, column])
+            path.append((step, action))
+            current = _expand(current, step)[0][:, action]
+            if step + 1 < TERMINAL_LAYER:
+                index = int(np.searchsorted(self.keys[step + 1], _keys(current)[0]))
+        return path
+
+    def _walk(self, state, path) -> np.ndarray:
+        current = np.array([state], dtype=np.int16)
+        for layer, action in path:
+            current = _expand(current, layer)[0][:, action]
+        return current
+
+    def _describe(self, state, path, terminal, column: int, batting: Optional[int] = None,
+                  defense: Optional[int] = None) -> dict:
+        """경로 → 응답용 계획 ({"sessions", "probability", "plan", "expected"})"""
+        if batting is None or defense is None:
+            # 타격/수비 합계만 알 때는 기본 스탯 비율대로 나눔 (집중 항목 선택용)
+            default_batting = STAT_DEFAULTS[STAT_NAMES.index('batting')]
+            default_defense = STAT_DEFAULTS[STAT_NAMES.index('defense')]
+            batting = round(int(state[_OTHER]) * default_batting / (default_batting + default_defense))
+            defense = int(state[_OTHER]) - batting
+
+        plan = []
+        for layer, action_index in path:
+            action = ACTIONS[action_index]
+            if action.intensity is None:
+                continue
+            focuses = action.focuses(batting, defense)
+            if 'batting' in focuses and action.other:
+                batting = min(100, batting + action.gain())
+            if 'defense' in focuses and action.other:
+                defense = min(100, defense + action.gain())
+            plan.append({
+                'month': SLOTS[layer][0],
+                'intensity': action.intensity,
+                'intensity_label': action.tier.label,
+                'focuses': focuses,
+            })
+
+        stamina_tournament, score = _outcome(terminal)
+        probability = float(_objective(terminal, self.assumptions)[0, column])
+        return {
+            'sessions': len(plan),
+            'probability': round(probability, 4),
+            'plan': plan if probability > 0 else [],
+            'expected': {
+                'ending_score': int(score[0]),
+                'stamina_at_tournament': int(stamina_tournament[0]),
+            },
+        }
+
+    def advise(self, game_state, ending: str) -> dict:
+        """
+        현재 게임 상태에서 목표 엔딩까지의 남은 훈련 계획
+
+        Returns:
+            {"target", "probability", "sessions", "plan": [{"month", "intensity", "intensity_label", "focuses"}],
+             "expected": {...}, "precomputed": 표에 그대로 있는 상태인지, "assumptions"}
+            표에 없는 상태면 가장 가까운 상태의 계획을 현재 상태에서 실행한 결과
+            가까운 표 상태도 없으면 (표보다 체력이 낮은 경우) 현재 상태에서 한도 안의 DP를 직접 계산한 결과
+            남은 훈련이 없거나 직접 계산도 한도를 넘으면 probability는 None, plan은 빈 목록
+
+        Raises:
+            ValueError: 알 수 없는 엔딩 ID
+        """
+        if ending not in game_rules.ENDING_IDS:
+            raise ValueError(f"알 수 없는 엔딩 '{ending}'")
+
+        position = plan_position(game_state)
+        if position is None:
+            return {'target': ending, 'sessions': 0, 'probability': None, 'plan': [],
+                    'message': '남은 훈련이 없습니다', 'assumptions': self.assumptions}
+
+        layer, state = position
+        column = game_rules.ENDING_IDS.index(ending)
+        planner = self
+        index = self.index_of(layer, state)
+        precomputed = index is not None
+        if index is None:
+            # 표에 없는 상태 (기본 스탯에서 출발하지 않은 저장 데이터 등): 가장 가까운 상태의 계획
+            index = self.nearest_index(layer, state)
+        if index is None:
+            # 표의 모든 상태보다 체력이 낮음: 현재 상태에서 직접 계산 (시작 상태가 0번)
+            planner, index = self.live_planner(layer, state), 0
+            if planner is None:
+                return {'target': ending, 'sessions': 0, 'probability': None, 'plan': [],
+                        'message': '이 상태에 맞는 계획이 없습니다', 'precomputed': False,
+                        'assumptions': self.assumptions}
+
+        path = planner._follow(layer, index, column)
+        terminal = self._walk(state, path)
+        result = self._describe(state, path, terminal, column,
+                                game_state.stats.batting, game_state.stats.defense)
+        return {
+            'target': ending,
+            **result,
+            'precomputed': precomputed,
+            'assumptions': self.assumptions,
+        }
+
+    # ------------------------------------------------------------------
+    # 저장 / 로드
+    # ------------------------------------------------------------------
+
+    def save(self, path: Path = TABLES_PATH):
+        arrays = {}
+        for layer in range(self.start_layer, TERMINAL_LAYER):
+            arrays[f'states_{layer}'] = self.states[layer]
+            arrays[f'policy_{layer}'] = self.policies[layer]
+        meta = {
+            'start_layer': self.start_layer,
+            'assumptions': self.assumptions,
+            'fronts': self.fronts,
+            'digest': self.digest,
+            'endings': list(game_rules.ENDING_IDS),
+        }
+        arrays['meta'] = np.frombuffer(json.dumps(meta, ensure_ascii=False).encode('utf-8'), dtype=np.uint8)
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, buffer.getvalue())
+
+    @classmethod
+    def load(cls, path: Path = TABLES_PATH) -> 'TrainingPlanner':
+        """
+        저장된 표 로드
+
+        Raises:
+            FileNotFoundError: 표가 없음
+            ValueError: 엔딩 목록이 현재 규칙과 다름 (다시 빌드 필요)
+        """
+        with np.load(path) as data:
+            meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+            if meta.get('endings') != list(game_rules.ENDING_IDS):
+                raise ValueError("엔딩 목록이 현재 규칙과 다릅니다")
+            start_layer = meta['start_layer']
+            states: list = [None] * (TERMINAL_LAYER + 1)
+            policies: list = [None] * TERMINAL_LAYER
+            for layer in range(start_layer, TERMINAL_LAYER):
+                states[layer] = data[f'states_{layer}']
+                policies[layer] = data[f'policy_{layer}']
+        planner = cls(start_layer, states, policies, meta['assumptions'], meta.get('fronts'), meta.get('digest', ''))
+        if planner.digest != rules_digest():
+            print("[TrainingPlanner] 규칙 파일이 표를 만든 뒤 바뀌었습니다. "
+                  "python -m services.training_planner build로 다시 만드세요")
+        return planner
+
+
+def plan_position(game_state) -> Optional[Tuple[int, Tuple[int, int, int]]]:
+    """
+    게임 상태 → (다음 훈련 슬롯, 그 슬롯 직전 상태)
+
+    이번 달 훈련을 다 썼거나 훈련이 없는 달이면 다음 훈련 달(월별 체력 회복 반영)의 첫 슬롯.
+    남은 훈련이 없으면 None
+    """
+    month = game_state.current_month
+    done = game_state.training_count_this_month
+    stats = game_state.stats
+    for layer, (slot_month, slot) in enumerate(SLOTS):
+        if slot_month < month or (slot_month == month and slot < done):
+            continue
+        stamina = int(_recover(np.int32(stats.stamina), max(month, FIRST_MONTH), slot_month))
+        return layer, (stamina, stats.speed, min(200, stats.batting + stats.defense))
+    return None
+
+
+def default_start() -> Tuple[int, Tuple[int, int, int]]:
+    """새 게임(3월, 기본 스탯)의 첫 훈련 슬롯과 상태"""
+    defaults = dict(zip(STAT_NAMES, STAT_DEFAULTS))
+    stamina = int(_recover(np.int32(defaults['stamina']), FIRST_MONTH, SLOTS[0][0]))
+    return 0, (stamina, defaults['speed'], defaults['batting'] + defaults['defense'])
+
+
+def build(assumptions: Optional[dict] = None, path: Path = TABLES_PATH) -> TrainingPlanner:
+    """기본 스탯에서 출발하는 표 + 파레토 전선 계산 후 저장"""
+    started = time.perf_counter()
+    layer, state = default_start()
+    planner = TrainingPlanner.solve(state, layer, assumptions, with_fronts=True)
+    planner.save(path)
+    states = sum(len(layer_states) for layer_states in planner.states if layer_states is not None)
+    print(f"[TrainingPlanner] 상태 {states:,}개, {time.perf_counter() - started:.1f}초, "
+          f"{path.stat().st_size / 1024 / 1024:.1f}MB → {path}")
+    return planner
+
+
+# ============================================================================
+# 싱글톤 패턴
+# ============================================================================
+
+_training_planner: TrainingPlanner | None = None
+
+
+def get_training_planner() -> Optional[TrainingPlanner]:
+    """
+    저장된 표로 만든 TrainingPlanner (표가 없거나 읽을 수 없으면 None)
+
+    표가 없으면 매번 파일을 다시 확인하므로, 실행 중에 빌드해도 다음 요청부터 사용됩니다.
+    """
+    global _training_planner
+    if _training_planner is None:
+        try:
+            _training_planner = TrainingPlanner.load()
+            print(f"[TrainingPlanner] 훈련 계획 표 로드: {TABLES_PATH}")
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, OSError) as e:
+            print(f"[TrainingPlanner] 훈련 계획 표를 읽을 수 없습니다 ({type(e).__name__}): {e}")
+            return None
+    return _training_planner
+
+
+def _option(args: List[str], name: str, default: int) -> int:
+    if name not in args:
+        return default
+    return int(args[args.index(name) + 1])
+
+
+if __name__ == "__main__":
+    """
+    훈련 계획 표 빌드 / 조회
+
+    실행 방법:
+    python -m services.training_planner build [--advice 6] [--mental 50] [--intimacy 30] [--overcome]
+    python -m services.training_planner show [엔딩 ID ...]
+    """
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    args = sys.argv[2:]
+    if command == "build":
+        planner = build({
+            'advice_total': _option(args, "--advice", DEFAULT_ASSUMPTIONS['advice_total']),
+            'mental': _option(args, "--mental", DEFAULT_ASSUMPTIONS['mental']),
+            'intimacy': _option(args, "--intimacy", DEFAULT_ASSUMPTIONS['intimacy']),
+            'steal_phobia_overcome': "--overcome" in args,
+        })
+        endings = list(game_rules.ENDING_IDS)
+    elif command == "show":
+        planner = get_training_planner()
+        if planner is None:
+            print("[TrainingPlanner] 표가 없습니다: python -m services.training_planner build")
+            sys.exit(1)
+        endings = args or list(game_rules.ENDING_IDS)
+    else:
+        print("사용법: python -m services.training_planner build [--advice N] [--mental N] "
+              "[--intimacy N] [--overcome] | show [엔딩 ID ...]")
+        sys.exit(1)
+
+    print(f"가정: {planner.assumptions}")
+    for ending in endings:
+        front = planner.fronts.get(ending, [])
+        if not front:
+            print(f"\n{ending}: 도달 불가")
+            continue
+        best = front[-1]
+        print(f"\n{ending}: 최고 {best['probability'] * 100:.2f}% (세션 {best['sessions']}회, "
+              f"엔딩 점수 {best['expected']['ending_score']}, 대회 체력 {best['expected']['stamina_at_tournament']})")
+        for session in best['plan']:
+            print(f"    {session['month']}월 강도 {session['intensity']:>3} {session['intensity_label']:<24} "
+                  f"{'+'.join(session['focuses'])}")
+        print("  파레토 전선 (세션 수 → 확률): " + ", ".join(
+            f"{point['sessions']}→{point['probability'] * 100:.1f}%" for point in front
+        ))
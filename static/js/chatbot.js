@@ -10,7 +10,9 @@ const AppState = {
     current: null,          // 현재 스토리북 데이터
     currentPage: 0,         // 현재 페이지 번호
     isActive: false,        // 스토리북 모드 여부
-    isProcessing: false     // 처리 중 플래그 (중복 클릭 방지)
+    isProcessing: false,    // 처리 중 플래그 (중복 클릭 방지)
+    urls: {},               // 스토리북 ID → 버전이 박힌 URL (미리 받아둔 캐시 재사용)
+    prefetched: new Set()   // 이미 미리 받은 URL
   },
 
   // 온보딩 상태
@@ -28,11 +30,17 @@ const AppState = {
   // 게임 상태 (서버에서 받아옴)
   game: null,
 
+  // 채팅 요청
+  chat: {
+    pendingRequestIds: new Map()  // 응답이 끝나지 않은 메시지 → 요청 ID (재전송 시 재사용)
+  },
+
   training: {
     isAvailable: false,
     isOpen: false,
     isSubmitting: false,
     intensity: 60,
+    sessionCount: 1,
     focuses: ['batting']
   },
 
@@ -118,6 +126,7 @@ const trainingButton = document.getElementById("training-button");
 const trainingModal = document.getElementById("training-modal");
 const trainingIntensityInput = document.getElementById("training-intensity");
 const trainingIntensityLabel = document.getElementById("training-intensity-label");
+const trainingCountInput = document.getElementById("training-count");
 const trainingSubmitBtn = document.getElementById("training-submit");
 const trainingCloseBtn = document.getElementById("training-close");
 
@@ -225,13 +234,19 @@ async function submitTraining(event) {
       AppState.training.intensity = intensityValue;
     }
 
+    const countValue = trainingCountInput ? Number(trainingCountInput.value) : AppState.training.sessionCount;
+    if (Number.isInteger(countValue) && countValue > 0) {
+      AppState.training.sessionCount = countValue;
+    }
+
+    // 같은 설정의 세션 N개를 한 번의 요청으로 검증/적용 (하나라도 불가능하면 전체 취소)
+    const session = { intensity: AppState.training.intensity, focuses };
     const payload = {
       username,
-      intensity: AppState.training.intensity,
-      focuses,
+      sessions: Array.from({ length: AppState.training.sessionCount }, () => session),
     };
 
-    const response = await fetch('/api/training', {
+    const response = await fetch('/api/training/plan', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify(payload),
@@ -253,8 +268,8 @@ async function submitTraining(event) {
 
     closeTrainingModal();
 
-    // 훈련 결과를 카드 형식으로 표시
-    showTrainingResultCard(data);
+    // 훈련 결과를 세션별 카드 형식으로 표시
+    data.steps.forEach((step) => showTrainingResultCard(step));
 
     await fetchGameState();
   } catch (error) {
@@ -537,6 +552,29 @@ function enableChatInput() {
   console.log('[입력] 활성화');
 }
 
+// 채팅 요청 ID 생성 (재시도 시 같은 ID를 보내면 서버가 진행 중인 응답에 합류시킴)
+function createRequestId() {
+  if (window.crypto && typeof window.crypto.randomUUID === 'function') {
+    return window.crypto.randomUUID();
+  }
+  return `${Date.now()}-${Math.random().toString(36).slice(2, 10)}`;
+}
+
+// 메시지의 요청 ID: 응답이 끝나기 전에 같은 메시지를 다시 보내면(더블 클릭, 실패 후 재전송) 같은 ID
+function requestIdFor(message) {
+  const pending = AppState.chat.pendingRequestIds;
+  if (!pending.has(message)) {
+    pending.set(message, createRequestId());
+  }
+  return pending.get(message);
+}
+
+// 응답이 끝난 메시지(완료, 오류, 서버가 스트림을 닫음)는 다음 전송 때 새 ID를 받도록 정리
+// (네트워크 오류로 fetch가 실패한 경우만 ID를 유지해, 재전송이 진행 중인 응답에 합류)
+function completeRequest(message) {
+  AppState.chat.pendingRequestIds.delete(message);
+}
+
 // 메시지 전송 함수 (EventSource 스트리밍 사용)
 async function sendMessage(isInitial = false) {
   let message;
@@ -554,6 +592,9 @@ async function sendMessage(isInitial = false) {
   // 로딩 표시
   const loadingId = appendMessageSync("loading", "생각 중...");
 
+  // 요청 ID (서버에서 중복 요청을 하나의 스트림으로 병합하는 데 사용)
+  const requestId = requestIdFor(message);
+
   try {
     // fetch로 POST 요청만 보내고 즉시 반환
     const response = await fetch("/api/chat/stream", {
@@ -562,6 +603,7 @@ async function sendMessage(isInitial = false) {
       body: JSON.stringify({
         message: message,
         username: username,
+        request_id: requestId,
       }),
     });
 
@@ -613,6 +655,7 @@ async function sendMessage(isInitial = false) {
 
           } else if (event.type === 'done') {
             // 스트리밍 완료
+            completeRequest(message);
             console.log('[STREAM] 완료');
 
           } else if (event.type === 'event_update') {
@@ -634,7 +677,8 @@ async function sendMessage(isInitial = false) {
             }
 
           } else if (event.type === 'error') {
-            // 오류 처리
+            // 오류 처리 (재전송하면 새로 시도하도록 ID 정리)
+            completeRequest(message);
             console.error('[STREAM] 오류:', event.content);
             fullResponse = event.content;
             updateBotMessageContent(messageId, fullResponse);
@@ -646,6 +690,9 @@ async function sendMessage(isInitial = false) {
       }
     }
 
+    // 서버가 스트림을 닫았으면 done/error 없이 끝났어도 이 요청은 끝난 것
+    completeRequest(message);
+
   } catch (error) {
     removeMessage(loadingId);
     showError("메시지 전송에 실패했습니다. 다시 시도해주세요.", error);
@@ -821,6 +868,7 @@ async function sendSystemMessageStreaming(systemMessage) {
       body: JSON.stringify({
         message: systemMessage,
         username: username,
+        request_id: requestIdFor(systemMessage),
       }),
     });
 
@@ -865,9 +913,11 @@ async function sendSystemMessageStreaming(systemMessage) {
             metadata = event.content;
 
           } else if (event.type === 'done') {
+            completeRequest(systemMessage);
             console.log('[STREAM] 완료');
 
           } else if (event.type === 'error') {
+            completeRequest(systemMessage);
             console.error('[STREAM] 오류:', event.content);
             fullResponse = event.content;
             updateBotMessageContent(messageId, fullResponse);
@@ -879,6 +929,8 @@ async function sendSystemMessageStreaming(systemMessage) {
       }
     }
 
+    completeRequest(systemMessage);
+
     // 메타데이터 처리 (기존 로직과 동일)
     if (metadata) {
       handleChatMetadata(metadata);
@@ -1572,7 +1624,10 @@ function closeMarchGuide() {
 async function loadAndShowStorybook(storybookId) {
   try {
     console.log('[스토리북] 로딩 시작:', storybookId);
-    const response = await fetch(`/api/storybook/${storybookId}?username=${username}`);
+    // 스토리북 내용은 사용자와 무관하므로 username 없이 요청 (ETag로 브라우저 캐시 재사용)
+    // 미리 받아둔 스토리북이면 같은 버전 URL로 요청해 브라우저 캐시에서 바로 가져옴
+    const url = AppState.storybook.urls[storybookId] || `/api/storybook/${storybookId}`;
+    const response = await fetch(url);
     const data = await response.json();
 
     console.log('[스토리북] API 응답:', data);
@@ -1593,6 +1648,9 @@ async function loadAndShowStorybook(storybookId) {
       renderStorybookPageInBook(0);
 
       console.log('[스토리북] 로드 완료:', AppState.storybook.current.title);
+
+      // 읽는 동안 다음 스토리북 후보를 미리 받아둠 (await 없이 백그라운드)
+      fetchStorybookOverlay(storybookId);
     } else {
       showError('스토리북을 불러올 수 없습니다.');
       console.error('[스토리북] 로드 실패:', data.error);
@@ -1603,6 +1661,97 @@ async function loadAndShowStorybook(storybookId) {
   }
 }
 
+/**
+ * 스토리북 페이지 이미지 HTML
+ * 빌드된 변환본(page.image_set)이 있으면 화면 크기에 맞는 AVIF/WebP를 고르는 <picture>,
+ * 없으면 원본 이미지
+ * @param {Object} page - 스토리북 페이지 ({image, image_set})
+ */
+function storyImageHtml(page) {
+  const onError = `onerror="document.getElementById('story-image-container').innerHTML='<p class=\\'no-image-text\\'>이미지 로드 실패</p>'"`;
+  const set = page.image_set;
+  if (!set) {
+    return `<img src="${page.image}" alt="스토리 이미지" ${onError}>`;
+  }
+
+  const avifSource = set.avif ? `<source type="image/avif" srcset="${set.avif}" sizes="${set.sizes}">` : '';
+  return `<picture>${avifSource}<source type="image/webp" srcset="${set.webp}" sizes="${set.sizes}">` +
+    `<img src="${page.image}" alt="스토리 이미지" decoding="async" ${onError}></picture>`;
+}
+
+/**
+ * 스토리북 페이지 이미지를 표시할 때와 같은 후보로 미리 받기
+ * (같은 <picture> 마크업을 화면 밖에서 만들면 브라우저가 같은 파일을 골라 캐시에 넣음)
+ * @param {Object} storybook - 스토리북 데이터
+ */
+function warmStorybookImages(storybook) {
+  if (!storybook || !Array.isArray(storybook.pages)) return;
+
+  const holder = document.createElement('div');
+  storybook.pages.forEach(page => {
+    if (!page.image_set || AppState.storybook.prefetched.has(page.image)) return;
+    AppState.storybook.prefetched.add(page.image);
+    holder.insertAdjacentHTML('beforeend', storyImageHtml(page).replace(/ onerror="[^"]*"/, ''));
+  });
+}
+
+/**
+ * 스토리북 사용자별 정보 조회 후 다음 스토리북 미리 받기
+ * @param {string} storybookId - 현재 스토리북 ID
+ */
+async function fetchStorybookOverlay(storybookId) {
+  try {
+    const response = await fetch(`/api/storybook/${storybookId}/overlay?username=${username}`);
+    const data = await response.json();
+    if (data.success) {
+      prefetchStorybooks(data.prefetch);
+    }
+  } catch (error) {
+    console.warn('[스토리북] 오버레이 조회 실패:', error);
+  }
+}
+
+/**
+ * 다음 스토리북 JSON과 이미지를 낮은 우선순위로 미리 받기
+ * @param {Array} manifest - [{id, url, images}, ...] (서버가 계산한 다음 후보)
+ */
+function prefetchStorybooks(manifest) {
+  if (!Array.isArray(manifest) || manifest.length === 0) return;
+
+  const run = () => {
+    manifest.forEach(entry => {
+      AppState.storybook.urls[entry.id] = entry.url;
+
+      const targets = [entry.url, ...(entry.images || [])];
+      targets.forEach(target => {
+        if (AppState.storybook.prefetched.has(target)) return;
+        AppState.storybook.prefetched.add(target);
+
+        if (target === entry.url) {
+          // JSON을 받은 뒤 변환본 이미지는 표시할 때와 같은 srcset으로 미리 받음
+          fetch(target, {priority: 'low'})
+            .then(response => response.json())
+            .then(data => warmStorybookImages(data.storybook))
+            .catch(() => AppState.storybook.prefetched.delete(target));
+        } else {
+          const img = new Image();
+          img.decoding = 'async';
+          img.onerror = () => AppState.storybook.prefetched.delete(target);
+          img.src = target;
+        }
+      });
+    });
+    console.log('[스토리북] 미리 받기:', manifest.map(entry => entry.id));
+  };
+
+  // 현재 화면 렌더링이 끝난 뒤 한가할 때 실행
+  if ('requestIdleCallback' in window) {
+    requestIdleCallback(run, {timeout: 2000});
+  } else {
+    setTimeout(run, 200);
+  }
+}
+
 /**
  * 책 안에서 스토리북 모드 표시
  */
@@ -1684,7 +1833,7 @@ async function renderStorybookPageInBook(pageIndex) {
   const imageContainer = document.getElementById('story-image-container');
   if (imageContainer) {
     if (page.image) {
-      imageContainer.innerHTML = `<img src="${page.image}" alt="스토리 이미지" onerror="this.parentElement.innerHTML='<p class=\\'no-image-text\\'>이미지 로드 실패</p>'">`;
+      imageContainer.innerHTML = storyImageHtml(page);
     } else {
       imageContainer.innerHTML = '<p class="no-image-text">이미지 없음</p>';
     }
@@ -1817,6 +1966,7 @@ async function completeStorybook() {
 
     if (data.success) {
       console.log('[스토리북] 완료:', data);
+      prefetchStorybooks(data.prefetch);
 
       // 다음 액션에 따라 분기
       if (data.next_action === 'start_chat_mode') {
@@ -1944,6 +2094,7 @@ async function advanceToNextMonth() {
 
     if (data.success) {
       console.log('[월 진행] 성공:', data);
+      prefetchStorybooks(data.prefetch);
 
       // 전환 스토리북 표시
       await transitionToStorybookMode(data.transition_storybook_id);
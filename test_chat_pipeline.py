@@ -0,0 +1,594 @@
+"""
+채팅 파이프라인 테스트
+
+중복 요청 병합, SSE 프레이밍, LLM 호출 제어 등 /api/chat/stream 경로의
+구성 요소를 테스트합니다. (LLM/Flask 없이 실행 가능한 부분만)
+
+각 테스트는 실패하면 AssertionError를 던지므로 pytest로도, 직접 실행으로도 돌릴 수 있습니다.
+    python test_chat_pipeline.py
+"""
+
+import sys
+import io
+import threading
+import time
+from pathlib import Path
+
+# Windows 콘솔 인코딩 문제 해결
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# 프로젝트 루트를 sys.path에 추가
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+
+
+def test_request_coalescing():
+    """중복 채팅 요청 병합 테스트"""
+    print("\n[Test 1] 중복 요청 병합 테스트")
+    print("="*50)
+
+    from services.request_coalescer import RequestCoalescer
+
+    coalescer = RequestCoalescer(replay_window=5.0, idle_timeout=5.0)
+    calls = []
+    release = threading.Event()
+
+    def producer():
+        calls.append(1)
+        yield {'type': 'token', 'content': '안녕'}
+        release.wait(5.0)
+        yield {'type': 'done', 'content': ''}
+
+    # 진행 중인 요청에 같은 request_id로 재시도 → 같은 스트림 구독
+    first = coalescer.stream("coalesce_user", "안녕?", "req-1", producer)
+    second = coalescer.stream("coalesce_user", "안녕?", "req-1", producer)
+    release.set()
+    first_events, second_events = list(first), list(second)
+    assert len(calls) == 1, f"producer가 {len(calls)}번 실행됨"
+    assert first_events == second_events == [
+        {'type': 'token', 'content': '안녕'},
+        {'type': 'done', 'content': ''},
+    ]
+    print("✓ 진행 중 재시도 병합 (producer 1회)")
+
+    # 완료 직후 재시도도 replay_window 안에서는 다시 생성하지 않음
+    assert list(coalescer.stream("coalesce_user", "안녕?", "req-1", producer)) == first_events
+    assert len(calls) == 1
+    print("✓ 완료 후 재시도 재사용")
+
+    # 새 request_id는 같은 메시지라도 새로 생성
+    assert list(coalescer.stream("coalesce_user", "안녕?", "req-2", producer)) == first_events
+    assert len(calls) == 2, f"새 요청인데 producer가 {len(calls)}번 실행됨"
+    print("✓ 새 요청 ID는 별도 실행")
+
+
+def test_errored_stream_not_replayed():
+    """오류로 끝난 스트림은 재전송 시 다시 생성"""
+    print("\n[Test 2] 오류 스트림 재생 제외 테스트")
+    print("="*50)
+
+    from services.request_coalescer import RequestCoalescer
+
+    coalescer = RequestCoalescer(replay_window=5.0, idle_timeout=5.0)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        yield {'type': 'token', 'content': '잠깐'}
+        raise RuntimeError("LLM 실패")
+
+    events = list(coalescer.stream("error_user", "안녕?", "req-1", failing))
+    assert events[-1]['type'] == 'error', f"마지막 이벤트가 오류가 아님: {events}"
+    assert coalescer.inflight_count() == 0, "오류 스트림이 재사용 대기로 남음"
+    print("✓ producer 예외 → error 이벤트, 재사용 대기에서 제거")
+
+    events = list(coalescer.stream("error_user", "안녕?", "req-1", failing))
+    assert len(calls) == 2, "같은 ID 재전송이 캐시된 오류를 받음"
+    print("✓ 같은 요청 ID 재전송 시 새로 시도")
+
+    # 생산자가 직접 보낸 error 이벤트도 같은 취급
+    def error_event():
+        calls.append(1)
+        yield {'type': 'error', 'content': '오류'}
+
+    list(coalescer.stream("error_user", "다시", "req-2", error_event))
+    list(coalescer.stream("error_user", "다시", "req-2", error_event))
+    assert len(calls) == 4
+    print("✓ error 이벤트로 끝난 스트림도 재생하지 않음")
+
+
+def _decode_frames(frames):
+    """SSE 프레임 → (이벤트 목록, heartbeat 수)"""
+    import json
+    events, heartbeats = [], 0
+    for frame in frames:
+        assert frame.endswith(b"\n\n"), f"프레임 끝이 빈 줄이 아님: {frame!r}"
+        if frame.startswith(b": heartbeat"):
+            heartbeats += 1
+            continue
+        assert frame.startswith(b"data: "), f"잘못된 프레임: {frame!r}"
+        events.append(json.loads(frame[len(b"data: "):].decode('utf-8')))
+    return events, heartbeats
+
+
+def test_sse_framing():
+    """토큰 묶음 SSE 프레이밍 테스트"""
+    print("\n[Test 3] SSE 프레이밍 테스트")
+    print("="*50)
+
+    from services.request_coalescer import RequestCoalescer
+    from services.sse_framing import SSEFramer
+
+    tokens = ["안", "녕", "하세요", " ", "감독님", "\"따옴표\"", "\n줄바꿈"]
+    source = [{'type': 'token', 'content': token} for token in tokens]
+    source += [{'type': 'metadata', 'stats': {'batting': 1}}, {'type': 'token', 'content': '끝'},
+               {'type': 'done', 'content': ''}]
+
+    # 첫 토큰은 바로, 나머지는 다음 token 외 이벤트까지 한 프레임으로
+    framer = SSEFramer(flush_interval_ms=60000, max_frame_bytes=10000, heartbeat_interval_s=0)
+    frames = list(framer.frames(source))
+    events, _ = _decode_frames(frames)
+    assert [event['type'] for event in events] == ['token', 'token', 'metadata', 'token', 'done'], events
+    assert events[0]['content'] == "안"
+    assert ''.join(event['content'] for event in events if event['type'] == 'token') == ''.join(tokens) + '끝'
+    assert events[2] == source[len(tokens)], "token 외 이벤트가 바뀜"
+    print(f"✓ 이벤트 {len(source)}개 → 프레임 {len(frames)}개, 내용/순서 유지")
+
+    # 바이트 한도에 닿으면 바로 전송
+    framer = SSEFramer(flush_interval_ms=60000, max_frame_bytes=4, heartbeat_interval_s=0)
+    events, _ = _decode_frames(framer.frames({'type': 'token', 'content': 'abc'} for _ in range(5)))
+    assert [event['content'] for event in events] == ['abc', 'abcabc', 'abcabc'], events
+    print("✓ max_frame_bytes 도달 시 전송")
+
+    # 원본 예외는 모아 둔 토큰을 보낸 뒤 다시 발생
+    def failing():
+        yield {'type': 'token', 'content': 'a'}
+        yield {'type': 'token', 'content': 'b'}
+        raise RuntimeError("업스트림 실패")
+
+    frames = []
+    try:
+        for frame in SSEFramer(flush_interval_ms=60000, heartbeat_interval_s=0).frames(failing()):
+            frames.append(frame)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("원본 예외가 전달되지 않음")
+    assert [event['content'] for event in _decode_frames(frames)[0]] == ['a', 'b']
+    print("✓ 예외 전 대기 토큰 전송")
+
+    # 구독 스트림: 업스트림이 멈춘 동안에도 제시간에 flush / heartbeat
+    def stalled():
+        yield {'type': 'token', 'content': '첫'}
+        yield {'type': 'token', 'content': '둘'}
+        time.sleep(0.5)
+        yield {'type': 'done', 'content': ''}
+
+    coalescer = RequestCoalescer(replay_window=5.0, idle_timeout=5.0)
+    framer = SSEFramer(flush_interval_ms=20, heartbeat_interval_s=0.1)
+    arrivals = []
+    started = time.monotonic()
+    for frame in framer.frames(coalescer.stream("sse_user", "안녕", "req-sse", stalled)):
+        arrivals.append((time.monotonic() - started, frame))
+    events, heartbeats = _decode_frames(frame for _, frame in arrivals)
+    assert [event.get('content') for event in events] == ['첫', '둘', ''], events
+    assert arrivals[1][0] < 0.3, f"멈춘 동안 대기 토큰이 전송되지 않음 ({arrivals[1][0]:.2f}초)"
+    assert heartbeats >= 2, f"heartbeat {heartbeats}회"
+    print(f"✓ 업스트림 정지 중 flush ({arrivals[1][0] * 1000:.0f}ms), heartbeat {heartbeats}회")
+
+
+class _FakeAPIError(Exception):
+    """openai 예외처럼 status_code / response.headers를 가진 오류"""
+
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        headers = {'retry-after': str(retry_after)} if retry_after is not None else {}
+        self.response = type('Response', (), {'status_code': status_code, 'headers': headers})()
+
+
+def test_llm_limiter():
+    """LLM 호출 승인 제어 (동시성/우선순위/재시도/페이싱) 테스트"""
+    print("\n[Test 4] LLM 호출 제한 테스트")
+    print("="*50)
+
+    from services.llm_limiter import (
+        LLMLimiter, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_JUDGE
+    )
+
+    # 프로필별 동시 실행 수 제한
+    limiter = LLMLimiter(profiles={'small': {'max_concurrency': 2}})
+    active, peak, guard = [0], [0], threading.Lock()
+
+    def work():
+        with guard:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with guard:
+            active[0] -= 1
+
+    threads = [threading.Thread(target=limiter.call, args=("small", work)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2, f"동시 실행 {peak[0]}개"
+    assert limiter.metrics()['small']['admitted'] == 6
+    print("✓ 동시 실행 수 제한 (6호출, 최대 2개)")
+
+    # 슬롯이 비면 도착 순서가 아니라 우선순위 순으로 처리
+    limiter = LLMLimiter(profiles={'one': {'max_concurrency': 1}})
+    release, order = threading.Event(), []
+    holder = threading.Thread(target=limiter.call, args=("one", lambda: release.wait(5)))
+    holder.start()
+    while limiter.metrics().get('one', {}).get('active') != 1:
+        time.sleep(0.005)
+    waiters = []
+    for name, priority in (("background", PRIORITY_BACKGROUND), ("judge", PRIORITY_JUDGE),
+                           ("interactive", PRIORITY_INTERACTIVE)):
+        waiter = threading.Thread(target=limiter.call, args=("one", lambda name=name: order.append(name)),
+                                  kwargs={'priority': priority})
+        waiter.start()
+        waiters.append(waiter)
+        while limiter.metrics()['one']['queue_depth'] < len(waiters):
+            time.sleep(0.005)
+    release.set()
+    for thread in [holder] + waiters:
+        thread.join()
+    assert order == ["interactive", "judge", "background"], f"처리 순서: {order}"
+    print("✓ 우선순위 대기열")
+
+    # 429 / 5xx는 백오프 후 재시도, Retry-After가 더 길면 그만큼 대기
+    limiter = LLMLimiter(max_retries=3, backoff_base_s=0.001, backoff_max_s=0.002)
+    failures = [_FakeAPIError(429, retry_after=0.05), _FakeAPIError(503)]
+
+    def flaky():
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    started = time.monotonic()
+    assert limiter.call("retry", flaky) == "ok"
+    assert time.monotonic() - started >= 0.05, "Retry-After를 지키지 않음"
+    metrics = limiter.metrics()['retry']
+    assert (metrics['retries'], metrics['rate_limited'], metrics['failures']) == (2, 1, 0), metrics
+    print("✓ 429/503 재시도 (Retry-After 반영)")
+
+    # 재시도할 수 없는 오류와 재시도 한도 초과는 그대로 발생
+    calls = []
+
+    def always(status):
+        def fn():
+            calls.append(status)
+            raise _FakeAPIError(status)
+        return fn
+
+    for status, expected_calls in ((400, 1), (500, 4)):
+        calls.clear()
+        try:
+            limiter.call(f"fail_{status}", always(status))
+        except _FakeAPIError:
+            pass
+        else:
+            raise AssertionError(f"{status} 오류가 전달되지 않음")
+        assert len(calls) == expected_calls, f"{status}: {len(calls)}회 호출"
+        assert limiter.metrics()[f"fail_{status}"]['failures'] == 1
+    print("✓ 400 즉시 실패, 500은 재시도 3회 후 실패")
+
+    # 스트림은 첫 청크 전 실패만 재시도 (이미 보낸 청크 중복 방지)
+    attempts = []
+
+    def stream_factory(fail_after):
+        def factory():
+            attempts.append(1)
+            if len(attempts) == 1 and fail_after == 0:
+                raise _FakeAPIError(429)
+            yield "a"
+            if fail_after == 1:
+                raise _FakeAPIError(503)
+            yield "b"
+        return factory
+
+    assert list(limiter.stream("stream", stream_factory(0))) == ["a", "b"] and len(attempts) == 2
+    attempts.clear()
+    received = []
+    try:
+        for chunk in limiter.stream("stream", stream_factory(1)):
+            received.append(chunk)
+    except _FakeAPIError:
+        pass
+    else:
+        raise AssertionError("청크 이후 오류가 전달되지 않음")
+    assert received == ["a"] and len(attempts) == 1, "일부 전송한 스트림을 재시도함"
+    assert limiter.metrics()['stream']['active'] == 0, "스트림 슬롯이 반환되지 않음"
+    print("✓ 스트림 재시도 규칙, 슬롯 반환")
+
+    # 분당 요청 수 페이싱 (초당 20회, 버스트 1)
+    limiter = LLMLimiter(profiles={'paced': {'requests_per_minute': 1200, 'burst': 1}})
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.call("paced", lambda: None)
+    elapsed = time.monotonic() - started
+    assert elapsed >= 0.14, f"페이싱 없이 실행됨 ({elapsed:.3f}초)"
+    print(f"✓ 토큰 버킷 페이싱 (4회 {elapsed * 1000:.0f}ms)")
+
+
+def test_circuit_breaker():
+    """단계별 서킷 브레이커 테스트"""
+    print("\n[Test 5] 서킷 브레이커 테스트")
+    print("="*50)
+
+    from services.circuit_breaker import BreakerRegistry, CircuitBreaker, STAGES, STAGE_STAT_JUDGE
+
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise RuntimeError("판정기 오류")
+
+    fallback = lambda: "대체"
+
+    # min_calls 이상에서 실패율이 임계값을 넘으면 차단
+    breaker = CircuitBreaker("test", min_calls=3, failure_rate=0.5, open_s=0.1)
+    assert breaker.call(lambda: "정상", fallback) == "정상"
+    assert breaker.call(failing, fallback) == "대체"
+    assert breaker.state == CircuitBreaker.CLOSED, "min_calls 전에 차단됨"
+    assert breaker.call(failing, fallback) == "대체"
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 1
+    print("✓ 실패율 2/3 → 차단")
+
+    # 차단 중에는 호출하지 않고 바로 대체 동작
+    calls.clear()
+    assert breaker.call(failing, fallback) == "대체"
+    assert calls == [] and breaker.rejected == 1, "차단 중 실제 호출이 실행됨"
+    print("✓ 차단 중 호출 생략")
+
+    # open_s 후 시험 호출은 하나만, 실패하면 다시 차단
+    time.sleep(0.12)
+    assert breaker.allow() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() is False, "시험 호출이 동시에 두 개 허용됨"
+    breaker.record(False, 0.0)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 2
+    print("✓ 시험 호출 1회, 실패 시 재차단")
+
+    # 시험 호출이 성공하면 복구되고 이전 기록은 지워짐
+    time.sleep(0.12)
+    assert breaker.call(lambda: "복구", fallback) == "복구"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot()['window_calls'] == 0
+    print("✓ 시험 호출 성공 → 복구")
+
+    # 느린 호출 비율로도 차단
+    breaker = CircuitBreaker("slow", min_calls=2, slow_call_s=0.0, slow_call_rate=1.0, failure_rate=1.1)
+    breaker.record(True, 0.01)
+    breaker.record(True, 0.01)
+    assert breaker.state == CircuitBreaker.OPEN, "느린 호출로 차단되지 않음"
+    print("✓ 느린 호출 비율 → 차단")
+
+    # window_s가 지난 기록은 판단에서 제외
+    breaker = CircuitBreaker("window", window_s=0.05, min_calls=2, failure_rate=0.5)
+    breaker.record(False, 0.0)
+    time.sleep(0.08)
+    breaker.record(False, 0.0)
+    assert breaker.state == CircuitBreaker.CLOSED, "지난 구간의 실패가 집계됨"
+    assert breaker.snapshot()['window_failures'] == 1
+    print("✓ 구간 밖 기록 제외")
+
+    # 레지스트리: default 위에 단계별 설정을 덮어씀
+    registry = BreakerRegistry({'default': {'open_s': 7}, STAGE_STAT_JUDGE: {'min_calls': 2}})
+    assert set(registry.snapshot()) == set(STAGES)
+    stat = registry.get(STAGE_STAT_JUDGE)
+    assert (stat.open_s, stat.min_calls) == (7, 2)
+    assert registry.get(STAGES[0]).min_calls == 5
+    print("✓ 단계별 설정 병합")
+
+
+def test_model_routing():
+    """작업별 모델 라우팅 / 메트릭 테스트"""
+    print("\n[Test 6] 모델 라우팅 테스트")
+    print("="*50)
+
+    import json
+    from types import SimpleNamespace
+    from services.model_router import DEFAULT_ROUTES, ModelRouter, TASK_REPLY, TASK_STAT_JUDGE
+
+    # 설정에 없는 항목은 기본값, 설정한 항목만 덮어씀
+    router = ModelRouter({TASK_STAT_JUDGE: {'model': 'judge-model', 'slo_ms': 10}, 'custom': {'model': 'x'}})
+    assert router.model_for(TASK_STAT_JUDGE) == 'judge-model'
+    assert router.route(TASK_STAT_JUDGE)['max_tokens'] == DEFAULT_ROUTES[TASK_STAT_JUDGE]['max_tokens']
+    assert router.model_for(TASK_REPLY) == DEFAULT_ROUTES[TASK_REPLY]['model']
+    assert router.model_for('custom') == 'x'
+    try:
+        router.route('unknown')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("설정이 없는 작업이 허용됨")
+    print("✓ 라우팅 설정 병합")
+
+    # 배포 설정에는 모든 기본 작업의 라우팅이 있음
+    with open(BASE_DIR / "config" / "chatbot_config.json", 'r', encoding='utf-8') as f:
+        routes = json.load(f)['model_routing']
+    assert set(DEFAULT_ROUTES) <= set(ModelRouter(routes).routes), "배포 설정에 빠진 작업이 있음"
+    print("✓ chatbot_config.json 라우팅 표")
+
+    # invoke: 토큰 사용량, SLO 위반, 오류 기록
+    message = SimpleNamespace(usage_metadata={'input_tokens': 12, 'output_tokens': 3})
+    assert router.invoke(TASK_STAT_JUDGE, lambda: message) is message
+
+    def slow():
+        time.sleep(0.02)
+        return SimpleNamespace(response_metadata={'token_usage': {'prompt_tokens': 5, 'completion_tokens': 1}})
+
+    router.invoke(TASK_STAT_JUDGE, slow)
+    try:
+        router.invoke(TASK_STAT_JUDGE, lambda: {}['missing'])
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("호출 오류가 전달되지 않음")
+    metrics = router.metrics()[TASK_STAT_JUDGE]
+    assert (metrics['calls'], metrics['errors']) == (3, 1), metrics
+    assert (metrics['input_tokens'], metrics['output_tokens']) == (17, 4), metrics
+    assert metrics['slo_violations'] >= 1 and metrics['model'] == 'judge-model', metrics
+    print(f"✓ 호출 메트릭 (p95 {metrics['p95_ms']}ms, SLO 위반 {metrics['slo_violations']}회)")
+
+    # stream: 지연 시간은 첫 청크까지, 토큰은 전체 합계
+    def chunks():
+        yield SimpleNamespace(usage_metadata={'input_tokens': 20, 'output_tokens': 1})
+        time.sleep(0.05)
+        yield SimpleNamespace(usage_metadata={'input_tokens': 0, 'output_tokens': 7})
+
+    assert len(list(router.stream(TASK_REPLY, chunks))) == 2
+    metrics = router.metrics()[TASK_REPLY]
+    assert (metrics['input_tokens'], metrics['output_tokens']) == (20, 8), metrics
+    assert metrics['p50_ms'] < 50, f"스트림 지연이 첫 청크 이후까지 측정됨: {metrics['p50_ms']}ms"
+    print("✓ 스트림 메트릭 (첫 청크 지연, 토큰 합계)")
+
+
+def test_chat_history_store():
+    """SQLite 대화 기록 (페이지 / 압축 보관 / 워커 간 공유) 테스트"""
+    print("\n[Test 7] 대화 기록 저장소 테스트")
+    print("="*50)
+
+    import tempfile
+    from langchain_core.messages import AIMessage, HumanMessage
+    from services.chat_history import (
+        ChatHistoryStore, SQLiteChatMessageHistory, SharedChatMessageHistory, recent_contents
+    )
+    from services.shared_store import InProcessBackend
+
+    def message(index):
+        kind = 'human' if index % 2 else 'ai'
+        return {'type': kind, 'data': {'content': f"{kind} {index}", 'type': kind}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "chat.sqlite3"
+        store = ChatHistoryStore(db_path, hot_messages=5, archive_block=4)
+        expected = [message(index) for index in range(1, 24)]
+        for start in range(0, len(expected), 3):
+            store.append("chat_user", expected[start:start + 3])
+        assert store.last_seq("chat_user") == 23
+        archived_rows = store._conn.execute("SELECT COUNT(*) FROM chat_archive").fetchone()[0]
+        hot_rows = store._conn.execute("SELECT COUNT(*) FROM chat_messages").fetchone()[0]
+        assert archived_rows > 0 and hot_rows < 5 + 4, f"보관 행 {archived_rows}, 최근 행 {hot_rows}"
+        assert store.read_range("chat_user", 1, 23) == expected, "보관 + 최근 메시지 순서가 다름"
+        print(f"✓ 메시지 23개 (압축 보관 {archived_rows}행, 최근 {hot_rows}행)")
+
+        # 최신 페이지부터 커서를 따라가면 전체를 한 번씩 읽음
+        pages, cursor = [], None
+        while True:
+            page, cursor = store.page("chat_user", before=cursor, limit=6)
+            pages.append(page)
+            if cursor is None:
+                break
+        assert pages[0] == expected[-6:] and sum(pages[::-1], []) == expected, "페이지 이어 붙이기 불일치"
+        assert store.page("chat_user", before=3, limit=6) == (expected[:2], None)
+        assert store.page("nobody") == ([], None)
+        print(f"✓ 커서 페이지 {len(pages)}개")
+
+        # 종류별 조회는 보관 구간에 걸쳐도 같은 결과
+        for within in (4, 23):
+            assert store.recent_of_type("chat_user", within, 'human') == [
+                item for item in expected[-within:] if item['type'] == 'human'
+            ], f"최근 {within}개 human 조회 불일치"
+        print("✓ 종류별 최근 메시지 조회")
+
+        # 다른 워커(같은 DB의 다른 연결)가 추가해도 순번이 이어짐
+        other = ChatHistoryStore(db_path, hot_messages=5, archive_block=4)
+        assert other.append("chat_user", [message(24)]) == 24
+        assert store.tail("chat_user", 2) == (24, [expected[-1], message(24)])
+        other.close()
+        print("✓ 워커 간 순번 유지")
+
+        # LangChain 히스토리: 마지막 window개만 프롬프트에 사용
+        history = SQLiteChatMessageHistory("chat_user", store, window=4)
+        assert [item.content for item in history.messages] == ["human 21", "ai 22", "human 23", "ai 24"]
+        history.add_messages([HumanMessage(content="새 질문"), AIMessage(content="새 답변")])
+        assert [item.content for item in history.messages[-2:]] == ["새 질문", "새 답변"]
+        assert history.message_count() == 26
+        reader = SQLiteChatMessageHistory("chat_user", store, window=4)
+        history.add_messages([HumanMessage(content="또 질문")])
+        assert reader.messages[-1].content == "또 질문", "다른 인스턴스의 추가를 읽지 못함"
+        assert recent_contents(reader, limit=4) == ["새 질문", "또 질문"]
+        older, cursor = reader.page(before=3, limit=5)
+        assert [item.content for item in older] == ["human 1", "ai 2"] and cursor is None
+        history.clear()
+        assert reader.messages == [] and store.last_seq("chat_user") == 0
+        print("✓ SQLiteChatMessageHistory 창 / 갱신 / 초기화")
+
+        # 다시 열어도 유지
+        store.append("persist_user", expected[:3])
+        store.close()
+        reopened = ChatHistoryStore(db_path, hot_messages=5, archive_block=4)
+        assert reopened.read_range("persist_user", 1, 3) == expected[:3]
+        reopened.close()
+        print("✓ 재시작 후 유지")
+
+    # 공유 백엔드 히스토리
+    backend = InProcessBackend()
+    shared = SharedChatMessageHistory("chat_user", backend)
+    shared.add_messages([HumanMessage(content="안녕"), AIMessage(content="네")])
+    assert [item.content for item in SharedChatMessageHistory("chat_user", backend).messages] == ["안녕", "네"]
+    shared.clear()
+    assert shared.messages == []
+    print("✓ 공유 백엔드 히스토리")
+
+
+def run_test(test) -> bool:
+    """테스트 실행 (예외가 나면 실패로 기록)"""
+    try:
+        test()
+        return True
+    except Exception as e:
+        print(f"✗ {test.__name__} 실패: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def main():
+    """메인 테스트 실행"""
+    print("="*50)
+    print("채팅 파이프라인 테스트")
+    print("="*50)
+
+    results = []
+
+    # 각 테스트 실행
+    results.append(("요청 병합", run_test(test_request_coalescing)))
+    results.append(("오류 스트림", run_test(test_errored_stream_not_replayed)))
+    results.append(("SSE 프레이밍", run_test(test_sse_framing)))
+    results.append(("LLM 호출 제한", run_test(test_llm_limiter)))
+    results.append(("서킷 브레이커", run_test(test_circuit_breaker)))
+    results.append(("모델 라우팅", run_test(test_model_routing)))
+    results.append(("대화 기록 저장소", run_test(test_chat_history_store)))
+
+    # 결과 요약
+    print("\n" + "="*50)
+    print("테스트 결과 요약")
+    print("="*50)
+
+    for name, result in results:
+        status = "✓ 성공" if result else "✗ 실패"
+        print(f"{name}: {status}")
+
+    total = len(results)
+    passed = sum(1 for _, result in results if result)
+
+    print(f"\n총 {total}개 테스트 중 {passed}개 성공, {total - passed}개 실패")
+
+    if passed == total:
+        print("\n🎉 모든 테스트 통과!")
+        return 0
+    else:
+        print(f"\n⚠️ {total - passed}개 테스트 실패")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
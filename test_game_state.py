@@ -0,0 +1,854 @@
+"""
+게임 상태 저장 테스트
+
+GameState 직렬화, 메모리 캐시, 저장소(파일/SQLite/저널/공유 저장소/보관소)를 테스트합니다.
+모든 저장소는 임시 디렉토리에서 실행하므로 saves/ 디렉토리를 건드리지 않습니다.
+
+각 테스트는 실패하면 AssertionError를 던지므로 pytest로도, 직접 실행으로도 돌릴 수 있습니다.
+    python test_game_state.py
+"""
+
+import sys
+import io
+import tempfile
+from pathlib import Path
+
+# Windows 콘솔 인코딩 문제 해결
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# 프로젝트 루트를 sys.path에 추가
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+
+
+def test_journal_replay():
+    """저널 저장소 재생 테스트"""
+    print("\n[Test 1] 저널 저장소 재생 테스트")
+    print("="*50)
+
+    from services.game_state_journal import JournalStorage
+    from services.game_state_manager import GameState
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal_dir = Path(tmp) / "journal"
+        journal = JournalStorage(journal_dir, snapshot_every=2, fsync=False)
+
+        state = GameState(session_id="journal_user")
+        saved = []
+        for month in (3, 4, 5, 6, 7):
+            state.current_month = month
+            state.stats.apply_changes({'batting': 3, 'stamina': -5})
+            state.flags[f'month_{month}'] = True
+            state.event_history.append(f"{month}월 시작")
+            journal.save("journal_user", state.to_dict())
+            saved.append(state.to_dict())
+        records = list(journal.iter_records("journal_user"))
+        assert [record['seq'] for record in records] == [1, 2, 3, 4, 5]
+        assert 'full' in records[0] and 'full' not in records[1], "두 번째 기록부터 delta가 아님"
+        print(f"✓ {len(saved)}회 기록 (첫 기록 전체, 이후 delta)")
+
+        # 새 인스턴스는 스냅샷 + 이후 저널만으로 마지막 상태를 복원해야 함
+        reloaded = JournalStorage(journal_dir, snapshot_every=2, fsync=False).load("journal_user")
+        assert reloaded == saved[-1], "재생한 상태가 마지막 저장과 다름"
+        assert GameState.from_dict(reloaded).current_month == 7
+        print("✓ 새 인스턴스에서 마지막 상태 복원")
+
+        # 기록 도중 중단된 마지막 줄은 잘라내고 이전 상태로 복원
+        with open(journal_dir / "journal_user.journal", 'ab') as f:
+            f.write(b'{"seq": 6, "set": {"current_')
+        reloaded = JournalStorage(journal_dir, snapshot_every=2, fsync=False).load("journal_user")
+        assert reloaded == saved[-1], "잘린 기록이 상태에 반영됨"
+        assert (journal_dir / "journal_user.journal").read_bytes().endswith(b"\n")
+        print("✓ 잘린 마지막 기록 제거")
+
+        # 저널 디렉토리 밖을 가리키는 세션 ID는 거절
+        for bad_id in ("../evil", "a/b"):
+            try:
+                journal.save(bad_id, saved[-1])
+            except ValueError:
+                continue
+            raise AssertionError(f"안전하지 않은 세션 ID가 저장됨: {bad_id}")
+        assert not (Path(tmp) / "evil.journal").exists()
+        print("✓ 안전하지 않은 세션 ID 거절")
+
+
+def test_game_state_codec():
+    """슬롯 기반 GameState/PlayerStats 변환 테스트"""
+    print("\n[Test 2] GameState 변환 테스트")
+    print("="*50)
+
+    import copy
+    from services.game_state_manager import GameState, PlayerStats
+
+    state = GameState(session_id="codec_user", current_month=5)
+    assert not hasattr(state, '__dict__') and not hasattr(state.stats, '__dict__'), "__slots__ 미사용"
+    state.stats.apply_changes({'batting': 70, 'stamina': -150, 'unknown': 5})
+    assert state.stats.batting == 100 and state.stats.stamina == 0, "스탯이 0-100으로 제한되지 않음"
+    state.flags['backstory_revealed'] = True
+    state.special_moments.append({'month': 5, 'title': '집 방문'})
+    state.record_training_session(
+        month=5, intensity=60, intensity_label="Standard Training", focuses=['speed'],
+        stat_changes={'speed': 4}, stamina_change=-6, summary="훈련"
+    )
+    print("✓ 슬롯 사용, 스탯 범위 제한")
+
+    # to_dict → from_dict 왕복 (알 수 없는 키는 무시)
+    data = state.to_dict()
+    restored = GameState.from_dict({**data, 'legacy_field': 1})
+    assert restored == state, "왕복 변환 결과가 다름"
+    assert not restored.is_dirty(), "복원 직후 변경 표시가 남음"
+    assert PlayerStats.from_dict({'mental': 50}).to_dict()['batting'] == 40, "빠진 스탯이 기본값이 아님"
+    print("✓ to_dict/from_dict 왕복")
+
+    # to_dict 결과는 이후 제자리 수정과 분리 (flush가 락 밖에서 기록하는 동안 바뀌지 않아야 함)
+    captured = state.to_dict()
+    state.flags['later'] = True
+    state.event_history.append("나중 이벤트")
+    state.training_history.append({'month': 6})
+    state.stats.apply_changes({'mental': 10})
+    assert 'later' not in captured['flags']
+    assert captured['event_history'] == data['event_history']
+    assert len(captured['training_history']) == 1
+    assert captured['stats'] == data['stats'], "스탯 dict가 원본과 공유됨"
+    print("✓ to_dict 결과가 이후 변경과 분리됨")
+
+    # 스냅샷(깊은 복사)은 원본 변경에 영향받지 않음
+    snapshot = copy.deepcopy(state)
+    state.stats.batting = 10
+    state.special_moments.append({'month': 6})
+    assert snapshot.stats.batting == 100 and len(snapshot.special_moments) == 1
+    print("✓ 스냅샷 복사 분리")
+
+    # 대입/mark_dirty로 변경 표시
+    restored.current_day = 2
+    assert restored.is_dirty()
+    restored.clear_dirty()
+    restored.mark_dirty()
+    assert restored.is_dirty()
+    print("✓ 변경 표시")
+
+
+def test_write_behind_flush():
+    """게임 상태 지연 기록(write_behind) 테스트"""
+    print("\n[Test 3] 지연 기록 테스트")
+    print("="*50)
+
+    from services.game_state_manager import GameStateManager
+    from services.game_state_storage import FileStorage
+
+    class CountingStorage(FileStorage):
+        """save_many 호출 횟수 기록"""
+        def __init__(self, save_dir):
+            super().__init__(save_dir)
+            self.batches = []
+
+        def save_many(self, items):
+            self.batches.append([session_id for session_id, _ in items])
+            super().save_many(items)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = CountingStorage(Path(tmp))
+        manager = GameStateManager(
+            Path(tmp),
+            storage=storage,
+            durability=GameStateManager.DURABILITY_WRITE_BEHIND,
+            flush_interval_s=3600
+        )
+        try:
+            # 같은 세션을 여러 번 저장해도 flush 한 번에 한 번만 기록
+            for batting in (1, 2, 3):
+                with manager.session_lock("flush_user") as state:
+                    state.stats.apply_changes({'batting': batting})
+                    state.event_history.append(f"저장 {batting}")
+                    manager.save("flush_user")
+            assert storage.load("flush_user") is None, "write_behind인데 즉시 기록됨"
+            assert manager.flush() == 1, "변경된 세션 1개가 기록되어야 함"
+            assert manager.flush() == 0, "변경 없는 세션이 다시 기록됨"
+            assert storage.batches == [["flush_user"]], f"기록 횟수 불일치: {storage.batches}"
+            data = storage.load("flush_user")
+            assert data['stats']['batting'] == 40 + 6
+            assert data['event_history'][-3:] == ["저장 1", "저장 2", "저장 3"]
+            print("✓ 저장 3회 → flush 1회 기록")
+
+            # 종료 시 남은 변경 기록
+            with manager.session_lock("flush_user") as state:
+                state.flags['closing'] = True
+                manager.save("flush_user")
+        finally:
+            manager.close()
+        assert storage.load("flush_user")['flags']['closing'] is True, "종료 시 변경이 기록되지 않음"
+        print("✓ close()에서 남은 변경 기록")
+
+        # sync 모드는 저장 즉시 기록
+        sync_storage = CountingStorage(Path(tmp) / "sync")
+        sync_manager = GameStateManager(Path(tmp) / "sync", storage=sync_storage)
+        with sync_manager.session_lock("sync_user") as state:
+            state.current_month = 4
+            sync_manager.save("sync_user")
+        assert sync_storage.load("sync_user")['current_month'] == 4
+        print("✓ sync 모드 즉시 기록")
+
+
+def test_session_cache_eviction():
+    """세션 캐시(LRU/TTL/제거 거부)와 세션 락 정리 테스트"""
+    print("\n[Test 4] 세션 캐시 제거 테스트")
+    print("="*50)
+
+    import gc
+    import threading
+    import time
+    from services.game_state_manager import GameStateManager
+    from services.session_cache import SessionCache
+
+    # LRU: 최근에 읽은 항목은 남고 가장 오래된 항목부터 제거
+    cache = SessionCache("lru", max_entries=2)
+    cache['a'], cache['b'] = 1, 2
+    assert cache.get('a') == 1
+    cache['c'] = 3
+    assert cache.keys() == ['a', 'c'] and cache.stats()['evictions'] == 1
+    print("✓ LRU 제거")
+
+    # 유휴 TTL
+    cache = SessionCache("ttl", idle_ttl_s=0.05)
+    cache['a'] = 1
+    time.sleep(0.1)
+    assert cache.sweep() == 1 and 'a' not in cache
+    print("✓ 유휴 만료")
+
+    # 콜백이 False를 반환하면 남기고, 콜백은 캐시 락 밖에서 실행
+    def on_evict(key, value):
+        other = threading.Thread(target=lambda: cache.get('keep'))
+        other.start()
+        other.join(timeout=2)
+        assert not other.is_alive(), "제거 콜백 중 다른 스레드가 캐시를 쓰지 못함"
+        return key != 'keep'
+
+    cache = SessionCache("veto", max_entries=1, on_evict=on_evict)
+    cache['keep'] = 1
+    cache['drop'] = 2
+    assert 'keep' in cache and cache.stats()['vetoed'] == 1, "거부한 항목이 제거됨"
+    cache['next'] = 3
+    assert 'drop' not in cache and 'keep' in cache
+    print("✓ 제거 거부, 콜백 중 캐시 사용 가능")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = GameStateManager(
+            Path(tmp),
+            durability=GameStateManager.DURABILITY_WRITE_BEHIND,
+            flush_interval_s=3600,
+            cache_config={'max_entries': 2}
+        )
+        try:
+            with manager.session_lock("user_0") as state:
+                assert manager._get_lock("user_0") is manager._get_lock("user_0")
+                state.stats.apply_changes({'batting': 1})
+                manager.save("user_0")
+            for index in range(1, 6):
+                with manager.session_lock(f"user_{index}") as state:
+                    state.stats.apply_changes({'batting': index})
+                    manager.save(f"user_{index}")
+            assert len(manager._states) <= 2, f"캐시 한도 초과: {len(manager._states)}"
+            assert manager.storage.load("user_0")['stats']['batting'] == 41, "제거된 세션의 변경이 기록되지 않음"
+            print(f"✓ 캐시 한도 유지 (세션 {len(manager._states)}개), 제거 전 기록")
+
+            # 아무도 잡고 있지 않은 세션 락은 남지 않음
+            gc.collect()
+            assert len(manager._locks) == 0, f"세션 락이 남아 있음: {list(manager._locks.keys())}"
+            assert manager.get_or_create("user_0").stats.batting == 41
+            print("✓ 사용하지 않는 세션 락 정리")
+        finally:
+            manager.close()
+
+
+def _cold_payload(index: int) -> str:
+    return 'x' * (index * 37 % 300)
+
+
+def _cold_put_worker(cold_dir: str, worker: int, workers: int, count: int, barrier):
+    """
+    다른 프로세스에서 같은 보관소에 기록한 뒤, 같은 인스턴스로 다른 워커의 기록을 읽음
+    (test_cold_storage용, 실패하면 예외로 종료 코드가 0이 아니게 됨)
+    """
+    from services.cold_storage import ColdStorage
+
+    cold = ColdStorage(Path(cold_dir), segment_max_bytes=4096)
+    barrier.wait(30)
+    for index in range(count):
+        cold.put(f"w{worker}_{index}", {'session_id': f"w{worker}_{index}", 'payload': _cold_payload(index)})
+        if index % 3 == 0:
+            cold.discard(f"w{worker}_{index}")
+    barrier.wait(60)
+    for other in range(workers):
+        for index in range(count):
+            data = cold.load(f"w{other}_{index}")
+            if index % 3 == 0:
+                assert data is None, f"삭제한 w{other}_{index}가 남아 있음"
+            else:
+                assert data['payload'] == _cold_payload(index), f"w{other}_{index} 내용 불일치"
+
+
+def test_cold_storage():
+    """비활성 세션 보관소 테스트 (여러 프로세스, 정리 후 재로드, 복원)"""
+    print("\n[Test 5] 비활성 세션 보관소 테스트")
+    print("="*50)
+
+    import multiprocessing
+    import os
+    import time
+    from services.cold_storage import ColdStorage
+    from services.game_state_journal import JournalStorage
+    from services.game_state_manager import GameStateManager
+    from services.state_codec import CorruptStateError
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cold_dir = Path(tmp) / "cold"
+
+        # 여러 프로세스가 동시에 보관/복원 표시해도 색인 위치가 맞아야 함
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(3)
+        workers = [
+            context.Process(target=_cold_put_worker, args=(str(cold_dir), worker, 3, 150, barrier))
+            for worker in range(3)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(timeout=60)
+            assert process.exitcode == 0, f"보관 프로세스가 다른 프로세스의 기록을 읽지 못함 (exitcode {process.exitcode})"
+        cold = ColdStorage(cold_dir, segment_max_bytes=4096)
+        expected = {f"w{worker}_{index}" for worker in range(3) for index in range(150) if index % 3}
+        assert set(cold.session_ids()) == expected, "다른 프로세스의 보관/삭제가 색인에 반영되지 않음"
+        for session_id in expected:
+            index = int(session_id.split('_')[1])
+            assert cold.load(session_id)['payload'] == _cold_payload(index), f"{session_id} 내용 불일치"
+        print(f"✓ 3개 프로세스 동시 기록 후 각 프로세스와 새 인스턴스에서 {len(expected)}개 세션 정상 복원")
+
+        # 다른 인스턴스(워커)가 정리하면, 이전 색인을 들고 있던 인스턴스도 다시 읽음
+        reader = ColdStorage(cold_dir, segment_max_bytes=4096)
+        for session_id in sorted(expected)[:200]:
+            cold.discard(session_id)
+        assert cold.compact() > 0, "정리할 세그먼트가 없음"
+        remaining = sorted(expected)[200:]
+        for session_id in remaining:
+            index = int(session_id.split('_')[1])
+            assert reader.load(session_id)['payload'] == _cold_payload(index), "정리 후 이전 색인으로 읽음"
+        assert reader.load(sorted(expected)[0]) is None
+        print("✓ 정리(세대 변경) 후 다른 인스턴스가 색인을 다시 읽음")
+
+        # 세그먼트가 없으면 손상으로 처리
+        segment = cold._index[remaining[0]][0]
+        os.unlink(cold_dir / segment)
+        try:
+            reader.load(remaining[0])
+        except CorruptStateError:
+            pass
+        else:
+            raise AssertionError("세그먼트가 없는데 CorruptStateError가 아님")
+        print("✓ 없는 세그먼트는 CorruptStateError")
+
+        # 보관/정리 담당은 한 인스턴스만
+        assert cold.claim_archiver() and cold.claim_archiver()
+        assert not reader.claim_archiver(), "두 인스턴스가 동시에 보관 담당"
+        print("✓ 보관 담당 프로세스 하나")
+
+        # 저널 저장소: 보관해도 이력은 남고, 로드하면 보관소에서 복원
+        journal = JournalStorage(Path(tmp) / "journal", fsync=False)
+        session_cold = ColdStorage(Path(tmp) / "cold2")
+        manager = GameStateManager(Path(tmp) / "states", storage=journal,
+                                   cold_storage=session_cold, archive_interval_s=0)
+        other = GameStateManager(Path(tmp) / "states", storage=journal,
+                                 cold_storage=ColdStorage(Path(tmp) / "cold2"), archive_interval_s=0)
+        for month in (3, 4):
+            with manager.session_lock("cold_user") as state:
+                state.current_month = month
+                manager.save("cold_user")
+        manager._states.pop("cold_user")
+        time.sleep(0.05)
+        assert session_cold.claim_archiver()
+        assert other.archive_idle(idle_s=0) == 0, "보관 담당이 아닌 워커가 보관함"
+        assert manager.archive_idle(idle_s=0) == 1
+        assert journal.load("cold_user") is None and "cold_user" in session_cold
+        assert len(list(journal.iter_records("cold_user"))) == 2, "보관하면서 저널 이력이 사라짐"
+        restored = manager.get_or_create("cold_user")
+        assert restored.current_month == 4 and "cold_user" not in session_cold
+        with manager.session_lock("cold_user") as state:
+            state.current_month = 5
+            manager.save("cold_user")
+        months = [record.get('full', record.get('set', {})).get('current_month')
+                  for record in journal.iter_records("cold_user")]
+        assert months == [3, 4, 4, 5], f"보관 전후 이력이 이어지지 않음: {months}"
+        print("✓ 저널 보관 후 이력 유지, 복원")
+
+
+def test_session_lock():
+    """세션 락 직렬화와 읽기 스냅샷 테스트"""
+    print("\n[Test 6] 세션 락 테스트")
+    print("="*50)
+
+    import threading
+    import time
+    from services.game_state_manager import GameStateManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = GameStateManager(Path(tmp))
+
+        # 같은 세션의 읽기-수정-쓰기가 겹치지 않아야 변경이 사라지지 않음
+        def add_batting(count):
+            for _ in range(count):
+                with manager.session_lock("lock_user") as state:
+                    value = state.flags.get('counter', 0)
+                    time.sleep(0.0005)
+                    state.flags['counter'] = value + 1
+        threads = [threading.Thread(target=add_batting, args=(20,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert manager.get_or_create("lock_user").flags['counter'] == 80, "동시 변경이 사라짐"
+        print("✓ 같은 세션 변경 직렬화 (4스레드 × 20회)")
+
+        # 한 세션의 락을 잡고 있어도 다른 세션과 스냅샷 읽기는 기다리지 않음
+        held, release = threading.Event(), threading.Event()
+
+        def hold():
+            with manager.session_lock("lock_user") as state:
+                state.current_month = 9
+                held.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        try:
+            assert held.wait(5)
+            started = time.perf_counter()
+            with manager.session_lock("other_user") as state:
+                state.current_month = 4
+            snapshot = manager.get_snapshot("lock_user")
+            assert time.perf_counter() - started < 1.0, "다른 세션/스냅샷 읽기가 락을 기다림"
+            assert snapshot.current_month != 9, "진행 중인 변경이 스냅샷에 보임"
+        finally:
+            release.set()
+            holder.join()
+        assert manager.get_snapshot("lock_user").current_month == 9, "락이 풀린 뒤 스냅샷이 갱신되지 않음"
+        print("✓ 다른 세션 병렬 처리, 스냅샷은 커밋된 상태만 반영")
+
+        # 스냅샷은 복사본이며 중첩 구간에서는 가장 바깥 구간이 끝날 때 갱신
+        snapshot = manager.get_snapshot("lock_user")
+        snapshot.stats.batting = 0
+        assert manager.get_or_create("lock_user").stats.batting != 0, "스냅샷 수정이 실제 상태에 반영됨"
+        with manager.session_lock("lock_user") as state:
+            with manager.session_lock("lock_user") as inner:
+                assert inner is state
+                inner.current_month = 10
+            assert manager.get_snapshot("lock_user").current_month == 9, "안쪽 구간에서 스냅샷이 갱신됨"
+        assert manager.get_snapshot("lock_user").current_month == 10
+        print("✓ 스냅샷 복사본, 중첩 구간 처리")
+
+
+def test_sqlite_storage():
+    """SQLite 저장소 행 변환 / 조회 / JSON 마이그레이션 테스트"""
+    print("\n[Test 7] SQLite 저장소 테스트")
+    print("="*50)
+
+    import json
+    import time
+    from services.game_state_manager import GameState, GameStateManager
+    from services.game_state_storage import FileStorage, SQLiteStorage, create_storage, migrate_json_dir
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "states.sqlite3"
+        storage = SQLiteStorage(db_path)
+
+        # 타입 컬럼과 JSON 컬럼으로 나눠 저장해도 to_dict()가 그대로 복원됨
+        state = GameState(session_id="sqlite_user", current_month=8)
+        state.stats.apply_changes({'batting': 12, 'mental': -5})
+        state.flags['met_coach'] = True
+        state.event_history.extend(["첫 만남", "8월 대회"])
+        state.current_storybook_id = "sb_8"
+        saved = state.to_dict()
+        saved['stats']['legacy_stat'] = 7  # 컬럼에 없는 스탯은 JSON 쪽에 보존
+        storage.save("sqlite_user", saved)
+        loaded = storage.load("sqlite_user")
+        assert loaded == saved, "저장한 상태와 로드한 상태가 다름"
+        assert GameState.from_dict(loaded) == GameState.from_dict(saved)
+        assert storage.load("missing") is None
+        print("✓ 행 ↔ dict 변환")
+
+        # 월 인덱스 / 유휴 세션 조회
+        cutoff = time.time()
+        storage.save_many([("april_user", GameState(session_id="april_user", current_month=4).to_dict())])
+        assert storage.sessions_in_month(8) == ["sqlite_user"]
+        assert storage.sessions_in_month(4) == ["april_user"]
+        assert storage.idle_sessions(cutoff) == ["sqlite_user"]
+        assert storage.session_ids() == ["april_user", "sqlite_user"] and storage.count() == 2
+        print("✓ 월별 / 유휴 세션 조회")
+
+        # save_many는 한 트랜잭션: 하나라도 실패하면 모두 취소
+        bad = GameState(session_id="bad_user").to_dict()
+        bad['current_month'] = None
+        try:
+            storage.save_many([("good_user", GameState(session_id="good_user").to_dict()), ("bad_user", bad)])
+        except Exception:
+            pass
+        else:
+            raise AssertionError("NOT NULL 위반이 저장됨")
+        assert storage.load("good_user") is None, "실패한 묶음의 일부가 저장됨"
+        print("✓ save_many 원자성")
+
+        # 다시 열어도 그대로
+        storage.delete("april_user")
+        storage.close()
+        storage = SQLiteStorage(db_path)
+        assert storage.session_ids() == ["sqlite_user"] and storage.load("sqlite_user") == saved
+        assert storage._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        storage.close()
+        print("✓ 재시작 후 유지 (WAL)")
+
+        # 기존 JSON 파일 마이그레이션: 이미 있는 세션은 건너뛰고 손상 파일은 실패로 집계
+        json_dir = Path(tmp) / "json"
+        files = FileStorage(json_dir)
+        for index in range(3):
+            files.save(f"json_user_{index}", GameState(session_id=f"json_user_{index}", current_month=5).to_dict())
+        (json_dir / "broken.json").write_text("{not json", encoding='utf-8')
+        target = SQLiteStorage(Path(tmp) / "migrated.sqlite3")
+        existing = {**saved, 'session_id': "json_user_0"}
+        target.save("json_user_0", existing)
+        result = migrate_json_dir(json_dir, target)
+        assert result == {'imported': 2, 'skipped': 1, 'failed': 1}, result
+        assert target.load("json_user_0") == existing, "이미 있는 세션을 덮어씀"
+        assert target.sessions_in_month(5) == ["json_user_1", "json_user_2"]
+        target.close()
+        print(f"✓ JSON 마이그레이션 {result}")
+
+        # 설정으로 생성: 빈 DB면 자동 마이그레이션, 매니저가 SQLite로 저장
+        storage = create_storage({'backend': 'sqlite', 'sqlite_path': str(Path(tmp) / "auto.sqlite3")}, json_dir)
+        assert isinstance(storage, SQLiteStorage) and storage.count() == 3
+        manager = GameStateManager(Path(tmp) / "unused", storage=storage)
+        with manager.session_lock("json_user_1") as state:
+            assert state.current_month == 5
+            state.current_month = 6
+            manager.save("json_user_1")
+        row = storage._conn.execute(
+            "SELECT current_month, data FROM game_states WHERE session_id = ?", ("json_user_1",)
+        ).fetchone()
+        assert row['current_month'] == 6 and 'current_month' not in json.loads(row['data'])
+        storage.close()
+        print("✓ create_storage 자동 마이그레이션, 매니저 저장")
+
+
+def test_state_codec():
+    """상태 직렬화 형식 / 원자적 쓰기 테스트"""
+    print("\n[Test 8] 상태 직렬화 / 원자적 쓰기 테스트")
+    print("="*50)
+
+    from services import state_codec
+    from services.game_state_manager import GameState, GameStateManager
+    from services.game_state_storage import FileStorage
+    from services.state_codec import (
+        CorruptStateError, FORMAT_JSON, FORMAT_JSON_PRETTY, FORMAT_MSGPACK,
+        atomic_write, decode, encode, read_file, resolve_format
+    )
+
+    state = GameState(session_id="codec_user", current_month=6)
+    state.event_history.append("한글 기록")
+    data = state.to_dict()
+
+    # 형식마다 같은 dict로 복원, 압축 JSON이 기존 형식보다 작음
+    formats = [FORMAT_JSON_PRETTY, FORMAT_JSON] + ([FORMAT_MSGPACK] if state_codec.msgpack else [])
+    for fmt in formats:
+        assert decode(encode(data, fmt)) == data, f"{fmt} 왕복 변환 불일치"
+    assert len(encode(data, FORMAT_JSON)) < len(encode(data, FORMAT_JSON_PRETTY))
+    assert decode(b'\xef\xbb\xbf' + encode(data)) == data, "BOM이 있는 JSON을 읽지 못함"
+    print(f"✓ {', '.join(formats)} 왕복 변환")
+
+    # 지원하지 않는 형식 / msgpack 미설치
+    try:
+        resolve_format("yaml")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("지원하지 않는 형식이 허용됨")
+    if state_codec.msgpack is None:
+        assert resolve_format(FORMAT_MSGPACK) == FORMAT_JSON
+        print("✓ msgpack 미설치 → json 대체")
+
+    # 해석할 수 없는 내용은 모두 CorruptStateError (ValueError 하위 클래스)
+    for raw in (b"", b"\x00\x01", b'{"session_id": "cut', b"[1, 2]", b"\x81\xa1"):
+        try:
+            decode(raw)
+        except CorruptStateError:
+            continue
+        raise AssertionError(f"손상된 내용을 해석함: {raw!r}")
+    assert issubclass(CorruptStateError, ValueError)
+    print("✓ 손상된 내용 거절")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "state.json"
+        assert read_file(path) is None
+
+        # 원자적 쓰기: 교체 후 임시 파일이 남지 않고, 실패하면 원본 유지
+        atomic_write(path, encode(data))
+        atomic_write(path, encode({**data, 'current_month': 7}))
+        assert read_file(path)['current_month'] == 7
+        try:
+            atomic_write(path, "bytes가 아님")
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("잘못된 payload가 기록됨")
+        assert read_file(path)['current_month'] == 7, "쓰기 실패 후 원본이 바뀜"
+        assert [p.name for p in Path(tmp).iterdir()] == ["state.json"], "임시 파일이 남음"
+        print("✓ 원자적 교체, 실패 시 원본 유지")
+
+        # 형식을 바꿔도 예전 파일을 읽고, 다음 저장 때 새 형식으로 바뀜
+        save_dir = Path(tmp) / "states"
+        FileStorage(save_dir, fmt=FORMAT_JSON_PRETTY).save("codec_user", data)
+        compact = FileStorage(save_dir, fmt=FORMAT_JSON)
+        assert compact.load("codec_user") == data
+        compact.save("codec_user", data)
+        assert (save_dir / "codec_user.json").read_bytes() == encode(data, FORMAT_JSON)
+        print("✓ 형식 전환 시 기존 파일 읽기")
+
+        # 손상된 파일은 옮겨 두고 새 게임으로 시작 (원본을 덮어쓰지 않음)
+        (save_dir / "broken_user.json").write_bytes(b'{"session_id": "broken_user", "stats": {')
+        manager = GameStateManager(save_dir, storage=compact)
+        assert manager.get_or_create("broken_user").current_month == 3
+        quarantined = list(save_dir.glob("broken_user.json.corrupt-*"))
+        assert len(quarantined) == 1, "손상 파일이 보존되지 않음"
+        assert quarantined[0].read_bytes().startswith(b'{"session_id": "broken_user"')
+        print("✓ 손상 파일 격리 후 새 게임")
+
+
+def test_shared_storage():
+    """공유 저장소 (버전 비교 저장 / 분산 락 / 락 연장) 테스트"""
+    print("\n[Test 9] 공유 저장소 테스트")
+    print("="*50)
+
+    import time
+    from services.game_state_manager import GameStateManager
+    from services.shared_store import InProcessBackend, SessionBusyError, SharedStorage, StaleStateError
+
+    backend = InProcessBackend()
+
+    # Redis LRANGE와 같은 범위 규칙 (끝 포함, 음수 인덱스)
+    backend.list_append("list", [b"a", b"b", b"c", b"d"])
+    assert backend.list_range("list", 0, -1) == [b"a", b"b", b"c", b"d"]
+    assert backend.list_range("list", -2, -1) == [b"c", b"d"] and backend.list_range("list", 1, 2) == [b"b", b"c"]
+    assert backend.list_length("list") == 4
+    print("✓ 리스트 범위 조회")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 워커 두 개: 같은 백엔드, 각자의 저장소/매니저
+        storage_a, storage_b = SharedStorage(backend), SharedStorage(backend, lock_wait_s=0.1)
+        worker_a = GameStateManager(Path(tmp) / "a", storage=storage_a,
+                                    durability=GameStateManager.DURABILITY_WRITE_BEHIND)
+        worker_b = GameStateManager(Path(tmp) / "b", storage=storage_b)
+        assert worker_a.durability == GameStateManager.DURABILITY_SYNC, "공유 저장소인데 지연 기록 사용"
+
+        with worker_a.session_lock("shared_user") as state:
+            state.stats.apply_changes({'batting': 5})
+            worker_a.save("shared_user")
+        with worker_b.session_lock("shared_user") as state:
+            assert state.stats.batting == 45
+            state.stats.apply_changes({'batting': 5})
+            worker_b.save("shared_user")
+        with worker_a.session_lock("shared_user") as state:
+            assert state.stats.batting == 50, "다른 워커의 저장이 로컬 캐시에 반영되지 않음"
+        assert worker_b.get_snapshot("shared_user").stats.batting == 50
+        print("✓ 워커 간 상태 공유 (락을 잡을 때 버전 비교 후 다시 로드)")
+
+        # 버전 비교 저장: 오래된 사본은 덮어쓰지 못함
+        stale_data = storage_b.load("shared_user")
+        storage_a.save("shared_user", {**stale_data, 'current_month': 5})
+        try:
+            storage_b.save("shared_user", stale_data)
+        except StaleStateError:
+            pass
+        else:
+            raise AssertionError("오래된 버전으로 덮어씀")
+        assert storage_a.load("shared_user")['current_month'] == 5
+        assert storage_b.is_stale("shared_user")
+        print("✓ 오래된 버전 저장 거절")
+
+        # 버전 캐시에 없는 세션도 현재 버전과 비교해 저장
+        fresh = SharedStorage(backend)
+        fresh.save("shared_user", {**stale_data, 'current_month': 6})
+        assert storage_a.load("shared_user")['current_month'] == 6
+        print("✓ 버전 캐시 누락 시 비교 저장")
+
+        # 다른 워커가 락을 잡고 있으면 제한 시간 후 SessionBusyError
+        with storage_a.session_guard("shared_user"):
+            started = time.monotonic()
+            try:
+                with storage_b.session_guard("shared_user"):
+                    raise AssertionError("같은 세션 락을 두 워커가 잡음")
+            except SessionBusyError:
+                pass
+            assert time.monotonic() - started < 1.0
+        with storage_b.session_guard("shared_user"):
+            pass
+        print("✓ 분산 락 대기 시간 초과")
+
+        # 락 유지 시간보다 오래 잡아도 연장되어 다른 워커가 가져가지 못함
+        short = SharedStorage(backend, lock_ttl_ms=60, lock_wait_s=0.05)
+        rival = SharedStorage(backend, lock_ttl_ms=60, lock_wait_s=0.05)
+        with short.session_guard("long_user"):
+            time.sleep(0.2)
+            try:
+                with rival.session_guard("long_user"):
+                    raise AssertionError("연장 중인 락을 다른 워커가 잡음")
+            except SessionBusyError:
+                pass
+            short.load("long_user")
+            short.save("long_user", {'session_id': "long_user", 'current_month': 4})
+        print("✓ 잡고 있는 락 자동 연장")
+
+        # 락을 잃으면(만료 후 다른 워커가 가져감) 저장 거절
+        with short.session_guard("lost_user"):
+            name = short._lock_key("lost_user")
+            with backend._mutex:
+                backend._locks[name] = ("other-worker", time.monotonic() + 60)
+            deadline = time.monotonic() + 2
+            while not short._held["lost_user"].lost and time.monotonic() < deadline:
+                time.sleep(0.01)
+            try:
+                short.save("lost_user", {'session_id': "lost_user"})
+            except StaleStateError:
+                pass
+            else:
+                raise AssertionError("락을 잃은 뒤에도 저장됨")
+        assert backend.load(short._state_key("lost_user")) == (0, None)
+        assert backend._locks[name][0] == "other-worker", "다른 워커의 락을 해제함"
+        print("✓ 잃은 락으로 저장 거절, 남의 락 유지")
+
+
+def test_sharded_layout():
+    """해시 분산 디렉토리 / 안전한 세션 ID 테스트"""
+    print("\n[Test 10] 해시 분산 디렉토리 테스트")
+    print("="*50)
+
+    from services.game_state_manager import GameState
+    from services.game_state_storage import FileStorage, is_safe_file_name, reshard_flat_dir, shard_key
+
+    # 경로로 해석될 수 있는 이름은 flat 파일 이름으로 쓰지 않음
+    for name in ("user", "감독_01", "a.b"):
+        assert is_safe_file_name(name), name
+    for name in ("", ".hidden", "..", "../evil", "a/b", "a\\b", "nul\0"):
+        assert not is_safe_file_name(name), name
+    print("✓ 안전한 파일 이름 판별")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        save_dir = Path(tmp) / "states"
+        data = lambda session_id: GameState(session_id=session_id).to_dict()
+
+        # flat은 위험한 이름을 거절, sharded는 어떤 이름이든 해시 경로에 저장
+        flat = FileStorage(save_dir)
+        try:
+            flat.save("../evil", data("../evil"))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("flat 레이아웃이 경로 문자를 허용함")
+        assert not (Path(tmp) / "evil.json").exists()
+
+        flat.save("old_user", data("old_user"))
+        sharded = FileStorage(save_dir, layout="sharded")
+        for session_id in ("../evil", "a/b", "new_user"):
+            sharded.save(session_id, data(session_id))
+            key = shard_key(session_id)
+            path = save_dir / key[:2] / key[2:4] / f"{key}.json"
+            assert path.exists() and sharded.load(session_id)['session_id'] == session_id
+        assert not (Path(tmp) / "evil.json").exists()
+        print("✓ sharded 경로 (어떤 세션 ID든 저장소 안)")
+
+        # 예전 flat 파일도 읽고 목록에 포함, 다음 저장 때 sharded로 이동
+        assert sharded.load("old_user")['session_id'] == "old_user"
+        assert sharded.session_ids() == sorted(["../evil", "a/b", "new_user", "old_user"])
+        sharded.save("old_user", data("old_user"))
+        assert not (save_dir / "old_user.json").exists(), "옮긴 flat 파일이 남음"
+
+        # 역색인: 삭제 기록 반영, 새 인스턴스 / 잘린 마지막 줄 / 재작성
+        sharded.delete("a/b")
+        assert sharded.load("a/b") is None
+        with open(sharded.index_path, 'ab') as f:
+            f.write(b'{"key": "tor')
+        reopened = FileStorage(save_dir, layout="sharded")
+        assert reopened.session_ids() == sorted(["../evil", "new_user", "old_user"])
+        sharded.index_path.unlink()
+        assert reopened.rebuild_index() == 3
+        assert FileStorage(save_dir, layout="sharded").session_ids() == sorted(["../evil", "new_user", "old_user"])
+        print("✓ 역색인 (삭제, 잘린 줄, 재작성)")
+
+        # 한 번에 옮기기
+        for index in range(3):
+            flat.save(f"bulk_{index}", data(f"bulk_{index}"))
+        assert reshard_flat_dir(reopened) == {'moved': 3, 'failed': 0}
+        assert not list(save_dir.glob("bulk_*.json"))
+        assert all(reopened.load(f"bulk_{index}") for index in range(3))
+        try:
+            reshard_flat_dir(flat)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("flat 저장소에서 reshard가 실행됨")
+        print("✓ flat → sharded 일괄 이동")
+
+
+def run_test(test) -> bool:
+    """테스트 실행 (예외가 나면 실패로 기록)"""
+    try:
+        test()
+        return True
+    except Exception as e:
+        print(f"✗ {test.__name__} 실패: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def main():
+    """메인 테스트 실행"""
+    print("="*50)
+    print("게임 상태 저장 테스트")
+    print("="*50)
+
+    results = []
+
+    # 각 테스트 실행
+    results.append(("저널 재생", run_test(test_journal_replay)))
+    results.append(("GameState 변환", run_test(test_game_state_codec)))
+    results.append(("지연 기록", run_test(test_write_behind_flush)))
+    results.append(("세션 캐시 제거", run_test(test_session_cache_eviction)))
+    results.append(("비활성 세션 보관소", run_test(test_cold_storage)))
+    results.append(("세션 락", run_test(test_session_lock)))
+    results.append(("SQLite 저장소", run_test(test_sqlite_storage)))
+    results.append(("상태 직렬화", run_test(test_state_codec)))
+    results.append(("공유 저장소", run_test(test_shared_storage)))
+    results.append(("해시 분산 디렉토리", run_test(test_sharded_layout)))
+
+    # 결과 요약
+    print("\n" + "="*50)
+    print("테스트 결과 요약")
+    print("="*50)
+
+    for name, result in results:
+        status = "✓ 성공" if result else "✗ 실패"
+        print(f"{name}: {status}")
+
+    total = len(results)
+    passed = sum(1 for _, result in results if result)
+
+    print(f"\n총 {total}개 테스트 중 {passed}개 성공, {total - passed}개 실패")
+
+    if passed == total:
+        print("\n🎉 모든 테스트 통과!")
+        return 0
+    else:
+        print(f"\n⚠️ {total - passed}개 테스트 실패")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -273,6 +273,413 @@ def test_image_files():
         return False
 
 
+def test_config_reload():
+    """설정 파일 핫 리로드 테스트 (ConfigService)"""
+    print("\n[Test 7] 설정 핫 리로드 테스트")
+    print("="*50)
+
+    import json
+    import os
+    import tempfile
+    from services.config_service import ConfigService
+
+    def write(path, content, tick):
+        path.write_text(content, encoding='utf-8')
+        # mtime 해상도가 낮은 파일 시스템에서도 변경으로 보이도록 시각을 직접 지정
+        os.utime(path, ns=(tick * 10**9, tick * 10**9))
+
+    def compile_config(config):
+        if 'title' not in config:
+            raise ValueError("title 없음")
+        return config
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "reload.json"
+        write(path, json.dumps({'title': 'v1'}), 1)
+
+        service = ConfigService(interval_s=60)
+        received = []
+        assert service.watch("reload", path, compile_config) == {'title': 'v1'}
+        service.subscribe("reload", received.append)
+        assert service.check() == [], "바뀌지 않은 파일을 다시 로드함"
+
+        write(path, json.dumps({'title': 'v2'}), 2)
+        assert service.check() == ["reload"]
+        assert service.get("reload") == {'title': 'v2'} and received == [{'title': 'v2'}]
+        print("✓ 변경된 파일 다시 로드 후 구독자 호출")
+
+        # 잘못된 JSON, 검증 실패 모두 이전 값 유지 (같은 내용으로 재시도하지 않음)
+        write(path, '{"title": ', 3)
+        assert service.check() == [] and service.get("reload") == {'title': 'v2'}
+        write(path, json.dumps({'name': 'v3'}), 4)
+        assert service.check() == [] and service.get("reload") == {'title': 'v2'}
+        assert service.check() == [] and len(received) == 1
+        print("✓ 잘못된 설정은 이전 값 유지")
+
+
+def test_storybook_snapshot_swap():
+    """스토리북 그래프 교체 시 응답 캐시가 한 번에 바뀌는지 테스트"""
+    print("\n[Test 8] 스토리북 스냅샷 교체 테스트")
+    print("="*50)
+
+    import copy
+    import json
+    import threading
+    from services.storybook_manager import (
+        DEFAULT_CONFIG_PATH, StorybookManager, compile_storybook_config
+    )
+
+    manager = StorybookManager()
+    config = manager.load_config()
+    renamed = copy.deepcopy(config)
+    renamed['storybooks']['3_opening']['title'] = "교체된 제목"
+    graphs = [manager.graph, compile_storybook_config(renamed, DEFAULT_CONFIG_PATH)]
+
+    old = manager.snapshot
+    manager.apply_graph(graphs[1])
+    new = manager.snapshot
+    assert old.views['3_opening']['title'] == config['storybooks']['3_opening']['title'], "이전 스냅샷이 바뀜"
+    assert new.views['3_opening']['title'] == "교체된 제목"
+    assert old.payloads['3_opening'].version != new.payloads['3_opening'].version
+    payload, links = manager.get_response_cache('3_opening')
+    assert payload is new.payloads['3_opening'] and links == new.prefetch_links.get('3_opening')
+    print("✓ 교체 전 스냅샷은 그대로, 새 스냅샷은 새 내용")
+
+    try:
+        new.views['3_opening'] = {}
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("스냅샷 views를 수정할 수 있음")
+    print("✓ 스냅샷 읽기 전용")
+
+    # 교체를 반복하는 동안 읽은 스냅샷은 항상 그래프/본문/view가 같은 버전
+    stop = threading.Event()
+
+    def swap():
+        index = 0
+        while not stop.is_set():
+            index += 1
+            manager.apply_graph(graphs[index % 2])
+
+    swapper = threading.Thread(target=swap, daemon=True)
+    swapper.start()
+    try:
+        for _ in range(300):
+            snapshot = manager.snapshot
+            body = json.loads(snapshot.payloads['3_opening'].body)
+            assert body['storybook'] == snapshot.views['3_opening'], "본문과 view가 다른 버전"
+            assert snapshot.graph.nodes['3_opening'].data['title'] == body['storybook']['title']
+    finally:
+        stop.set()
+        swapper.join(timeout=10)
+    print("✓ 교체 중에도 스냅샷 내부가 일관됨")
+
+
+def test_storybook_payload_caching():
+    """스토리북 응답 캐시 (버전, 인코딩별 ETag, 압축 본문) 테스트"""
+    print("\n[Test 9] 스토리북 응답 캐시 테스트")
+    print("="*50)
+
+    import gzip
+    import json
+    from services.storybook_payloads import MIN_COMPRESS_BYTES, build_payload
+
+    storybook = {'id': '3_opening', 'pages': [{'text': '첫 장면 ' * 200, 'image': './static/a.png'}]}
+    payload = build_payload(storybook)
+    assert build_payload(dict(storybook)).version == payload.version, "같은 내용인데 버전이 다름"
+    changed = build_payload({**storybook, 'title': '새 제목'})
+    assert changed.version != payload.version, "내용이 바뀌었는데 버전이 같음"
+    body = json.loads(payload.body)
+    assert body == {'success': True, 'version': payload.version, 'storybook': storybook}
+    print("✓ 내용 해시 버전")
+
+    # Accept-Encoding 선택 (q=0은 제외)
+    gzip_body, encoding = payload.encoded('gzip, deflate')
+    assert encoding == 'gzip' and gzip.decompress(gzip_body) == payload.body
+    assert payload.encoded('gzip;q=0, identity') == (payload.body, None)
+    assert payload.encoded('') == (payload.body, None)
+    small = build_payload({'id': 'x'})
+    assert len(small.body) < MIN_COMPRESS_BYTES and small.encoded('gzip') == (small.body, None)
+    print("✓ 인코딩 선택, 작은 본문은 압축하지 않음")
+
+    # 표현(인코딩)마다 다른 강한 ETag, If-None-Match는 버전만 비교
+    etags = {payload.etag_for(None), payload.etag_for('gzip'), payload.etag_for('br')}
+    assert len(etags) == 3 and payload.etag == f'"{payload.version}"', f"ETag가 인코딩별로 다르지 않음: {etags}"
+    for etag in etags | {f'W/{payload.etag}', '*', f'"other", {payload.etag_for("gzip")}'}:
+        assert payload.matches(etag), f"같은 버전인데 304가 아님: {etag}"
+    for etag in (None, '', changed.etag, changed.etag_for('gzip')):
+        assert not payload.matches(etag), f"다른 버전인데 304: {etag}"
+    print("✓ 인코딩별 ETag, 조건부 요청 비교")
+
+
+def test_storybook_graph():
+    """스토리북 설정 컴파일 / 검증 테스트"""
+    print("\n[Test 10] 스토리북 그래프 컴파일 테스트")
+    print("="*50)
+
+    import copy
+    import json
+    from services.storybook_graph import (
+        ACTION_SHOW_NEXT, ACTION_START_CHAT, CODE_BRANCHES, FINAL_MONTH, FINAL_STORYBOOK_ID, FIRST_MONTH,
+        StorybookConfigError, StorybookGraph
+    )
+    from services.storybook_manager import DEFAULT_CONFIG_PATH
+
+    with open(DEFAULT_CONFIG_PATH, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    # 배포 설정은 오류 없이 컴파일되고 월 전환이 모두 있음
+    graph = StorybookGraph.compile(config, BASE_DIR)
+    assert set(graph.transitions) == set(range(FIRST_MONTH, FINAL_MONTH))
+    assert set(graph.nodes) == set(config['storybooks'])
+    print(f"✓ 배포 설정 컴파일 (스토리북 {len(graph.nodes)}개, 경고 {len(graph.warnings)}개)")
+
+    # 다음 후보: 채팅 후 월 전환 / 9월은 엔딩 결정 / 코드 분기 / 지정된 다음 스토리북
+    for node in graph.nodes.values():
+        successors = graph.successors[node.id]
+        assert all(next_id in graph.nodes for next_id in successors), f"{node.id}: 없는 후보 {successors}"
+        if node.id in CODE_BRANCHES:
+            assert successors == CODE_BRANCHES[node.id]
+        elif node.completion.type == ACTION_START_CHAT:
+            expected = FINAL_STORYBOOK_ID if node.month == FINAL_MONTH else graph.transitions[node.month]
+            assert successors == (expected,), f"{node.id}: {successors}"
+        elif node.completion.type == ACTION_SHOW_NEXT and node.completion.next_storybook_id:
+            assert successors == (node.completion.next_storybook_id,)
+    print("✓ 다음 스토리북 후보")
+
+    # 문자열 / 딕셔너리 완료 동작은 같은 형태로 정규화
+    minimal = copy.deepcopy(config)
+    storybook = next(iter(minimal['storybooks'].values()))
+    storybook['completion_action'] = {'type': ACTION_SHOW_NEXT, 'next_storybook_id': FINAL_STORYBOOK_ID}
+    dict_form = StorybookGraph.compile(minimal, BASE_DIR).nodes[storybook['id']].completion
+    storybook['completion_action'] = ACTION_SHOW_NEXT
+    storybook['next_storybook_id'] = FINAL_STORYBOOK_ID
+    string_form = StorybookGraph.compile(minimal, BASE_DIR).nodes[storybook['id']].completion
+    assert dict_form == string_form and dict_form.next_storybook_id == FINAL_STORYBOOK_ID
+    print("✓ 완료 동작 정규화")
+
+    # 잘못된 참조는 한 번에 모두 보고
+    broken = copy.deepcopy(config)
+    books = broken['storybooks']
+    first, second, third = [book_id for book_id in books if 'transition' not in book_id][:3]
+    books[first]['completion_action'] = {'type': ACTION_SHOW_NEXT, 'next_storybook_id': 'no_such_book'}
+    books[second]['completion_action'] = 'fly_away'
+    books[third]['stat_changes'] = {'luck': 3}
+    del books['3_to_4_transition']
+    broken['month_goals']['4'] = {'description': '', 'batting': 150}
+    try:
+        StorybookGraph.compile(broken, BASE_DIR)
+    except StorybookConfigError as e:
+        message = str(e)
+    else:
+        raise AssertionError("잘못된 설정이 컴파일됨")
+    for expected in ("no_such_book", "fly_away", "luck", "3_to_4_transition", "batting 목표"):
+        assert expected in message, f"오류 목록에 '{expected}' 없음:\n{message}"
+    print("✓ 설정 오류 한 번에 보고")
+
+    # 이미지 파일이 없으면 경고만
+    missing = copy.deepcopy(config)
+    page = next(iter(missing['storybooks'].values()))['pages'][0]
+    page['image'] = "./static/images/no_such_image.png"
+    graph = StorybookGraph.compile(missing, BASE_DIR)
+    assert any("no_such_image.png" in warning for warning in graph.warnings)
+    print("✓ 없는 이미지는 경고")
+
+
+def test_storybook_prefetch():
+    """다음 스토리북 예측 / 미리 받기 목록 테스트"""
+    print("\n[Test 11] 다음 스토리북 미리 받기 테스트")
+    print("="*50)
+
+    from services.game_state_manager import GameState
+    from services.storybook_graph import FINAL_STORYBOOK_ID, TOURNAMENT_RESULT_IDS
+    from services.storybook_manager import StorybookManager
+
+    manager = StorybookManager()
+    graph = manager.graph
+
+    # 스토리북을 읽는 중이면 그 스토리북의 다음 후보
+    state = GameState(session_id="prefetch_user")
+    state.set_storybook_mode("3_opening")
+    assert manager.predict_next_storybooks(state) == graph.successors["3_opening"]
+
+    # 채팅 중: 월 전환 / 9월 엔딩 / 8월 대회 전(삼진 후 재도전 포함)이면 타석 결과
+    state = GameState(session_id="prefetch_user", current_month=4)
+    state.set_chat_mode()
+    assert manager.predict_next_storybooks(state) == (graph.transitions[4],)
+    state.current_month = 9
+    assert manager.predict_next_storybooks(state) == (FINAL_STORYBOOK_ID,)
+    state.current_month = 8
+    state.flags['tournament_result'] = 'strikeout'
+    assert manager.predict_next_storybooks(state) == TOURNAMENT_RESULT_IDS
+    state.flags['tournament_result'] = 'homerun'
+    assert manager.predict_next_storybooks(state) != TOURNAMENT_RESULT_IDS
+    state.current_phase = "ending"
+    assert manager.predict_next_storybooks(state) == ()
+    print("✓ 게임 상태별 다음 스토리북 예측")
+
+    # 미리 받기 목록: 버전이 박힌 URL과 이미지, 없는 ID는 제외
+    manifest = manager.prefetch_manifest(TOURNAMENT_RESULT_IDS + ("no_such_book",))
+    assert [entry['id'] for entry in manifest] == list(TOURNAMENT_RESULT_IDS)
+    for entry in manifest:
+        payload = manager.get_payload(entry['id'])
+        assert entry['url'] == f"/api/storybook/{entry['id']}?v={payload.version}"
+        assert all(url.startswith('/') and not url.startswith('./') for url in entry['images'])
+    print(f"✓ 미리 받기 목록 ({len(manifest)}개)")
+
+    # 스토리북 응답의 Link 헤더: 정적 후보의 URL과 이미지를 중복 없이 rel=prefetch로
+    payload, links = manager.get_response_cache("8_opening")
+    assert links, "8월 대회 스토리북에 Link 헤더가 없음"
+    parts = links.split(", ")
+    assert len(parts) == len(set(parts)), "Link 헤더에 중복 항목"
+    assert all(part.endswith("rel=prefetch; as=fetch") or part.endswith("rel=prefetch; as=image") for part in parts)
+    for entry in manager.prefetch_manifest(graph.successors["8_opening"]):
+        assert f"<{entry['url']}>; rel=prefetch; as=fetch" in parts
+        assert all(f"<{url}>; rel=prefetch; as=image" in parts for url in entry['images'])
+    print(f"✓ Link 헤더 ({len(parts)}개 항목)")
+
+
+def test_image_manifest():
+    """이미지 변환본 manifest (srcset) 적용 테스트"""
+    print("\n[Test 12] 이미지 변환본 manifest 테스트")
+    print("="*50)
+
+    import copy
+    import json
+    import tempfile
+    from services.image_pipeline import DEFAULT_SIZES, ImageManifest
+    from services.storybook_manager import StorybookManager
+
+    manager = StorybookManager()
+    storybook = manager.get_storybook("3_opening")
+    image = storybook['pages'][0]['image']
+    prefix = "./static/images/optimized/3"
+    entries = {
+        image: {
+            'source_hash': 'abc', 'width': 1600, 'height': 900,
+            'webp': [[480, f"{prefix}-480w.a.webp"], [960, f"{prefix}-960w.b.webp"], [1440, f"{prefix}-1440w.c.webp"]],
+            'avif': [[480, f"{prefix}-480w.d.avif"]],
+        },
+        "./static/images/avif_only.png": {'width': 10, 'height': 10, 'avif': [[10, "./x.avif"]]},
+    }
+    manifest = ImageManifest(entries)
+
+    # srcset 문자열과 기본 변환본(중간 크기 WebP)
+    image_set = manifest.image_set(image)
+    assert image_set == {
+        'avif': f"{prefix}-480w.d.avif 480w",
+        'webp': f"{prefix}-480w.a.webp 480w, {prefix}-960w.b.webp 960w, {prefix}-1440w.c.webp 1440w",
+        'src': f"{prefix}-960w.b.webp",
+        'sizes': DEFAULT_SIZES, 'width': 1600, 'height': 900,
+    }, image_set
+    assert manifest.image_set("./static/images/avif_only.png") is None, "WebP 없이 srcset을 만듦"
+    assert manifest.image_set("./static/images/unknown.png") is None
+    print("✓ srcset 생성")
+
+    # 페이지에 image_set을 붙인 사본 (원본은 그대로, 변환본이 없는 페이지는 그대로)
+    original = copy.deepcopy(storybook)
+    view = manifest.with_image_sets(storybook)
+    assert storybook == original, "원본 스토리북이 수정됨"
+    assert view['pages'][0]['image_set'] == image_set
+    assert all('image_set' not in page for page in view['pages'] if page.get('image') != image)
+    assert ImageManifest().with_image_sets(storybook) is storybook
+    print("✓ 스토리북 사본에 image_set 적용")
+
+    # manifest 파일 로드 (없으면 빈 manifest → 원본 이미지 사용)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "manifest.json"
+        assert len(ImageManifest.load(path)) == 0
+        path.write_text(json.dumps({'version': 1, 'images': entries}), encoding='utf-8')
+        assert ImageManifest.load(path).image_set(image) == image_set
+    print("✓ manifest.json 로드")
+
+    # 매니저에 적용하면 응답 본문과 미리 받기 목록이 바뀜 (변환본이 있는 이미지는 원본을 미리 받지 않음)
+    before, original_manifest = manager.get_payload("3_opening"), manager.image_manifest
+    manager.apply_image_manifest(manifest)
+    try:
+        payload = manager.get_payload("3_opening")
+        assert payload.version != before.version, "manifest 적용 후에도 같은 버전"
+        assert json.loads(payload.body)['storybook']['pages'][0]['image_set'] == image_set
+        images = manager.prefetch_manifest(["3_opening"])[0]['images']
+        assert image[1:] not in images, "변환본이 있는 원본 이미지를 미리 받음"
+    finally:
+        manager.apply_image_manifest(original_manifest)
+    assert manager.get_payload("3_opening").version == before.version
+    print("✓ 매니저 응답 / 미리 받기 목록 반영")
+
+
+def test_asset_manifest():
+    """정적 파일 목록 / 지문 테스트"""
+    print("\n[Test 13] 정적 파일 지문 테스트")
+    print("="*50)
+
+    import hashlib
+    import os
+    import tempfile
+    from services.asset_manifest import AssetManifest, tracked_dirs
+    from services.config_service import ConfigService
+
+    def write(path, content, tick):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        os.utime(path, ns=(tick * 10**9, tick * 10**9))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        static_dir = Path(tmp)
+        write(static_dir / "js" / "chatbot.js", b"console.log(1);", 1)
+        write(static_dir / "css" / "style.css", b"body {}", 1)
+        write(static_dir / "images" / "chatbot" / "b.PNG", b"png", 1)
+        write(static_dir / "images" / "chatbot" / "sub" / "a.jpg", b"jpg", 1)
+        write(static_dir / "images" / "chatbot" / "notes.txt", b"txt", 1)
+        write(static_dir / "images" / "other.png", b"png", 1)
+
+        # js/css 내용 해시와 챗봇 이미지 목록 (정렬, 이미지 확장자만)
+        manifest = AssetManifest.build(static_dir)
+        assert manifest.versions == {
+            "js/chatbot.js": hashlib.sha256(b"console.log(1);").hexdigest()[:10],
+            "css/style.css": hashlib.sha256(b"body {}").hexdigest()[:10],
+        }, manifest.versions
+        assert manifest.chatbot_images == ("b.PNG", "sub/a.jpg"), manifest.chatbot_images
+        assert manifest.version("js/chatbot.js") == manifest.versions["js/chatbot.js"]
+        assert manifest.version("images/other.png") is None, "지문 대상이 아닌 파일에 버전 반환"
+        print("✓ 지문 / 챗봇 이미지 목록 생성")
+
+        # 빈 static 디렉토리도 빈 manifest
+        empty = AssetManifest.build(static_dir / "missing")
+        assert empty.versions == {} and empty.chatbot_images == ()
+        print("✓ 디렉토리가 없으면 빈 manifest")
+
+        # 감시 스레드에서 파일이 바뀌면 새 지문으로 교체, 바뀌지 않으면 그대로
+        service = ConfigService(interval_s=60)
+        built = service.watch_tree("assets", tracked_dirs(static_dir), lambda: AssetManifest.build(static_dir))
+        old_version = built.version("js/chatbot.js")
+        assert service.check() == [], "바뀌지 않은 디렉토리를 다시 훑음"
+        assert service.get("assets") is built
+
+        write(static_dir / "js" / "chatbot.js", b"console.log(2);", 2)
+        write(static_dir / "images" / "chatbot" / "c.gif", b"gif", 2)
+        assert service.check() == ["assets"]
+        rebuilt = service.get("assets")
+        assert rebuilt.version("js/chatbot.js") not in (None, old_version), "내용이 바뀌었는데 지문이 그대로"
+        assert rebuilt.version("css/style.css") == built.version("css/style.css")
+        assert rebuilt.chatbot_images == ("b.PNG", "c.gif", "sub/a.jpg")
+        assert built.version("js/chatbot.js") == old_version, "이전 manifest가 수정됨"
+        print("✓ 파일 변경 시 manifest 교체")
+
+
+def run_test(test) -> bool:
+    """assert로 검증하는 테스트 실행 (예외가 나면 실패로 기록)"""
+    try:
+        test()
+        return True
+    except Exception as e:
+        print(f"✗ {test.__name__} 실패: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def main():
     """메인 테스트 실행"""
     print("="*50)
@@ -288,6 +695,13 @@ def main():
     results.append(("목표 확인", test_goal_checking()))
     results.append(("엔딩 결정", test_ending_determination()))
     results.append(("이미지 파일", test_image_files()))
+    results.append(("설정 핫 리로드", run_test(test_config_reload)))
+    results.append(("스냅샷 교체", run_test(test_storybook_snapshot_swap)))
+    results.append(("응답 캐시", run_test(test_storybook_payload_caching)))
+    results.append(("그래프 컴파일", run_test(test_storybook_graph)))
+    results.append(("미리 받기", run_test(test_storybook_prefetch)))
+    results.append(("이미지 manifest", run_test(test_image_manifest)))
+    results.append(("정적 파일 지문", run_test(test_asset_manifest)))
 
     # 결과 요약
     print("\n" + "="*50)
@@ -0,0 +1,293 @@
+"""
+훈련 테스트
+
+훈련 규칙(TrainingManager), 월 훈련 계획 적용, 훈련 계획 추천(TrainingPlanner),
+엔딩 분포 시뮬레이터를 테스트합니다.
+
+각 테스트는 실패하면 AssertionError를 던지므로 pytest로도, 직접 실행으로도 돌릴 수 있습니다.
+    python test_training.py
+"""
+
+import sys
+import io
+from pathlib import Path
+
+# Windows 콘솔 인코딩 문제 해결
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+# 프로젝트 루트를 sys.path에 추가
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+
+
+def make_state(month: int, stamina: int):
+    """month월, 체력 stamina인 새 게임 상태"""
+    from services.game_state_manager import GameState
+
+    state = GameState(session_id="training_user", current_month=month)
+    state.stats.apply_changes({'stamina': stamina - state.stats.stamina})
+    return state
+
+
+def expect_value_error(func, text: str = ""):
+    """func()가 text를 포함한 ValueError를 던지는지 확인"""
+    try:
+        func()
+    except ValueError as e:
+        assert text in str(e), f"예상과 다른 거절 사유: {e}"
+        return
+    raise AssertionError("ValueError가 발생하지 않음")
+
+
+def test_training_plan():
+    """월 훈련 계획 검증/적용 테스트"""
+    print("\n[Test 1] 월 훈련 계획 검증 테스트")
+    print("="*50)
+
+    from services.training_manager import TrainingManager, max_trainings
+
+    manager = TrainingManager()
+
+    def validate(state, sessions):
+        return lambda: manager.validate_plan(game_state=state, sessions=sessions)
+
+    # 체력은 단계마다 이어서 계산: 45 → 25 → 5 → 15 → 4번째에서 부족
+    state = make_state(4, 45)
+    sessions = [{'intensity': v, 'focuses': ['batting']} for v in (100, 100, 10, 100)]
+    expect_value_error(validate(state, sessions), "4번째")
+    print("✓ 단계별 체력 누적 검증")
+
+    # 회복 세션을 먼저 하면 같은 체력으로도 통과
+    state = make_state(4, 15)
+    manager.validate_plan(
+        game_state=state,
+        sessions=[{'intensity': 10, 'focuses': ['speed']}, {'intensity': 60, 'focuses': ['speed']}]
+    )
+    print("✓ 회복 후 훈련 계획 통과")
+
+    # 월별 최대 횟수
+    state = make_state(4, 100)
+    limit = max_trainings(4)
+    sessions = [{'intensity': 10, 'focuses': ['defense']}] * (limit + 1)
+    expect_value_error(validate(state, sessions), f"최대 {limit}회")
+    state.training_count_this_month = limit - 1
+    expect_value_error(validate(state, sessions[:2]), "남은 횟수 1회")
+    print(f"✓ 월 최대 {limit}회 제한 검증")
+
+    # 강도가 숫자가 아니면 ValueError (API에서 경고로 처리)
+    state = make_state(4, 100)
+    for bad in (None, "high"):
+        expect_value_error(validate(state, [{'intensity': bad, 'focuses': ['batting']}]), "1번째")
+    print("✓ 잘못된 강도 거절")
+
+    # 거절된 계획은 상태를 바꾸지 않음
+    state = make_state(4, 45)
+    before_stats = state.stats.to_dict()
+    sessions = [{'intensity': v, 'focuses': ['batting']} for v in (100, 100, 10, 100)]
+    expect_value_error(lambda: manager.execute_plan(game_state=state, sessions=sessions))
+    assert state.stats.to_dict() == before_stats, "거절된 계획이 스탯을 바꿈"
+    assert state.training_count_this_month == 0, "거절된 계획이 훈련 횟수를 바꿈"
+    assert state.training_history == [], "거절된 계획이 훈련 기록을 남김"
+    print("✓ 거절 시 상태 변경 없음")
+
+    # 통과한 계획은 순서대로 모두 적용
+    state = make_state(4, 45)
+    sessions = [{'intensity': v, 'focuses': ['batting']} for v in (100, 10, 60)]
+    outcomes = manager.execute_plan(game_state=state, sessions=sessions)
+    assert len(outcomes) == 3
+    assert state.training_count_this_month == 3
+    assert state.stats.stamina == 45 - 20 + 10 - 6, f"체력 불일치: {state.stats.stamina}"
+    assert len(state.training_history) == 3
+    print(f"✓ 계획 적용 완료 (체력 {state.stats.stamina}, 훈련 {state.training_count_this_month}회)")
+
+
+def test_training_planner():
+    """훈련 계획 추천 (표 조회 / 가까운 상태 / 직접 계산) 테스트"""
+    print("\n[Test 2] 훈련 계획 추천 테스트")
+    print("="*50)
+
+    from services import game_rules, training_planner
+    from services.training_manager import TrainingManager
+    from services.training_planner import TrainingPlanner, plan_position
+
+    # 6월 첫 슬롯에서 체력 60으로 출발하는 작은 표 (전체 빌드 대신)
+    layer, start = plan_position(make_state(6, 60))
+    table = TrainingPlanner.solve(start, layer)
+    assert layer == training_planner.SLOTS.index((6, 0))
+
+    # 표에 그대로 있는 상태
+    state = make_state(6, 60)
+    ending = max(game_rules.ENDING_IDS, key=lambda e: table.advise(state, e)['probability'])
+    advice = table.advise(state, ending)
+    assert advice['precomputed'] is True
+    assert advice['probability'] > 0 and advice['plan'], f"계획 없음: {advice}"
+    print(f"✓ 표 조회 ({ending} {advice['probability'] * 100:.1f}%, 세션 {advice['sessions']}회)")
+
+    # 표보다 체력이 낮은 상태: 빈 계획 대신 현재 상태에서 직접 계산
+    low = make_state(6, 15)
+    assert table.nearest_index(*plan_position(low)) is None
+    advices = [table.advise(low, e) for e in game_rules.ENDING_IDS]
+    assert all(a['precomputed'] is False and a['probability'] is not None for a in advices), "저체력 계획 없음"
+    # 쉬는 게 최선인 엔딩도 있으므로 훈련이 필요한 엔딩 중 가장 확률이 높은 것을 확인
+    advice = max((a for a in advices if a['plan']), key=lambda a: a['probability'])
+    assert advice['probability'] > 0
+    assert table.live_planner(*plan_position(low)) is table.live_planner(*plan_position(low)), "계산 결과를 재사용하지 않음"
+
+    # 추천한 계획은 실제 훈련 규칙으로 그대로 실행 가능 (월 진행 시 체력 회복)
+    for month in (6, 7, 8):
+        if month != low.current_month:
+            low.current_month = month
+            low.training_count_this_month = 0
+            low.stats.apply_changes({'stamina': game_rules.monthly_stamina_recovery(month)})
+        sessions = [
+            {'intensity': item['intensity'], 'focuses': item['focuses']}
+            for item in advice['plan'] if item['month'] == month
+        ]
+        if sessions:
+            TrainingManager().execute_plan(game_state=low, sessions=sessions)
+    assert low.stats.stamina == advice['expected']['stamina_at_tournament'], "계획 실행 결과가 예상과 다름"
+    print(f"✓ 체력 15 직접 계산 ({advice['target']} {advice['probability'] * 100:.1f}%, "
+          f"세션 {advice['sessions']}회 실행)")
+
+    # 직접 계산도 한도를 넘으면 빈 계획
+    original = training_planner.LIVE_SOLVE_MAX_STATES
+    training_planner.LIVE_SOLVE_MAX_STATES = 10
+    try:
+        fresh = TrainingPlanner(table.start_layer, table.states, table.policies, table.assumptions)
+        advice = fresh.advise(make_state(6, 16), ending)
+    finally:
+        training_planner.LIVE_SOLVE_MAX_STATES = original
+    assert advice['probability'] is None and advice['plan'] == [], f"한도 초과인데 계획 반환: {advice}"
+    print("✓ 계산 한도 초과 시 빈 계획")
+
+    # 남은 훈련이 없으면 빈 계획, 알 수 없는 엔딩은 ValueError
+    assert table.advise(make_state(8, 50), ending)['plan'] == []
+    expect_value_error(lambda: table.advise(state, "no_such_ending"), "no_such_ending")
+    print("✓ 남은 훈련 없음 / 잘못된 엔딩 처리")
+
+
+def test_ending_simulator():
+    """엔딩 분포 시뮬레이터 테스트"""
+    print("\n[Test 3] 엔딩 분포 시뮬레이터 테스트")
+    print("="*50)
+
+    import json
+    import tempfile
+    import numpy as np
+    from services import game_rules
+    from services.ending_simulator import BEHAVIOR_PROFILES, apply_rule, load_profile, simulate
+    from services.game_state_manager import PlayerStats
+
+    # apply_rule: 원소별 호출과 같은 결과, 값 조합마다 한 번만 호출
+    calls = []
+
+    def rule(a, b):
+        calls.append((a, b))
+        return a * 10 + b
+
+    a = np.array([3, 1, 3, 0, 1, 3])
+    b = np.array([2, 0, 2, 5, 0, 1])
+    assert apply_rule(rule, a, b).tolist() == [32, 10, 32, 5, 10, 31]
+    assert sorted(calls) == [(0, 5), (1, 0), (3, 1), (3, 2)], f"같은 조합을 다시 호출함: {calls}"
+    print("✓ apply_rule 조합별 한 번 호출")
+
+    # 같은 seed면 같은 결과, 횟수 합은 n
+    n = 20_000
+    report = simulate(BEHAVIOR_PROFILES["average"], n=n, seed=7)
+    again = simulate(BEHAVIOR_PROFILES["average"], n=n, seed=7)
+    for key in ('endings', 'tournament', 'stat_ranges', 'score'):
+        assert report[key] == again[key], f"같은 seed인데 {key}가 다름"
+        if key != 'score':
+            assert sum(report[key].values()) == n, f"{key} 합계가 n이 아님"
+    assert list(report['endings']) == list(game_rules.ENDING_IDS)
+    print("✓ seed 재현 / 합계")
+
+    # 훈련도 채팅도 없으면 스탯은 기본값 + 월별 체력 회복 그대로 (범위 하나, 등급 하나)
+    idle = {"training_sessions": {"0": 1}, "advice_score": {"1": 1}}
+    stats = PlayerStats()
+    for month in range(4, 10):
+        stats.apply_changes({'stamina': game_rules.monthly_stamina_recovery(month)})
+    score = game_rules.ending_score(stats)
+    range_ = game_rules.stat_range(score)
+    idle_report = simulate(idle, n=5_000, seed=1)
+    assert idle_report['score']['p10'] == idle_report['score']['p90'] == score, idle_report['score']
+    assert idle_report['stat_ranges'][range_] == 5_000
+    grade = game_rules.ENDING_GRADES[range_ - 1]
+    assert all(count == 0 for ending, count in idle_report['endings'].items()
+               if not ending.startswith(grade)), idle_report['endings']
+    print(f"✓ 행동 없는 프로필은 점수 {score}, {grade} 등급만")
+
+    # 훈련하는 프로필은 모두 행동 없는 프로필보다 엔딩 점수가 높음
+    for name, profile in BEHAVIOR_PROFILES.items():
+        mean = simulate(profile, n=n, seed=7)['score']['mean']
+        assert mean > score, f"{name} 프로필 점수 {mean}가 훈련 없음({score})보다 낮음"
+    print("✓ 훈련 반영")
+
+    # 잘못된 프로필은 ValueError
+    expect_value_error(lambda: simulate({"chat_gain": {"charm": [1, 1]}}, n=10), "charm")
+    expect_value_error(lambda: simulate({"training_sessions": {}}, n=10), "training_sessions")
+    expect_value_error(lambda: simulate({"training_intensity": {"60": -1}}, n=10), "training_intensity")
+    expect_value_error(lambda: simulate({"training_focus": {"batting+magic": 1}}, n=10), "magic")
+    print("✓ 잘못된 프로필 거절")
+
+    # 프로필 이름 / JSON 경로
+    assert load_profile("casual") == ("casual", BEHAVIOR_PROFILES["casual"])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "mine.json"
+        path.write_text(json.dumps(idle), encoding='utf-8')
+        assert load_profile(str(path)) == ("mine", idle)
+    expect_value_error(lambda: load_profile("pro"), "pro")
+    print("✓ 프로필 로드")
+
+
+def run_test(test) -> bool:
+    """테스트 실행 (예외가 나면 실패로 기록)"""
+    try:
+        test()
+        return True
+    except Exception as e:
+        print(f"✗ {test.__name__} 실패: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def main():
+    """메인 테스트 실행"""
+    print("="*50)
+    print("훈련 테스트")
+    print("="*50)
+
+    results = []
+
+    # 각 테스트 실행
+    results.append(("훈련 계획", run_test(test_training_plan)))
+    results.append(("계획 추천", run_test(test_training_planner)))
+    results.append(("엔딩 시뮬레이터", run_test(test_ending_simulator)))
+
+    # 결과 요약
+    print("\n" + "="*50)
+    print("테스트 결과 요약")
+    print("="*50)
+
+    for name, result in results:
+        status = "✓ 성공" if result else "✗ 실패"
+        print(f"{name}: {status}")
+
+    total = len(results)
+    passed = sum(1 for _, result in results if result)
+
+    print(f"\n총 {total}개 테스트 중 {passed}개 성공, {total - passed}개 실패")
+
+    if passed == total:
+        print("\n🎉 모든 테스트 통과!")
+        return 0
+    else:
+        print(f"\n⚠️ {total - passed}개 테스트 실패")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())